@@ -0,0 +1,117 @@
+"""
+downsample.py
+-------------
+
+Shape-preserving downsampling for every plot of the project (live GUI
+plots, saved run figures, Plotly dashboards).
+
+* ``minmax_indices`` keeps the minimum and maximum of each bucket. Peaks
+  (bite-force maxima, overshoots) always survive. Best for dense time series
+  drawn as lines.
+* ``lttb_indices`` (Largest-Triangle-Three-Buckets) keeps, per bucket, the
+  point forming the largest triangle with the previously kept point and the
+  mean of the next bucket. Best for visual fidelity with few points and for
+  multi-dimensional paths (3-D jaw trajectories): the triangle area is taken
+  in the space of all given columns, each scaled to its range.
+
+Both return sorted sample indices, which always include the first and last
+sample, so several columns (or a whole DataFrame) can be reduced
+consistently. ``downsample`` and ``downsample_frame`` are the shortcuts.
+
+Scripts outside this folder import it with::
+
+    sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+    from common.downsample import downsample
+"""
+from __future__ import annotations
+
+import numpy as np
+
+MAX_POINTS = 4000     # Default budget per line: beyond this a 300-dpi figure cannot show more detail
+
+
+def minmax_indices(y, n_buckets: int) -> np.ndarray:
+    """Indices of the min and max of each of ``n_buckets`` equal buckets.
+
+    ``y`` is (n,) or (n, C); for several columns the indices of all columns
+    are merged. At most 2·n_buckets·C + 2 indices are returned.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_buckets <= 0 or n <= 2 * n_buckets:
+        return np.arange(n)
+    k = -(-n // n_buckets)                               # Samples per bucket, the last one padded
+    pad = n_buckets * k - n
+    padded = np.concatenate([y, np.repeat(y[-1:], pad, axis=0)]) if pad else y
+    blocks = padded.reshape(n_buckets, k, *y.shape[1:])
+    offset = (np.arange(n_buckets) * k).reshape(-1, *([1] * (y.ndim - 1)))
+    nan = np.isnan(blocks)
+    i_min = np.where(nan, np.inf, blocks).argmin(axis=1)      # NaN gaps are never picked
+    i_max = np.where(nan, -np.inf, blocks).argmax(axis=1)
+    found = np.concatenate([(offset + i_min).ravel(), (offset + i_max).ravel(), [0, n - 1]])
+    return np.unique(np.minimum(found, n - 1))
+
+
+def lttb_indices(x, y, n_out: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets selection of ``n_out`` indices.
+
+    ``x`` is (n,), ``y`` is (n,) or (n, C). The loop runs over buckets only;
+    each bucket is evaluated with vector operations.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float).reshape(len(x), -1)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Scale every dimension to its range so that mm, rad and s weigh the same.
+    points = np.column_stack([x, y])
+    span = np.nanmax(points, axis=0) - np.nanmin(points, axis=0)
+    points = (points - np.nanmin(points, axis=0)) / np.where(span > 0, span, 1.0)
+    points = np.nan_to_num(points)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)     # n_out - 2 buckets between the end points
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = points[0]
+    for b in range(n_out - 2):
+        lo, hi = edges[b], max(edges[b + 1], edges[b] + 1)
+        nxt_lo, nxt_hi = hi, edges[b + 2] if b + 2 < len(edges) else n
+        c = points[nxt_lo:max(nxt_hi, nxt_lo + 1)].mean(axis=0)
+        candidates = points[lo:hi]
+        # Triangle area in any dimension from the Gram determinant: ½·sqrt(|u|²|v|² − (u·v)²)
+        u = candidates - a
+        v = c - a
+        gram = (u * u).sum(axis=1) * (v @ v) - (u @ v) ** 2
+        best = lo + int(np.argmax(gram))
+        selected[b + 1] = best
+        a = points[best]
+    return np.unique(selected)
+
+
+def downsample(x, y, max_points: int = MAX_POINTS, method: str = "minmax"):
+    """Return ``x[idx], y[idx]`` with at most about ``max_points`` samples."""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if method == "minmax":
+        idx = minmax_indices(y, max(max_points // (2 * (y.shape[1] if y.ndim > 1 else 1)), 1))
+    elif method == "lttb":
+        idx = lttb_indices(x, y, max_points)
+    else:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    return x[idx], y[idx]
+
+
+def downsample_frame(df, x_col: str, y_cols, max_points: int = MAX_POINTS, method: str = "lttb"):
+    """Rows of a DataFrame selected on ``y_cols`` against ``x_col``."""
+    y_cols = [y_cols] if isinstance(y_cols, str) else list(y_cols)
+    if len(df) <= max_points:
+        return df
+    y = df[y_cols].to_numpy(dtype=float)
+    if method == "minmax":
+        idx = minmax_indices(y, max(max_points // (2 * len(y_cols)), 1))
+    elif method == "lttb":
+        idx = lttb_indices(df[x_col].to_numpy(dtype=float), y, max_points)
+    else:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    return df.iloc[idx]
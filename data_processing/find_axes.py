@@ -1,9 +1,60 @@
-import pandas as pd
+#!/usr/bin/env python3
+"""
+find_axes.py
+------------
+
+Animate the head and jaw rigid-body axes of a Motive take in the robot frame
+and save the animation as an MP4.
+
+* The quaternions of the whole take are turned into rotation matrices in one
+  batched ``Rotation.from_quat`` call, and the arrow segments of every frame
+  are computed at once with numpy.
+* The figure is built once. Each frame only updates the segments of three
+  line collections (one per axis colour); no artist is re-created. The axes,
+  panes and grid are rendered once and blitted; only the arrows are drawn
+  per frame, and the RGBA buffer is piped to ffmpeg as raw video.
+* The frame range is split into chunks rendered by worker processes, each to
+  its own MP4. The parts are stitched with ffmpeg's concat demuxer (stream
+  copy, no re-encoding), so full-length takes are practical.
+
+Usage
+-----
+    python find_axes.py data/Take_2025-05-02_02.32.17_PM.csv
+    python find_axes.py take.csv --frames 2000 --fps 30 --jobs 8 --out take_axes.mp4
+    python find_axes.py take.csv --frames 200 --show      # live view, no file
+"""
+
+from __future__ import annotations
+import argparse
+import os
+import pathlib
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
+import pandas as pd
+import matplotlib
 import matplotlib.pyplot as plt
+from matplotlib.animation import FuncAnimation
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
 from scipy.spatial.transform import Rotation as R
-from matplotlib.animation import FuncAnimation, FFMpegWriter
 
+COLS = [
+"Frame", "Time",
+"head_qx", "head_qy", "head_qz", "head_qw", "head_px", "head_py", "head_pz",
+"jaw_qx",  "jaw_qy",  "jaw_qz",  "jaw_qw",  "jaw_px",  "jaw_py",  "jaw_pz",
+]
+DEFAULT_CSV = pathlib.Path("data") / "Take_2025-05-02_02.32.17_PM.csv"
+SKIPROWS = 208          # Motive header lines
+AXIS_LENGTH = 20        # mm
+AXIS_COLORS = "rbg"     # Robot X, Y, Z
+HEAD_RATIO = 0.3        # Arrow head length relative to the axis, as ax.quiver
+MARGIN = 20             # mm around the motion range
+
+
+# ───────────────────────────── frames ────────────────────────────────────────
 def mocap_to_robot_frame(pos, rot_matrix):
     """
     Converts from MoCap frame to robot frame.
@@ -11,119 +62,190 @@ def mocap_to_robot_frame(pos, rot_matrix):
         mocap X → robot X
         mocap Y → robot Z
         mocap Z → robot Y
-    Equivalent to permuting axes.
+    Equivalent to permuting axes. Works on one frame, (3,) and (3, 3), or on
+    a whole take, (N, 3) and (N, 3, 3).
     """
-    # Remap position
-    pos_robot = np.array([pos[0], pos[2], pos[1]])
-
-    # Remap rotation matrix columns (same as permuting axes)
-    R_robot = np.zeros((3, 3))
-    R_robot[:, 0] = rot_matrix[:, 0]               # X stays X
-    R_robot[:, 1] = rot_matrix[:, 2]               # Z becomes Y
-    R_robot[:, 2] = rot_matrix[:, 1]               # Y becomes Z
+    pos_robot = pos[..., [0, 2, 1]]                 # Remap position
+    R_robot = rot_matrix[..., [0, 2, 1]]            # X stays X, Z becomes Y, Y becomes Z (columns)
     return pos_robot, R_robot
 
-def plot_frame(ax, origin, R_matrix, label, length=20):
-    """Plot a 3D frame with arrows for x (red), y (green), z (blue)"""
-    colors = ['r', 'g', 'b']
-    for i in range(3):
-        axis = R_matrix[:, i] * length
-        ax.quiver(
-            origin[0], origin[1], origin[2],
-            axis[0], axis[1], axis[2],
-            color=colors[i],
-            linewidth=1,
-            alpha=0.6 if i > 0 else 1.0,  # make x axis more visible
-            label=f'{label} {"XYZ"[i]}' if i == 0 else None
-        )
 
+def load_take(csv_path: pathlib.Path, skiprows: int = SKIPROWS) -> pd.DataFrame:
+    return pd.read_csv(csv_path, header=None, names=COLS, skiprows=skiprows)
 
-COLS = [
-"Frame", "Time",
-"head_qx", "head_qy", "head_qz", "head_qw", "head_px", "head_py", "head_pz",
-"jaw_qx",  "jaw_qy",  "jaw_qz",  "jaw_qw",  "jaw_px",  "jaw_py",  "jaw_pz",
-]
 
-# Load your CSV (replace with your actual file)
-df = pd.read_csv('data\Take_2025-05-02_02.32.17_PM.csv', header=None, names=COLS, skiprows=208)
-
-num_frames = min(200, len(df))
-
-#fid axis limits based on df data
-x_min_head = df['head_px'].min()
-x_max_head = df['head_px'].max()
-z_min_head = df['head_py'].min()
-z_max_head = df['head_py'].max()
-y_min_head = df['head_pz'].min()
-y_max_head = df['head_pz'].max()
-x_min_jaw = df['jaw_px'].min()
-x_max_jaw = df['jaw_px'].max()
-z_min_jaw = df['jaw_py'].min()
-z_max_jaw = df['jaw_py'].max()
-y_min_jaw = df['jaw_pz'].min()
-y_max_jaw = df['jaw_pz'].max()
-x_min = min(x_min_head, x_min_jaw) - 20
-x_max = max(x_max_head, x_max_jaw) + 20
-y_min = min(y_min_head, y_min_jaw) - 20
-y_max = max(y_max_head, y_max_jaw) + 20
-z_min = min(z_min_head, z_min_jaw) - 20
-z_max = max(z_max_head, z_max_jaw) + 20
-
-# Preprocess data
-frames = []
-for i in range(num_frames):
-    row = df.iloc[i]
-
-    head_pos = np.array([row['head_px'], row['head_py'], row['head_pz']])
-    head_quat = np.array([row['head_qx'], row['head_qy'], row['head_qz'], row['head_qw']])
-    head_rot = R.from_quat(head_quat).as_matrix()
-    head_pos_robot, head_rot_robot = mocap_to_robot_frame(head_pos, head_rot)
-
-    jaw_pos = np.array([row['jaw_px'], row['jaw_py'], row['jaw_pz']])
-    jaw_quat = np.array([row['jaw_qx'], row['jaw_qy'], row['jaw_qz'], row['jaw_qw']])
-    jaw_rot = R.from_quat(jaw_quat).as_matrix()
-    jaw_pos_robot, jaw_rot_robot = mocap_to_robot_frame(jaw_pos, jaw_rot)
-
-    frames.append((head_pos_robot, head_rot_robot, jaw_pos_robot, jaw_rot_robot))
-
-# Setup 3D figure
-fig = plt.figure(figsize=(10, 8))
-ax = fig.add_subplot(111, projection='3d')
-ax.set_title('Head and Jaw Animation (Robot Frame)')
-ax.set_xlabel('Robot X')
-ax.set_ylabel('Robot Y')
-ax.set_zlabel('Robot Z')
-
-# Set axis limits based on first pose
-ref = frames[0][0]
-ax.set_xlim([x_min, x_max])
-ax.set_ylim([y_min, y_max])
-ax.set_zlim([z_min, z_max])
-
-quivers = []
-
-def init():
-    return []
-
-def update(i):
-    global quivers
-    for q in quivers:
-        q.remove()
-    quivers = []
-
-    head_pos, head_rot, jaw_pos, jaw_rot = frames[i]
-    for j in range(3):
-        axis = head_rot[:, j] * 20
-        quivers.append(ax.quiver(*head_pos, *axis, color='rbg'[j]))
-        axis = jaw_rot[:, j] * 20
-        quivers.append(ax.quiver(*jaw_pos, *axis, color='rbg'[j]))
-
-    return quivers
-
-ani = FuncAnimation(fig, update, frames=num_frames, init_func=init, blit=False, interval=100)
-
-# Save to MP4 (optional)
-ani.save('head_jaw_animation.mp4', writer=FFMpegWriter(fps=10))
-
-# Or show live
-# plt.show()
\ No newline at end of file
+def robot_poses(df: pd.DataFrame) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    """Per body, the (N, 3) positions and (N, 3, 3) rotations in the robot frame."""
+    poses = {}
+    for body in ("head", "jaw"):
+        pos = df[[f"{body}_px", f"{body}_py", f"{body}_pz"]].to_numpy(dtype=float)
+        rot = R.from_quat(df[[f"{body}_qx", f"{body}_qy", f"{body}_qz", f"{body}_qw"]].to_numpy(dtype=float))
+        poses[body] = mocap_to_robot_frame(pos, rot.as_matrix())
+    return poses
+
+
+def axis_segments(poses: dict[str, tuple[np.ndarray, np.ndarray]], length: float = AXIS_LENGTH) -> np.ndarray:
+    """Line segments of every axis arrow, (N, 3 axes, 3 · bodies, 2, 3).
+
+    Each arrow is its shaft plus two head strokes drawn in the plane of the
+    axis and the next axis of the same body.
+    """
+    per_body = []
+    for pos, rot in poses.values():
+        axes = np.moveaxis(rot, -1, 1) * length                 # (N, 3 axes, 3 xyz)
+        side = np.roll(axes, -1, axis=1)                        # Next axis of the same body
+        origin = np.broadcast_to(pos[:, None, :], axes.shape)
+        tip = origin + axes
+        back = tip - HEAD_RATIO * axes
+        per_body += [np.stack([origin, tip], axis=2),
+                     np.stack([tip, back + 0.5 * HEAD_RATIO * side], axis=2),
+                     np.stack([tip, back - 0.5 * HEAD_RATIO * side], axis=2)]
+    return np.stack(per_body, axis=2)
+
+
+def axis_limits(df: pd.DataFrame, margin: float = MARGIN) -> np.ndarray:
+    """(3, 2) robot-frame min/max of both bodies' positions, with a margin."""
+    pos = np.concatenate([df[[f"{body}_px", f"{body}_py", f"{body}_pz"]].to_numpy(dtype=float)
+                          for body in ("head", "jaw")])
+    pos, _ = mocap_to_robot_frame(pos, np.empty((0, 3, 3)))
+    return np.column_stack([np.nanmin(pos, axis=0) - margin, np.nanmax(pos, axis=0) + margin])
+
+
+# ───────────────────────────── rendering ─────────────────────────────────────
+def make_figure(limits: np.ndarray, first_frame: np.ndarray):
+    """Figure, and the three line collections updated at each frame."""
+    fig = plt.figure(figsize=(10, 8))
+    ax = fig.add_subplot(111, projection='3d')
+    ax.set_title('Head and Jaw Animation (Robot Frame)')
+    ax.set_xlabel('Robot X')
+    ax.set_ylabel('Robot Y')
+    ax.set_zlabel('Robot Z')
+    collections = []
+    for color, segments in zip(AXIS_COLORS, first_frame):
+        lines = Line3DCollection(segments, colors=color, linewidths=1.5)
+        ax.add_collection3d(lines)
+        collections.append(lines)
+    ax.set_xlim(limits[0])      # After the collections, which would autoscale the view
+    ax.set_ylim(limits[1])
+    ax.set_zlim(limits[2])
+    return fig, collections
+
+
+def draw_frame(collections, frame_segments: np.ndarray) -> None:
+    for lines, segments in zip(collections, frame_segments):
+        lines.set_segments(segments)
+
+
+def render_chunk(args) -> int:
+    """Render frames ``segments`` to ``out_path``; runs in a worker process."""
+    segments, limits, out_path, fps, dpi = args
+    matplotlib.use("Agg")
+    fig, collections = make_figure(limits, segments[0])
+    fig.set_dpi(dpi)
+    canvas = fig.canvas
+    ax = fig.axes[0]
+
+    for lines in collections:
+        lines.set_visible(False)
+    canvas.draw()
+    background = canvas.copy_from_bbox(fig.bbox)
+    for lines in collections:
+        lines.set_visible(True)
+
+    width, height = canvas.get_width_height(physical=True)
+    ffmpeg = subprocess.Popen(
+        [matplotlib.rcParams["animation.ffmpeg_path"], "-y", "-loglevel", "error",
+         "-f", "rawvideo", "-pix_fmt", "rgba", "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+         "-vcodec", "libx264", "-pix_fmt", "yuv420p", "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+         str(out_path)],
+        stdin=subprocess.PIPE)
+    try:
+        for frame_segments in segments:
+            canvas.restore_region(background)
+            draw_frame(collections, frame_segments)
+            for lines in collections:
+                lines.do_3d_projection()    # The view is fixed: only the arrows need projecting
+                ax.draw_artist(lines)
+            ffmpeg.stdin.write(canvas.buffer_rgba())
+    finally:
+        ffmpeg.stdin.close()
+        ffmpeg.wait()
+        plt.close(fig)
+    if ffmpeg.returncode:
+        raise RuntimeError(f"ffmpeg failed on {out_path} (exit code {ffmpeg.returncode})")
+    return len(segments)
+
+
+def concat_videos(parts: list[pathlib.Path], out_path: pathlib.Path) -> None:
+    """Join MP4 parts of identical encoding without re-encoding."""
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        for part in parts:
+            f.write(f"file '{part.resolve().as_posix()}'\n")
+        list_path = f.name
+    try:
+        subprocess.run([matplotlib.rcParams["animation.ffmpeg_path"], "-y", "-loglevel", "error",
+                        "-f", "concat", "-safe", "0", "-i", list_path, "-c", "copy", str(out_path)],
+                       check=True)
+    finally:
+        os.unlink(list_path)
+
+
+def save_animation(segments: np.ndarray, limits: np.ndarray, out_path: pathlib.Path,
+                   fps: int, dpi: int, jobs: int) -> None:
+    # Chunks of at least a few seconds: each part pays the figure set-up and an ffmpeg start.
+    n_chunks = max(1, min(jobs, len(segments) // (2 * fps)))
+    chunks = np.array_split(segments, n_chunks)
+    if n_chunks == 1:
+        render_chunk((segments, limits, out_path, fps, dpi))
+        return
+    with tempfile.TemporaryDirectory(dir=out_path.parent) as tmp:
+        parts = [pathlib.Path(tmp) / f"part_{k:03d}.mp4" for k in range(n_chunks)]
+        with ProcessPoolExecutor(max_workers=n_chunks) as pool:
+            list(pool.map(render_chunk, [(c, limits, p, fps, dpi) for c, p in zip(chunks, parts)]))
+        concat_videos(parts, out_path)
+
+
+# ───────────────────────────── main ──────────────────────────────────────────
+def main(csv_file: pathlib.Path, skiprows: int, start: int, frames: int | None, every: int,
+         fps: int, dpi: int, jobs: int, out: pathlib.Path, show: bool) -> None:
+    take = load_take(csv_file, skiprows)
+    stop = len(take) if frames is None else min(len(take), start + frames * every)
+    df = take.iloc[start:stop:every]
+    if df.empty:
+        print("No frames to animate, exiting.")
+        return
+
+    t0 = time.perf_counter()
+    segments = axis_segments(robot_poses(df))
+    limits = axis_limits(take)      # Same view whatever the animated range
+    print(f"Prepared {len(segments)} frames in {time.perf_counter() - t0:.2f} s")
+
+    if show:
+        fig, collections = make_figure(limits, segments[0])
+        update = lambda i: draw_frame(collections, segments[i]) or collections
+        ani = FuncAnimation(fig, update, frames=len(segments), interval=1000 / fps, blit=False)
+        plt.show()
+        return
+
+    t0 = time.perf_counter()
+    save_animation(segments, limits, out, fps, dpi, jobs)
+    print(f"Saved {out} ({len(segments)} frames) in {time.perf_counter() - t0:.1f} s")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Animate the head and jaw axes of a Motive take")
+    ap.add_argument("input_csv", type=pathlib.Path, nargs="?", default=DEFAULT_CSV,
+                    help=f"Motive CSV export (default {DEFAULT_CSV})")
+    ap.add_argument("--skiprows", type=int, default=SKIPROWS, help="Header lines of the export")
+    ap.add_argument("--start", type=int, default=0, help="First row to animate")
+    ap.add_argument("--frames", type=int, help="Number of frames to animate (default: the whole take)")
+    ap.add_argument("--every", type=int, default=1, help="Use every N-th row")
+    ap.add_argument("--fps", type=int, default=10, help="Video frame rate")
+    ap.add_argument("--dpi", type=int, default=100, help="Video resolution")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    ap.add_argument("--out", type=pathlib.Path, default=pathlib.Path("head_jaw_animation.mp4"),
+                    help="Output MP4")
+    ap.add_argument("--show", action="store_true", help="Show the animation live instead of saving it")
+    args = ap.parse_args()
+    main(csv_file=args.input_csv, skiprows=args.skiprows, start=args.start, frames=args.frames,
+         every=args.every, fps=args.fps, dpi=args.dpi, jobs=args.jobs, out=args.out, show=args.show)
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+realtime_retarget.py
+--------------------
+
+Drive the robot live from a subject: the per-frame version of
+*transform_trajectory.py*, streaming each pose to the firmware as it comes.
+
+Per mocap frame, with no look-ahead:
+
+1. **Causal low-pass** of the head & jaw rigid bodies in world space
+   (Butterworth in second-order sections, filter state kept between frames,
+   quaternion sign kept continuous and re-normalised). Unlike the zero-phase
+   filtfilt of the batch scripts it delays the motion, by its group delay
+   at low frequencies: about 69 ms at 4th order, 6 Hz and 120 Hz (printed
+   by ``run``, ``CausalLowPass.group_delay_ms``).
+2. **Head-relative** jaw pose, rotated to the **robot frame** with
+   ``frame_matrix.npy`` (from *derive_frame.py*), as transform_trajectory.py.
+3. **Origin offset**: the median pose of the first ``--origin-seconds`` (the
+   subject at rest, nothing is sent meanwhile) or ``--origin``.
+4. Resampled to the ``--interval`` of the robot stream (linear between
+   frames), clamped to the pose limits of main/Config.h and pushed into a
+   ``PoseStreamer`` (gui/pose_streamer.py), which keeps ``--lead`` ms in the
+   firmware jitter buffer.
+
+Frames come over UDP, one datagram per frame:
+``Frame,Time,head q(x,y,z,w),head p(x,y,z),jaw q,jaw p,send_ns`` with
+send_ns the ``time.monotonic_ns()`` of the sender. ``replay`` sends a Motive
+CSV export that way at its recorded rate, as a local stand-in for the live
+Motive stream (same host: send_ns is on the receiver's clock).
+
+Latency report (``run``, at the end and every ``--report`` s):
+* processing: frame received → its points in the streamer; its p99 must stay
+  below one mocap frame period, the frames over it are counted,
+* transit: send_ns → frame received (UDP and the socket buffer),
+* to serial: frame received → its points written to the serial port
+  (waiting for the batch), plus the device buffer lead on top,
+* filter: group delay of the causal low-pass, added to the motion itself.
+
+The run starts once the lead is buffered in the firmware (PoseStreamer
+calls back when ``--lead`` ms are in, or when a closed stream is all in).
+
+Usage
+~~~~~
+    python realtime_retarget.py replay take.csv --udp-port 1511
+    python realtime_retarget.py run frame_matrix.npy --udp-port 1511 --serial /dev/ttyACM0
+    python realtime_retarget.py run frame_matrix.npy --udp-port 1511 --out-csv live.csv   # no robot
+"""
+from __future__ import annotations
+import argparse
+import csv
+import math
+import pathlib
+import socket
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from scipy.signal import butter, group_delay, sos2tf, sosfilt, sosfilt_zi
+
+from transform_trajectory import COLS, quat_to_rot, rot_to_euler_ZYX, wrap_rad
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "gui"))
+sys.path.insert(0, str(ROOT / "simulation"))
+from firmware_config import CONFIG as C   # noqa: E402
+from pose_streamer import PoseStreamer    # noqa: E402
+
+POSE_LIMITS = np.array([
+    (C.MIN_X, C.MAX_X), (C.MIN_Y, C.MAX_Y), (C.MIN_Z, C.MAX_Z),
+    (C.MIN_ROLL, C.MAX_ROLL), (C.MIN_PITCH, C.MAX_PITCH), (C.MIN_YAW, C.MAX_YAW),
+])
+FRAME_VALUES = len(COLS) - 2        # Quaternion and position of the head and the jaw
+POSE_COLS = ["x_mm", "y_mm", "z_mm", "roll_rad", "pitch_rad", "yaw_rad"]
+
+# ───────────────────────────── per-frame pipeline ────────────────────────────
+
+
+class CausalLowPass:
+    """Butterworth low-pass applied one sample at a time, state kept between calls."""
+
+    def __init__(self, fs: float, fc: float, order: int, channels: int):
+        self.sos = butter(order, fc / (fs / 2), btype="low", output="sos")
+        self.zi = None
+        self.channels = channels
+        self.fs = fs
+
+    def group_delay_ms(self) -> float:
+        """Delay of the slow motion (group delay near DC), ms."""
+        _, delay = group_delay(sos2tf(self.sos), w=[1e-3], fs=self.fs)
+        return float(delay[0]) / self.fs * 1000.0
+
+    def step(self, x: np.ndarray) -> np.ndarray:
+        if self.zi is None:
+            # Start in steady state on the first sample: no transient from zero.
+            self.zi = sosfilt_zi(self.sos)[:, :, None] * x[None, None, :]
+        y, self.zi = sosfilt(self.sos, x[None, :], axis=0, zi=self.zi)
+        return y[0]
+
+
+class Retargeter:
+    """Mocap frame (world-space head & jaw) → robot pose, one frame at a time."""
+
+    def __init__(self, R_robot_from_mocap: np.ndarray, fs: float, cutoff: float, order: int,
+                 origin: np.ndarray | None = None, origin_frames: int = 0):
+        self.Rt = R_robot_from_mocap.T
+        self.filter = CausalLowPass(fs, cutoff, order, FRAME_VALUES)
+        self.last_q = [None, None]          # Head and jaw quaternions of the previous frame
+        self.origin = origin
+        self.origin_frames = origin_frames
+        self.origin_poses = []
+
+    def step(self, values: np.ndarray) -> np.ndarray | None:
+        """Robot pose (mm, rad) of a frame; None while the origin is being measured."""
+        values = np.array(values, dtype=float)
+        for k, sl in enumerate((slice(0, 4), slice(7, 11))):
+            # q and -q are the same rotation: keep the sign continuous so that the filter does not average them.
+            if self.last_q[k] is not None and np.dot(values[sl], self.last_q[k]) < 0:
+                values[sl] = -values[sl]
+            self.last_q[k] = values[sl].copy()
+        f = self.filter.step(values)
+        Rh, Rj = quat_to_rot(f[0:4]), quat_to_rot(f[7:11])    # quat_to_rot re-normalises
+        R_rel_robot = self.Rt @ (Rh.T @ Rj)
+        p_rel_robot = self.Rt @ (Rh.T @ (f[11:14] - f[4:7]))
+        pose = np.array([*p_rel_robot, *(wrap_rad(a) for a in rot_to_euler_ZYX(R_rel_robot))])
+
+        if self.origin is None:
+            self.origin_poses.append(pose)
+            if len(self.origin_poses) < self.origin_frames:
+                return None
+            self.origin = np.median(self.origin_poses, axis=0)
+        return pose - self.origin
+
+
+class StreamResampler:
+    """Poses at mocap frame times → points every interval_ms of stream time (linear between frames)."""
+
+    def __init__(self, interval_ms: int):
+        self.interval_s = interval_ms / 1000
+        self.t0 = None
+        self.previous = None        # (t, pose) of the previous frame
+        self.next_index = 0
+
+    def push(self, t: float, pose: np.ndarray) -> list[np.ndarray]:
+        if self.t0 is None:
+            self.t0 = t
+        t -= self.t0
+        points = []
+        while self.next_index * self.interval_s <= t:
+            ts = self.next_index * self.interval_s
+            if self.previous is None or t == self.previous[0]:
+                points.append(pose)
+            else:
+                u = (ts - self.previous[0]) / (t - self.previous[0])
+                points.append(self.previous[1] + u * (pose - self.previous[1]))
+            self.next_index += 1
+        self.previous = (t, pose)
+        return points
+
+
+def clamp_pose(pose: np.ndarray) -> tuple[tuple, bool]:
+    clamped = np.clip(pose, POSE_LIMITS[:, 0], POSE_LIMITS[:, 1])
+    return tuple(clamped), bool(np.any(clamped != pose))
+
+
+# ───────────────────────────── UDP frame source ──────────────────────────────
+
+
+def encode_frame(frame: int, t: float, values, send_ns: int) -> bytes:
+    return (f"{frame},{float(t)!r}," + ",".join(repr(float(v)) for v in values) + f",{send_ns}").encode()
+
+
+def decode_frame(data: bytes):
+    """(frame, time s, values, send_ns) of a datagram."""
+    fields = data.decode().split(",")
+    if len(fields) != len(COLS) + 1:
+        raise ValueError(f"expected {len(COLS) + 1} fields, got {len(fields)}")
+    return int(fields[0]), float(fields[1]), np.array(fields[2:-1], dtype=float), int(fields[-1])
+
+
+def replay(csv_path: pathlib.Path, host: str, port: int, speed: float) -> None:
+    """Send a Motive CSV export over UDP, one frame per datagram at its recorded rate."""
+    df = pd.read_csv(csv_path, header=None, names=COLS, skiprows=7).dropna()
+    rows = df.to_numpy()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    start = time.monotonic()
+    t_first = rows[0, 1]
+    for row in rows:
+        due = start + (row[1] - t_first) / speed
+        wait = due - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        sock.sendto(encode_frame(int(row[0]), row[1], row[2:], time.monotonic_ns()), (host, port))
+    print(f"Sent {len(rows)} frames in {time.monotonic() - start:.1f} s")
+
+
+# ───────────────────────────── latency statistics ────────────────────────────
+
+
+class LatencyStats:
+    def __init__(self, name: str, window: int = 10000):
+        self.name = name
+        self.samples = deque(maxlen=window)     # us
+
+    def add(self, ns: float) -> None:
+        self.samples.append(ns / 1000)
+
+    def percentile(self, q: float) -> float:
+        values = sorted(self.samples)
+        return values[min(len(values) - 1, int(round(q * (len(values) - 1))))] if values else math.nan
+
+    def format(self) -> str:
+        if not self.samples:
+            return f"{self.name}: no sample"
+        return (f"{self.name}: median {self.percentile(0.5):.0f} / p99 {self.percentile(0.99):.0f} / "
+                f"max {max(self.samples):.0f} us ({len(self.samples)} samples)")
+
+
+# ───────────────────────────── live loop ─────────────────────────────────────
+
+
+def open_robot(port: str, baudrate: int):
+    """(channel, close) of the serial link, replies read by a thread."""
+    import serial
+    from command_channel import CommandChannel
+
+    link = serial.Serial(port, baudrate, timeout=0.05)
+    channel = CommandChannel(lambda text: link.write((text + "\n").encode()))
+    running = [True]
+
+    def reader():
+        while running[0]:
+            raw = link.readline()
+            if not raw:
+                continue
+            line = raw.decode(errors="replace").strip()
+            if not channel.feed(line) and (line.startswith("Error") or line.startswith("Warning: Stream")):
+                print(line)
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+
+    def close():
+        running[0] = False
+        thread.join()
+        link.close()
+
+    return channel, close
+
+
+def run(mat_file: pathlib.Path, udp_port: int, serial_port: str | None, baudrate: int, fs: float,
+        cutoff: float, order: int, interval_ms: int, lead_ms: int, origin, origin_seconds: float,
+        out_csv: pathlib.Path | None, idle_s: float, report_s: float) -> None:
+    R = np.load(mat_file)
+    if R.shape != (3, 3):
+        raise ValueError("Rotation matrix must be 3×3")
+    retargeter = Retargeter(R, fs, cutoff, order, origin=None if origin is None else np.array(origin),
+                            origin_frames=int(round(origin_seconds * fs)))
+    resampler = StreamResampler(interval_ms)
+    budget_ns = 1e9 / fs
+    processing, transit, to_serial = (LatencyStats(n) for n in ("processing", "transit", "to serial"))
+    over_budget = clamped_points = frames = 0
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("0.0.0.0", udp_port))
+    sock.settimeout(0.002)      # The streamer is pumped between frames
+    channel = close_robot = streamer = None
+    started = threading.Event()
+    if serial_port is not None:
+        channel, close_robot = open_robot(serial_port, baudrate)
+        streamer = PoseStreamer(channel.request, interval_ms, lead_ms=lead_ms)
+    unsent = deque()            # (stream index, receive ns) of the points not written yet
+    pushed = 0
+    writer = None
+    if out_csv is not None:
+        out_file = open(out_csv, "w", newline="")
+        writer = csv.writer(out_file)
+        writer.writerow(["Frame", "Time", *POSE_COLS, "processing_us"])
+
+    print(f"Waiting for frames on UDP port {udp_port} ({fs:g} Hz, budget {budget_ns / 1000:.0f} us per frame)")
+    last_frame = None
+    last_report = time.monotonic()
+    try:
+        while True:
+            try:
+                data = sock.recv(4096)
+            except socket.timeout:
+                data = None
+            if data is not None:
+                receive_ns = time.monotonic_ns()
+                try:
+                    frame, t, values, send_ns = decode_frame(data)
+                except ValueError as e:
+                    print(f"Warning: malformed frame skipped: {e}")
+                    continue
+                pose = retargeter.step(values)
+                if pose is not None:
+                    points = resampler.push(t, pose)
+                    clamped = []
+                    for point in points:
+                        point, was_clamped = clamp_pose(point)
+                        clamped.append(point)
+                        clamped_points += was_clamped
+                    if streamer is not None and clamped:
+                        if not streamer.active and streamer.state == "idle":
+                            streamer.begin(on_ready=started.set)
+                        streamer.extend(clamped)
+                        unsent.extend((pushed + k, receive_ns) for k in range(len(clamped)))
+                    pushed += len(clamped)
+                elapsed = time.monotonic_ns() - receive_ns
+                processing.add(elapsed)
+                transit.add(receive_ns - send_ns)
+                over_budget += elapsed > budget_ns
+                frames += 1
+                if writer is not None and pose is not None:
+                    writer.writerow([frame, t, *(f"{v:.6f}" for v in pose), f"{elapsed / 1000:.1f}"])
+                last_frame = time.monotonic()
+
+            if streamer is not None:
+                channel.poll()
+                streamer.pump()
+                if started.is_set() and not streamer.playing:
+                    channel.request("start")
+                    streamer.set_playing()
+                now_ns = time.monotonic_ns()
+                while unsent and unsent[0][0] < streamer.sent:
+                    to_serial.add(now_ns - unsent.popleft()[1])
+                if streamer.state == "failed":
+                    break
+
+            if last_frame is not None and time.monotonic() - last_frame > idle_s:
+                print(f"No frame for {idle_s:g} s, stopping.")
+                break
+            if time.monotonic() - last_report > report_s:
+                last_report = time.monotonic()
+                print(f"{frames} frames, {processing.format()}, {over_budget} over budget")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+        if writer is not None:
+            out_file.close()
+        if streamer is not None:
+            if streamer.active:
+                streamer.close()
+                while streamer.active and streamer.state in ("filling", "streaming", "ending"):
+                    channel.poll()
+                    streamer.pump()
+                    time.sleep(0.002)
+            channel.request("stop")
+            time.sleep(0.2)
+            close_robot()
+
+    print(f"{frames} frames, {pushed} stream points ({clamped_points} clamped to the pose limits)")
+    print(f"{processing.format()} - {over_budget} frames over the {budget_ns / 1000:.0f} us budget")
+    print(transit.format())
+    print(f"filter: group delay {retargeter.filter.group_delay_ms():.0f} ms "
+          f"(order {order}, {cutoff:g} Hz at {fs:g} Hz)")
+    if streamer is not None:
+        print(to_serial.format() + f", plus the device buffer lead of about {lead_ms} ms")
+        if streamer.status is not None:
+            print(f"Stream underruns: {streamer.status.underruns}")
+
+
+# ────────────────────────────────── CLI ───────────────────────────────────────
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Real-time mocap to robot retargeting")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    rp = sub.add_parser("replay", help="Send a Motive CSV export over UDP at its recorded rate")
+    rp.add_argument("input_csv", type=pathlib.Path, help="Raw Motive CSV export")
+    rp.add_argument("--host", default="127.0.0.1")
+    rp.add_argument("--udp-port", type=int, default=1511)
+    rp.add_argument("--speed", type=float, default=1.0, help="Replay speed factor (default 1)")
+
+    rn = sub.add_parser("run", help="Retarget the received frames and stream them to the robot")
+    rn.add_argument("frame_matrix", type=pathlib.Path, help=".npy file from derive_frame.py")
+    rn.add_argument("--udp-port", type=int, default=1511)
+    rn.add_argument("--serial", help="Serial port of the Teensy or of the emulator (none: only measure / record)")
+    rn.add_argument("--baudrate", type=int, default=115200)
+    rn.add_argument("--fs", type=float, default=120.0, help="Mocap frame rate Hz (default 120)")
+    rn.add_argument("--cutoff", type=float, default=6.0, help="Low-pass cut-off frequency Hz (default 6)")
+    rn.add_argument("--order", type=int, default=4, help="Butterworth filter order (default 4)")
+    rn.add_argument("--interval", type=int, default=10, help="ms between stream points (default 10)")
+    rn.add_argument("--lead", type=int, default=50, help="ms kept in the firmware jitter buffer (default 50)")
+    rn.add_argument("--origin", type=float, nargs=6, metavar=("X", "Y", "Z", "ROLL", "PITCH", "YAW"),
+                    help="Origin pose in the robot frame (mm, rad) instead of measuring it")
+    rn.add_argument("--origin-seconds", type=float, default=1.0,
+                    help="Median pose of the first seconds taken as origin (default 1)")
+    rn.add_argument("--out-csv", type=pathlib.Path, help="Also record the retargeted poses")
+    rn.add_argument("--idle", type=float, default=2.0, help="Stop after this many seconds without a frame")
+    rn.add_argument("--report", type=float, default=5.0, help="Seconds between progress lines")
+    args = ap.parse_args()
+    if args.command == "replay":
+        replay(args.input_csv, args.host, args.udp_port, args.speed)
+    else:
+        run(args.frame_matrix, args.udp_port, args.serial, args.baudrate, args.fs, args.cutoff, args.order,
+            args.interval, args.lead, args.origin, args.origin_seconds, args.out_csv, args.idle, args.report)
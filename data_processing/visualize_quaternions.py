@@ -14,19 +14,29 @@ Interactive Plotly visualisations of HEAD and JAW *positions*
 Usage
 -----
     python visualize_positions.py Take*.csv           # live view
-    python visualize_positions.py Take*.csv --every 3 # decimate
+    python visualize_positions.py Take*.csv --max-points 2000
     python visualize_positions.py Take*.csv \
            --save-prefix pos_vis --no-show            # HTML only
+
+Every trace is reduced with common/downsample.py (min/max buckets for the
+time series, LTTB in (Time, x, y, z) for the 3-D paths), so hour-long takes
+give light HTML files without losing the extreme positions.
 """
 
 from __future__ import annotations
 import argparse
 import pathlib
+import sys
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import plotly.io as pio
 
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+from common.downsample import downsample, downsample_frame
+
+MAX_POINTS = 5000      # Per trace
+
 
 # ─────────────────────────── data helpers ────────────────────────────────────
 def load_csv(csv_path: pathlib.Path, every: int) -> pd.DataFrame:
@@ -44,7 +54,8 @@ def load_csv(csv_path: pathlib.Path, every: int) -> pd.DataFrame:
 
 
 # ────────────────────────── figures ──────────────────────────────────────────
-def make_body_ts_fig(df: pd.DataFrame, body: str, colour: str) -> go.Figure:
+def make_body_ts_fig(df: pd.DataFrame, body: str, colour: str,
+                     max_points: int = MAX_POINTS) -> go.Figure:
     """Three stacked sub-plots (x,y,z) for one body."""
     comps = ("x", "y", "z")
     fig = make_subplots(
@@ -52,10 +63,11 @@ def make_body_ts_fig(df: pd.DataFrame, body: str, colour: str) -> go.Figure:
         subplot_titles=[f"{body}_{c}  [mm]" for c in comps],
     )
     for i, c in enumerate(comps, start=1):
+        t, y = downsample(df["Time"].to_numpy(), df[f"{body}_{c}"].to_numpy(), max_points)
         fig.add_trace(
             go.Scatter(
-                x=df["Time"],
-                y=df[f"{body}_{c}"],
+                x=t,
+                y=y,
                 mode="lines",
                 line=dict(width=1.4, color=colour),
                 name=f"{body}_{c}",
@@ -71,11 +83,13 @@ def make_body_ts_fig(df: pd.DataFrame, body: str, colour: str) -> go.Figure:
     return fig
 
 
-def make_3d_path_fig(df: pd.DataFrame) -> go.Figure:
+def make_3d_path_fig(df: pd.DataFrame, max_points: int = MAX_POINTS) -> go.Figure:
     colours = dict(head="#1f77b4", jaw="#ff7f0e")
     fig = go.Figure()
+    full = df
 
     for body, colour in colours.items():
+        df = downsample_frame(full, "Time", [f"{body}_x", f"{body}_y", f"{body}_z"], max_points)
         # path line
         fig.add_trace(go.Scatter3d(
             x=df[f"{body}_x"], y=df[f"{body}_y"], z=df[f"{body}_z"],
@@ -116,13 +130,13 @@ def make_3d_path_fig(df: pd.DataFrame) -> go.Figure:
 
 
 # ──────────────────────────── main ───────────────────────────────────────────
-def main(csv_file: pathlib.Path, every: int,
+def main(csv_file: pathlib.Path, every: int, max_points: int,
          save_prefix: str | None, show: bool) -> None:
     df = load_csv(csv_file, every)
 
-    head_fig = make_body_ts_fig(df, "head", "#1f77b4")
-    jaw_fig  = make_body_ts_fig(df, "jaw",  "#ff7f0e")
-    path_fig = make_3d_path_fig(df)
+    head_fig = make_body_ts_fig(df, "head", "#1f77b4", max_points)
+    jaw_fig  = make_body_ts_fig(df, "jaw",  "#ff7f0e", max_points)
+    path_fig = make_3d_path_fig(df, max_points)
 
     if save_prefix:
         pio.write_html(head_fig, file=f"{save_prefix}_head_time_series.html",
@@ -144,7 +158,9 @@ if __name__ == "__main__":
     ap.add_argument("input_csv", type=pathlib.Path,
                     help="Raw Motive CSV export")
     ap.add_argument("--every", type=int, default=1,
-                    help="Use every N-th frame (default 1)")
+                    help="Use every N-th frame before downsampling (default 1)")
+    ap.add_argument("--max-points", type=int, default=MAX_POINTS,
+                    help=f"Points per trace after shape-preserving downsampling (default {MAX_POINTS})")
     ap.add_argument("--save-prefix", metavar="NAME",
                     help="Write self-contained HTML files using NAME as prefix")
     ap.add_argument("--no-show", action="store_true",
@@ -152,5 +168,6 @@ if __name__ == "__main__":
     args = ap.parse_args()
     main(csv_file=args.input_csv,
          every=args.every,
+         max_points=args.max_points,
          save_prefix=args.save_prefix,
          show=not args.no_show)
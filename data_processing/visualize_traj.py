@@ -16,19 +16,29 @@ EXAMPLES
   # live view in your browser
   python plot_trajectory_3d_interactive.py jaw_in_head_radians.csv
 
-  # decimate heavy recordings, write HTML files only
+  # write HTML files only, at most 2000 points per trace
   python plot_trajectory_3d_interactive.py jaw_in_head_radians.csv \
-      --every 3 --save-prefix jaw_vis --no-show
+      --max-points 2000 --save-prefix jaw_vis --no-show
+
+Long recordings are reduced with common/downsample.py before plotting: the
+3-D path keeps its LTTB points in (Time, x, y, z), the time series keep the
+min and max of each bucket, so the extreme positions of every chew survive.
 """
 
 from __future__ import annotations
 import argparse
 import pathlib
+import sys
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import plotly.io as pio
 
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+from common.downsample import downsample, downsample_frame
+
+MAX_POINTS = 5000      # Per trace; enough for a sharp figure, small HTML files
+
 
 # ───────────────────────────── helpers ────────────────────────────────────────
 def make_3d_fig(df: pd.DataFrame) -> go.Figure:
@@ -74,7 +84,7 @@ def make_3d_fig(df: pd.DataFrame) -> go.Figure:
     )
 
 
-def make_ts_fig(df: pd.DataFrame) -> go.Figure:
+def make_ts_fig(df: pd.DataFrame, max_points: int = MAX_POINTS) -> go.Figure:
     """Six stacked sub-plots: x, y, z, roll, pitch, yaw."""
     comps = [
         ("x_mm", "x [mm]"),
@@ -91,9 +101,10 @@ def make_ts_fig(df: pd.DataFrame) -> go.Figure:
     )
 
     for i, (col, label) in enumerate(comps, start=1):
+        t, y = downsample(df["Time"].to_numpy(), df[col].to_numpy(), max_points)
         fig.add_trace(
             go.Scatter(
-                x=df["Time"], y=df[col],
+                x=t, y=y,
                 mode="lines", line=dict(width=1.3, color="#1f77b4"),
                 name=label,
             ),
@@ -112,7 +123,7 @@ def make_ts_fig(df: pd.DataFrame) -> go.Figure:
 
 # ───────────────────────────── main ───────────────────────────────────────────
 def main(
-    csv_file: pathlib.Path, every: int,
+    csv_file: pathlib.Path, every: int, max_points: int,
     save_prefix: str | None, show: bool,
 ) -> None:
     df = pd.read_csv(csv_file).iloc[::every, :]          # optional decimation
@@ -128,8 +139,8 @@ def main(
         print("No data to plot, exiting.")
         return
 
-    fig_3d = make_3d_fig(df)
-    fig_ts = make_ts_fig(df)
+    fig_3d = make_3d_fig(downsample_frame(df, "Time", ["x_mm", "y_mm", "z_mm"], max_points))
+    fig_ts = make_ts_fig(df, max_points)
 
     if save_prefix:
         pio.write_html(fig_3d, file=f"{save_prefix}_3d.html",      auto_open=False)
@@ -146,7 +157,9 @@ if __name__ == "__main__":
     ap.add_argument("input_csv", type=pathlib.Path,
                     help="CSV with x_mm, y_mm, z_mm, roll_rad, pitch_rad, yaw_rad")
     ap.add_argument("--every", type=int, default=1,
-                    help="Plot every N-th frame (default 1 = all)")
+                    help="Keep every N-th frame before downsampling (default 1 = all)")
+    ap.add_argument("--max-points", type=int, default=MAX_POINTS,
+                    help=f"Points per trace after shape-preserving downsampling (default {MAX_POINTS})")
     ap.add_argument("--save-prefix", metavar="NAME",
                     help="Write HTML files using NAME as prefix")
     ap.add_argument("--no-show", action="store_true",
@@ -155,6 +168,7 @@ if __name__ == "__main__":
     main(
         csv_file=args.input_csv,
         every=args.every,
+        max_points=args.max_points,
         save_prefix=args.save_prefix,
         show=not args.no_show,
     )
@@ -0,0 +1,369 @@
+"""
+bite_force.py
+-------------
+
+Closed-loop bite force: track a target force profile by offsetting the played
+trajectory in z (and optionally pitch) from the host, so that food-texture
+experiments run at a controlled force instead of a fixed position. The
+firmware only uses the force as a hard stop at FORCE_THRESHOLD.
+
+* The firmware prints the total load-cell force every trajectory tick
+  (``Total Force - X: .., Y: .., Z: .., Time: <millis>``). The latest Fz is
+  fed with its host receive time and, once the clocks are synchronised
+  (clock_sync.py), its latency.
+* Every ``period_ms`` a PI controller turns the force error into a z offset
+  (mm, plus ``pitch_per_mm`` rad per mm of it) sent as
+  ``set offset:<z>,<pitch>``; the firmware adds it to the played poses
+  (main/PoseOffset.h), slew-limited and bounded on its side too.
+* Rate limits: the offset moves at most ``max_rate`` mm/s and stays within
+  ``max_offset``. The integrator is frozen while the output is limited
+  (anti-windup), and the output is held while Fz is below ``contact_n``
+  (the jaw opens in a chewing cycle): the open phases do not wind it up.
+* Latency of the loop, measured every step: age of the force sample when
+  the step runs (device → host, plus the wait on the host), and the round
+  trip of the offset command. The offset is applied at the next trajectory
+  tick after the command arrives, half a round trip later.
+* Fallback to the plain trajectory (offset 0, no more commands) when the
+  force samples stop for ``stale_ms``, when ``latency_strikes`` steps in a
+  row exceed ``max_latency_ms``, when an offset command fails or times out,
+  or when Fz exceeds ``force_limit``. If the host itself stalls, the
+  firmware watchdog (OFFSET_TIMEOUT_MS) returns to the trajectory.
+
+Pure Python, no Qt. From the command line (needs pyserial), 40 N for 20 s
+on the trajectory loaded on the robot::
+
+    python bite_force.py --port /dev/ttyACM0 --force 40 --duration 20 --out force_run.csv
+    python bite_force.py --port /dev/pts/5 --profile ramp.csv    # time_s,force_N rows
+"""
+
+import argparse
+import csv
+import re
+import threading
+import time
+from collections import deque
+
+from clock_sync import ClockSync, percentile
+
+PERIOD_MS = 20              # Control period, two trajectory loop ticks
+OFFSET_MAX_Z = 10.0         # OFFSET_MAX_Z of main/Config.h, mm
+FORCE_LIMIT_N = 150.0       # Fallback below FORCE_THRESHOLD (200 N), where the firmware stops
+KP = 0.02                   # mm/N
+KI = 0.5                    # mm/(N.s)
+MAX_RATE = 10.0             # mm/s
+CONTACT_N = 2.0             # N, below it the jaw is open: output held
+STALE_MS = 100              # No force sample for this long: fallback
+MAX_LATENCY_MS = 60         # Sample age + half the command round trip
+LATENCY_STRIKES = 5         # Steps in a row over MAX_LATENCY_MS before falling back
+TIMEOUT_S = 0.2             # Offset command reply, below OFFSET_TIMEOUT_MS (250 ms)
+LATENCY_WINDOW = 2000       # Steps kept for the latency statistics
+
+_TOTAL_FORCE_RE = re.compile(r"^Total Force - X: ([^,]+), Y: ([^,]+), Z: ([^,]+), Time: (\d+)")
+
+
+class ForceProfile:
+    """Target force (N) against time since the control started (s): linear between points, held after."""
+
+    def __init__(self, points):
+        self.points = sorted(points)
+
+    @classmethod
+    def constant(cls, force, ramp_s=1.0):
+        return cls([(0.0, 0.0), (ramp_s, force)] if ramp_s > 0 else [(0.0, force)])
+
+    @classmethod
+    def load_csv(cls, path):
+        """time_s,force_N rows, an optional header line."""
+        points = []
+        with open(path) as f:
+            for line in f:
+                fields = line.strip().split(",")
+                try:
+                    points.append((float(fields[0]), float(fields[1])))
+                except (ValueError, IndexError):
+                    continue
+        return cls(points)
+
+    @property
+    def duration(self):
+        return self.points[-1][0]
+
+    def at(self, t):
+        points = self.points
+        if t <= points[0][0]:
+            return points[0][1]
+        for (t0, f0), (t1, f1) in zip(points, points[1:]):
+            if t <= t1:
+                return f0 + (f1 - f0) * (t - t0) / (t1 - t0) if t1 > t0 else f1
+        return points[-1][1]
+
+
+class BiteForcePI:
+    """PI from the force error (N) to the z offset (mm), bounded and rate-limited, with anti-windup."""
+
+    def __init__(self, kp=KP, ki=KI, max_offset=OFFSET_MAX_Z, max_rate=MAX_RATE):
+        self.kp = kp
+        self.ki = ki
+        self.max_offset = max_offset
+        self.max_rate = max_rate
+        self.reset()
+
+    def reset(self):
+        self.integral = 0.0     # mm
+        self.output = 0.0       # mm
+
+    def step(self, target, measured, dt):
+        error = target - measured
+        integral = self.integral + self.ki * error * dt
+        wanted = self.kp * error + integral
+        limited = min(max(wanted, -self.max_offset), self.max_offset)
+        max_step = self.max_rate * dt
+        limited = min(max(limited, self.output - max_step), self.output + max_step)
+        if limited == wanted:
+            self.integral = integral    # Not limited: the integrator runs
+        self.output = limited
+        return limited
+
+
+class BiteForceControl:
+    def __init__(self, request, profile, controller=None, period_ms=PERIOD_MS, pitch_per_mm=0.0,
+                 contact_n=CONTACT_N, force_limit=FORCE_LIMIT_N, stale_ms=STALE_MS,
+                 max_latency_ms=MAX_LATENCY_MS, latency_strikes=LATENCY_STRIKES, log=print,
+                 clock=time.monotonic_ns):
+        self._request = request     # CommandChannel.request
+        self._clock = clock
+        self._lock = threading.RLock()     # Samples come from the reader, replies from the channel
+        self.profile = profile
+        self.controller = controller or BiteForcePI()
+        self.period_ns = int(period_ms * 1e6)
+        self.pitch_per_mm = pitch_per_mm
+        self.contact_n = contact_n
+        self.force_limit = force_limit
+        self.stale_ms = stale_ms
+        self.max_latency_ms = max_latency_ms
+        self.latency_strikes = latency_strikes
+        self.log = log
+        self.state = "off"          # off, control, fallback
+        self.sample = None          # Latest (Fz, device ms, receive ns, latency ms or None)
+        self.in_flight = None
+        self.start_ns = self.last_step_ns = 0
+        self.strikes = 0
+        self.skipped = 0            # Steps skipped, the previous command not answered yet
+        self.ages = deque(maxlen=LATENCY_WINDOW)    # ms, sample age at the step
+        self.rtts = deque(maxlen=LATENCY_WINDOW)    # ms, offset command round trip
+        self.history = []           # (t s, target N, Fz N, offset mm) per step
+
+    # ---- samples ----
+    def feed(self, line, receive_ns, latency_ms=None):
+        """Handle a Total Force line. Returns True if the line was one."""
+        m = _TOTAL_FORCE_RE.match(line)
+        if m is None:
+            return False
+        self.add_sample(float(m.group(3)), int(m.group(4)), receive_ns, latency_ms)
+        return True
+
+    def add_sample(self, fz, device_ms, receive_ns, latency_ms=None):
+        with self._lock:
+            self.sample = (fz, device_ms, receive_ns, latency_ms)
+            if self.state == "control" and fz > self.force_limit:
+                self._fallback(f"force {fz:.1f} N over the {self.force_limit:.0f} N limit")
+
+    # ---- control ----
+    def start(self):
+        """The robot entered MOVING: control from now, the profile starts at 0 s."""
+        with self._lock:
+            self.controller.reset()
+            self.state = "control"
+            self.start_ns = self.last_step_ns = self._clock()
+            self.strikes = self.skipped = 0
+            self.history = []
+
+    def stop(self):
+        """The robot stops: the firmware resets the offset itself."""
+        with self._lock:
+            self.state = "off"
+
+    @property
+    def active(self):
+        return self.state == "control"
+
+    @property
+    def elapsed_s(self):
+        return (self._clock() - self.start_ns) / 1e9
+
+    def pump(self):
+        with self._lock:
+            if self.state != "control":
+                return
+            now = self._clock()
+            if now - self.last_step_ns < self.period_ns:
+                return
+            dt = (now - self.last_step_ns) / 1e9
+            self.last_step_ns = now
+            if self.sample is None or (now - self.sample[2]) / 1e6 > self.stale_ms:
+                if now - self.start_ns > self.stale_ms * 1e6:
+                    self._fallback(f"no force sample for {self.stale_ms} ms")
+                return
+            if self.in_flight is not None and not self.in_flight.done():
+                self.skipped += 1       # One command in flight at a time
+                return
+
+            fz, _, receive_ns, latency_ms = self.sample
+            age = (latency_ms or 0.0) + (now - receive_ns) / 1e6
+            self.ages.append(age)
+            loop_ms = age + (self.rtts[-1] / 2 if self.rtts else 0.0)
+            self.strikes = self.strikes + 1 if loop_ms > self.max_latency_ms else 0
+            if self.strikes >= self.latency_strikes:
+                self._fallback(f"loop latency {loop_ms:.0f} ms over {self.max_latency_ms} ms "
+                               f"for {self.strikes} steps")
+                return
+
+            t = (now - self.start_ns) / 1e9
+            target = self.profile.at(t)
+            if fz >= self.contact_n:
+                self.controller.step(target, fz, dt)
+            offset = self.controller.output
+            self.history.append((t, target, fz, offset))
+            self._send(offset)
+
+    def _send(self, offset):
+        command = f"set offset:{offset:.3f},{offset * self.pitch_per_mm:.5f}"
+        self.in_flight = self._request(command, timeout=TIMEOUT_S)
+        self.in_flight.add_done_callback(self._on_reply)
+
+    def _on_reply(self, future):
+        if future.cancelled():
+            return
+        with self._lock:
+            if self.state != "control":
+                return
+            if future.exception() is not None:
+                self._fallback(f"offset command failed: {future.exception()}")
+                return
+            reply = future.result()
+            self.rtts.append(reply.rtt * 1000)
+            if not reply.ok:
+                for line in reply.lines:
+                    self.log(line)
+                self._fallback("offset command rejected")
+
+    def _fallback(self, reason):
+        self.state = "fallback"
+        self.log(f"Warning: Bite-force control stopped ({reason}), back to the plain trajectory.")
+        self.in_flight = self._request("set offset:0,0", timeout=TIMEOUT_S)
+
+    # ---- report ----
+    def tracking_error(self):
+        """RMS and max |target - Fz| (N) over the steps in contact, None before any."""
+        errors = [abs(target - fz) for _, target, fz, _ in self.history if fz >= self.contact_n]
+        if not errors:
+            return None
+        return (sum(e * e for e in errors) / len(errors)) ** 0.5, max(errors)
+
+    def format_status(self):
+        if self.state == "off":
+            return "Bite-force control: off"
+        text = f"Bite-force control: {self.state}"
+        if self.history:
+            t, target, fz, offset = self.history[-1]
+            text += f", target {target:.1f} N, Fz {fz:.1f} N, offset {offset:+.2f} mm"
+        if self.ages:
+            text += (f"   Sample age median {percentile(self.ages, 0.5):.1f} / "
+                     f"p95 {percentile(self.ages, 0.95):.1f} ms")
+        if self.rtts:
+            text += (f", offset RTT median {percentile(self.rtts, 0.5):.1f} / "
+                     f"p95 {percentile(self.rtts, 0.95):.1f} ms")
+        if self.skipped:
+            text += f", {self.skipped} steps skipped"
+        return text
+
+
+# ───────────────────────────── command line ──────────────────────────────────
+
+
+def run_control(port, baudrate, profile, duration_s, controller, period_ms, pitch_per_mm, out, sync_pings=20):
+    import serial
+    from command_channel import CommandChannel
+
+    link = serial.Serial(port, baudrate, timeout=0.05)
+    sync = ClockSync()
+    channel = CommandChannel(lambda text: link.write((text + "\n").encode()))
+    control = BiteForceControl(channel.request, profile, controller, period_ms, pitch_per_mm)
+    running = True
+
+    def reader():
+        while running:
+            raw = link.readline()
+            if not raw:
+                continue
+            receive_ns = time.monotonic_ns()
+            line = raw.decode(errors="replace").strip()
+            if channel.feed(line) or sync.feed(line, receive_ns):
+                continue
+            m = _TOTAL_FORCE_RE.match(line)
+            if m is not None:
+                control.add_sample(float(m.group(3)), int(m.group(4)), receive_ns, sync.tag(int(m.group(4)), receive_ns))
+            elif line.startswith("Error") or line.startswith("Warning"):
+                print(line)
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    try:
+        for _ in range(sync_pings):
+            link.write((sync.make_ping() + "\n").encode())
+            time.sleep(0.02)
+        start = channel.request("start", timeout=1.0)
+        while not start.done():
+            channel.poll()
+            time.sleep(0.002)
+        control.start()
+        while control.state != "off" and control.elapsed_s < duration_s:
+            channel.poll()
+            control.pump()
+            if control.state == "fallback":
+                break
+            time.sleep(0.002)
+        control.stop()
+        channel.request("stop", timeout=1.0)
+        time.sleep(0.2)
+    finally:
+        running = False
+        thread.join()
+        link.close()
+
+    print(control.format_status())
+    error = control.tracking_error()
+    if error is not None:
+        print(f"Force tracking error in contact: RMS {error[0]:.2f} N, max {error[1]:.2f} N")
+    if out:
+        with open(out, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["time_s", "target_N", "Fz_N", "offset_mm"])
+            writer.writerows(control.history)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Closed-loop bite force: z offset of the trajectory from the measured Fz")
+    ap.add_argument("--port", required=True, help="Serial port of the Teensy (or of simulation/teensy_emulator.py)")
+    ap.add_argument("--baudrate", type=int, default=115200)
+    target = ap.add_mutually_exclusive_group(required=True)
+    target.add_argument("--force", type=float, help="Constant target force N, reached over --ramp s")
+    target.add_argument("--profile", help="Target profile CSV: time_s,force_N rows")
+    ap.add_argument("--ramp", type=float, default=1.0, help="Ramp to --force, s (default 1)")
+    ap.add_argument("--duration", type=float, help="s of control (default: the profile, or 10 s)")
+    ap.add_argument("--kp", type=float, default=KP, help="mm/N (default %(default)s)")
+    ap.add_argument("--ki", type=float, default=KI, help="mm/(N.s) (default %(default)s)")
+    ap.add_argument("--max-rate", type=float, default=MAX_RATE, help="mm/s of the offset (default %(default)s)")
+    ap.add_argument("--max-offset", type=float, default=OFFSET_MAX_Z, help="mm (default %(default)s)")
+    ap.add_argument("--pitch-per-mm", type=float, default=0.0, help="Pitch offset rad per mm of z offset (default 0)")
+    ap.add_argument("--period", type=int, default=PERIOD_MS, help="Control period ms (default %(default)s)")
+    ap.add_argument("--out", help="CSV of time, target, Fz and offset per step")
+    args = ap.parse_args()
+    if args.profile:
+        profile = ForceProfile.load_csv(args.profile)
+    else:
+        profile = ForceProfile.constant(args.force, args.ramp)
+    duration = args.duration or (profile.duration if args.profile else 10.0)
+    run_control(args.port, args.baudrate, profile, duration,
+                BiteForcePI(args.kp, args.ki, args.max_offset, args.max_rate),
+                args.period, args.pitch_per_mm, args.out)
@@ -0,0 +1,250 @@
+"""
+clock_sync.py
+-------------
+
+Host / Teensy clock synchronisation and end-to-end latency of the serial link.
+
+* NTP-style exchange: the host sends ``ping:<t1>`` with its
+  ``time.monotonic_ns()``; the firmware answers ``Pong: <t1>, <t2>, <t3>``
+  with its ``micros()`` when it handled the ping and when it replied. With
+  the host receive time t4, a ping gives the round-trip delay
+  (t4 − t1) − (t3 − t2) and a device / host time pair at its midpoint.
+* The device clock is modelled as device = offset + rate · host over the last
+  ``window`` pings. Only the pings of lowest delay (within ``delay_margin_ns``
+  of the best, at least ``min_fit`` of them) are fitted: a ping queued behind
+  telemetry or a slow loop() pass is asymmetric and would bias the offset.
+  The drift is the rate − 1, in ppm. micros() wraps every 71 minutes; the
+  pongs are unwrapped from the first one, so the model is the device clock
+  modulo that period.
+* ``tag(device_ms, receive_ns)`` gives the latency of a telemetry line: host
+  receive time minus the host time of its ``time:`` field (millis() is
+  truncated, the middle of the millisecond is used). The field is unwrapped
+  against the model modulo the micros() period, which also covers the
+  millis() wrap (49 days). It is the serial backlog plus the print time, and
+  is kept for the status line.
+
+Pure Python, no Qt: the GUI feeds the Pong lines and tags its samples.
+
+Command round-trip benchmark (needs pyserial)::
+
+    python clock_sync.py --port /dev/ttyACM0 --command "set position:0,0,330" --count 200
+"""
+
+import argparse
+import re
+import statistics
+import threading
+import time
+from collections import deque
+
+PING_INTERVAL_MS = 500      # GUI ping period
+WINDOW = 64                 # Pings kept for the clock model
+DELAY_MARGIN_NS = 200_000   # Fitted pings: delay within this of the best one
+MIN_FIT = 4                 # ... and at least this many
+LATENCY_WINDOW = 1000       # Tagged samples kept for the latency statistics
+
+_PONG_RE = re.compile(r"^Pong: (\d+), (\d+), (\d+)$")
+_MICROS_WRAP = 1 << 32              # micros() period, us
+
+
+class PingSample:
+    def __init__(self, t1, t2, t3, t4):
+        self.t1 = t1        # Host send, ns
+        self.t2 = t2        # Device receive, us (unwrapped)
+        self.t3 = t3        # Device reply, us (unwrapped)
+        self.t4 = t4        # Host receive, ns
+
+    @property
+    def delay_ns(self):
+        return (self.t4 - self.t1) - (self.t3 - self.t2) * 1000
+
+    @property
+    def host_ns(self):
+        return (self.t1 + self.t4) / 2
+
+    @property
+    def device_ns(self):
+        return (self.t2 + self.t3) * 500
+
+
+class ClockSync:
+    def __init__(self, clock=time.monotonic_ns, window=WINDOW, delay_margin_ns=DELAY_MARGIN_NS, min_fit=MIN_FIT):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.delay_margin_ns = delay_margin_ns
+        self.min_fit = min_fit
+        self.samples = deque(maxlen=window)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)   # ms, of the tagged samples
+        self.pings = 0
+        self._last_raw = None       # Last micros() of a pong and its unwrapped value
+        self._last_unwrapped = 0
+        # Model: device_ns = device0 + rate * (host_ns - host0)
+        self.host0 = 0.0
+        self.device0 = None
+        self.rate = 1.0
+
+    # ---- ping exchange ----
+    def make_ping(self):
+        """Command to send now."""
+        return f"ping:{self._clock()}"
+
+    def feed(self, line, receive_ns=None):
+        """Handle a Pong line. Returns True if the line was one."""
+        match = _PONG_RE.match(line)
+        if match is None:
+            return False
+        t4 = self._clock() if receive_ns is None else receive_ns
+        t1 = int(match.group(1))
+        with self._lock:
+            t2 = self._unwrap_micros(int(match.group(2)))
+            t3 = t2 + ((int(match.group(3)) - int(match.group(2))) % _MICROS_WRAP)
+            self.samples.append(PingSample(t1, t2, t3, t4))
+            self.pings += 1
+            self._fit()
+        return True
+
+    def _unwrap_micros(self, raw):
+        if self._last_raw is None:
+            unwrapped = raw
+        else:
+            unwrapped = self._last_unwrapped + ((raw - self._last_raw + _MICROS_WRAP // 2) % _MICROS_WRAP) \
+                - _MICROS_WRAP // 2
+        self._last_raw, self._last_unwrapped = raw, unwrapped
+        return unwrapped
+
+    def _fit(self):
+        best = min(s.delay_ns for s in self.samples)
+        fit = [s for s in self.samples if s.delay_ns <= best + self.delay_margin_ns]
+        if len(fit) < self.min_fit:
+            fit = sorted(self.samples, key=lambda s: s.delay_ns)[:self.min_fit]
+        host0 = sum(s.host_ns for s in fit) / len(fit)
+        device0 = sum(s.device_ns for s in fit) / len(fit)
+        sxx = sum((s.host_ns - host0) ** 2 for s in fit)
+        rate = 1.0
+        # Drift only once the fitted pings span a second: over shorter spans the
+        # delay jitter dominates the slope.
+        if len(fit) >= 2 and max(s.host_ns for s in fit) - min(s.host_ns for s in fit) >= 1e9:
+            rate = sum((s.host_ns - host0) * (s.device_ns - device0) for s in fit) / sxx
+        self.host0, self.device0, self.rate = host0, device0, rate
+
+    # ---- conversions ----
+    @property
+    def synced(self):
+        return self.device0 is not None
+
+    def device_to_host_ns(self, device_us):
+        return self.host0 + (device_us * 1000 - self.device0) / self.rate
+
+    def host_to_device_us(self, host_ns):
+        return (self.device0 + self.rate * (host_ns - self.host0)) / 1000
+
+    def offset_ms(self, host_ns=None):
+        """Device clock minus host clock, at host_ns (default now)."""
+        host_ns = self._clock() if host_ns is None else host_ns
+        return (self.host_to_device_us(host_ns) * 1000 - host_ns) / 1e6
+
+    @property
+    def drift_ppm(self):
+        return (self.rate - 1.0) * 1e6
+
+    # ---- telemetry samples ----
+    def tag(self, device_ms, receive_ns):
+        """Latency (ms) of a line stamped with millis() = device_ms and received at receive_ns, None before sync."""
+        with self._lock:
+            if not self.synced:
+                return None
+            predicted = self.host_to_device_us(receive_ns)
+            device_us = device_ms * 1000 + 500      # Middle of the millisecond
+            # millis() * 1000 is the uptime in us modulo 2^32 us, as the model is.
+            device_us += round((predicted - device_us) / _MICROS_WRAP) * _MICROS_WRAP
+            latency = (receive_ns - self.device_to_host_ns(device_us)) / 1e6
+            self.latencies.append(latency)
+        return latency
+
+    def format_status(self):
+        if not self.synced:
+            return "Clock sync: waiting for the first ping reply"
+        with self._lock:
+            delays = sorted(s.delay_ns / 1e6 for s in self.samples)
+            latencies = sorted(self.latencies)
+        text = (f"Clock sync: offset {self.offset_ms():.1f} ms, drift {self.drift_ppm:+.0f} ppm, "
+                f"ping RTT min {delays[0]:.2f} / median {delays[len(delays) // 2]:.2f} ms ({self.pings} pings)")
+        if latencies:
+            text += (f"   Telemetry latency median {latencies[len(latencies) // 2]:.1f} / "
+                     f"p95 {latencies[int(0.95 * (len(latencies) - 1))]:.1f} / max {latencies[-1]:.1f} ms")
+        return text
+
+
+# ───────────────────────────── command round-trip benchmark ──────────────────
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def run_benchmark(port, baudrate, command, count, interval_s, sync_pings):
+    import serial
+    from command_channel import CommandChannel
+
+    link = serial.Serial(port, baudrate, timeout=0.05)
+    sync = ClockSync()
+    channel = CommandChannel(lambda text: link.write((text + "\n").encode()))
+    running = True
+
+    def reader():
+        while running:
+            raw = link.readline()
+            if not raw:
+                continue
+            receive_ns = time.monotonic_ns()
+            line = raw.decode(errors="replace").strip()
+            if not channel.feed(line):
+                sync.feed(line, receive_ns)
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    try:
+        for _ in range(sync_pings):
+            link.write((sync.make_ping() + "\n").encode())
+            time.sleep(interval_s)
+        rtts, failed = [], 0
+        for _ in range(count):
+            future = channel.request(command, timeout=1.0)
+            while not future.done():
+                channel.poll()
+                time.sleep(0.0005)
+            if future.exception() is None:
+                rtts.append(future.result().rtt * 1000)
+            else:
+                failed += 1
+            time.sleep(interval_s)
+    finally:
+        running = False
+        thread.join()
+        link.close()
+
+    print(sync.format_status() if sync.synced else "Clock sync: no ping reply")
+    if sync.synced:
+        forward = [(sync.device_to_host_ns(s.t2) - s.t1) / 1e6 for s in sync.samples]
+        backward = [(s.t4 - sync.device_to_host_ns(s.t3)) / 1e6 for s in sync.samples]
+        print(f"Ping one-way delay: host -> device median {statistics.median(forward):.2f} ms, "
+              f"device -> host median {statistics.median(backward):.2f} ms")
+    if not rtts:
+        print(f"'{command}': no reply in {count} requests")
+        return
+    print(f"'{command}' round trip over {len(rtts)} requests ({failed} timed out), ms:")
+    print(f"  min {min(rtts):.2f}  median {statistics.median(rtts):.2f}  p95 {percentile(rtts, 0.95):.2f}  "
+          f"p99 {percentile(rtts, 0.99):.2f}  max {max(rtts):.2f}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Clock sync and command round-trip latency of the X-Jaw serial link")
+    ap.add_argument("--port", required=True, help="Serial port of the Teensy (or of simulation/teensy_emulator.py)")
+    ap.add_argument("--baudrate", type=int, default=115200)
+    ap.add_argument("--command", default="set position:0,0,330", help="Command timed (default: %(default)s)")
+    ap.add_argument("--count", type=int, default=100, help="Requests sent (default 100)")
+    ap.add_argument("--interval", type=float, default=0.02, help="Seconds between requests (default 0.02)")
+    ap.add_argument("--sync-pings", type=int, default=50, help="Pings sent first to synchronise the clocks")
+    args = ap.parse_args()
+    run_benchmark(args.port, args.baudrate, args.command, args.count, args.interval, args.sync_pings)
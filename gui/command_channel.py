@@ -0,0 +1,133 @@
+"""
+command_channel.py
+------------------
+
+Request/response layer on top of the line-based serial link.
+
+Every request is sent as ``#<id> <command>``. The firmware answers with::
+
+    #<id> begin
+    ...reply lines...
+    #<id> end ok | #<id> end error
+
+``request`` returns a ``concurrent.futures.Future`` that completes with a
+``Reply`` as soon as the end marker is read, or fails with ``TimeoutError``
+once every retry has timed out. ``feed`` must see every received line and
+``poll`` must be called periodically (a QTimer in the GUI, a loop in scripts)
+to handle timeouts.
+
+Untagged lines are only taken as reply body between a ``begin`` and its
+``end``, and not past the request's deadline: a lost end marker or a
+firmware reset mid-reply expires the request like any other instead of
+swallowing the telemetry that follows.
+"""
+
+import re
+import threading
+import time
+from concurrent.futures import Future
+
+_MARKER_RE = re.compile(r"^#(\d+) (begin|end ok|end error)$")
+
+
+class Reply:
+    def __init__(self, command, lines, ok, rtt):
+        self.command = command
+        self.lines = lines      # Lines printed by the firmware while executing the command
+        self.ok = ok            # False if the firmware reported "end error"
+        self.rtt = rtt          # Seconds between the (last) send and the end marker
+
+
+class _Request:
+    def __init__(self, command, timeout, retries):
+        self.command = command
+        self.timeout = timeout
+        self.retries = retries
+        self.future = Future()
+        self.lines = []
+        self.sent_at = 0.0
+        self.deadline = 0.0
+
+
+class CommandChannel:
+    def __init__(self, write, clock=time.monotonic):
+        self._write = write
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._pending = {}      # id -> _Request
+        self._active = None     # Request whose reply body is being received
+
+    def request(self, command, timeout=1.0, retries=0):
+        """Send a command and return a Future resolved with its Reply."""
+        with self._lock:
+            req_id = self._next_id
+            self._next_id += 1
+            req = _Request(command, timeout, retries)
+            self._pending[req_id] = req
+            self._send(req_id, req)
+        return req.future
+
+    def _send(self, req_id, req):
+        req.lines = []
+        req.sent_at = self._clock()
+        req.deadline = req.sent_at + req.timeout
+        self._write(f"#{req_id} {req.command}")
+
+    def feed(self, line):
+        """Route a received line. Returns True if it belonged to a reply."""
+        match = _MARKER_RE.match(line)
+        done = None
+        with self._lock:
+            if match is None:
+                if self._active is not None and self._clock() > self._active.deadline:
+                    self._active = None     # End marker lost: poll() expires the request
+                if self._active is None:
+                    return False
+                self._active.lines.append(line)
+                return True
+
+            req_id, kind = int(match.group(1)), match.group(2)
+            req = self._pending.get(req_id)
+            if kind == "begin":
+                # Replies to requests that already timed out are left to the normal parser.
+                self._active = req
+                if req is not None:
+                    req.lines = []
+            else:
+                self._active = None
+                if req is not None:
+                    del self._pending[req_id]
+                    done = (req, Reply(req.command, req.lines, kind == "end ok",
+                                       self._clock() - req.sent_at))
+        if done is not None:
+            req, reply = done
+            req.future.set_result(reply)
+        return True
+
+    def poll(self):
+        """Resend or fail requests whose deadline has passed."""
+        now = self._clock()
+        expired = []
+        with self._lock:
+            for req_id, req in list(self._pending.items()):
+                if now < req.deadline:
+                    continue
+                if req is self._active:
+                    self._active = None
+                if req.retries > 0:
+                    req.retries -= 1
+                    self._send(req_id, req)
+                else:
+                    del self._pending[req_id]
+                    expired.append(req)
+        for req in expired:
+            req.future.set_exception(TimeoutError(f"No reply to '{req.command}' after {req.timeout:.2f} s"))
+
+    def close(self):
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+            self._active = None
+        for req in pending:
+            req.future.cancel()
@@ -0,0 +1,60 @@
+"""
+command_queue.py
+----------------
+
+Outbound serial queue that coalesces idempotent setpoint commands.
+
+* ``send(command)`` queues a command that must be delivered as-is and in order
+  (start, stop, tagged channel requests, ...). It is written immediately unless
+  a setpoint ahead of it is still waiting for its slot.
+* ``send(command, key=...)`` queues a setpoint. If the last queued command has
+  the same key it is replaced, so only the latest value is sent. Setpoints are
+  written at most once every ``min_interval_ms``.
+
+Setpoints never overtake, and are never merged across, a non-coalescible
+command, so the order the user acted in is preserved.
+"""
+
+import math
+import time
+from collections import deque
+
+from PyQt5.QtCore import QObject, QTimer
+
+SETPOINT_INTERVAL_MS = 40   # Maximum setpoint rate sent to the firmware (25 Hz)
+
+
+class CommandQueue(QObject):
+    def __init__(self, write, min_interval_ms=SETPOINT_INTERVAL_MS, parent=None):
+        super().__init__(parent)
+        self._write = write
+        self._min_interval = min_interval_ms / 1000
+        self._queue = deque()               # [key, command], key None = not coalescible
+        self._last_setpoint = -math.inf     # time.monotonic() of the last setpoint written
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._pump)
+
+    def send(self, command, key=None):
+        if key is not None and self._queue and self._queue[-1][0] == key:
+            self._queue[-1][1] = command    # Latest value wins and keeps its place
+        else:
+            self._queue.append([key, command])
+        self._pump()
+
+    def pending(self):
+        return len(self._queue)
+
+    def _pump(self):
+        while self._queue:
+            key, command = self._queue[0]
+            if key is not None:
+                now = time.monotonic()
+                wait = self._last_setpoint + self._min_interval - now
+                if wait > 0:
+                    if not self._timer.isActive():
+                        self._timer.start(math.ceil(wait * 1000))
+                    return
+                self._last_setpoint = now
+            self._queue.popleft()
+            self._write(command)
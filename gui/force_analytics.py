@@ -0,0 +1,188 @@
+"""
+force_analytics.py
+------------------
+
+Streaming bite-force analysis for the X-Jaw GUI.
+
+* Samples are fed one at a time as the force lines arrive; every sample costs
+  O(1) work and memory does not grow with the length of a session (only the
+  list of finished cycles does).
+* A chew cycle starts when the total vertical force rises above
+  ``on_threshold`` and ends when it falls below ``off_threshold``
+  (hysteresis, so noise around one threshold does not split a bite).
+  Cycles shorter than ``min_duration_ms`` are discarded as glitches.
+  The firmware prints the Total line before the three cell lines of the same
+  instant, so a cycle is closed on the next Total sample, once the cells
+  have been integrated up to its end.
+* Per cycle: peak total Fz and its time, duration, impulse (∫Fz dt,
+  trapezoidal) and the share of the impulse taken by the front and by each
+  back load cell.
+* Running session statistics (count, mean / std / max of peaks, mean
+  impulse) and the per-cell maximum Fz are kept incrementally.
+
+Pure Python, no Qt: the GUI shows ``summary()`` and saves ``rows()``.
+"""
+
+import math
+
+CELLS = ("Front", "Back Right", "Back Left")
+CYCLE_ON_N = 20.0        # Total Fz that starts a cycle (same crop threshold as force_distribution.py)
+CYCLE_OFF_N = 10.0       # Total Fz that ends it
+MIN_CYCLE_MS = 100       # Shorter cycles are rejected
+SETTLE_MS = 30000        # Per-cell maxima ignore samples before this firmware time
+
+CYCLE_FIELDS = ["cycle", "start_time", "end_time", "duration_s", "peak_fz", "peak_time",
+                "impulse_ns", "front_share", "back_right_share", "back_left_share"]
+
+
+class BiteCycle:
+    __slots__ = ("start", "end", "peak", "peak_time", "impulse", "cell_impulse")
+
+    def __init__(self, start):
+        self.start = start
+        self.end = start
+        self.peak = 0.0
+        self.peak_time = start
+        self.impulse = 0.0                              # Total Fz, N·s
+        self.cell_impulse = dict.fromkeys(CELLS, 0.0)
+
+    @property
+    def duration_s(self):
+        return (self.end - self.start) / 1000.0
+
+    def shares(self):
+        """Fraction of the summed cell impulse taken by each cell."""
+        total = sum(self.cell_impulse.values())
+        if total <= 0:
+            return dict.fromkeys(CELLS, math.nan)
+        return {cell: value / total for cell, value in self.cell_impulse.items()}
+
+    def as_row(self, index):
+        shares = self.shares()
+        return {
+            "cycle": index,
+            "start_time": self.start,
+            "end_time": self.end,
+            "duration_s": round(self.duration_s, 3),
+            "peak_fz": round(self.peak, 2),
+            "peak_time": self.peak_time,
+            "impulse_ns": round(self.impulse, 3),
+            "front_share": round(shares["Front"], 3),
+            "back_right_share": round(shares["Back Right"], 3),
+            "back_left_share": round(shares["Back Left"], 3),
+        }
+
+
+class ForceAnalyser:
+    """Incremental chew-cycle detector fed with the ``*Force - X: ...`` samples."""
+
+    def __init__(self, on_threshold=CYCLE_ON_N, off_threshold=CYCLE_OFF_N,
+                 min_duration_ms=MIN_CYCLE_MS, settle_ms=SETTLE_MS):
+        self.on_threshold = on_threshold
+        self.off_threshold = off_threshold
+        self.min_duration_ms = min_duration_ms
+        self.settle_ms = settle_ms
+        self.clear()
+
+    def clear(self):
+        self.cycles = []
+        self.current = None                         # BiteCycle in progress
+        self.closing = None                         # Ended, waiting for the cells of its last instant
+        self.last = {}                              # cell -> (time, Fz) of the previous sample
+        self.max_fz = dict.fromkeys(CELLS + ("Total",), 0.0)
+        self.last_total = 0.0
+        # Running sums of the finished cycles
+        self._count = 0
+        self._peak_sum = 0.0
+        self._peak_sq = 0.0
+        self._peak_max = 0.0
+        self._impulse_sum = 0.0
+        self._front_sum = 0.0
+        self._front_count = 0                       # Cycles with a defined front share
+
+    def add(self, cell, data):
+        """Feed one parsed sample ``{"Fx", "Fy", "Fz", "time"}`` of ``cell``.
+
+        Returns the finished BiteCycle when this sample closes one, else None.
+        """
+        t, fz = data["time"], data["Fz"]
+        if t >= self.settle_ms and fz > self.max_fz[cell]:
+            self.max_fz[cell] = fz
+        previous = self.last.get(cell)
+        self.last[cell] = (t, fz)
+
+        if cell != "Total":
+            cycle = self.current or self.closing
+            if cycle is not None and previous is not None and cycle.start <= previous[0] < t <= cycle.end:
+                cycle.cell_impulse[cell] += 0.5 * (fz + previous[1]) * (t - previous[0]) / 1000.0
+            return None
+
+        finished = self._finish(self.closing) if self.closing is not None else None
+        self.closing = None
+        self.last_total = fz
+        cycle = self.current
+        if cycle is None:
+            if fz > self.on_threshold:
+                # Integrate from the last sample below the threshold
+                self.current = cycle = BiteCycle(previous[0] if previous else t)
+                cycle.peak, cycle.peak_time = fz, t
+            else:
+                return finished
+
+        if previous is not None and t > previous[0]:
+            cycle.impulse += 0.5 * (fz + previous[1]) * (t - previous[0]) / 1000.0
+        cycle.end = t
+        if fz > cycle.peak:
+            cycle.peak, cycle.peak_time = fz, t
+        if fz < self.off_threshold:
+            self.current = None
+            self.closing = cycle
+        return finished
+
+    def _finish(self, cycle):
+        if cycle.end - cycle.start < self.min_duration_ms:
+            return None
+        self.cycles.append(cycle)
+        self._count += 1
+        self._peak_sum += cycle.peak
+        self._peak_sq += cycle.peak * cycle.peak
+        self._peak_max = max(self._peak_max, cycle.peak)
+        self._impulse_sum += cycle.impulse
+        front = cycle.shares()["Front"]
+        if not math.isnan(front):
+            self._front_sum += front
+            self._front_count += 1
+        return cycle
+
+    def summary(self):
+        """Session statistics, O(1)."""
+        n = self._count
+        mean = self._peak_sum / n if n else 0.0
+        var = max(self._peak_sq / n - mean * mean, 0.0) if n else 0.0
+        return {
+            "cycles": n,
+            "in_cycle": self.current is not None,
+            "current_fz": self.last_total,
+            "mean_peak": mean,
+            "std_peak": math.sqrt(var),
+            "max_peak": self._peak_max,
+            "mean_impulse": self._impulse_sum / n if n else 0.0,
+            "mean_front_share": self._front_sum / self._front_count if self._front_count else math.nan,
+        }
+
+    def rows(self):
+        return [cycle.as_row(i) for i, cycle in enumerate(self.cycles, start=1)]
+
+
+def format_summary(summary, last=None):
+    """One-line text for the GUI status label."""
+    text = (f"Cycles: {summary['cycles']}  |  Fz now: {summary['current_fz']:.1f} N"
+            f"{' (biting)' if summary['in_cycle'] else ''}")
+    if summary["cycles"]:
+        text += (f"  |  peak mean {summary['mean_peak']:.1f} ± {summary['std_peak']:.1f} N, "
+                 f"max {summary['max_peak']:.1f} N  |  impulse mean {summary['mean_impulse']:.2f} N·s")
+        front = summary["mean_front_share"]
+        text += "  |  front -" if math.isnan(front) else f"  |  front {100 * front:.0f} %"
+    if last is not None:
+        text += (f"  |  last: {last.peak:.1f} N, {last.impulse:.2f} N·s, {last.duration_s:.2f} s")
+    return text
@@ -1,4 +1,6 @@
 import sys
+import argparse
+import pathlib
 import serial
 import serial.tools.list_ports
 import threading
@@ -10,16 +12,31 @@ import csv
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QPushButton, QComboBox,
     QSlider, QLabel, QVBoxLayout, QWidget, QFileDialog, QHBoxLayout,
-    QDialog, QGridLayout, QTextEdit, QFormLayout, QSpinBox
+    QDialog, QGridLayout, QFormLayout, QSpinBox, QCheckBox, QDoubleSpinBox
 )
 from PyQt5.QtCore import Qt, QTimer, QEvent, pyqtSignal, pyqtSlot
-from PyQt5.QtGui import QIcon, QTextCursor
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-from mpl_toolkits.mplot3d import Axes3D
+from PyQt5.QtGui import QIcon
 import numpy as np
+from live_plots import LivePlotCanvas
+from force_analytics import CYCLE_FIELDS, ForceAnalyser, format_summary
+from tracking_monitor import TrackingMonitor
+from log_view import LogView
+from loop_timing import LoopTimingWindow
+from clock_sync import PING_INTERVAL_MS, ClockSync
+from pose_streamer import PoseStreamer, load_csv
+from bite_force import BiteForceControl, ForceProfile
+from command_channel import CommandChannel
+from command_queue import CommandQueue
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+from common.downsample import downsample
 
 ROOT_DIR = "..\Results"  # Directory to save results
+PLOT_REFRESH_MS = 33      # Live plot refresh period (~30 fps)
+COMMAND_POLL_MS = 20      # Period for checking command timeouts
+COMMAND_TIMEOUT_S = 1.0   # Time to wait for a command reply before retrying/failing
+STREAM_PUMP_MS = 10       # Period of the pose streamer (one trajectory loop tick)
+FORCE_PUMP_MS = 5         # Polling of the bite-force control, which steps every bite_force.PERIOD_MS
 
 class DynamicCombo(QComboBox):
     popupAboutToBeShown = pyqtSignal()          # <- custom signal
@@ -40,7 +57,8 @@ class SerialReader(threading.Thread):
         while self._running:
             if self.serial.in_waiting:
                 line = self.serial.readline().decode().strip()
-                self.callback(line)
+                # Stamped here, before the Qt queue, for the clock sync and the sample latency.
+                self.callback(line, time.monotonic_ns())
 
     def write(self, message):
         self.serial.write((message + "\n").encode())
@@ -51,10 +69,12 @@ class SerialReader(threading.Thread):
 
 
 class CalibrationWindow(QDialog):
-    def __init__(self, send_command):
+    def __init__(self, send_command, send_setpoint):
         super().__init__()
         self.setWindowTitle("Calibration")
         self.send_command = send_command
+        # Jog setpoints are coalesced: only the latest position is sent, at a capped rate.
+        self.send_setpoint = send_setpoint
         self.setModal(True)
 
         layout = QVBoxLayout()
@@ -94,7 +114,7 @@ class CalibrationWindow(QDialog):
         y = self.y_spin.value()
         z = self.z_spin.value()
         command = f"set position:{x},{y},{z}"
-        self.send_command(command)
+        self.send_setpoint(command, key="set position")
 
     def set_origin(self):
         x = self.x_spin.value()
@@ -106,9 +126,9 @@ class CalibrationWindow(QDialog):
 
 class RobotGUI(QMainWindow):
     # Add a signal to handle serial data safely from threads.
-    serialDataReceived = pyqtSignal(str)
+    serialDataReceived = pyqtSignal(str, object)   # line, host receive time (monotonic ns)
     
-    def __init__(self):
+    def __init__(self, port=None):
         super().__init__()
         self.setWindowTitle("X-Jaw")
         
@@ -131,6 +151,10 @@ class RobotGUI(QMainWindow):
         self.stop_button = QPushButton("Stop")
         self.stop_button.setFixedSize(100, 50)
         self.calibrate_button = QPushButton("Calibrate")
+        self.timing_button = QPushButton("Timing")
+        self.timing_window = None   # Loop timing histograms, created on first use
+        self.stream_button = QPushButton("Stream CSV...")
+        self.streamer = None        # Pose stream of a local CSV file, instead of the SD card trajectory
 
         self.trajectory_label = QLabel("Trajectory:")
         self.trajectory_dropdown = DynamicCombo()
@@ -145,13 +169,35 @@ class RobotGUI(QMainWindow):
         self.speed_spin.setFixedSize(80, 25)
         self.speed_spin.setSuffix(" ms")
 
-        self.canvas_3d = FigureCanvas(Figure(figsize=(4, 3)))
-        self.ax3d = self.canvas_3d.figure.add_subplot(111, projection='3d')
-
-        self.error_console = QTextEdit()
-        self.error_console.setReadOnly(True)
+        # Closed-loop bite force: the run tracks this force by offsetting the trajectory in z.
+        self.force_control_check = QCheckBox("Bite force control:")
+        self.force_target_spin = QDoubleSpinBox()
+        self.force_target_spin.setRange(1.0, 150.0)
+        self.force_target_spin.setValue(30.0)
+        self.force_target_spin.setFixedSize(80, 25)
+        self.force_target_spin.setSuffix(" N")
+        self.force_control = None
+        self.force_control_label = QLabel("Bite-force control: off")
+
+        # Live strip charts, refreshed at a fixed rate independently of the serial rate.
+        self.live_plots = LivePlotCanvas()
+        self.plot_timer = QTimer(self)
+        self.plot_timer.timeout.connect(self.update_plots)
+
+        # Per-chew-cycle bite-force statistics, computed as the force lines arrive.
+        self.force_analyser = ForceAnalyser()
+        self.last_cycle = None
+        self.force_stats_label = QLabel(format_summary(self.force_analyser.summary()))
+        # Sliding-window delay / error of each actuator, with lag and divergence alerts.
+        self.tracking_monitor = TrackingMonitor()
+        self.tracking_label = QLabel(self.tracking_monitor.format_status())
+        # Device clock against the host clock, and latency of the telemetry lines.
+        self.clock_sync = ClockSync()
+        self.latency_label = QLabel(self.clock_sync.format_status())
+
+        # Console output / errors, bounded and batch-updated.
+        self.error_console = LogView()
         self.error_console.setFixedHeight(200)
-        self.error_console.setPlaceholderText("Console output / errors...")
 
         # Left column: put start and stop vertically.
         button_layout = QHBoxLayout()
@@ -163,32 +209,60 @@ class RobotGUI(QMainWindow):
         traj_layout = QHBoxLayout()
         traj_layout.addWidget(self.trajectory_label)
         traj_layout.addWidget(self.trajectory_dropdown)
+        traj_layout.addWidget(self.stream_button)
         traj_layout.addStretch()
         traj_layout.addWidget(self.calibrate_button)
+        traj_layout.addWidget(self.timing_button)
         grid_layout.addLayout(traj_layout, 0, 1)            # first row, second column
 
         # Right second row: only the speed spin (aligned to left).
         speed_layout = QHBoxLayout()
         speed_layout.addWidget(self.speed_label)
         speed_layout.addWidget(self.speed_spin)
+        speed_layout.addSpacing(20)
+        speed_layout.addWidget(self.force_control_check)
+        speed_layout.addWidget(self.force_target_spin)
         speed_layout.addStretch()  # Add stretch to push the spin box to the left
         grid_layout.addLayout(speed_layout, 1, 1)          # second row, second column
 
         main_layout.addLayout(grid_layout)
+        main_layout.addWidget(self.live_plots, stretch=1)
+        main_layout.addWidget(self.tracking_label)
+        main_layout.addWidget(self.latency_label)
+        main_layout.addWidget(self.force_stats_label)
+        main_layout.addWidget(self.force_control_label)
         main_layout.addWidget(self.error_console)
 
         container = QWidget()
         container.setLayout(main_layout)
         self.setCentralWidget(container)
 
-        ports = list(serial.tools.list_ports.comports())
+        if port is None:
+            port = list(serial.tools.list_ports.comports())[0].device
         # Pass the emit function of the signal as callback.
-        self.serial = SerialReader(ports[0].device, 115200, self.serialDataReceived.emit)
+        self.serial = SerialReader(port, 115200, self.serialDataReceived.emit)
         self.serial.start()
 
+        # Every outgoing line goes through the queue so setpoints and commands keep their order.
+        self.command_queue = CommandQueue(self.serial.write, parent=self)
+        # Request/response layer: replies are matched to requests by id as soon as they arrive.
+        self.channel = CommandChannel(self.command_queue.send)
+        self.command_timer = QTimer(self)
+        self.command_timer.timeout.connect(self.channel.poll)
+        self.command_timer.start(COMMAND_POLL_MS)
+        self.ping_timer = QTimer(self)
+        self.ping_timer.timeout.connect(self.send_ping)
+        self.ping_timer.start(PING_INTERVAL_MS)
+        self.stream_timer = QTimer(self)
+        self.stream_timer.timeout.connect(self.pump_stream)
+        self.force_timer = QTimer(self)
+        self.force_timer.timeout.connect(self.pump_force_control)
+
         self.start_button.clicked.connect(self.send_start)
         self.stop_button.clicked.connect(self.send_stop)
         self.calibrate_button.clicked.connect(self.open_calibration_window)
+        self.timing_button.clicked.connect(self.open_timing_window)
+        self.stream_button.clicked.connect(self.open_stream)
         self.speed_spin.valueChanged.connect(self.send_speed)
         self.trajectory_dropdown.activated.connect(self.send_trajectory)
         # intercept “about to show” to trigger list request
@@ -196,40 +270,91 @@ class RobotGUI(QMainWindow):
 
         self.data = []
 
-        self.pending_files = None  # <-- new attribute to store file list
-
         # Connect the new signal to the handle_serial_data slot.
         self.serialDataReceived.connect(self.handle_serial_data)
 
+        self.plot_timer.start(PLOT_REFRESH_MS)
+
     def eventFilter(self, source, event):
         if source == self.trajectory_dropdown.view() and event.type() == QEvent.Show:
             self.load_trajectory_files()
         return super().eventFilter(source, event)
 
     def load_trajectory_files(self):
-        self.pending_files = None
-        self.serial.write("list_csv_files")
-        # Let the serial thread fetch the file list.
-        QTimer.singleShot(500, self.update_trajectory_files)
+        future = self.channel.request("list_csv_files", timeout=COMMAND_TIMEOUT_S, retries=2)
+        # The dropdown is refilled as soon as the firmware has answered.
+        future.add_done_callback(self.update_trajectory_files)
 
-    def update_trajectory_files(self):
+    def update_trajectory_files(self, future):
+        if future.cancelled():
+            return
+        files = []
+        if future.exception() is not None:
+            self.log(f"Error: {future.exception()}")
+        else:
+            for line in future.result().lines:
+                files += [fn.strip() for fn in line.split(',') if fn.strip().endswith('.csv')]
         self.trajectory_dropdown.clear()
-        if self.pending_files:
-            for filename in self.pending_files:
+        if files:
+            for filename in files:
                 self.trajectory_dropdown.addItem(filename)
         else:
             self.trajectory_dropdown.addItem("No files found")
 
+    def send_command(self, command):
+        future = self.channel.request(command, timeout=COMMAND_TIMEOUT_S)
+        future.add_done_callback(lambda f: self.on_command_reply(command, f))
+        self.log(f"Sent: {command}")
+        return future
+
+    def on_command_reply(self, command, future):
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self.log(f"Error: {future.exception()}")
+            return
+        reply = future.result()
+        for line in reply.lines:
+            self.log(line)
+        if not reply.ok:
+            self.log(f"Error: command '{command}' was rejected by the robot.")
+
     def send_start(self):
-        self.serial.write("start")
-        self.log("Sent: start")
+        self.live_plots.clear()
+        self.force_analyser.clear()
+        self.last_cycle = None
+        self.tracking_monitor.clear()
+        future = self.send_command("start")
+        if self.force_control_check.isChecked():
+            target = self.force_target_spin.value()
+            self.force_control = BiteForceControl(self.channel.request, ForceProfile.constant(target), log=self.log)
+            future.add_done_callback(self.start_force_control)
+
+    def start_force_control(self, future):
+        # Control from the moment the firmware entered MOVING.
+        if future.cancelled() or future.exception() is not None or not future.result().ok:
+            return
+        self.force_control.start()
+        self.force_timer.start(FORCE_PUMP_MS)
+        self.log(f"Bite-force control: tracking {self.force_target_spin.value():.1f} N")
+
+    def pump_force_control(self):
+        if self.force_control is None or not self.force_control.active:
+            self.force_timer.stop()
+            return
+        self.force_control.pump()
 
     def send_stop(self):
-        self.serial.write("stop")
-        self.log("Sent: stop")
+        if self.force_control is not None:
+            self.force_control.stop()   # The firmware resets the offset when it stops
+        if self.streamer is not None:
+            self.streamer.cancel()  # The firmware closes the stream when it stops
+        self.send_command("stop")
         # When stop is pressed, generate the plots from the saved serial messages.
         self.generate_plots()
         self.generateForcePlots()
+        if self.debug_actuator_data:    # Firmware built with ACT_DEBUG_LENGTH
+            self.generateDebugActuatorPlots()
 
     def open_calibration_window(self):
         # Disable main window buttons
@@ -237,9 +362,9 @@ class RobotGUI(QMainWindow):
         self.stop_button.setEnabled(False)
         self.calibrate_button.setEnabled(False)
 
-        self.serial.write("calibrate")
+        self.send_command("calibrate")
         
-        self.cal_window = CalibrationWindow(self.serial.write)
+        self.cal_window = CalibrationWindow(self.send_command, self.command_queue.send)
         self.cal_window.setModal(True)
         self.cal_window.exec()
 
@@ -263,24 +388,64 @@ class RobotGUI(QMainWindow):
         self.stop_button.setEnabled(True)
         self.calibrate_button.setEnabled(True)
 
-        self.serial.write("stop") # Ensure the robot moves back to stop state after calibration
+        self.send_command("stop") # Ensure the robot moves back to stop state after calibration
+
+    def open_timing_window(self):
+        # Non-modal: the histograms refresh while the robot runs.
+        if self.timing_window is None:
+            self.timing_window = LoopTimingWindow(self.channel.request, self.log, parent=self)
+        self.timing_window.show()
+        self.timing_window.raise_()
+
+    def open_stream(self):
+        # The waypoints of a local CSV are streamed at the interval of the spin box, without the SD card.
+        if self.streamer is not None and self.streamer.active:
+            self.log("Error: a stream is already running, press Stop first.")
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "Trajectory to stream", "", "CSV files (*.csv)")
+        if not path:
+            return
+        poses = load_csv(path)
+        if not poses:
+            self.log(f"Error: no pose in {path}")
+            return
+        self.streamer = PoseStreamer(self.channel.request, max(1, self.speed_spin.value()), log=self.log)
+        self.streamer.extend(poses)
+        self.streamer.close()
+        self.streamer.begin(on_ready=self.start_stream)
+        self.stream_timer.start(STREAM_PUMP_MS)
+        self.log(f"Streaming {len(poses)} poses from {os.path.basename(path)}")
+
+    def start_stream(self):
+        # The jitter buffer is filled: start the run, the firmware plays the stream.
+        self.send_start()
+        self.streamer.set_playing()
+
+    def pump_stream(self):
+        if self.streamer is None or not self.streamer.active:
+            self.stream_timer.stop()
+            return
+        self.streamer.pump()
+
+    def send_ping(self):
+        # Untagged: the Pong line is matched by the clock sync, not by the channel. Written
+        # directly, not through the command queue: t1 is stamped when the line goes out.
+        self.serial.write(self.clock_sync.make_ping())
 
     def send_trajectory(self):
         filename = self.trajectory_dropdown.currentText()
-        self.log(f"dropdown")
-        self.serial.write(f"trajectory:{filename}")
-        self.log(f"Sent: trajectory:{filename}")
+        self.send_command(f"trajectory:{filename}")
     
     def send_speed(self):
         value = self.speed_spin.value()
-        self.serial.write(f"set fixed interval:{value}")
-        self.log(f"Sent: set fixed interval:{value}")
+        self.send_command(f"set fixed interval:{value}")
 
     # Updated serial handling to capture actuator and pose messages.
-    def handle_serial_data(self, line):
-        # If this is the file list sent from the SD card, capture it and do not process further.
-        if ".csv" in line:
-            self.pending_files = [fn.strip() for fn in line.split(',') if fn.strip().endswith('.csv')]
+    def handle_serial_data(self, line, receive_ns):
+        # Replies to commands (including the SD card file list) are handled by the channel.
+        if self.channel.feed(line):
+            return
+        if self.clock_sync.feed(line, receive_ns):
             return
         
         # Check if line belongs to an actuator message.
@@ -295,7 +460,11 @@ class RobotGUI(QMainWindow):
                     "current_length": float(match.group(4)),
                     "time": int(match.group(5))
                 }
+                self.tag_sample(data, receive_ns)
                 self.actuator_data.append(data)
+                self.live_plots.add_actuator(data)
+                for alert in self.tracking_monitor.add(data):
+                    self.log(alert)
             return
 
         # Check if line belongs to a pose message.
@@ -312,7 +481,9 @@ class RobotGUI(QMainWindow):
                     "yaw": float(match.group(6)),
                     "time": int(match.group(7))
                 }
+                self.tag_sample(data, receive_ns)
                 self.pose_data.append(data)
+                self.live_plots.add_pose(data)
             return
 
         # Check if line belongs to a force message.
@@ -326,7 +497,12 @@ class RobotGUI(QMainWindow):
                     "Fz": float(match.group(3)),
                     "time": int(match.group(4))
                 }
+                self.tag_sample(data, receive_ns)
+                if self.force_control is not None:
+                    self.force_control.add_sample(data["Fz"], data["time"], receive_ns, data["latency_ms"])
                 self.force_data_total.append(data)
+                self.live_plots.add_force("Total", data)
+                self.add_force_sample("Total", data)
             return
 
         if line.startswith("Front Force - X:"):
@@ -339,7 +515,10 @@ class RobotGUI(QMainWindow):
                     "Fz": float(match.group(3)),
                     "time": int(match.group(4))
                 }
+                self.tag_sample(data, receive_ns)
                 self.force_data_front.append(data)
+                self.live_plots.add_force("Front", data)
+                self.add_force_sample("Front", data)
             return
         if line.startswith("Back Right Force - X:"):
             force_pattern = r"Back Right Force - X:\s*([^,]+),\s*Y:\s*([^,]+),\s*Z:\s*([^,]+),\s*Time:\s*(\d+)"
@@ -351,7 +530,10 @@ class RobotGUI(QMainWindow):
                     "Fz": float(match.group(3)),
                     "time": int(match.group(4))
                 }
+                self.tag_sample(data, receive_ns)
                 self.force_data_backr.append(data)
+                self.live_plots.add_force("Back Right", data)
+                self.add_force_sample("Back Right", data)
             return
         if line.startswith("Back Left Force - X:"):
             force_pattern = r"Back Left Force - X:\s*([^,]+),\s*Y:\s*([^,]+),\s*Z:\s*([^,]+),\s*Time:\s*(\d+)"
@@ -363,11 +545,14 @@ class RobotGUI(QMainWindow):
                     "Fz": float(match.group(3)),
                     "time": int(match.group(4))
                 }
+                self.tag_sample(data, receive_ns)
                 self.force_data_backl.append(data)
+                self.live_plots.add_force("Back Left", data)
+                self.add_force_sample("Back Left", data)
             return
 
         if line.startswith("Debug Actuator"):         
-            debug_actuator_pattern = r"Debug Actuator\s*(\d+)\s*raw pot value:\s*([\d.]+),\s*length:\s*([\d.]+),\s*filtered length:\s*([\d.]+),?\s*time:\s*(\d+)" 
+            debug_actuator_pattern = r"Debug Actuator\s*(\d+)\s*raw pot value:\s*([\d.]+),\s*length:\s*([\d.]+),\s*filtered length:\s*([\d.]+),?\s*time:\s*(\d+)(?:,\s*pwm:\s*(-?[\d.]+))?" 
             match = re.match(debug_actuator_pattern, line)
             if match:
                 data = {
@@ -375,7 +560,8 @@ class RobotGUI(QMainWindow):
                     "raw_value": float(match.group(2)),
                     "length": float(match.group(3)),
                     "filtered_length": float(match.group(4)),
-                    "time": int(match.group(5))
+                    "time": int(match.group(5)),
+                    "pwm": float(match.group(6)) if match.group(6) is not None else None  # PWM fed to the length estimator
                 }
                 # Append to actuator_data for consistency, or handle separately if needed.
                 self.debug_actuator_data.append(data)
@@ -387,34 +573,28 @@ class RobotGUI(QMainWindow):
         except ValueError:
             self.log(line) 
 
+    def tag_sample(self, data, receive_ns):
+        # Host receive time and estimated device-to-host latency (None until the first ping reply).
+        data["host_time_ns"] = receive_ns
+        data["latency_ms"] = self.clock_sync.tag(data["time"], receive_ns)
+
     def log(self, message):
-        timestamp = time.strftime("[%H:%M:%S] ")
-        full_message = timestamp + message
-        # Wrap each message in its own paragraph so that the styling is isolated.
-        if message.startswith("Warning"):
-            colored_message = f'<p style="color: orange; margin: 0;">{full_message}</p>'
-        elif message.startswith("Error"):
-            colored_message = f'<p style="color: red; margin: 0;">{full_message}</p>'
-        else:
-            colored_message = f'<p style="margin: 0;">{full_message}</p>'
-        self.error_console.append(colored_message)
-        self.error_console.moveCursor(QTextCursor.End)
+        # Queued and inserted once per frame; Warning/Error lines are coloured by the model.
+        self.error_console.append(message)
 
     def update_plots(self):
-        if not self.data:
-            return
-
-        # ...existing code for 3D plot (if needed)...
-        # arr = np.array(self.data[-100:])
-        # x, y, z, c1, c2 = arr[:, 0], arr[:, 1], arr[:, 2], arr[:, 3], arr[:, 4]
-
-        # self.ax3d.clear()
-        # self.ax3d.plot(x, y, z, color='blue')
-        # self.ax3d.set_xlabel('X')
-        # self.ax3d.set_ylabel('Y')
-        # self.ax3d.set_zlabel('Z')
-
-        # self.canvas_3d.draw()
+        # Called by plot_timer: cost depends on the plot width, not on the run length.
+        self.live_plots.refresh()
+        self.force_stats_label.setText(format_summary(self.force_analyser.summary(), self.last_cycle))
+        self.tracking_label.setText(self.tracking_monitor.format_status())
+        self.latency_label.setText(self.clock_sync.format_status())
+        if self.force_control is not None:
+            self.force_control_label.setText(self.force_control.format_status())
+
+    def add_force_sample(self, cell, data):
+        cycle = self.force_analyser.add(cell, data)
+        if cycle is not None:
+            self.last_cycle = cycle
 
     def generate_plots(self):
         # Ensure there is data to plot.
@@ -438,10 +618,10 @@ class RobotGUI(QMainWindow):
                 #change time so that the first point is at 0 and it's in seconds and not ms
                 times = [d["time"] for d in act_data]
                 times = [(t - times[0]) / 1000 for t in times]  # Convert ms to seconds
-                target_lengths = [d["target_length"] for d in act_data]
-                current_lengths = [d["current_length"] for d in act_data]
-                axs1[i].plot(times, target_lengths, label="Target Length")
-                axs1[i].plot(times, current_lengths, label="Current Length")
+                lengths = [(d["target_length"], d["current_length"]) for d in act_data]
+                times, lengths = downsample(times, lengths)    # Same samples for both lines
+                axs1[i].plot(times, lengths[:, 0], label="Target Length")
+                axs1[i].plot(times, lengths[:, 1], label="Current Length")
                 axs1[i].set_title(f"Actuator {i}")
                 axs1[i].set_xlabel("Time (s)")
                 axs1[i].set_ylabel("Length (mm)")
@@ -463,6 +643,7 @@ class RobotGUI(QMainWindow):
                 times = [d["time"] for d in act_data]
                 times = [(t - times[0]) / 1000 for t in times]  # Convert ms to seconds
                 speeds = [d["speed"] for d in act_data]
+                times, speeds = downsample(times, speeds)
                 axs2[i].plot(times, speeds, label="Speed", color="green")
                 axs2[i].set_title(f"Actuator {i}")
                 axs2[i].set_xlabel("Time (s)")
@@ -486,6 +667,7 @@ class RobotGUI(QMainWindow):
                 times = [d["time"] for d in self.pose_data]
                 times = [(t - times[0]) / 1000 for t in times]  # Convert ms to seconds
                 values = [d[dim] for d in self.pose_data]
+                times, values = downsample(times, values)
                 axs3[idx].plot(times, values, label=dim, color="red")
                 axs3[idx].set_title(dim)
                 axs3[idx].set_xlabel("Time (s)")
@@ -502,7 +684,7 @@ class RobotGUI(QMainWindow):
         # --- Save actuator data to CSV ---
         actuator_csv_filename = f"{ROOT_DIR}\\{filename}_{speed}_ms_actuator_data_{timestamp}.csv"
         with open(actuator_csv_filename, mode='w', newline='') as csvfile:
-            fieldnames = ["actuator", "speed", "target_length", "current_length", "time"]
+            fieldnames = ["actuator", "speed", "target_length", "current_length", "time", "host_time_ns", "latency_ms"]
             writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
             writer.writeheader()
             writer.writerows(self.actuator_data)
@@ -511,7 +693,7 @@ class RobotGUI(QMainWindow):
         # --- Save pose data to CSV ---
         pose_csv_filename = f"{ROOT_DIR}\\{filename}_{speed}_ms_pose_data_{timestamp}.csv"
         with open(pose_csv_filename, mode='w', newline='') as csvfile:
-            fieldnames = ["x", "y", "z", "roll", "pitch", "yaw", "time"]
+            fieldnames = ["x", "y", "z", "roll", "pitch", "yaw", "time", "host_time_ns", "latency_ms"]
             writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
             writer.writeheader()
             writer.writerows(self.pose_data)
@@ -555,6 +737,7 @@ class RobotGUI(QMainWindow):
                 times = [d["time"] for d in load_cell_data]
                 times = [(t - times[0]) / 1000 for t in times]
                 values = [d[dim] for d in load_cell_data]
+                times, values = downsample(times, values)   # Min/max buckets: bite peaks are kept
                 axs[idx].plot(times, values, label=dim, color="blue")
                 axs[idx].set_title(f"{load_cell_names[i]} Load Cell - {dim}")
                 axs[idx].set_xlabel("Time (s)")
@@ -565,29 +748,30 @@ class RobotGUI(QMainWindow):
             fig.savefig(force_filename)
             self.log(f"Saved {load_cell_names[i]} force plot: {force_filename}")
         # --- Log max z force on each load cell ---
-        #only log max after the first 30 seconds of data collection
-        stable_force_data_front = [d for d in self.force_data_front if d["time"] >= 30000]
-        stable_force_data_backr = [d for d in self.force_data_backr if d["time"] >= 30000]
-        stable_force_data_backl = [d for d in self.force_data_backl if d["time"] >= 30000]
-        stable_force_data_total = [d for d in self.force_data_total if d["time"] >= 30000]
-        max_forces = {
-            "Front": max([d["Fz"] for d in stable_force_data_front], default=0),
-            "Back Right": max([d["Fz"] for d in stable_force_data_backr], default=0),
-            "Back Left": max([d["Fz"] for d in stable_force_data_backl], default=0),
-            "Total": max([d["Fz"] for d in stable_force_data_total], default=0)
-        }
-        for load_cell, max_force in max_forces.items():
+        # Kept by the force analyser as the samples arrived (only after the first 30 s).
+        for load_cell, max_force in self.force_analyser.max_fz.items():
             self.log(f"Max Z Force on {load_cell} Load Cell: {max_force:.2f} N")
         # --- Save force data to CSV ---
         force_csv_filename = f"{ROOT_DIR}\\{filename}_{speed}_ms_force_data_{timestamp}.csv"
         with open(force_csv_filename, mode='w', newline='') as csvfile:
-            fieldnames = ["Fx", "Fy", "Fz", "time"]
+            fieldnames = ["Fx", "Fy", "Fz", "time", "host_time_ns", "latency_ms"]
             writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
             writer.writeheader()
             for data in self.force_data_front + self.force_data_backr + self.force_data_backl + self.force_data_total:
                 writer.writerow(data)
         self.log(f"Saved force data CSV: {force_csv_filename}")
 
+        # --- Save the chew cycles found by the force analyser ---
+        summary = self.force_analyser.summary()
+        self.log(format_summary(summary))
+        if summary["cycles"]:
+            cycles_csv_filename = f"{ROOT_DIR}\\{filename}_{speed}_ms_force_cycles_{timestamp}.csv"
+            with open(cycles_csv_filename, mode='w', newline='') as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=CYCLE_FIELDS)
+                writer.writeheader()
+                writer.writerows(self.force_analyser.rows())
+            self.log(f"Saved force cycles CSV: {cycles_csv_filename}")
+
         # --- Close figures to free memory ---
         plt.close('all')
 
@@ -609,6 +793,15 @@ class RobotGUI(QMainWindow):
         speed = self.speed_spin.value()
         timestamp = time.strftime("%Y%m%d-%H%M%S")
 
+        # --- Save debug actuator data to CSV (simulation/length_estimator.py validates the estimators on it) ---
+        debug_csv_filename = f"{ROOT_DIR}\\{filename}_{speed}_ms_debug_actuator_data_{timestamp}.csv"
+        with open(debug_csv_filename, mode='w', newline='') as csvfile:
+            fieldnames = ["actuator", "raw_value", "length", "filtered_length", "time", "pwm"]
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(self.debug_actuator_data)
+        self.log(f"Saved debug actuator data CSV: {debug_csv_filename}")
+
         # --- Figure 1: Plot for actuator length and filtered length ---
         fig1, axs1 = plt.subplots(3, 2, figsize=(10, 8))
         axs1 = axs1.flatten()
@@ -617,10 +810,10 @@ class RobotGUI(QMainWindow):
             if act_data:
                 times = [d["time"] for d in act_data]
                 times = [(t - times[0]) / 1000 for t in times]  # convert ms to s
-                lengths = [d["length"] for d in act_data]
-                filtered_lengths = [d["filtered_length"] for d in act_data]
-                axs1[i].plot(times, lengths, label="Length", color="green")
-                axs1[i].plot(times, filtered_lengths, label="Filtered Length", color="red")
+                lengths = [(d["length"], d["filtered_length"]) for d in act_data]
+                times, lengths = downsample(times, lengths)
+                axs1[i].plot(times, lengths[:, 0], label="Length", color="green")
+                axs1[i].plot(times, lengths[:, 1], label="Filtered Length", color="red")
                 axs1[i].set_title(f"Actuator {i}")
                 axs1[i].set_xlabel("Time (s)")
                 axs1[i].set_ylabel("Length (mm)")
@@ -642,6 +835,7 @@ class RobotGUI(QMainWindow):
                 times = [d["time"] for d in act_data]
                 times = [(t - times[0]) / 1000 for t in times]  # convert ms to s
                 raw_values = [d["raw_value"] for d in act_data]
+                times, raw_values = downsample(times, raw_values)
                 axs2[i].plot(times, raw_values, label="Raw Value", color="orange")
                 axs2[i].set_title(f"Actuator {i}")
                 axs2[i].set_xlabel("Time (s)")
@@ -662,14 +856,19 @@ class RobotGUI(QMainWindow):
         self.debug_actuator_data.clear()
 
     def closeEvent(self, event):
+        self.channel.close()
         self.serial.stop()
         super().closeEvent(event)
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = RobotGUI()
+    ap = argparse.ArgumentParser(description="X-Jaw control GUI")
+    ap.add_argument("--port", help="Serial port of the Teensy, e.g. the pty of simulation/teensy_emulator.py "
+                                   "(default: first serial port found)")
+    args, qt_args = ap.parse_known_args()
+    app = QApplication(sys.argv[:1] + qt_args)
+    window = RobotGUI(port=args.port)
     window.setWindowIcon(QIcon("app_icon.ico"))
-    window.resize(900, 300)
+    window.resize(900, 900)
     window.show()
     sys.exit(app.exec())
@@ -0,0 +1,188 @@
+"""
+live_plots.py
+-------------
+
+Live scrolling strip charts for the X-Jaw GUI.
+
+* Every series lives in a fixed-capacity ring buffer, so memory does not grow
+  with the length of a run.
+* Before drawing, each visible window is min/max-decimated to the pixel width
+  of its axes (common/downsample.py): the number of drawn vertices is bounded by the screen, not by
+  the number of samples received.
+* Lines are drawn with blitting; the static background (axes, ticks, labels)
+  is only re-rendered when the y-limits have to change or the widget resizes.
+"""
+
+import pathlib
+import sys
+
+import numpy as np
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+from common.downsample import minmax_indices
+
+WINDOW_S = 10.0         # Visible time span (s)
+BUFFER_CAPACITY = 4096  # Samples kept per series (~40 s at 100 Hz)
+
+
+class RingBuffer:
+    """Fixed-capacity buffer of (time, value) samples with ordered read-out."""
+
+    def __init__(self, capacity=BUFFER_CAPACITY):
+        self.t = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.capacity = capacity
+        self.head = 0   # Index of the next write
+        self.size = 0
+
+    def append(self, t, y):
+        self.t[self.head] = t
+        self.y[self.head] = y
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def clear(self):
+        self.head = 0
+        self.size = 0
+
+    def last_time(self):
+        return self.t[self.head - 1] if self.size else None
+
+    def since(self, t_min):
+        """Return the samples with time >= t_min, oldest first."""
+        if self.size < self.capacity:
+            t, y = self.t[:self.size], self.y[:self.size]
+        else:
+            t = np.concatenate((self.t[self.head:], self.t[:self.head]))
+            y = np.concatenate((self.y[self.head:], self.y[:self.head]))
+        i = np.searchsorted(t, t_min)
+        return t[i:], y[i:]
+
+
+class LivePlotCanvas(FigureCanvas):
+    """Strip charts for actuator tracking, pose and per-cell vertical force."""
+
+    ACTUATOR_COLORS = {"target": "tab:blue", "current": "tab:orange"}
+    POSE_COLORS = {"x": "tab:red", "y": "tab:green", "z": "tab:blue",
+                   "roll": "tab:red", "pitch": "tab:green", "yaw": "tab:blue"}
+    FORCE_COLORS = {"Front": "limegreen", "Back Right": "black",
+                    "Back Left": "violet", "Total": "tab:blue"}
+
+    def __init__(self, window_s=WINDOW_S):
+        super().__init__(Figure(figsize=(9, 7)))
+        self.window_s = window_s
+        self.series = {}       # name -> (RingBuffer, Line2D)
+        self._background = None
+        self._needs_full_draw = True
+
+        gs = self.figure.add_gridspec(5, 2)
+        self.act_axes = []
+        for i in range(6):
+            ax = self.figure.add_subplot(gs[i // 2, i % 2])
+            ax.set_title(f"Actuator {i}", fontsize=8)
+            for kind, color in self.ACTUATOR_COLORS.items():
+                self._add_series(f"act{i}_{kind}", ax, color)
+            self.act_axes.append(ax)
+
+        self.pos_ax = self.figure.add_subplot(gs[3, 0])
+        self.pos_ax.set_title("Pose (mm)", fontsize=8)
+        self.rot_ax = self.figure.add_subplot(gs[3, 1])
+        self.rot_ax.set_title("Pose (rad)", fontsize=8)
+        for dim in ("x", "y", "z"):
+            self._add_series(f"pose_{dim}", self.pos_ax, self.POSE_COLORS[dim], label=dim)
+        for dim in ("roll", "pitch", "yaw"):
+            self._add_series(f"pose_{dim}", self.rot_ax, self.POSE_COLORS[dim], label=dim)
+
+        self.force_ax = self.figure.add_subplot(gs[4, :])
+        self.force_ax.set_title("Fz (N)", fontsize=8)
+        for cell, color in self.FORCE_COLORS.items():
+            self._add_series(f"fz_{cell}", self.force_ax, color, label=cell)
+
+        for ax in self.figure.axes:
+            ax.set_xlim(-self.window_s, 0)
+            ax.tick_params(labelsize=7)
+            ax.grid(True, alpha=0.3)
+        for ax in (self.pos_ax, self.rot_ax, self.force_ax):
+            ax.legend(loc="upper left", fontsize=6, ncol=4)
+        self.figure.tight_layout()
+
+        self.mpl_connect("draw_event", self._on_draw)
+
+    def _add_series(self, name, ax, color, label=None):
+        (line,) = ax.plot([], [], color=color, linewidth=1, label=label, animated=True)
+        self.series[name] = (RingBuffer(), line)
+
+    # ---- data input (times in device ms, as sent by the firmware) ----
+    def add_actuator(self, data):
+        t = data["time"] / 1000
+        i = data["actuator"]
+        self.series[f"act{i}_target"][0].append(t, data["target_length"])
+        self.series[f"act{i}_current"][0].append(t, data["current_length"])
+
+    def add_pose(self, data):
+        t = data["time"] / 1000
+        for dim in ("x", "y", "z", "roll", "pitch", "yaw"):
+            self.series[f"pose_{dim}"][0].append(t, data[dim])
+
+    def add_force(self, cell, data):
+        self.series[f"fz_{cell}"][0].append(data["time"] / 1000, data["Fz"])
+
+    def clear(self):
+        for buffer, line in self.series.values():
+            buffer.clear()
+            line.set_data([], [])
+        self._needs_full_draw = True
+
+    # ---- rendering ----
+    def refresh(self):
+        """Update every line from its buffer and blit; called by a fixed-rate timer."""
+        times = [b.last_time() for b, _ in self.series.values() if b.size]
+        if not times:
+            return
+        t_now = max(times)
+        t_min = t_now - self.window_s
+
+        for buffer, line in self.series.values():
+            t, y = buffer.since(t_min)
+            n_buckets = int(line.axes.bbox.width) // 2
+            idx = minmax_indices(y, n_buckets)
+            line.set_data(t[idx] - t_now, y[idx])
+
+        for ax in self.figure.axes:
+            if self._rescale_y(ax):
+                self._needs_full_draw = True
+
+        if self._needs_full_draw or self._background is None:
+            self._needs_full_draw = False
+            self.draw()     # Re-renders the background and calls _on_draw
+        else:
+            self.restore_region(self._background)
+            self._draw_lines()
+            self.blit(self.figure.bbox)
+
+    def _rescale_y(self, ax):
+        """Widen (or shrink to fit) the y-limits; return True if they changed."""
+        ys = [line.get_ydata() for line in ax.get_lines() if len(line.get_ydata())]
+        if not ys:
+            return False
+        lo = min(np.min(y) for y in ys)
+        hi = max(np.max(y) for y in ys)
+        cur_lo, cur_hi = ax.get_ylim()
+        span = max(hi - lo, 1e-3)
+        # Only touch the limits when data leaves them or uses a small part of them,
+        # so the background is not re-rendered every frame.
+        if lo < cur_lo or hi > cur_hi or span < 0.25 * (cur_hi - cur_lo):
+            margin = 0.1 * span
+            ax.set_ylim(lo - margin, hi + margin)
+            return True
+        return False
+
+    def _draw_lines(self):
+        for _, line in self.series.values():
+            line.axes.draw_artist(line)
+
+    def _on_draw(self, event):
+        self._background = self.copy_from_bbox(self.figure.bbox)
+        self._draw_lines()
@@ -0,0 +1,139 @@
+"""
+log_view.py
+-----------
+
+Bounded, batched console for the X-Jaw GUI.
+
+* Messages are queued by ``append`` and inserted into the model once per frame
+  by a timer, so a burst of firmware warnings costs one layout pass.
+* The model keeps at most ``capacity`` rows; the oldest rows are dropped.
+* Consecutive messages that only differ by their numbers (e.g. the per-tick
+  clamp warnings) are collapsed into one row with a repeat counter ("×312")
+  as long as they keep arriving within ``collapse_window_s``.
+"""
+
+import re
+import time
+from collections import deque
+
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QTimer
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import QListView, QAbstractItemView
+
+LOG_CAPACITY = 5000       # Maximum number of rows kept
+LOG_FLUSH_MS = 33         # Batch insert period (~30 fps)
+COLLAPSE_WINDOW_S = 1.0   # Repeats closer than this are collapsed
+
+_NUMBER_RE = re.compile(r"[-+]?\d+(?:\.\d+)?")
+
+
+class LogEntry:
+    __slots__ = ("key", "text", "stamp", "count", "last_seen")
+
+    def __init__(self, key, text, stamp, now):
+        self.key = key          # Message with numbers masked, used for collapsing
+        self.text = text
+        self.stamp = stamp
+        self.count = 1
+        self.last_seen = now
+
+    def display(self):
+        if self.count > 1:
+            return f"{self.stamp}{self.text}  ×{self.count}"
+        return f"{self.stamp}{self.text}"
+
+
+class LogModel(QAbstractListModel):
+    def __init__(self, capacity=LOG_CAPACITY, collapse_window_s=COLLAPSE_WINDOW_S, parent=None):
+        super().__init__(parent)
+        self.capacity = capacity
+        self.collapse_window_s = collapse_window_s
+        self.entries = deque()
+        self.pending = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self.entries[index.row()]
+        if role == Qt.DisplayRole:
+            return entry.display()
+        if role == Qt.ForegroundRole:
+            if entry.text.startswith("Warning"):
+                return QColor("orange")
+            if entry.text.startswith("Error"):
+                return QColor("red")
+        return None
+
+    def append(self, message):
+        """Queue a message; it becomes visible on the next flush."""
+        self.pending.append((time.monotonic(), time.strftime("[%H:%M:%S] "), message))
+
+    def flush(self):
+        """Insert every queued message in one batch. Returns True if rows were added."""
+        if not self.pending:
+            return False
+        pending, self.pending = self.pending, []
+
+        last = self.entries[-1] if self.entries else None
+        last_changed = False
+        new = []
+        for now, stamp, message in pending:
+            key = _NUMBER_RE.sub("#", message)
+            target = new[-1] if new else last
+            if target is not None and target.key == key and now - target.last_seen < self.collapse_window_s:
+                target.text = message
+                target.stamp = stamp
+                target.count += 1
+                target.last_seen = now
+                if target is last:
+                    last_changed = True
+            else:
+                new.append(LogEntry(key, message, stamp, now))
+
+        if last_changed:
+            row = self.createIndex(len(self.entries) - 1, 0)
+            self.dataChanged.emit(row, row, [Qt.DisplayRole])
+        if not new:
+            return False
+
+        new = new[-self.capacity:]
+        overflow = len(self.entries) + len(new) - self.capacity
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            for _ in range(overflow):
+                self.entries.popleft()
+            self.endRemoveRows()
+
+        first = len(self.entries)
+        self.beginInsertRows(QModelIndex(), first, first + len(new) - 1)
+        self.entries.extend(new)
+        self.endInsertRows()
+        return True
+
+
+class LogView(QListView):
+    """Read-only console view that follows the newest row unless scrolled up."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.log_model = LogModel(parent=self)
+        self.setModel(self.log_model)
+        self.setUniformItemSizes(True)   # Constant-time layout regardless of row count
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+
+        self.flush_timer = QTimer(self)
+        self.flush_timer.timeout.connect(self.flush)
+        self.flush_timer.start(LOG_FLUSH_MS)
+
+    def append(self, message):
+        self.log_model.append(message)
+
+    def flush(self):
+        bar = self.verticalScrollBar()
+        at_bottom = bar.value() >= bar.maximum()
+        if self.log_model.flush() and at_bottom:
+            self.scrollToBottom()
@@ -0,0 +1,200 @@
+"""
+loop_timing.py
+--------------
+
+Loop timing panel of the X-Jaw GUI.
+
+* ``get timing`` makes the firmware print, for the window since the previous
+  request, the execution time of each ``loop()`` phase (main/LoopTiming.h):
+  count, min, mean, max, p99 and a histogram in half-octave bins of CPU
+  cycles, then the deadline statistics of the trajectory and actuator loops
+  (main/Scheduler.h).
+* ``parse_timing`` turns the reply lines into a ``TimingReport``; pure Python,
+  no Qt, so it can be used from scripts.
+* ``LoopTimingWindow`` requests a report every ``REFRESH_MS`` while it is open
+  and draws one histogram per phase (time on a log axis, the p99 and the max
+  marked) with the statistics in the titles.
+"""
+
+import math
+import re
+
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QDialog, QLabel, QVBoxLayout
+
+REFRESH_MS = 1000       # Period of the "get timing" requests
+TIMEOUT_S = 1.0
+
+_WINDOW_RE = re.compile(r"^Timing window - (\d+) ms, cycles per us: ([\d.]+)$")
+_PHASE_RE = re.compile(r"^Timing phase (\w+) - n: (\d+), min: ([\d.]+), mean: ([\d.]+), "
+                       r"max: ([\d.]+), p99: ([\d.]+), hist:(.*)$")
+_LOOP_RE = re.compile(r"^(?:Warning: )?Timing - (\w+) loop: (\d+) ticks of (\d+) us, late min (\d+) / "
+                      r"mean ([\d.]+) / max (\d+) us, (\d+) ticks dropped in (\d+) overruns$")
+
+
+def bin_lower_cycles(index):
+    """Lower edge of a histogram bin, in cycles: bin 2k starts at 2^k, bin 2k+1 at 1.5 * 2^k."""
+    if index == 0:
+        return 0.0
+    return (1.5 if index % 2 else 1.0) * 2.0 ** (index // 2)
+
+
+class PhaseTiming:
+    def __init__(self, name, count, min_us, mean_us, max_us, p99_us, histogram):
+        self.name = name
+        self.count = count
+        self.min_us = min_us
+        self.mean_us = mean_us
+        self.max_us = max_us
+        self.p99_us = p99_us
+        self.histogram = histogram      # bin index -> count
+
+
+class TaskTiming:
+    def __init__(self, name, ticks, period_us, late_min_us, late_mean_us, late_max_us, dropped, overruns):
+        self.name = name
+        self.ticks = ticks
+        self.period_us = period_us
+        self.late_min_us = late_min_us
+        self.late_mean_us = late_mean_us
+        self.late_max_us = late_max_us
+        self.dropped = dropped
+        self.overruns = overruns
+
+
+class TimingReport:
+    def __init__(self):
+        self.window_ms = 0
+        self.cycles_per_us = 1.0
+        self.phases = {}    # name -> PhaseTiming, "loop" is the whole pass
+        self.tasks = {}     # "Trajectory" / "Actuator" -> TaskTiming
+
+    def bin_edges_us(self, index):
+        return (bin_lower_cycles(index) / self.cycles_per_us,
+                bin_lower_cycles(index + 1) / self.cycles_per_us)
+
+
+def parse_timing(lines):
+    """TimingReport of the reply lines of ``get timing`` (other lines are ignored)."""
+    report = TimingReport()
+    for line in lines:
+        line = line.strip()
+        m = _WINDOW_RE.match(line)
+        if m:
+            report.window_ms = int(m.group(1))
+            report.cycles_per_us = float(m.group(2)) or 1.0
+            continue
+        m = _PHASE_RE.match(line)
+        if m:
+            histogram = {}
+            for item in m.group(7).split():
+                index, count = item.split("=")
+                histogram[int(index)] = int(count)
+            report.phases[m.group(1)] = PhaseTiming(m.group(1), int(m.group(2)), *map(float, m.group(3, 4, 5, 6)),
+                                                    histogram)
+            continue
+        m = _LOOP_RE.match(line)
+        if m:
+            report.tasks[m.group(1)] = TaskTiming(m.group(1), int(m.group(2)), int(m.group(3)), int(m.group(4)),
+                                                  float(m.group(5)), int(m.group(6)), int(m.group(7)),
+                                                  int(m.group(8)))
+    return report
+
+
+def format_tasks(report):
+    parts = []
+    for task in report.tasks.values():
+        text = (f"{task.name} loop ({task.period_us} us): late mean {task.late_mean_us:.1f} / "
+                f"max {task.late_max_us} us")
+        if task.dropped:
+            text += f", {task.dropped} ticks dropped in {task.overruns} overruns"
+        parts.append(text)
+    return "   ".join(parts) if parts else "Loop deadlines: no run yet"
+
+
+class LoopTimingCanvas(FigureCanvas):
+    """One histogram per loop phase, time in us on a log axis."""
+
+    PHASES = ("loop", "commands", "force", "trajectory", "kinematics", "actuators", "telemetry")
+
+    def __init__(self):
+        super().__init__(Figure(figsize=(8, 8)))
+        self.axes = {}
+        for k, name in enumerate(self.PHASES):
+            self.axes[name] = self.figure.add_subplot(len(self.PHASES), 1, k + 1)
+        self.figure.tight_layout()
+
+    def show_report(self, report):
+        for name, ax in self.axes.items():
+            ax.clear()
+            ax.tick_params(labelsize=7)
+            phase = report.phases.get(name)
+            if phase is None or phase.count == 0:
+                ax.set_title(f"{name}: no sample", fontsize=8)
+                continue
+            for index, count in phase.histogram.items():
+                lo, hi = report.bin_edges_us(index)
+                lo = max(lo, 0.5 / report.cycles_per_us)     # Bin 0 starts at 0: keep it on the log axis
+                ax.bar(lo, count, width=hi - lo, align="edge", color="tab:blue", alpha=0.7)
+            ax.axvline(phase.p99_us, color="tab:orange", linewidth=1)
+            ax.axvline(phase.max_us, color="tab:red", linewidth=1)
+            ax.set_xscale("log")
+            ax.set_yscale("log")
+            ax.set_ylim(bottom=0.5)
+            ax.grid(True, alpha=0.3)
+            rate = phase.count / (report.window_ms / 1000) if report.window_ms else math.nan
+            ax.set_title(f"{name}: n {phase.count} ({rate:.0f}/s), min {phase.min_us:.1f}, "
+                         f"mean {phase.mean_us:.1f}, p99 {phase.p99_us:.1f}, max {phase.max_us:.1f} us",
+                         fontsize=8)
+        self.axes[self.PHASES[-1]].set_xlabel("us (orange: p99, red: max)", fontsize=8)
+        self.figure.tight_layout()
+        self.draw_idle()
+
+
+class LoopTimingWindow(QDialog):
+    """Non-modal window polling ``get timing`` through the command channel while open."""
+
+    def __init__(self, request, log, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Loop timing")
+        self.request = request
+        self.log = log
+        self.pending = None
+
+        self.canvas = LoopTimingCanvas()
+        self.tasks_label = QLabel(format_tasks(TimingReport()))
+        layout = QVBoxLayout()
+        layout.addWidget(self.tasks_label)
+        layout.addWidget(self.canvas, stretch=1)
+        self.setLayout(layout)
+        self.resize(700, 900)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start(REFRESH_MS)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()       # Closed or hidden: stop polling the firmware
+        super().hideEvent(event)
+
+    def refresh(self):
+        if self.pending is not None and not self.pending.done():
+            return      # One request in flight at a time
+        self.pending = self.request("get timing", timeout=TIMEOUT_S)
+        self.pending.add_done_callback(self.on_reply)
+
+    def on_reply(self, future):
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            self.log(f"Error: {future.exception()}")
+            return
+        report = parse_timing(future.result().lines)
+        self.canvas.show_report(report)
+        self.tasks_label.setText(format_tasks(report))
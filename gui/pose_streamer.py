@@ -0,0 +1,278 @@
+"""
+pose_streamer.py
+----------------
+
+Stream poses or actuator lengths to the firmware instead of playing a
+trajectory from the SD card: no copy to the card between experiments and no
+limit on the trajectory length.
+
+* ``stream begin:pose`` (or ``lengths``) empties the jitter buffer of the
+  firmware (main/PoseStream.h). Batches ``stream:<t0>,<dt>;<6 values>;...``
+  append points every dt ms of stream time, the values as integers in
+  1/STREAM_LENGTH_SCALE mm and 1/STREAM_ANGLE_SCALE rad. Each batch is
+  answered with the buffer level and the lead, the stream time buffered
+  ahead of the playhead.
+* ``PoseStreamer`` fills the buffer up to ``lead_ms`` before calling
+  ``on_ready`` (the GUI then sends ``start``), and then sends a batch
+  whenever the lead, counted down on the host clock since the last reply,
+  falls below it. One batch is in flight at a time. After the last point it
+  sends ``stream end``: the firmware then holds the last point instead of
+  reporting underruns. ``pump()`` must be called periodically (a QTimer in
+  the GUI, a loop in scripts).
+* Points can be added while streaming (``extend``), e.g. from a live source;
+  ``close`` marks the end.
+
+Pure Python, no Qt. From the command line (needs pyserial), a trajectory CSV
+in the SD card format (header, then x,y,z,roll,pitch,yaw)::
+
+    python pose_streamer.py --port /dev/ttyACM0 ../Results/chewing.csv --interval 100
+"""
+
+import argparse
+import re
+import threading
+import time
+from collections import deque
+
+STREAM_POSE, STREAM_LENGTHS = "pose", "lengths"
+LENGTH_SCALE = 100          # STREAM_LENGTH_SCALE of main/Config.h: 1/100 mm
+ANGLE_SCALE = 10000         # STREAM_ANGLE_SCALE: 1/10000 rad
+MAX_BATCH_CHARS = 500       # CMD_BUFFER_SIZE of main/SerialCommand.h is 512, with the "#<id> " tag
+LEAD_MS = 300               # Stream time kept buffered ahead of the playhead
+TIMEOUT_S = 1.0
+
+_STATUS_RE = re.compile(r"^Stream - mode: (\w+), points: (\d+)/(\d+), lead: (\d+) ms, "
+                        r"playhead: (\d+) ms, underruns: (\d+)$")
+
+
+class StreamStatus:
+    def __init__(self, mode, level, capacity, lead_ms, playhead_ms, underruns):
+        self.mode = mode
+        self.level = level
+        self.capacity = capacity
+        self.lead_ms = lead_ms
+        self.playhead_ms = playhead_ms
+        self.underruns = underruns
+
+
+def parse_status(lines):
+    """StreamStatus of the last status line among lines, None if there is none."""
+    status = None
+    for line in lines:
+        m = _STATUS_RE.match(line.strip())
+        if m:
+            status = StreamStatus(m.group(1), *(int(v) for v in m.group(2, 3, 4, 5, 6)))
+    return status
+
+
+def encode_point(values, mode=STREAM_POSE):
+    """x, y, z (mm), roll, pitch, yaw (rad), or six lengths (mm), as the integers of a batch."""
+    scales = (LENGTH_SCALE,) * 3 + ((ANGLE_SCALE if mode == STREAM_POSE else LENGTH_SCALE),) * 3
+    return ",".join(str(round(v * s)) for v, s in zip(values, scales))
+
+
+def encode_batch(t0, dt, points, mode=STREAM_POSE, max_chars=MAX_BATCH_CHARS):
+    """(command, number of points it holds): as many of the points, dt ms apart from t0, as fit."""
+    command = f"stream:{t0},{dt}"
+    count = 0
+    for values in points:
+        item = ";" + encode_point(values, mode)
+        if len(command) + len(item) > max_chars:
+            break
+        command += item
+        count += 1
+    return command, count
+
+
+def load_csv(path):
+    """Poses of a trajectory CSV in the SD card format: a header line, then x,y,z,roll,pitch,yaw."""
+    poses = []
+    with open(path) as f:
+        next(f, None)
+        for line in f:
+            fields = line.strip().split(",")
+            if len(fields) >= 6:
+                poses.append(tuple(float(v) for v in fields[:6]))
+    return poses
+
+
+class PoseStreamer:
+    def __init__(self, request, interval_ms, mode=STREAM_POSE, lead_ms=LEAD_MS, log=print,
+                 clock=time.monotonic):
+        self._request = request     # CommandChannel.request
+        self._clock = clock
+        self._lock = threading.RLock()     # Replies may complete while a request is being sent
+        self.interval_ms = int(interval_ms)
+        self.mode = mode
+        self.lead_ms = lead_ms
+        self.log = log
+        self.pending = deque()      # Points not sent yet
+        self.sent = 0               # Points sent, the next one is at sent * interval_ms
+        self.closed = False         # No more points will be added
+        self.status = None          # Last StreamStatus and host time it was received
+        self.status_time = 0.0
+        self.playing = False        # start sent: the playhead runs
+        self.state = "idle"         # idle, opening, filling, streaming, ending, draining, done, failed
+        self.in_flight = None
+        self.on_ready = None
+
+    # ---- points ----
+    def extend(self, points):
+        with self._lock:
+            self.pending.extend(points)
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+
+    # ---- control ----
+    def begin(self, on_ready=None):
+        """Empty the firmware buffer and fill it; on_ready() is called once it holds lead_ms of points."""
+        self.on_ready = on_ready
+        self.state = "opening"
+        self._send(f"stream begin:{self.mode}")
+
+    def set_playing(self):
+        """The firmware entered MOVING: its playhead runs from now."""
+        with self._lock:
+            self.playing = True
+            self.status_time = self._clock()
+
+    def cancel(self):
+        self.state = "done"
+
+    @property
+    def active(self):
+        return self.state not in ("idle", "done", "failed")
+
+    def estimated_lead_ms(self):
+        if self.status is None:
+            return 0
+        elapsed = (self._clock() - self.status_time) * 1000 if self.playing else 0
+        return self.status.lead_ms - elapsed
+
+    def pump(self):
+        with self._lock:
+            if self.in_flight is not None and not self.in_flight.done():
+                return      # One request in flight at a time
+            if self.state in ("filling", "streaming"):
+                if self.pending and self.estimated_lead_ms() < self.lead_ms and self._send_batch():
+                    return
+                if self.state == "filling" and self._filled():
+                    self._ready()
+                if not self.pending and self.closed:
+                    self.state = "ending"
+                    self._send("stream end")
+            elif self.state == "draining" and self.estimated_lead_ms() < -2 * self.interval_ms:
+                self._send("get stream")
+
+    def _filled(self):
+        """The buffer holds lead_ms of points, all of them, or as many as fit: the run can start."""
+        if self.status is None:
+            return False
+        return (self.estimated_lead_ms() >= self.lead_ms or (self.closed and not self.pending)
+                or self.status.level >= self.status.capacity)
+
+    def _ready(self):
+        self.state = "streaming"
+        if self.on_ready is not None:
+            self.on_ready()
+
+    def _send_batch(self):
+        """Send the next points that fit in a batch and in the buffer. False if none does."""
+        free = self.status.capacity - self.status.level
+        points = [self.pending[k] for k in range(min(len(self.pending), free))]
+        command, count = encode_batch(self.sent * self.interval_ms, self.interval_ms, points, self.mode)
+        if count == 0:
+            return False
+        for _ in range(count):
+            self.pending.popleft()
+        self.sent += count
+        self._send(command)
+        return True
+
+    def _send(self, command):
+        self.in_flight = self._request(command, timeout=TIMEOUT_S)
+        self.in_flight.add_done_callback(lambda f: self._on_reply(command, f))
+
+    def _on_reply(self, command, future):
+        if future.cancelled():
+            return
+        with self._lock:
+            if future.exception() is not None:
+                self.log(f"Error: stream: {future.exception()}")
+                self.state = "failed"
+                return
+            reply = future.result()
+            status = parse_status(reply.lines)
+            if status is not None:
+                self.status, self.status_time = status, self._clock()
+            if not reply.ok:
+                for line in reply.lines:
+                    self.log(line)
+                self.log(f"Error: '{command.split(';')[0]}' was rejected, streaming stopped.")
+                self.state = "failed"
+                return
+            if self.state == "opening":
+                self.state = "filling"
+            elif self.state == "ending":
+                self.state = "draining"
+            elif self.state == "draining" and status is not None and status.lead_ms == 0:
+                self.state = "done"
+                self.log(f"Stream finished: {self.sent} points, {status.underruns} underruns.")
+
+
+# ───────────────────────────── command line ──────────────────────────────────
+
+
+def run_stream(port, baudrate, path, interval_ms, mode, lead_ms):
+    import serial
+    from command_channel import CommandChannel
+
+    link = serial.Serial(port, baudrate, timeout=0.05)
+    channel = CommandChannel(lambda text: link.write((text + "\n").encode()))
+    running = True
+
+    def reader():
+        while running:
+            raw = link.readline()
+            if not raw:
+                continue
+            line = raw.decode(errors="replace").strip()
+            if not channel.feed(line) and (line.startswith("Error") or line.startswith("Warning: Stream")):
+                print(line)
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    streamer = PoseStreamer(channel.request, interval_ms, mode, lead_ms)
+    streamer.extend(load_csv(path))
+    streamer.close()
+    started = threading.Event()
+    try:
+        streamer.begin(on_ready=started.set)
+        while streamer.active:
+            channel.poll()
+            streamer.pump()
+            if started.is_set() and not streamer.playing:
+                channel.request("start", timeout=TIMEOUT_S)
+                streamer.set_playing()
+            time.sleep(0.002)
+        channel.request("stop", timeout=TIMEOUT_S)
+        time.sleep(0.2)
+    finally:
+        running = False
+        thread.join()
+        link.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Stream a trajectory CSV to the X-Jaw without copying it to the SD card")
+    ap.add_argument("--port", required=True, help="Serial port of the Teensy (or of simulation/teensy_emulator.py)")
+    ap.add_argument("--baudrate", type=int, default=115200)
+    ap.add_argument("csv", help="Trajectory CSV: header, then x,y,z,roll,pitch,yaw (or six lengths with --lengths)")
+    ap.add_argument("--interval", type=int, default=100, help="ms between points (default 100)")
+    ap.add_argument("--lengths", action="store_true", help="The CSV holds actuator lengths (mm)")
+    ap.add_argument("--lead", type=int, default=LEAD_MS, help="ms of points kept buffered (default %(default)s)")
+    args = ap.parse_args()
+    run_stream(args.port, args.baudrate, args.csv, args.interval,
+               STREAM_LENGTHS if args.lengths else STREAM_POSE, args.lead)
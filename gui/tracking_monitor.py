@@ -0,0 +1,225 @@
+"""
+tracking_monitor.py
+-------------------
+
+Live tracking delay and error of each actuator for the X-Jaw GUI.
+
+* Every ``Actuator N ...`` line updates, for that actuator, the windowed sums
+  of a cross-correlation between target and current length over the lags
+  0 … ``max_lag`` samples: Σu(t−k)·y(t), Σu(t−k), Σu²(t−k), Σy, Σy². Adding
+  the new sample and removing the one leaving the window costs O(max_lag),
+  whatever the window length. The sums are recomputed exactly from the ring
+  buffer once per window so that rounding does not drift over long runs.
+* The delay is the lag of the correlation peak (parabolic refinement), the
+  error the RMS of y(t) − u(t − delay) over the window, both read from the
+  same sums, as plots_generation/run_analysis.py does offline. A peak at
+  ``max_lag`` is beyond the searched lags: no delay, the error without delay.
+* Every ``update_every`` samples the estimates feed two one-sided CUSUM
+  detectors per actuator (delay, error) against a baseline learned by an
+  EWMA while the actuator is in control. An alert is raised when the
+  actuator starts lagging or diverging, and cleared when it recovers.
+
+Pure Python + numpy, no Qt: the GUI shows ``format_status()`` and logs the
+alerts returned by ``add``.
+"""
+
+import math
+
+import numpy as np
+
+NUM_ACTUATORS = 6
+DT_MS = 10              # Firmware PLATFORM_UPDATE_INTERVAL, one actuator line per update
+WINDOW_S = 3.0          # Sliding window
+MAX_LAG_MS = 500.0      # Searched delays: 0 … MAX_LAG_MS (same bound as run_analysis.py)
+UPDATE_EVERY = 10       # Samples between two estimates / detector steps (100 ms)
+WARMUP = 30             # Estimates used to learn the baseline before alerting (3 s)
+EWMA_ALPHA = 0.02       # Baseline adaptation while in control
+CUSUM_K = 0.5           # Allowance, in baseline standard deviations
+CUSUM_H = 8.0           # Alarm threshold, in baseline standard deviations
+MIN_SIGMA = {"delay": 10.0, "error": 0.2}      # ms, mm: below this a deviation is noise
+MIN_TARGET_STD = 0.5    # mm: window without target motion, delay undefined
+
+
+class CusumDetector:
+    """One-sided (upward) CUSUM on a metric standardised by an EWMA baseline."""
+
+    __slots__ = ("min_sigma", "mean", "var", "n", "g", "alarm")
+
+    def __init__(self, min_sigma):
+        self.min_sigma = min_sigma
+        self.mean = 0.0
+        self.var = 0.0
+        self.n = 0
+        self.g = 0.0
+        self.alarm = False
+
+    def update(self, x):
+        """Returns +1 when an alarm starts, -1 when it clears, else 0."""
+        if x is None or math.isnan(x):
+            return 0
+        self.n += 1
+        if self.n <= WARMUP:        # Plain running mean / variance to start the baseline
+            delta = x - self.mean
+            self.mean += delta / self.n
+            self.var += (delta * (x - self.mean) - self.var) / self.n
+            return 0
+        sigma = max(math.sqrt(self.var), self.min_sigma)
+        self.g = max(0.0, self.g + (x - self.mean) / sigma - CUSUM_K)
+        if not self.alarm and self.g > CUSUM_H:
+            self.alarm = True
+            return 1
+        if self.alarm and self.g == 0.0:
+            self.alarm = False
+            return -1
+        if not self.alarm and self.g == 0.0:  # In control: let the baseline follow slow changes
+            delta = x - self.mean
+            self.mean += EWMA_ALPHA * delta
+            self.var = (1 - EWMA_ALPHA) * (self.var + EWMA_ALPHA * delta * delta)
+        return 0
+
+
+class ActuatorTracker:
+    """Windowed cross-correlation sums of one actuator."""
+
+    def __init__(self, window, max_lag):
+        self.window = window
+        self.max_lag = max_lag
+        self.size = window + max_lag + 1          # Oldest sample needed: u(t − window − max_lag)
+        self.lags = np.arange(max_lag + 1)
+        self.u = np.zeros(self.size)
+        self.y = np.zeros(self.size)
+        self.clear()
+
+    def clear(self):
+        self.n = 0                              # Samples received
+        self.s_uy = np.zeros(self.max_lag + 1)
+        self.s_u = np.zeros(self.max_lag + 1)
+        self.s_uu = np.zeros(self.max_lag + 1)
+        self.s_y = 0.0
+        self.s_yy = 0.0
+
+    @property
+    def count(self):
+        """Samples in the window (those with the full lag history)."""
+        return min(max(self.n - self.max_lag, 0), self.window)
+
+    def add(self, u, y):
+        t = self.n
+        p = t % self.size
+        self.u[p] = u
+        self.y[p] = y
+        self.n += 1
+        if t < self.max_lag:
+            return
+        u_lag = self.u[(p - self.lags) % self.size]
+        self.s_uy += u_lag * y
+        self.s_u += u_lag
+        self.s_uu += u_lag * u_lag
+        self.s_y += y
+        self.s_yy += y * y
+        if t - self.window >= self.max_lag:     # Sample leaving the window
+            q = (t - self.window) % self.size
+            u_old = self.u[(q - self.lags) % self.size]
+            y_old = self.y[q]
+            self.s_uy -= u_old * y_old
+            self.s_u -= u_old
+            self.s_uu -= u_old * u_old
+            self.s_y -= y_old
+            self.s_yy -= y_old * y_old
+        if (t - self.max_lag) % self.window == self.window - 1:
+            self._recompute()
+
+    def _recompute(self):
+        ts = np.arange(self.n - self.count, self.n)
+        y = self.y[ts % self.size]
+        u = self.u[(ts[:, None] - self.lags) % self.size]
+        self.s_uy = (u * y[:, None]).sum(axis=0)
+        self.s_u = u.sum(axis=0)
+        self.s_uu = (u * u).sum(axis=0)
+        self.s_y = float(y.sum())
+        self.s_yy = float((y * y).sum())
+
+    def estimate(self):
+        """(delay in samples, peak ρ, RMS error at that delay, RMS error without delay).
+
+        Delay and ρ are NaN when undefined: too short a window, no target
+        motion, or the peak at max_lag; the error is then the one without delay.
+        """
+        m = self.count
+        if m < 2:
+            return math.nan, math.nan, math.nan, math.nan
+        var_y = self.s_yy - self.s_y * self.s_y / m
+        var_u = self.s_uu - self.s_u * self.s_u / m
+        sq = np.maximum(self.s_yy - 2.0 * self.s_uy + self.s_uu, 0.0) / m
+        raw_rms = math.sqrt(sq[0])
+        if var_u.min() < m * MIN_TARGET_STD ** 2 or var_y <= 0:
+            return math.nan, math.nan, raw_rms, raw_rms
+        rho = (self.s_uy - self.s_u * self.s_y / m) / np.sqrt(var_u * var_y)
+        k = int(np.argmax(rho))
+        if k == self.max_lag:       # Peak beyond the searched lags: no delay estimate
+            return math.nan, math.nan, raw_rms, raw_rms
+        offset = 0.0
+        if 0 < k:
+            left, mid, right = rho[k - 1], rho[k], rho[k + 1]
+            curvature = left - 2.0 * mid + right
+            if curvature < 0:
+                offset = 0.5 * (left - right) / curvature
+        rms = math.sqrt(np.interp(k + offset, self.lags, sq))
+        return k + offset, float(rho[k]), rms, raw_rms
+
+
+class TrackingMonitor:
+    """Per-actuator live delay / error with lag and divergence alerts."""
+
+    def __init__(self, dt_ms=DT_MS, window_s=WINDOW_S, max_lag_ms=MAX_LAG_MS, update_every=UPDATE_EVERY):
+        self.dt_ms = dt_ms
+        self.update_every = update_every
+        window = max(int(round(window_s * 1000.0 / dt_ms)), 2)
+        max_lag = max(int(round(max_lag_ms / dt_ms)), 1)
+        self.trackers = [ActuatorTracker(window, max_lag) for _ in range(NUM_ACTUATORS)]
+        self.clear()
+
+    def clear(self):
+        for tracker in self.trackers:
+            tracker.clear()
+        self.detectors = [{name: CusumDetector(sigma) for name, sigma in MIN_SIGMA.items()}
+                          for _ in range(NUM_ACTUATORS)]
+        self.latest = [None] * NUM_ACTUATORS    # dict per actuator, see add()
+
+    def add(self, data):
+        """Feed one parsed ``Actuator N ...`` sample. Returns the alert messages it raised."""
+        i = data["actuator"]
+        if not 0 <= i < NUM_ACTUATORS:
+            return []
+        tracker = self.trackers[i]
+        tracker.add(data["target_length"], data["current_length"])
+        if tracker.n % self.update_every:
+            return []
+
+        delay, rho, rms, raw_rms = tracker.estimate()
+        delay_ms = float(delay) * self.dt_ms
+        self.latest[i] = {"delay_ms": delay_ms, "rho": rho, "rms_mm": rms, "raw_rms_mm": raw_rms}
+        alerts = []
+        for name, value, unit, verb in (("delay", delay_ms, "ms", "lagging"), ("error", rms, "mm", "diverging")):
+            detector = self.detectors[i][name]
+            change = detector.update(value)
+            if change > 0:
+                alerts.append(f"Warning: Actuator {i} {verb}: {name} {value:.1f} {unit} "
+                              f"(baseline {detector.mean:.1f} {unit})")
+            elif change < 0:
+                alerts.append(f"Actuator {i} {name} back to normal: {value:.1f} {unit}")
+        return alerts
+
+    def alarms(self):
+        return [any(d.alarm for d in detectors.values()) for detectors in self.detectors]
+
+    def format_status(self):
+        """One-line text for the GUI status label."""
+        parts = []
+        for i, (latest, alarm) in enumerate(zip(self.latest, self.alarms())):
+            if latest is None:
+                parts.append(f"A{i} -")
+                continue
+            delay = "-" if math.isnan(latest["delay_ms"]) else f"{latest['delay_ms']:.0f} ms"
+            parts.append(f"A{i}{' (!)' if alarm else ''} {delay} / {latest['rms_mm']:.2f} mm")
+        return "Tracking delay / RMS error:  " + "  |  ".join(parts)
@@ -1,13 +1,17 @@
 #include "Actuator.h"
+#include "LoopTiming.h"
 #include <Arduino.h>
 
-Actuator::Actuator(CD74HC4067& pot_mux, int pwmPin, int aPin, int bPin, int potPin, int actNb)
-    : pot_mux(pot_mux), potPin(potPin), driver(pwmPin, aPin, bPin), minPotValue(0), maxPotValue(0), actuatorNb(actNb), targetLength(0), errorSum(0), lastError(0) {}
+Actuator::Actuator(CD74HC4067& pot_mux, int pwmPin, int aPin, int bPin, int potPin, int actNb, unsigned long updateIntervalUs)
+    : pot_mux(pot_mux), potPin(potPin), driver(pwmPin, aPin, bPin), minPotValue(0), maxPotValue(0), actuatorNb(actNb),
+      dt(updateIntervalUs / 1e6f), rampUpdates(max(1, (int)(PLATFORM_UPDATE_INTERVAL * 1000 / updateIntervalUs))),
+      targetLength(0), targetRate(0), setpoint(0), rampLeft(0), hasSetpoint(false), errorSum(0), lastError(0),
+      lastOutput(0), estimator(ACT_LENGTH_ESTIMATOR, ACT_KF_MAX_SPEED[actNb], ACT_KF_TAU[actNb], updateIntervalUs / 1e6f) {}
 
 void Actuator::begin() {
     driver.begin();
     loadCalibration();
-    std::fill(length_data_buffer, length_data_buffer + ACT_LPF_N, (float)ACTUATOR_MIN_LENGTH); // Initialize the buffer to zero
+    estimator.reset(); // Starts from the first reading
 }
 
 void Actuator::loadCalibration() {
@@ -70,23 +74,16 @@ float Actuator::getLength(bool verbose) {
 
     float length = mapFloat(raw, minPotValue, maxPotValue, (float)ACTUATOR_MIN_LENGTH, (float)ACTUATOR_MAX_LENGTH);
 
-    // Apply low pass filter to smooth the reading
-    length_data_buffer[buffer_index] = length;
-    buffer_index = (buffer_index + 1) % ACT_LPF_N; // Circular buffer index
-
-    // Calculate the average of the last ACT_LPF_N readings if the buffer is full
-    float sum = 0;
-    for(int i = 0; i < ACT_LPF_N; i++) {
-        sum += length_data_buffer[i];
-    }
-    float filtered_length = sum / ACT_LPF_N;
+    // Smooth the reading (moving average, alpha-beta or Kalman, see Config.h)
+    float filtered_length = estimator.update(length, lastOutput);
 
     if(verbose) {
         Serial.print("Debug Actuator "); Serial.print(actuatorNb);
         Serial.print(" raw pot value: "); Serial.print(raw);
         Serial.print(", length: "); Serial.print(length);
         Serial.print(", filtered length: "); Serial.print(filtered_length);
-        Serial.print(" time: "); Serial.println(millis());
+        Serial.print(" time: "); Serial.print(millis());
+        Serial.print(", pwm: "); Serial.println(lastOutput);
     }
     
     return filtered_length;
@@ -97,12 +94,19 @@ int Actuator::getRaw() {
     return analogRead(POT_MUX_SIG);
 }
 
-void Actuator::setTargetLength(float length) {
+void Actuator::setTargetLength(float length, float rate) {
     targetLength = constrain(length, ACTUATOR_MIN_LENGTH, ACTUATOR_MAX_LENGTH);
+    targetRate = rate;
+    if (!hasSetpoint) { // First target: no ramp from an undefined setpoint
+        setpoint = targetLength;
+        hasSetpoint = true;
+    }
+    rampLeft = rampUpdates;
 }
 
 bool Actuator::update(bool verbose) {
-    float current = getLength(false);
+    if (!hasSetpoint) return true; // No target yet: leave the motor stopped
+    float current = getLength(verbose && ACT_DEBUG_LENGTH);
     // if(current < ACTUATOR_MIN_LENGTH || current > ACTUATOR_MAX_LENGTH) {
     //     driver.setSpeed(0);
     //     Serial.print("Error: Actuator "); Serial.print(actuatorNb); Serial.println(" out of bounds.");
@@ -111,14 +115,25 @@ bool Actuator::update(bool verbose) {
     //     Serial.print("Min length: "); Serial.println(ACTUATOR_MIN_LENGTH);
     //     return false;
     // }
-    float error = targetLength - current;
-    errorSum += error * (PLATFORM_UPDATE_INTERVAL / 1000.0f);
+    // Ramp the setpoint towards the last target. Once it is reached (the next target is late),
+    // hold it without feed-forward.
+    float rate = 0;
+    if (rampLeft > 0) {
+        setpoint += (targetLength - setpoint) / rampLeft;
+        rampLeft--;
+        rate = targetRate;
+    }
+    float error = setpoint - current;
+    errorSum += error * dt;
     errorSum = constrain(errorSum, -MAX_INTEGRAL, MAX_INTEGRAL); // Prevent integral windup
-    float dError = (error - lastError) / (PLATFORM_UPDATE_INTERVAL / 1000.0f);
-    float output = ACT_KP * error + ACT_KI * errorSum + ACT_KD * dError;
+    float dError = (error - lastError) / dt;
+    // PID on the length error, plus the PWM that holds the target rate (velocity feed-forward)
+    float output = ACT_KP * error + ACT_KI * errorSum + ACT_KD * dError + ACT_KFF[actuatorNb] * rate;
     driver.setSpeed(output);
+    lastOutput = output;
     lastError = error;
     if (verbose) {
+        PhaseTimer timer(PHASE_TELEMETRY);
         Serial.print("Actuator "); Serial.print(actuatorNb); 
         Serial.print(" target speed: "); Serial.print((int)min(abs(output), 255.0f));
         Serial.print(", target length: "); Serial.print(targetLength);
@@ -130,16 +145,20 @@ bool Actuator::update(bool verbose) {
 
 void Actuator::stop() {
     driver.setSpeed(0);
+    lastOutput = 0;
 }
 
 void Actuator::setSpeed(int speed) {
     driver.setSpeed(speed);
+    lastOutput = speed;
 }
 
 void Actuator::setMin(int min) {
     minPotValue = min;
+    estimator.reset(); // The length scale changed
 }
 
 void Actuator::setMax(int max) {
     maxPotValue = max;
+    estimator.reset();
 }
\ No newline at end of file
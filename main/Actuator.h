@@ -4,6 +4,7 @@
 #include "MotorDriver.h"
 #include "Utils.h"
 #include "Config.h"
+#include "LengthEstimator.h"
 #include <SPI.h>
 #include <SD.h>
 #include <CD74HC4067.h>
@@ -11,12 +12,17 @@
 
 class Actuator {
 public:
-    Actuator(CD74HC4067& pot_mux, int pwmPin, int aPin, int bPin, int potPin, int actNb);
+    // updateIntervalUs: period of update(), see ACTUATOR_UPDATE_INTERVAL_US.
+    Actuator(CD74HC4067& pot_mux, int pwmPin, int aPin, int bPin, int potPin, int actNb,
+             unsigned long updateIntervalUs = ACTUATOR_UPDATE_INTERVAL_US);
     void begin();
     void loadCalibration();
     void saveCalibration();
-    void setTargetLength(float length);
+    // New target, reached by a linear ramp over the next PLATFORM_UPDATE_INTERVAL of updates.
+    // rate: target length rate (mm/s), for the feed-forward.
+    void setTargetLength(float length, float rate = 0.0f);
     bool update(bool verbose = false);
+    float getSetpoint() const { return setpoint; }
     float getLength(bool verbose = false);
     int getRaw();
     void stop();
@@ -32,11 +38,17 @@ private:
     int minPotValue;
     int maxPotValue;
     int actuatorNb;
-    float targetLength;
+    float dt; // s, between updates
+    int rampUpdates; // Updates per PLATFORM_UPDATE_INTERVAL
+    float targetLength; // End of the current ramp
+    float targetRate;
+    float setpoint; // Ramped target fed to the PID
+    int rampLeft; // Updates left before the setpoint reaches targetLength
+    bool hasSetpoint;
     float errorSum;
     float lastError;
-    float length_data_buffer[ACT_LPF_N]; // Buffer for the last 10 readings
-    int buffer_index = 0; // Index for the next reading to be added to the buffer
+    float lastOutput; // PWM commanded at the previous update, input of the length estimator
+    LengthEstimator estimator;
 };
 
 #endif // ACTUATOR_H
\ No newline at end of file
@@ -31,11 +31,54 @@ const float ACT_KI = 0.1f;
 const float ACT_KD = 0.0f;
 const float MAX_INTEGRAL = 100.0f; // Maximum integral term to prevent windup
 
-// Low pass filter constant
-const int ACT_LPF_N = 10; // Number of samples to average
+// Velocity feed-forward: PWM per mm/s of target length rate, from the plant: 255 / ACT_KF_MAX_SPEED
+// (refit with simulation/feedforward_fit.py). Target jumps get no rate (StewartPlatform::resetTargetRates).
+const float ACT_KFF[NUM_ACTUATORS] = {4.25f, 4.25f, 4.25f, 4.25f, 4.25f, 4.25f};
+const float ACT_FF_MAX_RATE = 50.0f; // mm/s, rate clamp, also kept within each ACT_KF_MAX_SPEED
+
+// Update intervals: the trajectory loop (RobotController state, Trajectory::getPose, IK, telemetry) and
+// the faster actuator loop (length estimator and PID of each actuator), which ramps the setpoints
+// handed over by the trajectory loop. ACTUATOR_UPDATE_INTERVAL_US = 1000 * PLATFORM_UPDATE_INTERVAL
+// gives back the single-rate loop.
+const unsigned long PLATFORM_UPDATE_INTERVAL = 10; // ms
+const unsigned long ACTUATOR_UPDATE_INTERVAL_US = 1000; // us, must divide 1000 * PLATFORM_UPDATE_INTERVAL
+
+// Actuator length estimator fed to the PID (see LengthEstimator.h, simulation/length_estimator.py).
+// Its parameters are in time units; LengthEstimator derives the per-update values from its interval.
+const int ACT_EST_MOVING_AVERAGE = 0; // Mean of the readings of the last ACT_LPF_WINDOW_MS (about 50 ms of delay)
+const int ACT_EST_ALPHA_BETA = 1; // Fixed-gain length/velocity tracker
+const int ACT_EST_KALMAN = 2; // Kalman filter driven by the commanded PWM
+// Moving average until the Kalman plant is fitted on recorded Debug Actuator runs (actuator_sysid.py)
+const int ACT_LENGTH_ESTIMATOR = ACT_EST_MOVING_AVERAGE;
+const bool ACT_DEBUG_LENGTH = false; // Print a "Debug Actuator" line with the telemetry while moving
 
-// Update interval (ms)
-const unsigned long PLATFORM_UPDATE_INTERVAL = 10;
+// Low pass filter constant
+const unsigned long ACT_LPF_WINDOW_MS = 100; // Time window averaged
+const int ACT_LPF_N = int(ACT_LPF_WINDOW_MS * 1000 / ACTUATOR_UPDATE_INTERVAL_US); // Samples in the window (buffer size)
+
+// Alpha-beta tracker, as the natural frequency and damping of its error dynamics
+// (alpha = 0.15, beta = 0.012 per update at 10 ms)
+const float ACT_AB_FREQUENCY = 11.4f; // rad/s
+const float ACT_AB_DAMPING = 0.71f;
+
+// Kalman filter: plant model of each actuator (fit with simulation/actuator_sysid.py) and noise
+const float ACT_KF_MAX_SPEED[NUM_ACTUATORS] = {60.0f, 60.0f, 60.0f, 60.0f, 60.0f, 60.0f}; // mm/s at PWM 255
+const float ACT_KF_TAU[NUM_ACTUATORS] = {0.03f, 0.03f, 0.03f, 0.03f, 0.03f, 0.03f}; // s, velocity time constant
+const float ACT_KF_Q_LENGTH = 0.0f; // mm^2/s, length process noise
+const float ACT_KF_Q_VELOCITY = 10.0f; // (mm/s)^2/s, unmodelled velocity changes (noise at rest below the moving average's)
+const float ACT_KF_R = 0.04f; // mm^2 per reading, potentiometer noise variance
+
+// Pose streaming (PoseStream.h): jitter buffer of the setpoints streamed by the host (gui/pose_streamer.py)
+const int STREAM_BUFFER_SIZE = 512; // Points buffered, 5 s at 10 ms
+const float STREAM_LENGTH_SCALE = 100.0f; // Streamed lengths (mm) are integers in 1/100 mm
+const float STREAM_ANGLE_SCALE = 10000.0f; // Streamed angles (rad) are integers in 1/10000 rad
+
+// Host offset of the trajectory (PoseOffset.h): z / pitch set by the bite-force control of gui/bite_force.py
+const float OFFSET_MAX_Z = 10.0f; // mm, either way
+const float OFFSET_MAX_PITCH = degrees2rad(5.0f); // rad, either way
+const float OFFSET_MAX_RATE_Z = 20.0f; // mm/s, slew of the applied offset
+const float OFFSET_MAX_RATE_PITCH = degrees2rad(10.0f); // rad/s
+const unsigned long OFFSET_TIMEOUT_MS = 250; // Not refreshed for this long: back to the plain trajectory
 
 // Pin assignments 
 const int ACT_PWM_PINS[NUM_ACTUATORS] = {33, 8, 5, 2, 29, 25};
@@ -56,7 +99,8 @@ const int LC_FRONT[3] = {9, 8, 7}; // A, Mux channel for front load cell (x, y,
 const int LC_BACK_R[3] = {12, 11, 10}; // B, Mux channel for back right load cell (x, y, z)
 const int LC_BACK_L[3] = {15, 14, 13}; // C, Mux channel for back left load cell (x, y, z)
 // Load cell samples
-const int LC_SAMPLES = 10; // Number of samples to average for load cell readings
+const int LC_SAMPLES = 5; // Passes averaged for the load cell readings, one sample each (the old sampler pushed two per pass into 10 slots: same window)
+const unsigned int LC_MUX_SETTLE_US = 2; // Settling time after a mux channel switch, before the conversion
 // Load cell calibration
 const int LOAD_CELL_MIN_FORCE = 0; // Minimum load cell value
 const int LOAD_CELL_MAX_FORCE = 500; // Maximum load cell value
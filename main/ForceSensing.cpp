@@ -13,14 +13,22 @@ ForceSensing::ForceSensing(): lc_mux(LC_MUX_S0, LC_MUX_S1, LC_MUX_S2, LC_MUX_S3)
 }
 
 bool ForceSensing::update() {
-    lc_front.update();
-    lc_back_r.update();
-    lc_back_l.update();
+    // Single round-robin pass: each of the nine channels is selected and converted once.
+    LoadCell3Axis* cells[3] = {&lc_front, &lc_back_r, &lc_back_l};
+    for (LoadCell3Axis* cell : cells) {
+        uint16_t raw[3];
+        for (int axis = 0; axis < 3; axis++) {
+            lc_mux.channel(cell->channel(axis));
+            delayMicroseconds(LC_MUX_SETTLE_US); // Let the mux output settle instead of a throw-away conversion
+            raw[axis] = analogRead(LC_MUX_SIG);
+        }
+        cell->addSample(raw[0], raw[1], raw[2]);
+    }
 
-    // Read the force vectors from each load cell
-    ForceVector frontForce = lc_front.readForce();
-    ForceVector backRForce = lc_back_r.readForce();
-    ForceVector backLForce = lc_back_l.readForce();
+    // Latest averaged force vectors, no re-sampling
+    ForceVector frontForce = lc_front.getForce();
+    ForceVector backRForce = lc_back_r.getForce();
+    ForceVector backLForce = lc_back_l.getForce();
 
     // Combine the forces into a single force vector
     force.x = frontForce.x + backLForce.x -  backRForce.x;
@@ -22,7 +22,7 @@
 
 
 // === Helper – build column‑major rotation matrix = Rz(yaw) * Ry(pitch) * Rx(roll)
-void Kinematics::rotationMatrix(float roll, float pitch, float yaw, float R[3][3])
+void Kinematics::rotationMatrix(float roll, float pitch, float yaw, float R[3][3]) const
 {
     float cr = cosf(roll),   sr = sinf(roll);
     float cp = cosf(pitch),  sp = sinf(pitch);
@@ -10,7 +10,7 @@ class Kinematics {
 public:
     // void inverse(const Pose& pose, float lengths[6]);
     void inverse(const Pose& pose, float lengths[NUM_ACTUATORS], bool absolute = false) const;
-    void rotationMatrix(float roll, float pitch, float yaw, float R[3][3]);
+    void rotationMatrix(float roll, float pitch, float yaw, float R[3][3]) const;
     Kinematics();
     void setRotationCenter(float cx, float cy, float cz);
     void setHomePose(const Pose& p);
@@ -0,0 +1,79 @@
+#include "LengthEstimator.h"
+#include <Arduino.h>
+
+LengthEstimator::LengthEstimator(int mode, float maxSpeed, float tau, float dt)
+    : mode(mode), dt(dt), decay(expf(-dt / tau)), gain((1.0f - expf(-dt / tau)) * maxSpeed / 255.0f),
+      lpfN(constrain((int)lroundf(ACT_LPF_WINDOW_MS / 1000.0f / dt), 1, ACT_LPF_N)),
+      qLength(ACT_KF_Q_LENGTH * dt), qVelocity(ACT_KF_Q_VELOCITY * dt) {
+    // Alpha-beta gains whose error poles (z^2 - (2 - alpha - beta) z + 1 - alpha) are those of
+    // the continuous dynamics of ACT_AB_FREQUENCY and ACT_AB_DAMPING, sampled every dt.
+    float r = expf(-ACT_AB_DAMPING * ACT_AB_FREQUENCY * dt);
+    float wd = ACT_AB_FREQUENCY * sqrtf(fabsf(1.0f - ACT_AB_DAMPING * ACT_AB_DAMPING)) * dt;
+    float poleSum = 2.0f * r * (ACT_AB_DAMPING < 1.0f ? cosf(wd) : coshf(wd));
+    alpha = 1.0f - r * r;
+    beta = 2.0f - alpha - poleSum;
+}
+
+void LengthEstimator::start(float measured) {
+    length = measured;
+    velocity = 0;
+    for (int i = 0; i < lpfN; i++) buffer[i] = measured;
+    sum = measured * lpfN;
+    index = 0;
+    p00 = ACT_KF_R;     // Measurement noise only, at rest
+    p01 = 0;
+    p11 = 0;
+    initialised = true;
+}
+
+float LengthEstimator::update(float measured, float pwm) {
+    if (!initialised) {
+        start(measured);
+        return length;
+    }
+
+    switch (mode) {
+    case ACT_EST_ALPHA_BETA: {
+        float predicted = length + velocity * dt;
+        float residual = measured - predicted;
+        length = predicted + alpha * residual;
+        velocity += beta / dt * residual;
+        break;
+    }
+
+    case ACT_EST_KALMAN: {
+        // Same drive as MotorDriver::setSpeed: dead band, then saturation.
+        float drive = fabsf(pwm) < MIN_SPEED ? 0.0f : constrain(pwm, -255.0f, 255.0f);
+
+        // Predict: first-order velocity lag towards maxSpeed * drive / 255.
+        float predicted = length + velocity * dt;
+        velocity = decay * velocity + gain * drive;
+        float q00 = p00 + dt * (2.0f * p01 + dt * p11) + qLength;
+        float q01 = decay * (p01 + dt * p11);
+        float q11 = decay * decay * p11 + qVelocity;
+
+        // Correct with the potentiometer length.
+        float k0 = q00 / (q00 + ACT_KF_R);
+        float k1 = q01 / (q00 + ACT_KF_R);
+        float residual = measured - predicted;
+        length = predicted + k0 * residual;
+        velocity += k1 * residual;
+        p00 = (1.0f - k0) * q00;
+        p01 = (1.0f - k0) * q01;
+        p11 = q11 - k1 * q01;
+        break;
+    }
+
+    default: // ACT_EST_MOVING_AVERAGE
+        sum += measured - buffer[index];
+        buffer[index] = measured;
+        index = (index + 1) % lpfN;
+        if (index == 0) { // Re-sum once per lap so rounding does not accumulate
+            sum = 0;
+            for (int i = 0; i < lpfN; i++) sum += buffer[i];
+        }
+        length = sum / lpfN;
+        break;
+    }
+    return length;
+}
@@ -0,0 +1,56 @@
+#ifndef LENGTH_ESTIMATOR_H
+#define LENGTH_ESTIMATOR_H
+
+#include "Config.h"
+
+//--------------------------------------------------------------------
+// Actuator length fed to the PID, from the potentiometer length and the
+// PWM commanded at the previous update. Selected by ACT_LENGTH_ESTIMATOR:
+//   ACT_EST_MOVING_AVERAGE  mean of the readings of the last ACT_LPF_WINDOW_MS (running sum)
+//   ACT_EST_ALPHA_BETA      fixed-gain length/velocity tracker
+//   ACT_EST_KALMAN          2-state Kalman filter, prediction driven by the PWM
+// The Config.h parameters are in time units: the per-update window, gains and process
+// noise are derived from dt, so the filters behave the same at any actuator loop rate.
+// Reference implementation and validation on recorded logs:
+// simulation/length_estimator.py.
+//--------------------------------------------------------------------
+class LengthEstimator {
+public:
+    // maxSpeed (mm/s at PWM 255) and tau (s): plant model of the Kalman filter.
+    // dt (s): time between updates.
+    LengthEstimator(int mode, float maxSpeed, float tau, float dt = ACTUATOR_UPDATE_INTERVAL_US / 1e6f);
+
+    // Forget the state; the next update() starts from its measurement.
+    void reset() { initialised = false; }
+
+    // New potentiometer length (mm) and the PWM applied since the last update.
+    // Returns the estimated length (mm).
+    float update(float measured, float pwm);
+
+    float getLength() const { return length; }
+    float getVelocity() const { return velocity; }     // mm/s, 0 for the moving average
+
+private:
+    void start(float measured);
+
+    int mode;
+    float dt;
+    float decay;    // Velocity kept over one update
+    float gain;     // mm/s gained per PWM unit over one update
+    int lpfN;       // Readings in ACT_LPF_WINDOW_MS, at most ACT_LPF_N
+    float alpha, beta;      // Alpha-beta gains per update
+    float qLength, qVelocity;   // Kalman process noise per update
+    bool initialised = false;
+    float length = 0;
+    float velocity = 0;
+
+    // Moving average (sized for ACTUATOR_UPDATE_INTERVAL_US, slower loops use part of it)
+    float buffer[ACT_LPF_N];
+    float sum = 0;
+    int index = 0;
+
+    // Kalman covariance (symmetric)
+    float p00 = 0, p01 = 0, p11 = 0;
+};
+
+#endif // LENGTH_ESTIMATOR_H
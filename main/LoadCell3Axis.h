@@ -15,33 +15,40 @@ struct ForceVector {
   float z;
 };
 
+//--------------------------------------------------------------------
+// One 3-axis load cell. The ADC is not read here: ForceSensing samples
+// every channel once per pass and hands the raw values to addSample(),
+// which keeps a running sum over the last LC_SAMPLES readings (passes).
+//--------------------------------------------------------------------
 class LoadCell3Axis {
 public:
     LoadCell3Axis(CD74HC4067& lc_mux, int muxPinX, int muxPinY, int muxPinZ);
     
-    // Initialize the load cell
-    void update();
-    
-    // Read the force vector from the load cell
-    ForceVector readForce();
+    // Mux channel of an axis (0 = x, 1 = y, 2 = z)
+    inline uint8_t channel(int axis) const { return _ch[axis]; }
+
+    // Add one raw ADC reading of each axis and update the averaged force
+    void addSample(uint16_t rawX, uint16_t rawY, uint16_t rawZ);
     
-    // Get the force vector
+    // Latest averaged, tared force vector (no ADC access)
     ForceVector getForce() const;
 
-    // Get raw data from the load cell for debug
-    inline uint8_t getXRawData() const { return _xDataBuffer[_bufferIndex]; }
-    inline uint8_t getYRawData() const { return _yDataBuffer[_bufferIndex]; }
-    inline uint8_t getZRawData() const { return _zDataBuffer[_bufferIndex]; }
+    // Get the latest raw data from the load cell for debug
+    inline uint16_t getXRawData() const { return _latestRaw[0]; }
+    inline uint16_t getYRawData() const { return _latestRaw[1]; }
+    inline uint16_t getZRawData() const { return _latestRaw[2]; }
 
     // Tare the load cell
     void tare();
 
 private:
-  CD74HC4067 lc_mux; // Multiplexer for load cell
-  uint8_t  _chX, _chY, _chZ;
-  uint8_t  _xDataBuffer[LC_SAMPLES] = {0};
-  uint8_t  _yDataBuffer[LC_SAMPLES] = {0};
-  uint8_t  _zDataBuffer[LC_SAMPLES] = {0};
+  CD74HC4067& lc_mux; // Multiplexer shared by the load cells
+  uint8_t  _ch[3];
+  // 10-bit ADC readings, per axis. Were uint8_t, which wrapped readings above 255 counts:
+  // forces over 124 N per axis read differently from the force CSVs recorded before.
+  uint16_t _dataBuffer[3][LC_SAMPLES] = {};
+  uint32_t _sum[3] = {0, 0, 0};             // Running sum of each buffer
+  uint16_t _latestRaw[3] = {0, 0, 0};
   uint8_t  _bufferIndex = 0;
   ForceVector _force{0, 0, 0};
   ForceVector _forceTare{0, 0, 0}; // Tare values for each axis
@@ -1,57 +1,30 @@
-#include "LoadCell3axis.h"
+#include "LoadCell3Axis.h"
 
 LoadCell3Axis::LoadCell3Axis(CD74HC4067& lc_mux, int muxPinX, int muxPinY, int muxPinZ)
-    : lc_mux(lc_mux), _chX(muxPinX), _chY(muxPinY), _chZ(muxPinZ) {
-}
-
-void LoadCell3Axis::update() {
-    // Read the force vector from the load cell
-    ForceVector force = readForce();
-    
-    // Update the internal force vector
-    _force.x = force.x;
-    _force.y = force.y;
-    _force.z = force.z;
+    : lc_mux(lc_mux), _ch{(uint8_t)muxPinX, (uint8_t)muxPinY, (uint8_t)muxPinZ} {
 }
 
 ForceVector LoadCell3Axis::getForce() const {
     return _force;
 }
 
-//use circular buffer to read the force vector
-ForceVector LoadCell3Axis::readForce() {
-    lc_mux.channel(_chX); // Select channel for X
-    int rawX = analogRead(LC_MUX_SIG); // Read the raw value from the mux
-    rawX = analogRead(LC_MUX_SIG); // Read the raw value from the mux again to ensure stability
-    lc_mux.channel(_chY); // Select channel for Y
-    int rawY = analogRead(LC_MUX_SIG); // Read the raw value from the mux
-    rawY = analogRead(LC_MUX_SIG); // Read the raw value from the mux again to ensure stability
-    lc_mux.channel(_chZ); // Select channel for Z
-    int rawZ = analogRead(LC_MUX_SIG); // Read the raw value from the mux
-    rawZ = analogRead(LC_MUX_SIG); // Read the raw value from the mux again to ensure stability
-
-    // add values to the circular buffer
-    _xDataBuffer[_bufferIndex] = rawX;
-    _yDataBuffer[_bufferIndex] = rawY;
-    _zDataBuffer[_bufferIndex] = rawZ;
-    _bufferIndex = (_bufferIndex + 1) % LC_SAMPLES;
-
-    // Calculate the average force vector
-    float avgX = 0, avgY = 0, avgZ = 0;
-    for (int i = 0; i < LC_SAMPLES; i++) {
-        avgX += _xDataBuffer[i];
-        avgY += _yDataBuffer[i];
-        avgZ += _zDataBuffer[i];
+void LoadCell3Axis::addSample(uint16_t rawX, uint16_t rawY, uint16_t rawZ) {
+    const uint16_t raw[3] = {rawX, rawY, rawZ};
+    float avg[3];
+    for (int axis = 0; axis < 3; axis++) {
+        // Running sum: add the new reading, drop the one it replaces in the circular buffer
+        _sum[axis] += raw[axis];
+        _sum[axis] -= _dataBuffer[axis][_bufferIndex];
+        _dataBuffer[axis][_bufferIndex] = raw[axis];
+        _latestRaw[axis] = raw[axis];
+        avg[axis] = (float)_sum[axis] / LC_SAMPLES;
     }
-
-    avgX /= LC_SAMPLES;
-    avgY /= LC_SAMPLES;
-    avgZ /= LC_SAMPLES;
+    _bufferIndex = (_bufferIndex + 1) % LC_SAMPLES;
 
     ForceVector force;
-    force.x = map(avgX, LOAD_CELL_MIN, LOAD_CELL_MAX, LOAD_CELL_MIN_FORCE, LOAD_CELL_MAX_FORCE);
-    force.y = map(avgY, LOAD_CELL_MIN, LOAD_CELL_MAX, LOAD_CELL_MIN_FORCE, LOAD_CELL_MAX_FORCE);
-    force.z = map(avgZ, LOAD_CELL_MIN, LOAD_CELL_MAX, LOAD_CELL_MIN_FORCE, LOAD_CELL_MAX_FORCE);
+    force.x = map(avg[0], LOAD_CELL_MIN, LOAD_CELL_MAX, LOAD_CELL_MIN_FORCE, LOAD_CELL_MAX_FORCE);
+    force.y = map(avg[1], LOAD_CELL_MIN, LOAD_CELL_MAX, LOAD_CELL_MIN_FORCE, LOAD_CELL_MAX_FORCE);
+    force.z = map(avg[2], LOAD_CELL_MIN, LOAD_CELL_MAX, LOAD_CELL_MIN_FORCE, LOAD_CELL_MAX_FORCE);
 
     // Apply tare offset
     force.x -= _forceTare.x;
@@ -62,27 +35,27 @@ ForceVector LoadCell3Axis::readForce() {
     force.x = constrain(force.x, LOAD_CELL_MIN_FORCE, LOAD_CELL_MAX_FORCE);
     force.y = constrain(force.y, LOAD_CELL_MIN_FORCE, LOAD_CELL_MAX_FORCE);
     force.z = constrain(force.z, LOAD_CELL_MIN_FORCE, LOAD_CELL_MAX_FORCE);
-    return force;
+    _force = force;
 }
 
 void LoadCell3Axis::tare() {
     unsigned long startTime = millis();
     
     // Update the tare force vector
-    lc_mux.channel(_chX); // Select channel for X
+    lc_mux.channel(_ch[0]); // Select channel for X
     int rawX = analogRead(LC_MUX_SIG); // Read the raw value from the mux
-    lc_mux.channel(_chY); // Select channel for Y
+    lc_mux.channel(_ch[1]); // Select channel for Y
     int rawY = analogRead(LC_MUX_SIG); // Read the raw value from the mux
-    lc_mux.channel(_chZ); // Select channel for Z
+    lc_mux.channel(_ch[2]); // Select channel for Z
     int rawZ = analogRead(LC_MUX_SIG); // Read the raw value from the mux
     while(millis() - startTime < TARE_DELAY) {
-        lc_mux.channel(_chX); // Select channel for X
+        lc_mux.channel(_ch[0]); // Select channel for X
         int readX = analogRead(LC_MUX_SIG); // Read the raw value from the mux
         rawX = readX < rawX ? readX : rawX; // Keep the minimum value for tare
-        lc_mux.channel(_chY); // Select channel for Y
+        lc_mux.channel(_ch[1]); // Select channel for Y
         int readY = analogRead(LC_MUX_SIG); // Read the raw value from the mux
         rawY = readY < rawY ? readY : rawY; // Keep the minimum value for tare
-        lc_mux.channel(_chZ); // Select channel for Z
+        lc_mux.channel(_ch[2]); // Select channel for Z
         int readZ = analogRead(LC_MUX_SIG); // Read the raw value from the mux
         rawZ = readZ < rawZ ? readZ : rawZ; // Keep the minimum value for tare
     }
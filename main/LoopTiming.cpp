@@ -0,0 +1,86 @@
+#include "LoopTiming.h"
+
+LoopTiming loopTiming;
+PhaseTimer* PhaseTimer::current = nullptr;
+
+static const char* PHASE_NAMES[NUM_LOOP_PHASES] = {
+    "commands", "force", "trajectory", "kinematics", "actuators", "telemetry"
+};
+
+static int timingBin(uint32_t cycles) {
+    if (cycles < 2) return 0;
+    int msb = 31 - __builtin_clz(cycles);
+    return 2 * msb + ((cycles >> (msb - 1)) & 1);
+}
+
+static uint64_t binUpperEdge(int bin) {
+    // Lower edge of the next bin
+    int next = bin + 1;
+    uint64_t octave = 1ULL << (next / 2);
+    return next % 2 ? octave + octave / 2 : octave;
+}
+
+void PhaseStats::add(uint32_t cycles) {
+    if (count == 0 || cycles < minCycles) minCycles = cycles;
+    if (cycles > maxCycles) maxCycles = cycles;
+    sumCycles += cycles;
+    count++;
+    histogram[timingBin(cycles)]++;
+}
+
+uint32_t PhaseStats::percentileCycles(float fraction) const {
+    if (count == 0) return 0;
+    uint32_t rank = (uint32_t)ceilf(fraction * count);
+    uint32_t seen = 0;
+    for (int bin = 0; bin < TIMING_BINS; bin++) {
+        seen += histogram[bin];
+        if (seen >= rank) return binUpperEdge(bin) < maxCycles ? (uint32_t)binUpperEdge(bin) : maxCycles;
+    }
+    return maxCycles;
+}
+
+void LoopTiming::beginLoop() {
+    loopStart = cycleCount();
+}
+
+void LoopTiming::endLoop() {
+    loop.add(cycleCount() - loopStart);
+}
+
+static void printStats(const char* name, const PhaseStats& stats, float perMicro) {
+    Serial.print("Timing phase "); Serial.print(name);
+    Serial.print(" - n: "); Serial.print(stats.count);
+    Serial.print(", min: "); Serial.print(stats.minCycles / perMicro);
+    Serial.print(", mean: "); Serial.print(stats.count ? stats.sumCycles / perMicro / stats.count : 0.0f);
+    Serial.print(", max: "); Serial.print(stats.maxCycles / perMicro);
+    Serial.print(", p99: "); Serial.print(stats.percentileCycles(0.99f) / perMicro);
+    Serial.print(", hist:");
+    for (int bin = 0; bin < TIMING_BINS; bin++) {
+        if (stats.histogram[bin] == 0) continue;
+        Serial.print(" "); Serial.print(bin); Serial.print("="); Serial.print(stats.histogram[bin]);
+    }
+    Serial.println();
+}
+
+void LoopTiming::print() const {
+    float perMicro = cyclesPerMicro();
+    Serial.print("Timing window - "); Serial.print(millis() - windowStart);
+    Serial.print(" ms, cycles per us: "); Serial.println(perMicro);
+    printStats("loop", loop, perMicro);
+    for (int phase = 0; phase < NUM_LOOP_PHASES; phase++) {
+        printStats(PHASE_NAMES[phase], phases[phase], perMicro);
+    }
+}
+
+void LoopTiming::reset() {
+    for (PhaseStats& stats : phases) stats = PhaseStats();
+    loop = PhaseStats();
+    windowStart = millis();
+}
+
+PhaseTimer::~PhaseTimer() {
+    uint32_t total = cycleCount() - start;
+    loopTiming.add(phase, total - nested);
+    if (parent) parent->nested += total;
+    current = parent;
+}
@@ -0,0 +1,90 @@
+#ifndef LOOP_TIMING_H
+#define LOOP_TIMING_H
+
+#include <Arduino.h>
+
+//--------------------------------------------------------------------
+// Per-phase execution time of loop(), read from the cycle counter.
+// A PhaseTimer placed around a block adds its duration to the phase
+// statistics when it goes out of scope. Timers nest: a phase only gets
+// its own time, the time of the timers opened inside it goes to theirs
+// (the actuator lines printed inside the PID update count as telemetry).
+// Each phase keeps count, min, mean, max and a histogram in half-octave
+// bins, from which the p99 is read; the statistics cover a window that
+// starts again at every report ("get timing").
+//--------------------------------------------------------------------
+
+enum LoopPhase {
+    PHASE_COMMANDS,     // Serial command assembly and dispatch
+    PHASE_FORCE,        // Load cell sampling
+    PHASE_TRAJECTORY,   // Trajectory::getPose
+    PHASE_KINEMATICS,   // Inverse kinematics and actuator targets (StewartPlatform::moveToPose)
+    PHASE_ACTUATORS,    // Length estimators and PIDs (StewartPlatform::update)
+    PHASE_TELEMETRY,    // Pose, force and actuator lines
+    NUM_LOOP_PHASES
+};
+
+// Half-octave bins of the cycle count: bin 2k starts at 2^k cycles, bin 2k+1 at 1.5 * 2^k.
+const int TIMING_BINS = 64;
+
+struct PhaseStats {
+    uint32_t count = 0;
+    uint32_t minCycles = 0;
+    uint32_t maxCycles = 0;
+    uint64_t sumCycles = 0;
+    uint32_t histogram[TIMING_BINS] = {};
+
+    void add(uint32_t cycles);
+    uint32_t percentileCycles(float fraction) const;    // Upper edge of the bin, at most maxCycles
+};
+
+// Cycle counter: ARM_DWT_CYCCNT on the Teensy 4.1, micros() where there is none (host tests).
+#if defined(ARM_DWT_CYCCNT)
+inline uint32_t cycleCount() { return ARM_DWT_CYCCNT; }
+inline float cyclesPerMicro() { return F_CPU_ACTUAL / 1e6f; }
+#else
+inline uint32_t cycleCount() { return micros(); }
+inline float cyclesPerMicro() { return 1.0f; }
+#endif
+
+class LoopTiming {
+public:
+    void beginLoop();   // Start of a loop() pass
+    void endLoop();     // End of the pass: its whole duration goes to the "loop" statistics
+
+    void add(LoopPhase phase, uint32_t cycles) { phases[phase].add(cycles); }
+    const PhaseStats& getPhase(LoopPhase phase) const { return phases[phase]; }
+    const PhaseStats& getLoop() const { return loop; }
+
+    // "Timing window - ..." then one "Timing phase <name> - ..." line per phase, times in us.
+    void print() const;
+    // Clear the statistics and start a new window.
+    void reset();
+
+private:
+    PhaseStats phases[NUM_LOOP_PHASES];
+    PhaseStats loop;
+    uint32_t loopStart = 0;
+    unsigned long windowStart = 0;  // millis()
+};
+
+extern LoopTiming loopTiming;
+
+class PhaseTimer {
+public:
+    explicit PhaseTimer(LoopPhase phase) : phase(phase), parent(current), start(cycleCount()) { current = this; }
+    ~PhaseTimer();
+
+    PhaseTimer(const PhaseTimer&) = delete;
+    PhaseTimer& operator=(const PhaseTimer&) = delete;
+
+private:
+    LoopPhase phase;
+    PhaseTimer* parent;
+    uint32_t start;
+    uint32_t nested = 0;    // Cycles of the timers opened inside this one
+
+    static PhaseTimer* current;
+};
+
+#endif // LOOP_TIMING_H
@@ -0,0 +1,53 @@
+#include "PoseOffset.h"
+#include "Trajectory.h"
+
+static float stepTowards(float value, float target, float maxStep) {
+    if (target > value + maxStep) return value + maxStep;
+    if (target < value - maxStep) return value - maxStep;
+    return target;
+}
+
+void PoseOffset::reset() {
+    z = pitch = targetZ = targetPitch = 0;
+    timedOut = false;
+}
+
+bool PoseOffset::set(float newZ, float newPitch, unsigned long now) {
+    if (newZ < -OFFSET_MAX_Z || newZ > OFFSET_MAX_Z || newPitch < -OFFSET_MAX_PITCH || newPitch > OFFSET_MAX_PITCH) {
+        Serial.print("Error: Offset out of bounds (z: +/-"); Serial.print(OFFSET_MAX_Z);
+        Serial.print(" mm, pitch: +/-"); Serial.print(OFFSET_MAX_PITCH, 4); Serial.println(" rad).");
+        return false;
+    }
+    targetZ = newZ;
+    targetPitch = newPitch;
+    lastSet = now;
+    timedOut = false;
+    return true;
+}
+
+void PoseOffset::update(unsigned long now) {
+    bool fresh = now - lastSet <= OFFSET_TIMEOUT_MS;
+    if (!fresh && !timedOut && (targetZ != 0 || targetPitch != 0)) {
+        Serial.print("Warning: Offset not refreshed for "); Serial.print(now - lastSet);
+        Serial.println(" ms, returning to the trajectory.");
+        targetZ = targetPitch = 0;
+        timedOut = true;
+    }
+    const float dt = PLATFORM_UPDATE_INTERVAL / 1000.0f;
+    z = stepTowards(z, targetZ, OFFSET_MAX_RATE_Z * dt);
+    pitch = stepTowards(pitch, targetPitch, OFFSET_MAX_RATE_PITCH * dt);
+}
+
+Pose PoseOffset::apply(const Pose& pose) const {
+    Pose p = pose;
+    p.z += z;
+    p.pitch += pitch;
+    return Trajectory::clampPose(p);
+}
+
+void PoseOffset::printStatus() const {
+    Serial.print("Offset - z: "); Serial.print(z);
+    Serial.print(" mm, pitch: "); Serial.print(pitch, 4);
+    Serial.print(" rad, target z: "); Serial.print(targetZ);
+    Serial.print(" mm, target pitch: "); Serial.print(targetPitch, 4); Serial.println(" rad");
+}
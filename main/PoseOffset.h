@@ -0,0 +1,41 @@
+#ifndef POSE_OFFSET_H
+#define POSE_OFFSET_H
+
+#include "Kinematics.h"
+
+//--------------------------------------------------------------------
+// z / pitch offset added by the host to the poses played in MOVING (SD card
+// trajectory or pose stream), for the closed-loop bite-force control of
+// gui/bite_force.py. The host sets a target within ±OFFSET_MAX_Z /
+// ±OFFSET_MAX_PITCH; the applied offset follows it at most at
+// OFFSET_MAX_RATE_Z / OFFSET_MAX_RATE_PITCH, one step per trajectory tick.
+// Watchdog: a target not refreshed for OFFSET_TIMEOUT_MS falls back to zero,
+// at the same rates, so a host that stops or stalls leaves the plain
+// trajectory and not a frozen offset.
+//--------------------------------------------------------------------
+class PoseOffset {
+public:
+    // Zero target and applied offset at once (entering or leaving MOVING).
+    void reset();
+    // New target at host time now (ms). Out of bounds: rejected with an error.
+    bool set(float z, float pitch, unsigned long now);
+    // Trajectory tick: watchdog, then one rate-limited step of the applied offset.
+    void update(unsigned long now);
+    // pose plus the applied offset, clamped to the pose limits.
+    Pose apply(const Pose& pose) const;
+
+    float getZ() const { return z; }
+    float getPitch() const { return pitch; }
+    bool isTimedOut() const { return timedOut; }
+
+    // "Offset - z: 1.20 mm, pitch: 0.0100 rad, target z: 2.00 mm, target pitch: 0.0100 rad"
+    void printStatus() const;
+
+private:
+    float z = 0, pitch = 0;                 // Applied
+    float targetZ = 0, targetPitch = 0;
+    unsigned long lastSet = 0;
+    bool timedOut = false;
+};
+
+#endif // POSE_OFFSET_H
@@ -0,0 +1,130 @@
+#include "PoseStream.h"
+#include "Trajectory.h"
+#include <stdlib.h>
+
+static bool lengthsWithinLimits(const Pose& lengths) {
+    const float values[NUM_ACTUATORS] = {lengths.x, lengths.y, lengths.z, lengths.roll, lengths.pitch, lengths.yaw};
+    for (float value : values) {
+        if (value < ACTUATOR_MIN_LENGTH || value > ACTUATOR_MAX_LENGTH) return false;
+    }
+    return true;
+}
+
+void PoseStream::begin(StreamMode newMode) {
+    mode = newMode;
+    head = 0;
+    count = 0;
+    received = false;
+    lastTime = 0;
+    playhead = 0;
+    underruns = 0;
+    ended = false;
+    starved = false;
+    finished = false;
+}
+
+bool PoseStream::addBatch(const char* batch) {
+    if (!isActive()) {
+        Serial.println("Error: No stream started. Send stream begin:pose or stream begin:lengths first.");
+        return false;
+    }
+    char* end;
+    unsigned long t0 = strtoul(batch, &end, 10);
+    bool valid = end != batch && *end == ',';
+    unsigned long dt = 0;
+    const char* p = end;
+    if (valid) {
+        p++;
+        dt = strtoul(p, &end, 10);
+        valid = end != p && dt > 0;
+        p = end;
+    }
+    for (unsigned long k = 0; valid && *p == ';'; k++) {
+        p++;
+        long v[NUM_ACTUATORS];
+        for (int j = 0; valid && j < NUM_ACTUATORS; j++) {
+            v[j] = strtol(p, &end, 10);
+            valid = end != p && (j == NUM_ACTUATORS - 1 || *end == ',');
+            p = valid && j < NUM_ACTUATORS - 1 ? end + 1 : end;
+        }
+        if (!valid) break;
+        float angleScale = mode == StreamMode::POSE ? STREAM_ANGLE_SCALE : STREAM_LENGTH_SCALE; // Lengths: six mm values
+        Pose point = {v[0] / STREAM_LENGTH_SCALE, v[1] / STREAM_LENGTH_SCALE, v[2] / STREAM_LENGTH_SCALE,
+                      v[3] / angleScale, v[4] / angleScale, v[5] / angleScale};
+        if (!add(t0 + k * dt, point)) return false;
+    }
+    if (!valid || *p != '\0') {
+        Serial.print("Error: Malformed stream batch at: ");
+        Serial.println(p);
+        return false;
+    }
+    return true;
+}
+
+bool PoseStream::add(unsigned long time, const Pose& point) {
+    if (received && time <= lastTime) {
+        Serial.print("Error: Stream point at "); Serial.print(time);
+        Serial.println(" ms is not after the previous one.");
+        return false;
+    }
+    if (mode == StreamMode::POSE ? !Trajectory::withinLimits(point) : !lengthsWithinLimits(point)) {
+        Serial.print("Error: Stream point at "); Serial.print(time);
+        Serial.println(" ms out of bounds.");
+        return false;
+    }
+    if (count >= STREAM_BUFFER_SIZE) {
+        Serial.println("Error: Stream buffer full.");
+        return false;
+    }
+    points[(head + count) % STREAM_BUFFER_SIZE] = {point, time};
+    count++;
+    lastTime = time;
+    received = true;
+    return true;
+}
+
+void PoseStream::advance(unsigned long now) {
+    playhead = now;
+    // The segment around now needs the point before it: drop the ones before that.
+    while (count >= 3 && at(2).time <= now) {
+        head = (head + 1) % STREAM_BUFFER_SIZE;
+        count--;
+    }
+    bool drained = count == 0 || now >= at(count - 1).time;
+    if (drained && !ended && !starved) {
+        underruns++;
+        Serial.print("Warning: Stream buffer underrun at "); Serial.print(now);
+        Serial.println(" ms, holding the last point.");
+    }
+    starved = drained && !ended;
+    if (drained && ended && !finished) {
+        Serial.println("Stream finished.");
+    }
+    finished = drained && ended;
+}
+
+Pose PoseStream::getPoint(unsigned long time) const {
+    int i = 0;
+    while (i < count && time >= at(i).time) i++;
+    if (i == 0) return at(0).point;
+    if (i == count) return at(count - 1).point;
+
+    // Segment [at(i-1), at(i)], neighbours clamped to the buffer like Trajectory::getPose
+    float t = float(time - at(i - 1).time) / float(at(i).time - at(i - 1).time);
+    Pose p = Trajectory::catmullRom(at(i > 1 ? i - 2 : 0).point, at(i - 1).point, at(i).point,
+                                    at(i + 1 < count ? i + 1 : count - 1).point, t);
+    return mode == StreamMode::POSE ? Trajectory::clampPose(p) : p;
+}
+
+unsigned long PoseStream::getLeadMs() const {
+    return count > 0 && lastTime > playhead ? lastTime - playhead : 0;
+}
+
+void PoseStream::printStatus() const {
+    Serial.print("Stream - mode: ");
+    Serial.print(mode == StreamMode::POSE ? "pose" : mode == StreamMode::LENGTHS ? "lengths" : "off");
+    Serial.print(", points: "); Serial.print(count); Serial.print("/"); Serial.print(STREAM_BUFFER_SIZE);
+    Serial.print(", lead: "); Serial.print(getLeadMs());
+    Serial.print(" ms, playhead: "); Serial.print(playhead);
+    Serial.print(" ms, underruns: "); Serial.println(underruns);
+}
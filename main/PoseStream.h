@@ -0,0 +1,73 @@
+#ifndef POSE_STREAM_H
+#define POSE_STREAM_H
+
+#include "Kinematics.h"
+
+enum class StreamMode {
+    OFF,        // MOVING plays the SD card trajectory
+    POSE,       // Streamed platform poses, relative to the home pose like the trajectory files
+    LENGTHS     // Streamed actuator lengths (mm), the kinematics are skipped
+};
+
+//--------------------------------------------------------------------
+// Jitter buffer of the setpoints streamed by the host (gui/pose_streamer.py),
+// played in MOVING instead of the SD card trajectory, so a stream is not
+// bounded by the trajectory's MAX_POINTS and needs no SD card copy.
+// A batch "<t0>,<dt>;<6 values>;<6 values>;..." appends points at t0,
+// t0 + dt, ... ms of stream time (tick 0 of MOVING is stream time 0), the
+// values as integers: mm in 1/STREAM_LENGTH_SCALE, rad in 1/STREAM_ANGLE_SCALE.
+// A pose or a set of lengths is kept as a Pose (x..yaw = lengths 0..5) and
+// interpolated with the Catmull-Rom of Trajectory. Played points are
+// dropped. When the playhead passes the last point before end(), the last
+// point is held and an underrun is counted. The host paces itself on the
+// lead: the stream time buffered ahead of the playhead.
+//--------------------------------------------------------------------
+class PoseStream {
+public:
+    // Clear the buffer and select what the points are. OFF: back to the SD card trajectory.
+    void begin(StreamMode mode);
+    // No more points will come: draining the buffer ends the stream instead of underrunning.
+    void end() { ended = true; }
+
+    StreamMode getMode() const { return mode; }
+    bool isActive() const { return mode != StreamMode::OFF; }
+    bool isEmpty() const { return count == 0; }
+
+    // Parse a batch and append its points. Stops at the first invalid point, returns false on any error.
+    bool addBatch(const char* batch);
+    // Append a point: times strictly increasing, values within the pose or actuator limits of Config.h.
+    bool add(unsigned long time, const Pose& point);
+
+    // Playhead of the trajectory tick: drops the points no longer needed, detects underruns.
+    void advance(unsigned long now);
+    // Interpolated point at a stream time at or after the playhead (the first point before it,
+    // the last point after it). The buffer must not be empty.
+    Pose getPoint(unsigned long time) const;
+
+    int getLevel() const { return count; }
+    unsigned long getLeadMs() const;
+    unsigned long getUnderruns() const { return underruns; }
+
+    // "Stream - mode: pose, points: 12/512, lead: 120 ms, playhead: 3400 ms, underruns: 0"
+    void printStatus() const;
+
+private:
+    struct Waypoint {
+        Pose point;
+        unsigned long time;
+    } points[STREAM_BUFFER_SIZE];   // Ring buffer
+    int head = 0;
+    int count = 0;
+    StreamMode mode = StreamMode::OFF;
+    bool received = false;          // A point was added since begin()
+    unsigned long lastTime = 0;     // Time of the last point added
+    unsigned long playhead = 0;
+    unsigned long underruns = 0;
+    bool ended = false;
+    bool starved = false;           // Playhead past the last point, not ended
+    bool finished = false;          // Playhead past the last point, ended
+
+    const Waypoint& at(int k) const { return points[(head + k) % STREAM_BUFFER_SIZE]; }
+};
+
+#endif // POSE_STREAM_H
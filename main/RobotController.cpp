@@ -1,5 +1,6 @@
 #include "RobotController.h"
 #include <Arduino.h>
+#include "LoopTiming.h"
 
 // ========= Public methods implementation ===========
 
@@ -22,27 +23,42 @@ bool RobotController::begin() {
 
     // Initialize force sensing
     forceSensing.tareAll(); // Tare all load cells
+
+    // Start the control loops: their first ticks are due at the first update()
+    trajectoryTask.start();
+    actuatorTask.start();
     return true;
 }
 
 void RobotController::update() {
     // update and print the force sensing data
-    if(!forceSensing.update()) {
+    bool forceOk;
+    {
+        PhaseTimer timer(PHASE_FORCE);
+        forceOk = forceSensing.update();
+    }
+    if(!forceOk) {
         Serial.println("Error: Too much vertical force. Stopping execution.");
         setState(RobotState::STOP);
         return;
     }
+    // Trajectory loop: the state methods hand new targets to the platform every PLATFORM_UPDATE_INTERVAL
+    bool trajectoryTick = trajectoryTask.due();
     if(state == RobotState::MOVING) {
-        move();
+        if(trajectoryTick) move();
+        PhaseTimer timer(PHASE_TELEMETRY);
         forceSensing.printForce(); 
     }
     else if(state == RobotState::CALIBRATING) {
-        calibrate();
+        if(trajectoryTick) calibrate();
         //forceSensing.printForce(); // uncomment to record force data during calibration
     }
     else if(state == RobotState::STOP) {
-        stop();
+        if(trajectoryTick) stop();
     }
+
+    // Actuator loop: length estimators and PIDs every ACTUATOR_UPDATE_INTERVAL_US
+    if(actuatorTask.due()) updateActuators();
 }
 
 RobotState RobotController::getState() const {
@@ -64,6 +80,7 @@ bool RobotController::setState(RobotState newState) {
     }
 
     state = newState;
+    platform.resetTargetRates(); // The first targets of the new state are a jump, not a rate
     switch (newState) {
         case RobotState::CALIBRATING:
             onEnterCalibrating();
@@ -75,6 +92,16 @@ bool RobotController::setState(RobotState newState) {
             onEnterStop();
             break;
     }
+    offset.reset(); // A run starts and ends on the plain trajectory
+    if (prevState == RobotState::MOVING) {
+        printLoopTiming(); // Timing of the run that just ended
+        if (stream.isActive()) {
+            stream.printStatus();
+            stream.begin(StreamMode::OFF);
+            Serial.println("Stream closed.");
+        }
+    }
+    trajectoryTask.start(); // The new state starts on its own grid, tick 0 now
     return true;
 }
 
@@ -94,38 +121,111 @@ void RobotController::setFixedInterval(unsigned long interval) {
     fixedInterval = interval;
 }
 
+bool RobotController::beginStream(StreamMode mode) {
+    if(state == RobotState::MOVING) {
+        Serial.println("Error: Cannot change the stream while MOVING.");
+        return false;
+    }
+    stream.begin(mode);
+    if(mode == StreamMode::OFF) {
+        Serial.println("Stream off, playing the SD card trajectory.");
+    } else {
+        Serial.print(mode == StreamMode::POSE ? "Streaming poses" : "Streaming actuator lengths");
+        Serial.print(", buffer of "); Serial.print(STREAM_BUFFER_SIZE); Serial.println(" points.");
+        stream.printStatus();
+    }
+    return true;
+}
+
+bool RobotController::addStreamBatch(const char* batch) {
+    bool ok = stream.addBatch(batch);
+    if(stream.isActive()) stream.printStatus();
+    return ok;
+}
+
+bool RobotController::endStream() {
+    if(!stream.isActive()) {
+        Serial.println("Error: No stream to end.");
+        return false;
+    }
+    stream.end();
+    stream.printStatus();
+    return true;
+}
+
+bool RobotController::setOffset(float z, float pitch) {
+    if(state != RobotState::MOVING) {
+        Serial.println("Error: The offset only applies while MOVING.");
+        return false;
+    }
+    bool ok = offset.set(z, pitch, millis());
+    offset.printStatus();
+    return ok;
+}
+
 // ========= Private methods implementation ===========
 
 void RobotController::calibrate() {
-    static unsigned long init_time = millis();
-    static unsigned long lastUpdate = 0;
-    unsigned long now = millis() - init_time;
-    if(now - lastUpdate >= PLATFORM_UPDATE_INTERVAL) {
-        lastUpdate = now;
-        //trajectory.printPose(currentTarget);
-        platform.moveToPose(calibrationTargetPose, true); // Move to target pose with absolute position kinematics
-        if(!platform.update(false)) {
-            Serial.println("Error: Failed updating platform. Stopping robot.");
-            setState(RobotState::STOP);
-        }
-    }
+    //trajectory.printPose(currentTarget);
+    PhaseTimer timer(PHASE_KINEMATICS);
+    platform.moveToPose(calibrationTargetPose, true); // Move to target pose with absolute position kinematics
 }
 
 void RobotController::move() {
-    //init time
-    static unsigned long lastUpdate = 0;
-    unsigned long now = millis() - trajectoryInitTime;
-    if(now - lastUpdate >= PLATFORM_UPDATE_INTERVAL) {
-        lastUpdate = now;
-        Pose target = trajectory.getPose(now);
-        trajectory.printPose(target);
+    // Trajectory time of this tick: on the PLATFORM_UPDATE_INTERVAL grid since entering MOVING,
+    // so a late tick still samples the trajectory where it was scheduled.
+    unsigned long now = trajectoryTask.getTickTimeMs();
+    offset.update(millis());
+    if(stream.isActive()) {
+        moveStream(now);
+        return;
+    }
+    Pose pose, target;
+    {
+        PhaseTimer timer(PHASE_TRAJECTORY);
+        pose = offset.apply(trajectory.getPose(now));
+        // The actuators ramp to the new targets over the next PLATFORM_UPDATE_INTERVAL: aim ahead.
+        target = offset.apply(trajectory.getPose(now + platform.getSetpointLookahead()));
+    }
+    {
+        PhaseTimer timer(PHASE_TELEMETRY);
+        trajectory.printPose(pose);
+    }
+    {
+        PhaseTimer timer(PHASE_KINEMATICS);
         platform.moveToPose(target);
-        if(!platform.update(true)) {
-            Serial.println("Error: Failed updating platform. Stoppping execution.");
-            setState(RobotState::STOP); 
-            return;
+    }
+    actuatorTelemetry = true; // Print the actuator lines at the next actuator update
+}
+
+void RobotController::moveStream(unsigned long now) {
+    // Same as move() on the streamed points, stream time 0 being tick 0 of MOVING.
+    Pose point, target;
+    {
+        PhaseTimer timer(PHASE_TRAJECTORY);
+        stream.advance(now);
+        if(stream.isEmpty()) return; // Nothing streamed yet: the actuators keep their targets
+        point = stream.getPoint(now);
+        target = stream.getPoint(now + platform.getSetpointLookahead());
+        if(stream.getMode() == StreamMode::POSE) {
+            point = offset.apply(point);
+            target = offset.apply(target);
         }
     }
+    if(stream.getMode() == StreamMode::POSE) {
+        PhaseTimer timer(PHASE_TELEMETRY);
+        trajectory.printPose(point);
+    }
+    {
+        PhaseTimer timer(PHASE_KINEMATICS);
+        if(stream.getMode() == StreamMode::POSE) {
+            platform.moveToPose(target);
+        } else {
+            const float lengths[NUM_ACTUATORS] = {target.x, target.y, target.z, target.roll, target.pitch, target.yaw};
+            platform.moveToLengths(lengths);
+        }
+    }
+    actuatorTelemetry = true;
 }
 
 void RobotController::stop() {
@@ -149,20 +249,32 @@ void RobotController::stop() {
     }
 
     // If the robot is in STOP state, make platform return to home pose.
-    static unsigned long init_time = millis();
-    static unsigned long lastUpdate = 0;
-    unsigned long now = millis() - init_time;
-    if(now - lastUpdate >= PLATFORM_UPDATE_INTERVAL) {
-        lastUpdate = now;
-        //trajectory.printPose(platform.getHomePose());
-        platform.moveToHomePose(); // Move to home pose
-        if(!platform.update(false)) {
-            Serial.println("Error: Failed updating platform. Stopping robot.");
-            setState(RobotState::STOP); //TODO: error state ?
-        }
+    //trajectory.printPose(platform.getHomePose());
+    PhaseTimer timer(PHASE_KINEMATICS);
+    platform.moveToHomePose(); // Move to home pose
+}
+
+void RobotController::updateActuators() {
+    // Polled from loop() like the trajectory loop, not run from a timer interrupt: the potentiometers
+    // share the ADC with the load cells, and the setpoints are then never read while moveToPose writes them.
+    bool verbose = actuatorTelemetry && state == RobotState::MOVING;
+    actuatorTelemetry = false;
+    bool ok;
+    {
+        PhaseTimer timer(PHASE_ACTUATORS); // The actuator lines printed by verbose updates count as telemetry
+        ok = platform.update(verbose);
+    }
+    if(!ok) {
+        Serial.println("Error: Failed updating platform. Stopping robot.");
+        setState(RobotState::STOP); //TODO: error state ?
     }
 }
 
+void RobotController::printLoopTiming() const {
+    trajectoryTask.printTiming("Trajectory");
+    actuatorTask.printTiming("Actuator");
+}
+
 void RobotController::onEnterCalibrating() {
     Serial.println("Entering calibration state.");
 
@@ -177,7 +289,7 @@ void RobotController::onEnterMoving() {
     Serial.println("Entering moving state.");
     // When moving, start the trajectory and coordinate subsystems.
     // Start tongue and saliva pumps, eyes synchronization if needed.
-    trajectoryInitTime = millis(); // Record the time when moving starts
+    actuatorTask.resetTiming(); // Timing of this run, printed when it stops
 }
 
 void RobotController::onEnterStop() {
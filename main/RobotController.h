@@ -4,6 +4,9 @@
 #include "StewartPlatform.h"
 #include "Trajectory.h" 
 #include "ForceSensing.h"
+#include "Scheduler.h"
+#include "PoseStream.h"
+#include "PoseOffset.h"
 
 enum class RobotState {
     CALIBRATING,
@@ -26,6 +29,16 @@ public:
         trajectoryFileName = filename;
     }
     void setFixedInterval(unsigned long interval);
+    void printLoopTiming() const;   // Timing of the trajectory and actuator loops since the run started
+
+    // Pose streaming (PoseStream.h): MOVING plays the streamed setpoints instead of the SD card trajectory.
+    bool beginStream(StreamMode mode);      // Not while MOVING. OFF: back to the SD card trajectory
+    bool addStreamBatch(const char* batch); // Prints the stream status for the host's pacing
+    bool endStream();
+    void printStreamStatus() const { stream.printStatus(); }
+
+    // Host z / pitch offset of the played poses (PoseOffset.h), only while MOVING, reset at each run.
+    bool setOffset(float z, float pitch);   // Prints the offset status for the host's log
 
 private:
     RobotState state = RobotState::STOP; // Initial state
@@ -34,8 +47,12 @@ private:
     Pose calibrationTargetPose = {0, 0, Z0+5, 0, 0, 0}; // Target pose for calibration
     String trajectoryFileName = "test_trajectory.csv"; // File name for trajectory
     String loadedTrajectoryFileName = ""; // Track the currently loaded trajectory file
-    unsigned long trajectoryInitTime = 0; // Time when trajectory is started because we changed to MOVING state
     unsigned long fixedInterval = 100; // Default fixed interval for trajectory points in milliseconds
+    PeriodicTask trajectoryTask{PLATFORM_UPDATE_INTERVAL * 1000}; // Restarted at each state change: tick 0 starts the trajectory
+    PeriodicTask actuatorTask{ACTUATOR_UPDATE_INTERVAL_US};
+    bool actuatorTelemetry = false; // New targets: print the actuator lines at the next update
+    PoseStream stream; // Closed when a run stops: a run plays at most one stream
+    PoseOffset offset; // Not applied to a lengths stream
 
     // Force sensing subsystem
     ForceSensing forceSensing; 
@@ -43,7 +60,9 @@ private:
     // State-specific methods
     void calibrate();     
     void move();    
+    void moveStream(unsigned long now);
     void stop();           
+    void updateActuators(); // Actuator loop, runs in every state
 
     // Helper methods for state transitions
     void onEnterCalibrating();
@@ -0,0 +1,44 @@
+#include "Scheduler.h"
+
+PeriodicTask::PeriodicTask(unsigned long periodUs, MicrosClock clock)
+    : periodUs(periodUs), clock(clock) {}
+
+void PeriodicTask::start() {
+    startTime = clock();
+    nextTick = 0;
+    lastTick = 0;
+    resetTiming();
+}
+
+bool PeriodicTask::due() {
+    // Unsigned differences: correct across the wrap of the clock.
+    unsigned long deadline = startTime + (unsigned long)(nextTick * periodUs);
+    unsigned long late = clock() - deadline;
+    if ((long)late < 0) return false;
+
+    if (late >= periodUs) { // Whole periods missed: run the latest tick, drop the ones before
+        unsigned long missed = late / periodUs;
+        nextTick += missed;
+        late -= missed * periodUs;
+        timing.skipped += missed;
+        timing.overruns++;
+    }
+
+    if (timing.ticks == 0 || late < timing.minLateUs) timing.minLateUs = late;
+    if (late > timing.maxLateUs) timing.maxLateUs = late;
+    timing.sumLateUs += late;
+    timing.ticks++;
+    lastTick = nextTick++;
+    return true;
+}
+
+void PeriodicTask::printTiming(const char* name) const {
+    if (timing.skipped > 0) Serial.print("Warning: ");
+    Serial.print("Timing - "); Serial.print(name); Serial.print(" loop: ");
+    Serial.print(timing.ticks); Serial.print(" ticks of "); Serial.print(periodUs);
+    Serial.print(" us, late min "); Serial.print(timing.minLateUs);
+    Serial.print(" / mean "); Serial.print(timing.meanLateUs(), 1);
+    Serial.print(" / max "); Serial.print(timing.maxLateUs);
+    Serial.print(" us, "); Serial.print(timing.skipped);
+    Serial.print(" ticks dropped in "); Serial.print(timing.overruns); Serial.println(" overruns");
+}
@@ -0,0 +1,61 @@
+#ifndef SCHEDULER_H
+#define SCHEDULER_H
+
+#include <Arduino.h>
+
+// Microsecond clock of the scheduler: micros() on the Teensy, a fake clock in the host tests.
+typedef unsigned long (*MicrosClock)();
+
+// Timing of the ticks run since PeriodicTask::start() or resetTiming().
+struct TaskTiming {
+    unsigned long ticks = 0;        // Ticks run
+    unsigned long skipped = 0;      // Ticks dropped because a whole period or more was missed
+    unsigned long overruns = 0;     // Times ticks were dropped
+    unsigned long minLateUs = 0;    // Lateness of the ticks run: poll time - deadline
+    unsigned long maxLateUs = 0;
+    uint64_t sumLateUs = 0;
+
+    float meanLateUs() const { return ticks ? (float)sumLateUs / ticks : 0.0f; }
+};
+
+//--------------------------------------------------------------------
+// Fixed-rate task of the cooperative loop. due() is polled from loop()
+// and returns true once per period, on a grid of deadlines counted in
+// microseconds from start(): a late tick runs as soon as it is polled and
+// the next deadline stays on the grid, so the rate does not drift. When a
+// whole period or more is missed (serial command, SD card load), the missed
+// ticks are dropped instead of being run back to back, and counted as an
+// overrun. Deadlines survive the 32-bit wrap of the clock.
+//--------------------------------------------------------------------
+class PeriodicTask {
+public:
+    PeriodicTask(unsigned long periodUs, MicrosClock clock = micros);
+
+    // Restart the grid with the first tick due now, and clear the timing.
+    void start();
+
+    // True when a tick is due: the caller runs it before polling again.
+    bool due();
+
+    // Scheduled time of the last tick run, from start(). It advances by exactly
+    // one period per tick (more after an overrun), whatever the lateness.
+    uint64_t getTickTimeUs() const { return lastTick * periodUs; }
+    unsigned long getTickTimeMs() const { return (unsigned long)(getTickTimeUs() / 1000); }
+
+    unsigned long getPeriodUs() const { return periodUs; }
+    const TaskTiming& getTiming() const { return timing; }
+    void resetTiming() { timing = TaskTiming(); }
+
+    // "Timing - <name> loop: ...": ticks, lateness and dropped ticks, as a Warning if any were dropped.
+    void printTiming(const char* name) const;
+
+private:
+    unsigned long periodUs;
+    MicrosClock clock;
+    unsigned long startTime = 0;    // clock() at start()
+    uint64_t nextTick = 0;          // Index of the next deadline on the grid
+    uint64_t lastTick = 0;          // Index of the last tick run
+    TaskTiming timing;
+};
+
+#endif // SCHEDULER_H
@@ -0,0 +1,74 @@
+#include "SerialCommand.h"
+#include <string.h>
+#include <ctype.h>
+
+bool LineAssembler::poll(Stream& stream) {
+    if (ready) return true;
+    while (stream.available() > 0) {
+        int c = stream.read();
+        if (c < 0) break;
+        if (c == '\n') {
+            // Trim trailing whitespace ('\r' included) and hand the line over.
+            while (length > 0 && isspace((unsigned char)buffer[length - 1])) length--;
+            buffer[length] = '\0';
+            ready = true;
+            return true; // Leave any following bytes for the next loop iteration
+        }
+        if (length == 0 && isspace((unsigned char)c)) continue; // Trim leading whitespace
+        if (length < CMD_BUFFER_SIZE - 1) {
+            buffer[length++] = (char)c;
+        } else {
+            overflow = true; // Keep discarding until the end of the line
+        }
+    }
+    return false;
+}
+
+void LineAssembler::clear() {
+    length = 0;
+    ready = false;
+    overflow = false;
+    buffer[0] = '\0';
+}
+
+static bool runCommand(const char* command, const CommandEntry* table, int count) {
+    for (int i = 0; i < count; i++) {
+        const CommandEntry& entry = table[i];
+        if (entry.hasArgs) {
+            size_t n = strlen(entry.name);
+            if (strncmp(command, entry.name, n) == 0) {
+                const char* args = command + n;
+                while (isspace((unsigned char)*args)) args++;
+                return entry.handler(args);
+            }
+        } else if (strcasecmp(command, entry.name) == 0) {
+            return entry.handler("");
+        }
+    }
+    Serial.print("Unknown command. Available commands: ");
+    for (int i = 0; i < count; i++) {
+        Serial.print(table[i].name);
+        if (table[i].hasArgs) Serial.print("<...>");
+        if (i < count - 1) Serial.print(", ");
+    }
+    Serial.println();
+    return false;
+}
+
+bool dispatchCommand(char* line, const CommandEntry* table, int count) {
+    if (line[0] != '#') {
+        return runCommand(line, table, count);
+    }
+
+    // Tagged command "#<id> <command>"
+    char* id = line + 1;
+    char* command = id;
+    while (*command && !isspace((unsigned char)*command)) command++;
+    if (*command) *command++ = '\0';
+    while (isspace((unsigned char)*command)) command++;
+
+    Serial.print("#"); Serial.print(id); Serial.println(" begin");
+    bool ok = runCommand(command, table, count);
+    Serial.print("#"); Serial.print(id); Serial.println(ok ? " end ok" : " end error");
+    return ok;
+}
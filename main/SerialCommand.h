@@ -0,0 +1,50 @@
+#ifndef SERIAL_COMMAND_H
+#define SERIAL_COMMAND_H
+
+#include <Arduino.h>
+
+#define CMD_BUFFER_SIZE 512 // Longest accepted command line, including the terminating '\0' (stream batches)
+
+//--------------------------------------------------------------------
+// Incremental line assembler: consumes only the bytes already received,
+// so it never blocks the control loop waiting for the rest of a command
+// that was split across USB packets. No heap allocation.
+//--------------------------------------------------------------------
+class LineAssembler {
+public:
+    // Read the available bytes. Returns true when a complete line is ready.
+    bool poll(Stream& stream);
+
+    // The completed line, trimmed and null-terminated (valid until clear()).
+    char* line() { return buffer; }
+
+    // True if the completed line was longer than the buffer and got truncated.
+    bool overflowed() const { return overflow; }
+
+    // Start assembling the next line.
+    void clear();
+
+private:
+    char buffer[CMD_BUFFER_SIZE];
+    int length = 0;
+    bool ready = false;
+    bool overflow = false;
+};
+
+// Command handler: receives the text after the command name (leading spaces skipped).
+// Returns false if the command failed or its arguments are invalid.
+typedef bool (*CommandHandler)(const char* args);
+
+struct CommandEntry {
+    const char* name;       // "start" (whole line, case-insensitive) or "set position:" (prefix)
+    bool hasArgs;           // true: name is a prefix followed by arguments
+    CommandHandler handler;
+};
+
+// Look the line up in the command table and run its handler.
+// Lines tagged "#<id> <command>" get their output framed by "#<id> begin" and
+// "#<id> end ok|error" so the host can match replies to requests.
+// Returns false for unknown or failed commands.
+bool dispatchCommand(char* line, const CommandEntry* table, int count);
+
+#endif // SERIAL_COMMAND_H
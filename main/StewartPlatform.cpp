@@ -2,12 +2,13 @@
 #include "Config.h"
 #include <Arduino.h>
 
-StewartPlatform::StewartPlatform(): pot_mux(POT_MUX_S0, POT_MUX_S1, POT_MUX_S2, POT_MUX_S3) {
+StewartPlatform::StewartPlatform(unsigned long actuatorIntervalUs)
+    : pot_mux(POT_MUX_S0, POT_MUX_S1, POT_MUX_S2, POT_MUX_S3), actuatorIntervalUs(actuatorIntervalUs) {
     pinMode(POT_MUX_SIG, INPUT); // Mux SIG pin for potentiometers
     pinMode(POT_MUX_EN, OUTPUT); // Mux EN pin for potentiometers
     digitalWrite(POT_MUX_EN, LOW); // Enable the potentiometer Mux
     for(int i = 0; i < 6; i++)
-        actuators[i] = new Actuator(pot_mux, ACT_PWM_PINS[i], ACT_A_PINS[i], ACT_B_PINS[i], ACT_POT_CH[i], i);
+        actuators[i] = new Actuator(pot_mux, ACT_PWM_PINS[i], ACT_A_PINS[i], ACT_B_PINS[i], ACT_POT_CH[i], i, actuatorIntervalUs);
 }
 
 void StewartPlatform::begin() {
@@ -18,6 +19,15 @@ void StewartPlatform::begin() {
 
 void StewartPlatform::moveToPose(const Pose& pose, bool absolute) {
     kin.inverse(pose, targetLengths, absolute);
+    setTargets();
+}
+
+void StewartPlatform::moveToLengths(const float lengths[NUM_ACTUATORS]) {
+    for(int i = 0; i < 6; i++) targetLengths[i] = lengths[i];
+    setTargets();
+}
+
+void StewartPlatform::setTargets() {
     for(int i = 0; i < 6; i++) {
         float clamped = constrain(targetLengths[i], ACTUATOR_MIN_LENGTH, ACTUATOR_MAX_LENGTH);
         if(clamped != targetLengths[i]) {
@@ -26,8 +36,18 @@ void StewartPlatform::moveToPose(const Pose& pose, bool absolute) {
             Serial.print(" Target: "); Serial.print(targetLengths[i]);
             Serial.print(" Clamped: "); Serial.println(clamped);
         }
-        actuators[i]->setTargetLength(clamped);
+        // Target rate from consecutive targets (one per PLATFORM_UPDATE_INTERVAL), for the feed-forward.
+        // None for the first targets after a state change; never above what the actuator can follow.
+        float rate = 0;
+        if(hasPreviousTargets) {
+            float maxRate = min(ACT_FF_MAX_RATE, ACT_KF_MAX_SPEED[i]);
+            rate = (clamped - previousTargets[i]) / (PLATFORM_UPDATE_INTERVAL / 1000.0f);
+            rate = constrain(rate, -maxRate, maxRate);
+        }
+        previousTargets[i] = clamped;
+        actuators[i]->setTargetLength(clamped, rate);
     }
+    hasPreviousTargets = true;
 }
 
 bool StewartPlatform::update(bool verbose) {
@@ -39,6 +59,7 @@ bool StewartPlatform::update(bool verbose) {
 
 void StewartPlatform::stop() {
     for(int i = 0; i < 6; i++) actuators[i]->stop();
+    hasPreviousTargets = false;
 }
 
 // State StewartPlatform::getState() const {
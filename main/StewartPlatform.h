@@ -6,14 +6,27 @@
 
 class StewartPlatform {
 public:
-    StewartPlatform();
+    // actuatorIntervalUs: period of update(), see ACTUATOR_UPDATE_INTERVAL_US.
+    StewartPlatform(unsigned long actuatorIntervalUs = ACTUATOR_UPDATE_INTERVAL_US);
     void begin();
+    // Trajectory loop, every PLATFORM_UPDATE_INTERVAL: new actuator targets, ramped by update().
     void moveToPose(const Pose& pose, bool absolute = false);
+    // Same with the actuator lengths given directly (streamed joint setpoints), no kinematics.
+    void moveToLengths(const float lengths[NUM_ACTUATORS]);
     void moveToHomePose() {
+        resetTargetRates(); // Static target: no feed-forward from the pose left behind
         moveToPose(kin.getHomePose(), true); // Move to home pose with absolute position kinematics
     }
+    // The next targets are a jump (state change): they get no feed-forward rate.
+    void resetTargetRates() { hasPreviousTargets = false; }
     void stop();
+    // Actuator loop, every actuatorIntervalUs: length estimators and PIDs.
     bool update(bool verbose=false);
+    // How far ahead (ms) the trajectory loop evaluates the pose, so that the ramped setpoints
+    // are on time instead of one PLATFORM_UPDATE_INTERVAL late.
+    unsigned long getSetpointLookahead() const {
+        return (PLATFORM_UPDATE_INTERVAL * 1000 - actuatorIntervalUs) / 1000;
+    }
     bool calibrateActuators(bool fullCalibration, bool debug=false);
     void setHomePose(const Pose& pose) {
         kin.setHomePose(pose); 
@@ -23,9 +36,14 @@ public:
     }
 private:
     CD74HC4067 pot_mux;
+    unsigned long actuatorIntervalUs;
     Actuator* actuators[6];
     float targetLengths[6];
+    float previousTargets[6]; // Clamped targets of the previous moveToPose, for the target rates
+    bool hasPreviousTargets = false;
     Kinematics kin;
+
+    void setTargets(); // Clamp targetLengths and hand them to the actuators with their rates
 };
 
 #endif // STEWART_PLATFORM_H
\ No newline at end of file
@@ -25,12 +25,7 @@ bool Trajectory::addWaypoint(Pose& pose) {
     // pose.pitch = degrees2rad(pose.pitch);
     // pose.yaw = degrees2rad(pose.yaw);
     // Validate that the pose is within the allowed limits.
-    if( pose.x < MIN_X || pose.x > MAX_X ||
-        pose.y < MIN_Y || pose.y > MAX_Y ||
-        pose.z < MIN_Z || pose.z > MAX_Z ||
-        pose.roll < MIN_ROLL || pose.roll > MAX_ROLL ||
-        pose.pitch < MIN_PITCH || pose.pitch > MAX_PITCH ||
-        pose.yaw < MIN_YAW || pose.yaw > MAX_YAW) {
+    if(!withinLimits(pose)) {
         Serial.println("Error: Pose out of bounds.");
         return false;
     }
@@ -152,28 +147,23 @@ Pose Trajectory::getPose(unsigned long currentTime) {
         const unsigned long t0 = points[i1].time, t1 = points[i2].time;
         float t = static_cast<float>(currentTime - t0) / static_cast<float>(t1 - t0);
 
-        const Pose &P0 = points[i0].pose;
-        const Pose &P1 = points[i1].pose;
-        const Pose &P2 = points[i2].pose;
-        const Pose &P3 = points[i3].pose;
-
-        Pose p {
-            catmullRom(P0.x,    P1.x,    P2.x,    P3.x,    t),
-            catmullRom(P0.y,    P1.y,    P2.y,    P3.y,    t),
-            catmullRom(P0.z,    P1.z,    P2.z,    P3.z,    t),
-            catmullRom(P0.roll, P1.roll, P2.roll, P3.roll, t),
-            catmullRom(P0.pitch,P1.pitch,P2.pitch,P3.pitch,t),
-            catmullRom(P0.yaw,  P1.yaw,  P2.yaw,  P3.yaw,  t)
-        };
-
         // Clamp to operational limits (duplicates removed)
-        p = clampPose(p);
+        Pose p = clampPose(catmullRom(points[i0].pose, points[i1].pose, points[i2].pose, points[i3].pose, t));
 
         return p;
     }
     return points[count-1].pose;
 }
 
+bool Trajectory::withinLimits(const Pose& pose) {
+    return pose.x >= MIN_X && pose.x <= MAX_X &&
+           pose.y >= MIN_Y && pose.y <= MAX_Y &&
+           pose.z >= MIN_Z && pose.z <= MAX_Z &&
+           pose.roll >= MIN_ROLL && pose.roll <= MAX_ROLL &&
+           pose.pitch >= MIN_PITCH && pose.pitch <= MAX_PITCH &&
+           pose.yaw >= MIN_YAW && pose.yaw <= MAX_YAW;
+}
+
 Pose Trajectory::clampPose(const Pose& pose) {
     Pose clampedPose;
     clampedPose.x = clamp(pose.x, MIN_X, MAX_X);
@@ -197,6 +187,17 @@ float Trajectory::catmullRom(float p0, float p1, float p2, float p3, float t)
     );
 }
 
+Pose Trajectory::catmullRom(const Pose& p0, const Pose& p1, const Pose& p2, const Pose& p3, float t) {
+    return {
+        catmullRom(p0.x,     p1.x,     p2.x,     p3.x,     t),
+        catmullRom(p0.y,     p1.y,     p2.y,     p3.y,     t),
+        catmullRom(p0.z,     p1.z,     p2.z,     p3.z,     t),
+        catmullRom(p0.roll,  p1.roll,  p2.roll,  p3.roll,  t),
+        catmullRom(p0.pitch, p1.pitch, p2.pitch, p3.pitch, t),
+        catmullRom(p0.yaw,   p1.yaw,   p2.yaw,   p3.yaw,   t)
+    };
+}
+
 void Trajectory::printPose(const Pose& pose) {
     Serial.print("Pose: "); Serial.print("x: "); Serial.print(pose.x); Serial.print(", ");
     Serial.print("y: "); Serial.print(pose.y); Serial.print(", ");
@@ -22,7 +22,13 @@ public:
 
     // Returns the interpolated or current pose based on the current time.
     Pose getPose(unsigned long currentTime);
-    float catmullRom(float p0, float p1, float p2, float p3, float t);
+    static float catmullRom(float p0, float p1, float p2, float p3, float t);
+    // Catmull-Rom of each pose component between p1 (t = 0) and p2 (t = 1), not clamped.
+    static Pose catmullRom(const Pose& p0, const Pose& p1, const Pose& p2, const Pose& p3, float t);
+    // True if every component is within the pose limits of Config.h.
+    static bool withinLimits(const Pose& pose);
+    // Clamp to the pose limits of Config.h, with a warning per clamped value.
+    static Pose clampPose(const Pose& pose);
     void printPoints();
     void printPose(const Pose& pose);
 
@@ -38,8 +44,6 @@ private:
     } points[MAX_POINTS];
     int count;
     unsigned long fixedInterval; // Fixed time interval between points (in ms)
-
-    Pose clampPose(const Pose& pose);
 };
 
 #endif // TRAJECTORY_H
\ No newline at end of file
@@ -1,9 +1,48 @@
 #include <Arduino.h>
 #include "RobotController.h"
 #include "Utils.h"
+#include "SerialCommand.h"
+#include "LoopTiming.h"
 #include <CD74HC4067.h>
 
 RobotController robotController;
+LineAssembler commandLine;
+
+bool cmdStart(const char*);
+bool cmdStop(const char*);
+bool cmdCalibrate(const char*);
+bool cmdListCSVFiles(const char*);
+bool cmdTrajectory(const char* filename);
+bool cmdSetPosition(const char* params);
+bool cmdSetOrigin(const char* params);
+bool cmdSetFixedInterval(const char* params);
+bool cmdGetTiming(const char*);
+bool cmdPing(const char* token);
+bool cmdStreamBegin(const char* params);
+bool cmdStreamBatch(const char* batch);
+bool cmdStreamEnd(const char*);
+bool cmdGetStream(const char*);
+bool cmdSetOffset(const char* params);
+
+// Command table: whole-line commands are case-insensitive, "name:" commands take arguments.
+const CommandEntry COMMANDS[] = {
+    {"start",               false, cmdStart},
+    {"stop",                false, cmdStop},
+    {"calibrate",           false, cmdCalibrate},
+    {"list_csv_files",      false, cmdListCSVFiles},
+    {"trajectory:",         true,  cmdTrajectory},
+    {"set position:",       true,  cmdSetPosition},
+    {"set origin:",         true,  cmdSetOrigin},
+    {"set fixed interval:", true,  cmdSetFixedInterval},
+    {"get timing",          false, cmdGetTiming},
+    {"ping:",               true,  cmdPing},
+    {"stream begin:",       true,  cmdStreamBegin},
+    {"stream:",             true,  cmdStreamBatch},
+    {"stream end",          false, cmdStreamEnd},
+    {"get stream",          false, cmdGetStream},
+    {"set offset:",         true,  cmdSetOffset},
+};
+const int NUM_COMMANDS = sizeof(COMMANDS) / sizeof(COMMANDS[0]);
 
 void setup() {
     Serial.begin(9600);
@@ -23,81 +62,154 @@ void setup() {
         }
     }
 
+    loopTiming.reset(); // First timing window starts with the control loop
 }
 
 void loop() {
-    // Handle commands sent via Serial by gui.
-    if (Serial.available()) {
-        String command = Serial.readStringUntil('\n');
-        command.trim();
-        if (command.equalsIgnoreCase("start")) {
-            Serial.println("Starting robot.");
-            robotController.setState(RobotState::MOVING);
-            return;
-        }else if (command.equalsIgnoreCase("stop")) {
-            Serial.println("Stopping robot.");
-            robotController.setState(RobotState::STOP);
-            return;
-        }else if (command.equalsIgnoreCase("calibrate")) {
-            Serial.println("Calibration state");
-            robotController.setState(RobotState::CALIBRATING);
-            return;
-        }else if (command.equalsIgnoreCase("list_csv_files")) {
-            listCSVFiles();
-            return;
-        }else if (command.startsWith("trajectory:")) {
-            // Remove "trajectory:" and get the remaining part as filename.
-            String filename = command.substring(11);
-            filename.trim();
-            Serial.print("Loading trajectory from file: ");
-            Serial.println(filename);
-            robotController.setTrajectoryFileName(filename);
-            return;
-        }else if (command.startsWith("set position:")) {
-            // Parse the command to set a specific position
-            String params = command.substring(13);
-            params.trim();
-            float x, y, z;
-            if (sscanf(params.c_str(), "%f,%f,%f", &x, &y, &z) == 3) {
-                // Update the global target pose.
-                robotController.setCalibrationTargetPose({x, y, z, 0, 0, 0});
-            } else {
-                Serial.print("Error: Invalid parameters for set position. Message received: ");
-                Serial.println(command);
-            }
-            return;
-        }else if (command.startsWith("set origin:")) {
-            // Parse the command to set a new origin
-            String params = command.substring(11);
-            params.trim();
-            float x, y, z;
-            if (sscanf(params.c_str(), "%f,%f,%f", &x, &y, &z) == 3) {
-                robotController.setPlatformHomePose({x, y, z, 0, 0, 0});
-                Serial.print("Origin set to: ");
-                Serial.print(x); Serial.print(", ");
-                Serial.print(y); Serial.print(", ");
-                Serial.println(z);
-            } else {
-                Serial.print("Error: Invalid parameters for set origin. Message received: ");
-                Serial.println(command);
+    loopTiming.beginLoop();
+    // Handle commands sent via Serial by gui. The line is assembled from the bytes
+    // already received, so a command split across USB packets never stalls the loop.
+    bool commandHandled = false;
+    {
+        PhaseTimer timer(PHASE_COMMANDS);
+        if (commandLine.poll(Serial)) {
+            if (commandLine.overflowed()) {
+                Serial.print("Error: Command too long, ignored. Maximum length: ");
+                Serial.println(CMD_BUFFER_SIZE - 1);
+            } else if (commandLine.line()[0] != '\0') {
+                dispatchCommand(commandLine.line(), COMMANDS, NUM_COMMANDS);
             }
-            return;
-        } else if (command.startsWith("set fixed interval:")) {
-            // Parse the command to set a new fixed interval
-            String params = command.substring(19);
-            params.trim();
-            unsigned long interval = params.toInt();
-            if (interval > 0) {
-                robotController.setFixedInterval(interval);
-            } else {
-                Serial.print("Error: Invalid fixed interval value. Message received: ");
-                Serial.println(command);
-            }
-            return;
-        } else {
-            Serial.println("Unknown command. Available commands: start, stop, calibrate, list_csv_files, trajectory:<filename>, set position:<x,y,z>, set origin:<x,y,z>");
+            commandLine.clear();
+            commandHandled = true;
         }
     }
 
-    robotController.update();
-}
\ No newline at end of file
+    // A pass that ran a command leaves the control update to the next pass.
+    if (!commandHandled) robotController.update();
+    loopTiming.endLoop();
+}
+
+// ========= Command handlers ===========
+
+bool cmdStart(const char*) {
+    Serial.println("Starting robot.");
+    return robotController.setState(RobotState::MOVING);
+}
+
+bool cmdStop(const char*) {
+    Serial.println("Stopping robot.");
+    return robotController.setState(RobotState::STOP);
+}
+
+bool cmdCalibrate(const char*) {
+    Serial.println("Calibration state");
+    return robotController.setState(RobotState::CALIBRATING);
+}
+
+bool cmdListCSVFiles(const char*) {
+    listCSVFiles();
+    return true;
+}
+
+bool cmdTrajectory(const char* filename) {
+    Serial.print("Loading trajectory from file: ");
+    Serial.println(filename);
+    robotController.setTrajectoryFileName(String(filename));
+    return true;
+}
+
+bool cmdSetPosition(const char* params) {
+    float x, y, z;
+    if (sscanf(params, "%f,%f,%f", &x, &y, &z) == 3) {
+        // Update the global target pose.
+        robotController.setCalibrationTargetPose({x, y, z, 0, 0, 0});
+        return true;
+    }
+    Serial.print("Error: Invalid parameters for set position. Message received: ");
+    Serial.println(params);
+    return false;
+}
+
+bool cmdSetOrigin(const char* params) {
+    float x, y, z;
+    if (sscanf(params, "%f,%f,%f", &x, &y, &z) == 3) {
+        robotController.setPlatformHomePose({x, y, z, 0, 0, 0});
+        Serial.print("Origin set to: ");
+        Serial.print(x); Serial.print(", ");
+        Serial.print(y); Serial.print(", ");
+        Serial.println(z);
+        return true;
+    }
+    Serial.print("Error: Invalid parameters for set origin. Message received: ");
+    Serial.println(params);
+    return false;
+}
+
+bool cmdSetFixedInterval(const char* params) {
+    long interval = atol(params);
+    if (interval > 0) {
+        robotController.setFixedInterval(interval);
+        return true;
+    }
+    Serial.print("Error: Invalid fixed interval value. Message received: ");
+    Serial.println(params);
+    return false;
+}
+
+bool cmdGetTiming(const char*) {
+    // Execution time per loop phase since the last report, then the scheduler timing of the run.
+    loopTiming.print();
+    loopTiming.reset();
+    robotController.printLoopTiming();
+    return true;
+}
+
+bool cmdPing(const char* token) {
+    // Clock synchronisation (gui/clock_sync.py): echo the host timestamp with micros()
+    // when the ping is handled and when the reply is printed.
+    unsigned long received = micros();
+    if (token[0] == '\0') {
+        Serial.println("Error: ping needs the host timestamp.");
+        return false;
+    }
+    Serial.print("Pong: "); Serial.print(token);
+    Serial.print(", "); Serial.print(received);
+    Serial.print(", "); Serial.println(micros());
+    return true;
+}
+
+bool cmdStreamBegin(const char* params) {
+    // "pose" or "lengths" empties the jitter buffer and selects what the batches carry, "off" goes back
+    // to the SD card trajectory.
+    if (strcasecmp(params, "pose") == 0) return robotController.beginStream(StreamMode::POSE);
+    if (strcasecmp(params, "lengths") == 0) return robotController.beginStream(StreamMode::LENGTHS);
+    if (strcasecmp(params, "off") == 0) return robotController.beginStream(StreamMode::OFF);
+    Serial.print("Error: Invalid stream mode (pose, lengths or off). Message received: ");
+    Serial.println(params);
+    return false;
+}
+
+bool cmdStreamBatch(const char* batch) {
+    return robotController.addStreamBatch(batch);
+}
+
+bool cmdStreamEnd(const char*) {
+    return robotController.endStream();
+}
+
+bool cmdGetStream(const char*) {
+    robotController.printStreamStatus();
+    return true;
+}
+
+bool cmdSetOffset(const char* params) {
+    // Bite-force control (gui/bite_force.py): "<z mm>,<pitch rad>" added to the played poses,
+    // refreshed faster than OFFSET_TIMEOUT_MS.
+    float z, pitch;
+    if (sscanf(params, "%f,%f", &z, &pitch) == 2) {
+        return robotController.setOffset(z, pitch);
+    }
+    Serial.print("Error: Invalid parameters for set offset. Message received: ");
+    Serial.println(params);
+    return false;
+}
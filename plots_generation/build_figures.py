@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+build_figures.py  –  Rebuild the report figures that are out of date
+
+Each figure is a target with input files, parameters, a build function and
+its output PNGs. A target is stale when an output is missing or when the hash
+of its inputs, parameters or build function source changed since the last
+build. Hashes are kept in Results/.cache/figures.json. File hashes are
+memoised by size and mtime, so unchanged CSVs are not re-read.
+
+Targets may depend on other targets through their outputs. The graph is
+built level by level: the stale targets of a level are rendered in parallel
+in a process pool, then the next level is checked with the fresh outputs.
+Updating one run therefore re-analyses that run, refreshes the tracking
+metrics and redraws only the delay / ρ / RMS figures.
+
+Usage:
+    python build_figures.py             # build stale figures
+    python build_figures.py --list      # show targets and whether they are stale
+    python build_figures.py --force actuator_rhos
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import pathlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("MPLBACKEND", "Agg")     # Workers render to files only
+
+import force_distribution
+import plot_correlation
+import plot_traj
+from run_analysis import CACHE_DIRNAME, RESULTS_DIR
+from run_catalog import RunCatalog
+
+HERE = pathlib.Path(__file__).resolve().parent
+MANIFEST = RESULTS_DIR / CACHE_DIRNAME / "figures.json"
+TRACKING_JSON = RESULTS_DIR / CACHE_DIRNAME / "tracking_metrics.json"
+
+
+class Target:
+    def __init__(self, name, build, inputs, outputs, params=None, deps=()):
+        self.name = name
+        self.build = build                  # build(inputs, outputs, **params), module level (picklable)
+        self.inputs = [pathlib.Path(p) for p in inputs]
+        self.outputs = [pathlib.Path(p) for p in outputs]
+        self.params = params or {}
+        self.deps = list(deps)              # Names of targets whose outputs are among the inputs
+
+
+# ───────────────────────────── build functions ───────────────────────────────
+
+
+def build_tracking_metrics(inputs, outputs, trajectory):
+    # Already inside a pool worker: analyse the runs serially (uncached runs only).
+    time_intervals, data = plot_correlation.interval_metrics(trajectory, jobs=1)
+    outputs[0].write_text(json.dumps({"time_intervals": time_intervals, "data": data}))
+
+
+def build_metric_figure(inputs, outputs, key):
+    metrics = json.loads(inputs[0].read_text())
+    ylabel, mean_label, _, ylim = plot_correlation.METRICS[key]
+    plot_correlation.plot_metric(metrics["time_intervals"], metrics["data"][key], ylabel, mean_label,
+                                 outputs[0], ylim)
+
+
+def build_force_distribution(inputs, outputs, line_coords):
+    force_distribution.plot_force_distrib(str(inputs[0]), line_coords, outputs[0])
+
+
+def build_trajectory(inputs, outputs, seconds):
+    plot_traj.plot_trajectory(inputs[0], outputs, seconds)
+
+
+def _run(target_args):
+    build, inputs, outputs, params = target_args
+    start = time.perf_counter()
+    build(inputs, outputs, **params)
+    return time.perf_counter() - start
+
+
+# ───────────────────────────── graph ─────────────────────────────────────────
+
+
+def targets(out_dir: pathlib.Path, trajectory: str = "benhui_gum_10s") -> list[Target]:
+    catalog = RunCatalog()
+    catalog.refresh()
+    runs = catalog.query(trajectory=trajectory)
+    run_files = [path for run in runs for path in (run.actuator_csv, run.pose_csv) if path is not None]
+
+    graph = []
+    if runs:
+        graph.append(Target("tracking_metrics", build_tracking_metrics, run_files, [TRACKING_JSON],
+                            {"trajectory": trajectory}))
+        for key, (_, _, png, _) in plot_correlation.METRICS.items():
+            graph.append(Target(pathlib.Path(png).stem, build_metric_figure, [TRACKING_JSON], [out_dir / png],
+                                {"key": key}, deps=["tracking_metrics"]))
+    else:
+        print(f"No '{trajectory}' runs in the catalog, skipping the tracking figures")
+    for path, lines in zip(force_distribution.file_paths, force_distribution.line_coords):
+        png = force_distribution.default_output(path)
+        graph.append(Target(f"force_{pathlib.Path(png).stem}", build_force_distribution, [HERE / path],
+                            [out_dir / png], {"line_coords": lines}))
+    graph.append(Target("trajectory", build_trajectory, [HERE / plot_traj.TRAJECTORY_CSV],
+                        [out_dir / name for name in plot_traj.OUTPUTS], {"seconds": 4.0}))
+    return graph
+
+
+class Builder:
+    def __init__(self, graph: list[Target], jobs: int):
+        self.graph = {t.name: t for t in graph}
+        self.jobs = jobs
+        self.manifest = json.loads(MANIFEST.read_text()) if MANIFEST.exists() else {}
+        self.file_hashes = self.manifest.setdefault("_files", {})
+
+    def file_hash(self, path: pathlib.Path) -> str:
+        stat = path.stat()
+        memo = self.file_hashes.get(str(path))
+        if memo and memo[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return memo[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        self.file_hashes[str(path)] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def stamp(self, target: Target) -> str:
+        digest = hashlib.sha256(inspect.getsource(target.build).encode())
+        digest.update(json.dumps(target.params, sort_keys=True, default=str).encode())
+        for path in target.inputs:
+            digest.update(f"{path}:{self.file_hash(path)}".encode())
+        return digest.hexdigest()
+
+    def missing_inputs(self, target: Target) -> list[pathlib.Path]:
+        return [p for p in target.inputs if not p.exists()]
+
+    def is_stale(self, target: Target) -> bool:
+        return (any(not p.exists() for p in target.outputs)
+                or self.manifest.get(target.name) != self.stamp(target))
+
+    def levels(self) -> list[list[Target]]:
+        depth = {}
+
+        def level(name):
+            if name not in depth:
+                depth[name] = 1 + max((level(d) for d in self.graph[name].deps), default=-1)
+            return depth[name]
+
+        out = []
+        for name in self.graph:
+            lvl = level(name)
+            while len(out) <= lvl:
+                out.append([])
+            out[lvl].append(self.graph[name])
+        return out
+
+    def build(self, force: set[str]) -> None:
+        failed = set()
+        for targets_at_level in self.levels():
+            todo = []
+            for t in targets_at_level:
+                if failed & set(t.deps):
+                    failed.add(t.name)
+                    print(f"  skip   {t.name} (dependency failed)")
+                elif missing := self.missing_inputs(t):
+                    print(f"  skip   {t.name} (missing {missing[0]})")
+                elif t.name in force or self.is_stale(t):
+                    todo.append(t)
+                else:
+                    print(f"  fresh  {t.name}")
+            if not todo:
+                continue
+            for t in todo:
+                for p in t.outputs:
+                    p.parent.mkdir(parents=True, exist_ok=True)
+            args = [(t.build, t.inputs, t.outputs, t.params) for t in todo]
+            with ProcessPoolExecutor(max_workers=max(1, min(self.jobs, len(todo)))) as pool:
+                futures = [pool.submit(_run, a) for a in args]
+                for t, future in zip(todo, futures):
+                    try:
+                        seconds = future.result()
+                    except Exception as e:      # Report and keep building the independent figures
+                        failed.add(t.name)
+                        print(f"  FAILED {t.name}: {e}")
+                        continue
+                    self.manifest[t.name] = self.stamp(t)
+                    print(f"  built  {t.name} ({seconds:.1f} s)")
+            MANIFEST.parent.mkdir(parents=True, exist_ok=True)
+            MANIFEST.write_text(json.dumps(self.manifest, indent=1))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Incrementally rebuild the report figures")
+    ap.add_argument("--out-dir", type=pathlib.Path, default=HERE, help="Where the PNGs go (default: this folder)")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    ap.add_argument("--force", nargs="*", default=[], metavar="TARGET", help="Rebuild these targets anyway")
+    ap.add_argument("--list", action="store_true", help="List the targets and their state, build nothing")
+    args = ap.parse_args()
+
+    start = time.perf_counter()
+    builder = Builder(targets(args.out_dir.resolve()), args.jobs)
+    if args.list:
+        for lvl in builder.levels():
+            for t in lvl:
+                state = "missing input" if builder.missing_inputs(t) else "stale" if builder.is_stale(t) else "fresh"
+                print(f"{t.name:<32}{state:<15}{', '.join(p.name for p in t.outputs)}")
+    else:
+        builder.build(set(args.force))
+        print(f"Done in {time.perf_counter() - start:.1f} s")
@@ -2,97 +2,26 @@
 """
 delay_xcorr.py  –  Estimate commanded-vs-measured delay per actuator
 Usage:
-    python delay_xcorr.py data.csv
+    python control_delay.py                 # every run under ../Results
+    python control_delay.py data.csv ...    # given actuator_data CSV files
 Dependencies:
-    pip install pandas numpy scipy
+    pip install pandas numpy
 """
 import sys
-import numpy as np
-import pandas as pd
-from scipy.signal import correlate, correlation_lags
 
-def normalised_xcorr(x, y):
-    """Return full, zero-mean, unit-variance cross-correlation ρ_xy(k)."""
-    x = x - x.mean()
-    y = y - y.mean()
-    denom = np.sqrt(np.sum(x**2) * np.sum(y**2))
-    return correlate(y, x, mode='full') / denom           # +lag ⇒ y lags x
+from run_analysis import Run, analyse_runs, discover_runs, print_result
 
 
-def rms_error_shifted(u: np.ndarray, y: np.ndarray, k: int) -> float:
-    """Return RMS(|shift(u,k) − y|) after aligning for lag k.
-
-    Positive *k* means *y* lags *u*, so we discard the first *k* samples of *u*.
-    Negative *k* means *u* lags *y*, so we discard the first |k| samples of *y*.
-    """
-    if k > 0:
-        # Discard the first *k* samples of u so that u[k] aligns with y[0]
-        u_aligned = u[k:]
-        y_aligned = y[: len(u_aligned)]
-    elif k < 0:
-        k_abs = abs(k)
-        # Discard first |k| samples of y so that y[k_abs] aligns with u[0]
-        y_aligned = y[k_abs:]
-        u_aligned = u[: len(y_aligned)]
-    else:
-        u_aligned = u
-        y_aligned = y
-
-    if len(u_aligned) == 0 or len(y_aligned) == 0:
-        return np.nan
-
-    return float(np.sqrt(np.mean((u_aligned - y_aligned) ** 2)))
-
-def analyse_actuator(df_act):
-    u = df_act["target_length"].to_numpy()
-    y = df_act["current_length"].to_numpy()
-    rho = normalised_xcorr(u, y)
-    lags = correlation_lags(len(y), len(u), mode='full')  # same length as rho
-    k_peak = int(lags[np.argmax(np.abs(rho))])            # lag (samples)
-    rho_peak = float(rho[np.argmax(np.abs(rho))])
-
-    # Estimate Δt from the 'time' column (assumes monotonic ascending)
-    t = df_act["time"].to_numpy()
-    dt = np.median(np.diff(t)) if len(t) > 1 else np.nan
-    print(f"Actuator {df_act['actuator'].iloc[0]}: dt = {dt:.6f} s, k_peak = {k_peak}")
-    tau_sec = k_peak * dt
-
-    # RMS error after delay compensation
-    rms_err = rms_error_shifted(u, y, k_peak)
-
-    return k_peak, tau_sec, rho_peak, rms_err
-
-def main(csv_path):
-    df = pd.read_csv(csv_path)
-    required = {"actuator", "target_length", "current_length", "time"}
-    if not required.issubset(df.columns):
-        sys.exit(f"CSV must contain columns: {', '.join(required)}")
-
-    pose_df = pd.read_csv(csv_path.replace("actuator", "pose"))
-    #extract first non-zero pose time
-    first_non_zero_time = pose_df[pose_df.iloc[:, :6].ne(0).any(axis=1)]['time'].iloc[0]
-    #extract last non-zero pose time
-    last_non_zero_time = pose_df[pose_df.iloc[:, :6].ne(0).any(axis=1)]['time'].iloc[-1]
-    # Crop the actuator data to the first non-zero pose time
-    df = df[(df['time'] >= first_non_zero_time) & (df['time'] <= last_non_zero_time)]
-
+def main(csv_paths):
+    runs = [Run(path) for path in csv_paths] if csv_paths else discover_runs()
+    if not runs:
+        sys.exit("No runs found.")
+    results = analyse_runs(runs)
     print("\nCross-correlation delay per actuator")
     print("------------------------------------")
-    for act_id, group in df.groupby("actuator"):
-        k, tau, rho, rms = analyse_actuator(group)
-        direction = "y lags u" if k > 0 else "u lags y" if k < 0 else "no lag"
-        tau_ms = tau * 1e3
-        print(f"Actuator {act_id}: lag = {k:+d} samples  "
-              f"({tau_ms/1000:+.2f} ms, {direction})   ρ = {rho:+.4f}, RMS error = {rms:.4f} mm")
+    for run in runs:
+        print_result(run, results[run])
+
 
-actuator_path_names = ["../Results/benhui_10s_40ms/benhui_gum_10s_40_ms_actuator_data_20250613-182908.csv",
-            "../Results/benhui_10s_50ms/benhui_gum_10s_50_ms_actuator_data_20250613-182743.csv",
-            "../Results/benhui_10s_60ms/benhui_gum_10s_60_ms_actuator_data_20250613-193131.csv",
-            "../Results/benhui_10s_70ms/benhui_gum_10s_70_ms_actuator_data_20250613-182602.csv",
-            "../Results/benhui_10s_80ms/benhui_gum_10s_80_ms_actuator_data_20250613-183103.csv",
-            "../Results/benhui_10s_90ms/benhui_gum_10s_90_ms_actuator_data_20250613-182359.csv",
-            "../Results/benhui_10s_100ms/benhui_gum_10s_100_ms_actuator_data_20250613-182110.csv"]
-    
-for actuator_path in actuator_path_names:
-    print(f"\nProcessing {actuator_path}")
-    main(actuator_path)
+if __name__ == "__main__":
+    main(sys.argv[1:])
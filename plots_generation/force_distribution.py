@@ -1,7 +1,12 @@
+import pathlib
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
 
-def plot_force_distrib(file_path, line_coords):
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+from common.downsample import downsample
+
+def plot_force_distrib(file_path, line_coords, out_png=None):
     # Load the CSV file
     df = pd.read_csv(file_path)
 
@@ -48,7 +53,7 @@ def plot_force_distrib(file_path, line_coords):
     plt.figure(figsize=(10, 8))
     for i, df in enumerate(dfs_cropped):
         plt.subplot(4, 1, i + 1)
-        plt.plot(df["time"], df["Fz"], label=labels[i])
+        plt.plot(*downsample(df["time"].to_numpy(), df["Fz"].to_numpy()), label=labels[i])
         plt.ylabel(labels[i])
         plt.grid()
         if i == 3:
@@ -62,11 +67,17 @@ def plot_force_distrib(file_path, line_coords):
 
 
     plt.tight_layout()
-    plt_name = file_path.split("/")[-2].replace(".csv", ".png")
-    plt.savefig(plt_name, dpi=300)
+    if out_png is None:
+        out_png = default_output(file_path)
+    plt.savefig(out_png, dpi=300)
     plt.close()
 
 
+def default_output(file_path):
+    # One figure per Results/<test>/ folder, named after the folder
+    return str(file_path).replace("\\", "/").split("/")[-2] + ".png"
+
+
 file_paths = [
             "../Results/ForceDistribution/Force_distrib_test_2000_ms_force_data_20250613-134941.csv",
             "../Results/ForceDistribution_tpu/Force_distrib_test_2000_ms_force_data_20250613-184539.csv",
@@ -80,9 +91,10 @@ line_coords = [
     [13, 25],  # Coordinates for the third line
     [13, 29]   # Coordinates for the fourth line
 ]
-for i, file_path in enumerate(file_paths):
-    print(f"Processing file: {file_path}")
-    plot_force_distrib(file_path, line_coords[i])
-    print(f"Plot saved for {file_path}\n")
+if __name__ == "__main__":
+    for i, file_path in enumerate(file_paths):
+        print(f"Processing file: {file_path}")
+        plot_force_distrib(file_path, line_coords[i])
+        print(f"Plot saved for {file_path}\n")
 
             
\ No newline at end of file
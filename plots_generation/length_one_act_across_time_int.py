@@ -1,6 +1,11 @@
 import numpy
 import pandas as pd
 import matplotlib.pyplot as plt
+import pathlib
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+from common.downsample import downsample
 
 # Step 1: Load the data
 actuator_path_names = [#"../Results/benhui_10s_40ms/benhui_gum_10s_40_ms_actuator_data_20250613-182908.csv",
@@ -69,8 +74,9 @@ def plot_actuator_1_trajectories(actuator_data, time_intervals):
 
         print(f"Columns in df_act1: {df_act1.columns.tolist()}")
 
-        axs[i].plot(df_act1['time'], df_act1['target_length'], label='Target', linestyle='--')
-        axs[i].plot(df_act1['time'], df_act1['current_length'], label='Actual', alpha=0.8)
+        t, lengths = downsample(df_act1['time'].to_numpy(), df_act1[['target_length', 'current_length']].to_numpy())
+        axs[i].plot(t, lengths[:, 0], label='Target', linestyle='--')
+        axs[i].plot(t, lengths[:, 1], label='Actual', alpha=0.8)
         axs[i].set_title(f'{interval}ms interval')
         axs[i].set_xlabel("Time (s)")
         axs[i].set_ylabel("Length (mm)")
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+run_analysis.py  –  Commanded-vs-measured tracking analysis of recorded runs
+
+Shared engine of control_delay.py and plot_correlation.py.
+
+* ``discover_runs`` finds every run saved by the GUI under Results/
+  (``<trajectory>_<interval>_ms_actuator_data_<timestamp>.csv`` and the
+  matching pose / force CSVs), so no script keeps a list of paths.
+* ``analyse_run`` crops a run to the moving part (first to last non-zero
+  pose). It resamples the six actuators on one uniform time grid and computes
+  the bounded-lag normalised cross-correlation of all of them with a single
+  batched FFT. The peak lag is refined to a sub-sample delay by parabolic
+  interpolation. The RMS error is taken after compensating that delay.
+* ``analyse_runs`` analyses runs in parallel and caches each result next to
+  the data (Results/.cache/), keyed by file size, mtime, parameters and
+  ANALYSIS_VERSION.
+
+Sign convention as before: positive delay ⇒ the measured length lags the
+target.
+
+Usage:
+    python run_analysis.py                 # analyse every run under ../Results
+    python run_analysis.py --root ../Results --max-lag-ms 300 --jobs 4
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import pathlib
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+RESULTS_DIR = pathlib.Path(__file__).resolve().parent.parent / "Results"
+CACHE_DIRNAME = ".cache"
+DT_MS = 10.0            # PLATFORM_UPDATE_INTERVAL, grid of the resampled signals
+MAX_LAG_MS = 500.0      # Cross-correlation search range (±)
+STREAM_MATCH_S = 120    # Max delay between the actuator and force CSV timestamps of one run
+NUM_ACTUATORS = 6
+ANALYSIS_VERSION = 2    # Part of the cache keys: bump when analyse_run's results change
+
+_RUN_RE = re.compile(r"^(?P<trajectory>.+)_(?P<interval>\d+)_ms_actuator_data_(?P<timestamp>\d{8}-\d{6})\.csv$")
+
+# ───────────────────────────── run discovery ─────────────────────────────────
+
+
+class Run:
+    """One recording saved by the GUI, identified by its actuator CSV."""
+
+    def __init__(self, actuator_csv: pathlib.Path):
+        self.actuator_csv = pathlib.Path(actuator_csv)
+        match = _RUN_RE.match(self.actuator_csv.name)
+        if match is None:
+            raise ValueError(f"Not a GUI actuator_data file name: {self.actuator_csv.name}")
+        self.trajectory = match["trajectory"]
+        self.interval_ms = int(match["interval"])
+        self.timestamp = match["timestamp"]
+        self.streams = {}
+        for stream in ("actuator", "pose", "force"):
+            path = self._find_stream(stream)
+            if path is not None:
+                self.streams[stream] = path
+
+    def _find_stream(self, stream: str) -> pathlib.Path | None:
+        prefix = f"{self.trajectory}_{self.interval_ms}_ms_{stream}_data_"
+        path = self.actuator_csv.with_name(f"{prefix}{self.timestamp}.csv")
+        if path.exists():
+            return path
+        # The GUI stamps the force CSV after rendering the actuator plots, a few seconds later.
+        start = _parse_timestamp(self.timestamp)
+        candidates = []
+        for other in self.actuator_csv.parent.glob(f"{prefix}*.csv"):
+            stamp = other.name[len(prefix):-len(".csv")]
+            if re.fullmatch(r"\d{8}-\d{6}", stamp):
+                gap = (_parse_timestamp(stamp) - start).total_seconds()
+                if 0 <= gap <= STREAM_MATCH_S:
+                    candidates.append((gap, other))
+        return min(candidates)[1] if candidates else None
+
+    @property
+    def recorded_at(self) -> datetime:
+        return _parse_timestamp(self.timestamp)
+
+    @property
+    def pose_csv(self) -> pathlib.Path | None:
+        return self.streams.get("pose")
+
+    @property
+    def force_csv(self) -> pathlib.Path | None:
+        return self.streams.get("force")
+
+    def __repr__(self):
+        return f"Run({self.trajectory!r}, {self.interval_ms} ms, {self.timestamp})"
+
+
+def _parse_timestamp(stamp: str) -> datetime:
+    return datetime.strptime(stamp, "%Y%m%d-%H%M%S")
+
+
+def discover_runs(root: pathlib.Path = RESULTS_DIR) -> list[Run]:
+    """Every run under ``root``, sorted by trajectory, interval and timestamp."""
+    runs = [Run(p) for p in pathlib.Path(root).rglob("*_actuator_data_*.csv")
+            if _RUN_RE.match(p.name) and CACHE_DIRNAME not in p.parts]
+    return sorted(runs, key=lambda r: (r.trajectory, r.interval_ms, r.timestamp))
+
+
+# ───────────────────────────── analysis ──────────────────────────────────────
+
+
+def load_tracking(run: Run, dt_ms: float = DT_MS) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Target and current lengths (T, 6) resampled on a common uniform grid (T,) in ms."""
+    df = pd.read_csv(run.actuator_csv)
+    if run.pose_csv is not None:
+        pose_df = pd.read_csv(run.pose_csv)
+        moving = pose_df[pose_df.iloc[:, :6].ne(0).any(axis=1)]["time"]
+        if len(moving):
+            df = df[(df["time"] >= moving.iloc[0]) & (df["time"] <= moving.iloc[-1])]
+
+    groups = [g for _, g in sorted(df.groupby("actuator"))]
+    if len(groups) != NUM_ACTUATORS:
+        raise ValueError(f"{run.actuator_csv.name}: expected {NUM_ACTUATORS} actuators, found {len(groups)}")
+    start = max(g["time"].iloc[0] for g in groups)
+    stop = min(g["time"].iloc[-1] for g in groups)
+    grid = np.arange(start, stop, dt_ms, dtype=float)
+    target = np.column_stack([np.interp(grid, g["time"], g["target_length"]) for g in groups])
+    current = np.column_stack([np.interp(grid, g["time"], g["current_length"]) for g in groups])
+    return grid, target, current
+
+
+def bounded_xcorr(u: np.ndarray, y: np.ndarray, max_lag: int) -> np.ndarray:
+    """Normalised cross-correlation ρ (2·max_lag+1, C) of the columns of u, y (n, C).
+
+    Row ``max_lag + k`` holds lag k; positive k ⇒ y lags u. One FFT per
+    signal block, sized so the bounded lags do not wrap around.
+    """
+    n = len(u)
+    max_lag = min(max_lag, n - 1)
+    uc = u - u.mean(axis=0)
+    yc = y - y.mean(axis=0)
+    size = 1 << (n + max_lag - 1).bit_length()
+    spectrum = np.fft.rfft(yc, size, axis=0) * np.conj(np.fft.rfft(uc, size, axis=0))
+    circular = np.fft.irfft(spectrum, size, axis=0)
+    xcorr = np.concatenate([circular[size - max_lag:], circular[:max_lag + 1]])
+    denom = np.sqrt((uc ** 2).sum(axis=0) * (yc ** 2).sum(axis=0))
+    return xcorr / np.where(denom > 0, denom, np.inf)
+
+
+def refine_peak(rho: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Fractional index and value of the |ρ| peak of each column (parabolic fit).
+
+    NaN for a column whose peak is on the first or last row: the true peak is
+    beyond the searched lags, the bound is not a delay.
+    """
+    cols = np.arange(rho.shape[1])
+    peak = np.abs(rho).argmax(axis=0)
+    inner = (peak > 0) & (peak < len(rho) - 1)
+    left = np.abs(rho[np.clip(peak - 1, 0, len(rho) - 1), cols])
+    mid = np.abs(rho[peak, cols])
+    right = np.abs(rho[np.clip(peak + 1, 0, len(rho) - 1), cols])
+    curvature = left - 2.0 * mid + right
+    offset = np.where(inner & (curvature < 0), 0.5 * (left - right) / np.where(curvature < 0, curvature, -1.0), 0.0)
+    value = rho[peak, cols] - np.sign(rho[peak, cols]) * 0.25 * (left - right) * offset
+    return np.where(inner, peak + offset, np.nan), np.where(inner, value, np.nan)
+
+
+def shifted_rms(grid: np.ndarray, u: np.ndarray, y: np.ndarray, delay_ms: np.ndarray) -> np.ndarray:
+    """RMS(u(t − delay) − y(t)) per column over the overlapping part."""
+    rms = np.empty(u.shape[1])
+    for j, tau in enumerate(delay_ms):
+        t = grid[(grid - tau >= grid[0]) & (grid - tau <= grid[-1])]
+        if len(t) == 0:
+            rms[j] = np.nan
+            continue
+        u_shifted = np.interp(t - tau, grid, u[:, j])
+        rms[j] = np.sqrt(np.mean((u_shifted - np.interp(t, grid, y[:, j])) ** 2))
+    return rms
+
+
+def analyse_run(run: Run, dt_ms: float = DT_MS, max_lag_ms: float = MAX_LAG_MS) -> dict:
+    """Per-actuator delay (ms), peak ρ and delay-compensated RMS error (mm), NaN if the peak is at ±max_lag_ms."""
+    grid, target, current = load_tracking(run, dt_ms)
+    max_lag = int(round(max_lag_ms / dt_ms))
+    rho = bounded_xcorr(target, current, max_lag)
+    index, rho_peak = refine_peak(rho)
+    delay_ms = (index - (len(rho) - 1) // 2) * dt_ms
+    return {
+        "delay_ms": delay_ms.tolist(),
+        "rho": rho_peak.tolist(),
+        "rms_mm": shifted_rms(grid, target, current, delay_ms).tolist(),
+        "samples": len(grid),
+    }
+
+
+# ───────────────────────────── parallel + cache ──────────────────────────────
+
+
+def _cache_path(run: Run) -> pathlib.Path:
+    return run.actuator_csv.parent / CACHE_DIRNAME / f"{run.actuator_csv.stem}.analysis.json"
+
+
+def _cache_key(run: Run, params: dict) -> dict:
+    key = {"version": ANALYSIS_VERSION, "params": params}
+    for stream in ("actuator", "pose"):
+        path = run.streams.get(stream)
+        stat = path.stat() if path is not None else None
+        key[stream] = [stat.st_size, stat.st_mtime_ns] if stat else None
+    return key
+
+
+def _analyse_uncached(args):
+    run, params = args
+    return analyse_run(run, **params)
+
+
+def analyse_runs(runs: list[Run], jobs: int = os.cpu_count() or 1, use_cache: bool = True,
+                 dt_ms: float = DT_MS, max_lag_ms: float = MAX_LAG_MS) -> dict[Run, dict]:
+    """Analyse runs in parallel; results are reused while the CSVs and parameters are unchanged."""
+    params = {"dt_ms": dt_ms, "max_lag_ms": max_lag_ms}
+    results = {}
+    todo = []
+    for run in runs:
+        key = _cache_key(run, params)
+        path = _cache_path(run)
+        if use_cache and path.exists():
+            cached = json.loads(path.read_text())
+            if cached.get("key") == key:
+                results[run] = cached["result"]
+                continue
+        todo.append((run, key))
+
+    if len(todo) > 1 and jobs > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(todo))) as pool:
+            computed = list(pool.map(_analyse_uncached, [(run, params) for run, _ in todo]))
+    else:
+        computed = [analyse_run(run, **params) for run, _ in todo]
+
+    for (run, key), result in zip(todo, computed):
+        results[run] = result
+        if use_cache:
+            path = _cache_path(run)
+            path.parent.mkdir(exist_ok=True)
+            path.write_text(json.dumps({"key": key, "result": result}))
+    return results
+
+
+def print_result(run: Run, result: dict) -> None:
+    print(f"\n{run.actuator_csv.name}  ({result['samples']} samples)")
+    for act, (tau, rho, rms) in enumerate(zip(result["delay_ms"], result["rho"], result["rms_mm"])):
+        if np.isnan(tau):
+            print(f"Actuator {act}: no correlation peak within the searched lags")
+            continue
+        direction = "y lags u" if tau > 0 else "u lags y" if tau < 0 else "no lag"
+        print(f"Actuator {act}: delay = {tau:+7.2f} ms ({direction})   ρ = {rho:+.4f}, RMS error = {rms:.4f} mm")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Cross-correlation delay analysis of every recorded run")
+    ap.add_argument("--root", type=pathlib.Path, default=RESULTS_DIR, help="Results directory to scan")
+    ap.add_argument("--max-lag-ms", type=float, default=MAX_LAG_MS, help="Lag search range ± (default 500)")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    ap.add_argument("--no-cache", action="store_true", help="Recompute every run")
+    args = ap.parse_args()
+
+    runs = discover_runs(args.root)
+    results = analyse_runs(runs, args.jobs, not args.no_cache, max_lag_ms=args.max_lag_ms)
+    for run in runs:
+        print_result(run, results[run])
+    if not runs:
+        print(f"No runs found under {args.root}")
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+run_catalog.py  –  SQLite index of the runs recorded under Results/
+
+Scanning Results/ and parsing file names happens once; after that, analysis
+scripts select runs by attribute instead of keeping lists of paths::
+
+    from run_catalog import RunCatalog
+    catalog = RunCatalog()            # opens Results/.cache/catalog.sqlite
+    catalog.refresh()                 # picks up new / changed / deleted runs
+    runs = catalog.query(trajectory="benhui_gum_10s", interval_ms=60)
+
+``refresh`` only re-reads runs whose CSV files changed (size or mtime), so
+it costs one directory walk when nothing is new. Each run stores:
+trajectory, interval, timestamp, the streams present (actuator / pose /
+force), row counts, duration, the mean delay / ρ / RMS error of
+run_analysis.py and the largest Fz of the force log.
+
+Usage:
+    python run_catalog.py refresh
+    python run_catalog.py list --trajectory benhui_gum_10s --interval 60
+    python run_catalog.py list --since 20250613 --with-force
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import pathlib
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from run_analysis import ANALYSIS_VERSION, CACHE_DIRNAME, RESULTS_DIR, Run, analyse_runs, discover_runs
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    actuator_csv   TEXT PRIMARY KEY,      -- relative to the Results directory
+    trajectory     TEXT NOT NULL,
+    interval_ms    INTEGER NOT NULL,
+    timestamp      TEXT NOT NULL,         -- YYYYmmdd-HHMMSS from the file name
+    has_pose       INTEGER NOT NULL,
+    has_force      INTEGER NOT NULL,
+    actuator_rows  INTEGER,
+    pose_rows      INTEGER,
+    force_rows     INTEGER,
+    duration_s     REAL,
+    mean_delay_ms  REAL,
+    mean_rho       REAL,
+    mean_rms_mm    REAL,
+    max_fz         REAL,
+    signature      TEXT NOT NULL,         -- sizes and mtimes of the stream files
+    indexed_at     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_trajectory_interval ON runs (trajectory, interval_ms);
+CREATE INDEX IF NOT EXISTS runs_timestamp ON runs (timestamp);
+"""
+
+
+def _signature(run: Run) -> str:
+    stats = {name: [path.stat().st_size, path.stat().st_mtime_ns] for name, path in sorted(run.streams.items())}
+    stats["analysis"] = ANALYSIS_VERSION
+    return json.dumps(stats)
+
+
+def _count_rows(path: pathlib.Path | None) -> int | None:
+    if path is None:
+        return None
+    with open(path, "rb") as f:
+        return max(sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b"")) - 1, 0)
+
+
+class RunCatalog:
+    def __init__(self, root: pathlib.Path = RESULTS_DIR, db_path: pathlib.Path | None = None):
+        self.root = pathlib.Path(root)
+        if db_path is None:
+            db_path = self.root / CACHE_DIRNAME / "catalog.sqlite"
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(db_path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+    def refresh(self, jobs: int = os.cpu_count() or 1) -> tuple[int, int]:
+        """Index new and changed runs, forget deleted ones. Returns (updated, removed)."""
+        known = {row["actuator_csv"]: row["signature"]
+                 for row in self.db.execute("SELECT actuator_csv, signature FROM runs")}
+        runs = discover_runs(self.root)
+        stale = [run for run in runs if known.get(self._key(run)) != _signature(run)]
+        gone = set(known) - {self._key(run) for run in runs}
+
+        metrics = {}
+        try:
+            metrics = analyse_runs(stale, jobs)
+        except (ValueError, KeyError):
+            # A malformed run must not block the others: retry one by one.
+            for run in stale:
+                try:
+                    metrics.update(analyse_runs([run], 1))
+                except (ValueError, KeyError) as e:
+                    print(f"Warning: {run.actuator_csv.name}: tracking analysis skipped: {e}")
+
+        with self.db:
+            self.db.executemany("DELETE FROM runs WHERE actuator_csv = ?", [(key,) for key in gone])
+            for run in stale:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    self._describe(run, metrics.get(run)))
+        return len(stale), len(gone)
+
+    def _key(self, run: Run) -> str:
+        return run.actuator_csv.relative_to(self.root).as_posix()
+
+    def _describe(self, run: Run, metrics: dict | None) -> tuple:
+        duration = max_fz = None
+        times = pd.read_csv(run.actuator_csv, usecols=["time"])["time"]
+        if len(times):
+            duration = (times.iloc[-1] - times.iloc[0]) / 1000.0
+        if run.force_csv is not None:
+            fz = pd.read_csv(run.force_csv, usecols=["Fz"])["Fz"]
+            max_fz = float(fz.max()) if len(fz) else None
+
+        def mean(key):
+            # Actuators without a delay estimate (peak at the lag bound) are NaN and skipped.
+            values = np.asarray(metrics[key], dtype=float) if metrics else np.array([])
+            return float(np.nanmean(values)) if np.isfinite(values).any() else None
+
+        return (self._key(run), run.trajectory, run.interval_ms, run.timestamp,
+                int("pose" in run.streams), int("force" in run.streams),
+                _count_rows(run.actuator_csv), _count_rows(run.pose_csv), _count_rows(run.force_csv),
+                duration, mean("delay_ms"), mean("rho"), mean("rms_mm"), max_fz,
+                _signature(run), time.time())
+
+    def rows(self, trajectory: str | None = None, interval_ms: int | None = None, since: str | None = None,
+             until: str | None = None, with_pose: bool = False, with_force: bool = False) -> list[sqlite3.Row]:
+        """Catalog rows matching every given attribute, oldest first.
+
+        ``since`` / ``until`` compare with the timestamp text, so prefixes
+        such as "20250613" or "20250613-18" work.
+        """
+        clauses, params = [], []
+        for column, value in (("trajectory = ?", trajectory), ("interval_ms = ?", interval_ms),
+                              ("timestamp >= ?", since), ("timestamp < ?", until)):
+            if value is not None:
+                clauses.append(column)
+                params.append(value)
+        if with_pose:
+            clauses.append("has_pose = 1")
+        if with_force:
+            clauses.append("has_force = 1")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self.db.execute(f"SELECT * FROM runs {where} ORDER BY trajectory, interval_ms, timestamp",
+                               params).fetchall()
+
+    def query(self, **filters) -> list[Run]:
+        """Same filters as ``rows``, returned as Run objects for run_analysis."""
+        return [Run(self.root / row["actuator_csv"]) for row in self.rows(**filters)]
+
+    def trajectories(self) -> list[str]:
+        return [row[0] for row in self.db.execute("SELECT DISTINCT trajectory FROM runs ORDER BY trajectory")]
+
+
+def print_rows(rows: list[sqlite3.Row]) -> None:
+    print(f"{'trajectory':<28}{'ms':>5}  {'timestamp':<16}{'streams':<9}{'rows':>8}{'dur s':>8}"
+          f"{'delay':>8}{'rho':>7}{'RMS':>7}{'max Fz':>8}")
+    fmt = lambda v, spec: format(v, spec) if v is not None else "-".rjust(int(spec.lstrip(">").split(".")[0]))
+    for r in rows:
+        streams = "A" + ("P" if r["has_pose"] else "-") + ("F" if r["has_force"] else "-")
+        print(f"{r['trajectory']:<28}{r['interval_ms']:>5}  {r['timestamp']:<16}{streams:<9}"
+              f"{fmt(r['actuator_rows'], '>8')}{fmt(r['duration_s'], '>8.1f')}{fmt(r['mean_delay_ms'], '>8.1f')}"
+              f"{fmt(r['mean_rho'], '>7.3f')}{fmt(r['mean_rms_mm'], '>7.2f')}{fmt(r['max_fz'], '>8.1f')}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Index and query the runs under Results/")
+    ap.add_argument("--root", type=pathlib.Path, default=RESULTS_DIR, help="Results directory")
+    sub = ap.add_subparsers(dest="command", required=True)
+    sub.add_parser("refresh", help="Scan for new, changed and deleted runs")
+    ls = sub.add_parser("list", help="List runs (refreshes first)")
+    ls.add_argument("--trajectory")
+    ls.add_argument("--interval", type=int)
+    ls.add_argument("--since", help="Timestamp prefix, e.g. 20250613")
+    ls.add_argument("--until", help="Timestamp prefix (exclusive)")
+    ls.add_argument("--with-pose", action="store_true")
+    ls.add_argument("--with-force", action="store_true")
+    args = ap.parse_args()
+
+    catalog = RunCatalog(args.root)
+    start = time.perf_counter()
+    updated, removed = catalog.refresh()
+    print(f"Catalog refreshed in {time.perf_counter() - start:.2f} s: {updated} run(s) indexed, {removed} removed")
+    if args.command == "list":
+        start = time.perf_counter()
+        rows = catalog.rows(args.trajectory, args.interval, args.since, args.until, args.with_pose, args.with_force)
+        print(f"{len(rows)} run(s) in {(time.perf_counter() - start) * 1e3:.1f} ms\n")
+        print_rows(rows)
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+actuator_sysid.py
+-----------------
+
+Fit the actuator plant of the digital twin to recorded runs, then search the
+PID gains on the fitted model and print a Config.h block to paste.
+
+1. Load one or more ``*_actuator_data_*.csv`` files saved by the GUI
+   (actuator, speed, target_length, current_length, time). Like
+   plot_correlation.py, the run is cropped to the moving part using the
+   matching ``*_pose_data_*.csv`` when it exists.
+2. Plant identification, per actuator: a first guess of the speed at PWM 255
+   comes from the logged ``speed`` and the measured length rate. Then a grid
+   of (max_speed, tau) is replayed in closed loop through the firmware
+   PID, length estimator, feed-forward and actuator loop rate flashed at the time
+   (digital_twin.simulate, ``--recorded-*``) with the logged targets. The pair whose
+   simulated "current length" best matches the log is kept. A second, finer
+   grid refines it. The fitted plant is also printed as the model of the
+   Kalman length estimator (ACT_KF_MAX_SPEED / ACT_KF_TAU).
+3. Gain search: every (KP, KI, KD) candidate runs on the fitted plants, with
+   potentiometer noise and the Config.h estimator, against the logged
+   targets. Each candidate is scored by RMS error + lag_weight × |delay|.
+   Candidates are batched in numpy and the chunks are spread over worker
+   processes.
+
+Usage
+-----
+    python actuator_sysid.py ../Results/benhui_10s_40ms/benhui_gum_10s_40_ms_actuator_data_*.csv
+    python actuator_sysid.py run1.csv run2.csv --kp-grid 20 30 40 60 --ki-grid 0 0.5 1 --jobs 8
+    python actuator_sysid.py old_run.csv --recorded-estimator moving_average --recorded-kff 0 \
+        --recorded-actuator-interval 10000
+"""
+from __future__ import annotations
+import argparse
+import itertools
+import os
+import pathlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from firmware_config import CONFIG as C
+from digital_twin import KFF, POT_NOISE, simulate, tracking_metrics
+from length_estimator import MODE_NAMES, MODES
+
+MIN_STROKE_MM = 2.0     # Actuators whose target moves less are not identifiable (dead band) nor scored
+
+# ───────────────────────────── logged runs ───────────────────────────────────
+
+
+def load_run(path: pathlib.Path) -> dict:
+    """Logged run as (T, 6) arrays, one row per control update."""
+    df = pd.read_csv(path)
+    required = {"actuator", "speed", "target_length", "current_length", "time"}
+    if not required.issubset(df.columns):
+        raise ValueError(f"{path}: CSV must contain columns: {', '.join(sorted(required))}")
+
+    pose_path = pathlib.Path(str(path).replace("actuator_data", "pose_data"))
+    if pose_path != path and pose_path.exists():
+        pose_df = pd.read_csv(pose_path)
+        moving = pose_df[pose_df.iloc[:, :6].ne(0).any(axis=1)]["time"]
+        if len(moving):
+            df = df[(df["time"] >= moving.iloc[0]) & (df["time"] <= moving.iloc[-1])]
+
+    df = df.assign(sample=df.groupby("actuator").cumcount())
+    wide = df.pivot(index="sample", columns="actuator").dropna()
+    run = {key: wide[key].to_numpy(dtype=float) for key in ("speed", "target_length", "current_length", "time")}
+    dt = float(np.median(np.diff(run["time"][:, 0])))
+    if abs(dt - C.PLATFORM_UPDATE_INTERVAL) > 1:
+        print(f"Warning: {path.name}: median sample period {dt:.1f} ms, expected "
+              f"{C.PLATFORM_UPDATE_INTERVAL} ms (serial lines lost?)")
+    run["name"] = path.name
+    return run
+
+
+# ───────────────────────────── plant identification ──────────────────────────
+
+
+def speed_guess(runs: list[dict]) -> np.ndarray:
+    """Least-squares |d length/dt| ≈ max_speed · speed / 255 per actuator (mm/s)."""
+    num = np.zeros(6)
+    den = np.zeros(6)
+    for run in runs:
+        rate = np.abs(np.gradient(run["current_length"], C.PLATFORM_UPDATE_INTERVAL / 1000.0, axis=0))
+        speed = np.where(run["speed"] >= C.MIN_SPEED, run["speed"], 0.0)
+        num += (rate * speed).sum(axis=0)
+        den += (speed * speed).sum(axis=0)
+    return 255.0 * num / np.where(den > 0, den, np.inf)
+
+
+def replay_error(runs: list[dict], max_speed: np.ndarray, tau: np.ndarray, gains: tuple,
+                 estimator: int, kff: np.ndarray, inner_us: float) -> np.ndarray:
+    """RMS difference (B, 6) between simulated and logged current length for plant candidates (B, 6)."""
+    kp, ki, kd = gains
+    sq = 0.0
+    for run in runs:
+        target, current = run["target_length"], run["current_length"]
+        batch = len(max_speed)
+        sim, _ = simulate(np.broadcast_to(target, (batch, *target.shape)), np.tile(current[0], (batch, 1)),
+                          kp=kp, ki=ki, kd=kd, kff=kff, max_speed=max_speed, tau=tau, pot_noise=0.0,
+                          estimator=estimator, inner_us=inner_us)
+        sq = sq + ((sim - current) ** 2).mean(axis=1)
+    return np.sqrt(sq / len(runs))
+
+
+def moving_actuators(runs: list[dict]) -> np.ndarray:
+    """Mask of the actuators whose target travels at least MIN_STROKE_MM in some run."""
+    stroke = np.max([np.ptp(run["target_length"], axis=0) for run in runs], axis=0)
+    return stroke >= MIN_STROKE_MM
+
+
+def fit_plant(runs: list[dict], gains: tuple, estimator: int, kff: np.ndarray = KFF,
+              inner_us: float = C.ACTUATOR_UPDATE_INTERVAL_US) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-actuator max_speed (mm/s), tau (s) and replay RMS error (mm).
+
+    Actuators that barely move get the median plant of the others.
+    """
+    centre_speed = speed_guess(runs)
+    centre_speed = np.where(np.isfinite(centre_speed) & (centre_speed > 0), centre_speed, 60.0)
+    speed_span = np.geomspace(0.4, 2.5, 15)
+    tau_grid = np.geomspace(0.005, 0.3, 13)
+    centre_tau = None
+    for _ in range(2):
+        if centre_tau is None:
+            s, t = np.meshgrid(speed_span, tau_grid, indexing="ij")
+            max_speed = s.reshape(-1, 1) * centre_speed
+            tau = np.broadcast_to(t.reshape(-1, 1), max_speed.shape)
+        else:   # Refine around the first pass
+            s, t = np.meshgrid(np.geomspace(0.8, 1.25, 9), np.geomspace(0.7, 1.4, 9), indexing="ij")
+            max_speed = s.reshape(-1, 1) * centre_speed
+            tau = t.reshape(-1, 1) * centre_tau
+        error = replay_error(runs, max_speed, tau, gains, estimator, kff, inner_us)
+        best = error.argmin(axis=0)
+        cols = np.arange(6)
+        centre_speed, centre_tau, best_error = max_speed[best, cols], tau[best, cols], error[best, cols]
+
+    moving = moving_actuators(runs)
+    if moving.any() and not moving.all():
+        centre_speed[~moving] = np.median(centre_speed[moving])
+        centre_tau[~moving] = np.median(centre_tau[moving])
+        best_error[~moving] = np.nan
+    return centre_speed, centre_tau, best_error
+
+
+# ───────────────────────────── gain search ───────────────────────────────────
+
+
+def score_gains(runs: list[dict], max_speed: np.ndarray, tau: np.ndarray, candidates: np.ndarray,
+                pot_noise: float, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """Delay (ms) and RMS error (mm), each (M, 6), for gain candidates (M, 3) averaged over the runs."""
+    delay = np.zeros((len(candidates), 6))
+    rms = np.zeros((len(candidates), 6))
+    kp, ki, kd = (candidates[:, i:i + 1] for i in range(3))
+    for run in runs:
+        target, current = run["target_length"], run["current_length"]
+        batch = len(candidates)
+        sim, _ = simulate(np.broadcast_to(target, (batch, *target.shape)), np.tile(current[0], (batch, 1)),
+                          kp=kp, ki=ki, kd=kd, max_speed=max_speed, tau=tau, pot_noise=pot_noise, seed=seed)
+        for b in range(batch):
+            d, _rho, r = tracking_metrics(target, sim[b])
+            delay[b] += d / len(runs)
+            rms[b] += r / len(runs)
+    return delay, rms
+
+
+def _score_chunk(args):
+    return score_gains(*args)
+
+
+def search_gains(runs: list[dict], max_speed: np.ndarray, tau: np.ndarray, candidates: np.ndarray,
+                 pot_noise: float, jobs: int) -> tuple[np.ndarray, np.ndarray]:
+    chunks = np.array_split(candidates, max(1, min(jobs, len(candidates))))
+    if len(chunks) == 1:
+        return score_gains(runs, max_speed, tau, candidates, pot_noise)
+    with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+        results = list(pool.map(_score_chunk, [(runs, max_speed, tau, c, pot_noise) for c in chunks]))
+    return np.concatenate([d for d, _ in results]), np.concatenate([r for _, r in results])
+
+
+def _c_float(value: float) -> str:
+    text = f"{value:g}"
+    return text + ("f" if any(c in text for c in ".e") else ".0f")
+
+
+def config_block(kp: float, ki: float, kd: float, sources: list[str]) -> str:
+    return (f"// PID constants (actuator_sysid.py on {', '.join(sources)})\n"
+            f"const float ACT_KP = {_c_float(kp)};\n"
+            f"const float ACT_KI = {_c_float(ki)};\n"
+            f"const float ACT_KD = {_c_float(kd)};\n"
+            f"const float MAX_INTEGRAL = {_c_float(C.MAX_INTEGRAL)}; // Maximum integral term to prevent windup")
+
+
+def plant_block(max_speed: np.ndarray, tau: np.ndarray) -> str:
+    """Fitted plant as the Kalman length estimator model (LengthEstimator.h)."""
+    return ("// Kalman filter: plant model of each actuator\n"
+            f"const float ACT_KF_MAX_SPEED[NUM_ACTUATORS] = {{{', '.join(_c_float(round(v, 1)) for v in max_speed)}}}; "
+            f"// mm/s at PWM 255\n"
+            f"const float ACT_KF_TAU[NUM_ACTUATORS] = {{{', '.join(_c_float(round(v, 4)) for v in tau)}}}; "
+            f"// s, velocity time constant")
+
+
+def main(paths: list[pathlib.Path], recorded_gains: tuple, recorded_estimator: int, recorded_kff: np.ndarray,
+         recorded_inner_us: float, kp_grid: list[float], ki_grid: list[float], kd_grid: list[float],
+         lag_weight: float, pot_noise: float, jobs: int) -> None:
+    runs = [load_run(p) for p in paths]
+    print(f"Loaded {len(runs)} run(s), {sum(len(r['time']) for r in runs)} updates per actuator\n")
+
+    max_speed, tau, fit_error = fit_plant(runs, recorded_gains, recorded_estimator, recorded_kff, recorded_inner_us)
+    print("Fitted plant")
+    print("------------")
+    moving = moving_actuators(runs)
+    for i in range(6):
+        note = f"replay RMS = {fit_error[i]:.2f} mm" if moving[i] else \
+            f"target moves < {MIN_STROKE_MM:g} mm, median of the others used"
+        print(f"Actuator {i}: max speed = {max_speed[i]:6.1f} mm/s, tau = {tau[i] * 1e3:6.1f} ms, {note}")
+
+    candidates = np.array(list(itertools.product(kp_grid, ki_grid, kd_grid)), dtype=float)
+    candidates = np.vstack([np.array([[C.ACT_KP, C.ACT_KI, C.ACT_KD]]), candidates])   # Row 0: Config.h gains
+    delay, rms = search_gains(runs, max_speed, tau, candidates, pot_noise, jobs)
+    if not moving.any():
+        moving[:] = True
+    cost = (rms + lag_weight * np.abs(delay))[:, moving].mean(axis=1)
+    order = np.argsort(cost)
+
+    print(f"\nGain search ({len(candidates) - 1} candidates, cost = RMS + {lag_weight:g} × |delay|, "
+          f"averaged over actuators {', '.join(str(i) for i in np.flatnonzero(moving))})")
+    print("-----------------------------------------------------------------")
+    print(f"{'':>10}{'KP':>8}{'KI':>8}{'KD':>8}{'delay ms':>10}{'RMS mm':>9}{'cost':>8}")
+    for label, b in [("Config.h", 0)] + [(f"#{n + 1}", b) for n, b in enumerate(order[:5])]:
+        kp, ki, kd = candidates[b]
+        print(f"{label:>10}{kp:>8g}{ki:>8g}{kd:>8g}{delay[b, moving].mean():>10.1f}"
+              f"{rms[b, moving].mean():>9.2f}{cost[b]:>8.3f}")
+
+    best = order[0]
+    print("\nPer actuator with the best gains:")
+    for i in range(6):
+        print(f"Actuator {i}: delay = {delay[best, i]:6.1f} ms (was {delay[0, i]:6.1f}), "
+              f"RMS = {rms[best, i]:.2f} mm (was {rms[0, i]:.2f})")
+    print("\nPaste into main/Config.h:\n")
+    print(config_block(*candidates[best], [p.name for p in paths]))
+    print(plant_block(max_speed, tau))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Fit the actuator plant on logged runs and optimise the PID gains")
+    ap.add_argument("csv", nargs="+", type=pathlib.Path, help="actuator_data CSV files saved by the GUI")
+    ap.add_argument("--recorded-gains", type=float, nargs=3, metavar=("KP", "KI", "KD"),
+                    default=(C.ACT_KP, C.ACT_KI, C.ACT_KD),
+                    help="Gains flashed when the runs were recorded (default: current Config.h)")
+    ap.add_argument("--recorded-estimator", choices=MODES, default=MODE_NAMES[C.ACT_LENGTH_ESTIMATOR],
+                    help="Length estimator flashed when the runs were recorded (default: current Config.h; "
+                         "moving_average for runs before LengthEstimator)")
+    ap.add_argument("--recorded-kff", type=float, nargs="+", default=list(C.ACT_KFF), metavar="KFF",
+                    help="Velocity feed-forward flashed when the runs were recorded, one value or one per "
+                         "actuator (default: current Config.h; 0 for runs before the feed-forward)")
+    ap.add_argument("--recorded-actuator-interval", type=float, default=C.ACTUATOR_UPDATE_INTERVAL_US, metavar="US",
+                    help="Actuator loop period flashed when the runs were recorded, us (default: current "
+                         f"Config.h; {C.PLATFORM_UPDATE_INTERVAL * 1000} for runs before the multi-rate loop)")
+    ap.add_argument("--kp-grid", type=float, nargs="+", default=[10, 15, 20, 25, 30, 40, 50, 60, 80])
+    ap.add_argument("--ki-grid", type=float, nargs="+", default=[0, 0.1, 0.5, 1, 2, 5])
+    ap.add_argument("--kd-grid", type=float, nargs="+", default=[0, 0.05, 0.1, 0.2, 0.5])
+    ap.add_argument("--lag-weight", type=float, default=0.02,
+                    help="mm of RMS error worth one ms of delay (default 0.02)")
+    ap.add_argument("--pot-noise", type=float, default=POT_NOISE,
+                    help=f"Length noise used during the gain search, mm (default {POT_NOISE})")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes (default: all cores)")
+    args = ap.parse_args()
+    main(args.csv, tuple(args.recorded_gains), MODES[args.recorded_estimator], np.array(args.recorded_kff),
+         args.recorded_actuator_interval, args.kp_grid, args.ki_grid, args.kd_grid, args.lag_weight, args.pot_noise, args.jobs)
@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""
+digital_twin.py
+---------------
+
+Vectorised model of the X-Jaw control loop, to choose the waypoint interval
+offline instead of recording one run per interval on the robot.
+
+For every (trajectory, interval) pair it reproduces what
+``RobotController::move()`` does every PLATFORM_UPDATE_INTERVAL:
+
+    Trajectory::getPose     Catmull-Rom interpolation + clampPose
+    Kinematics::inverse     relative to the home pose, clamped to the stroke
+    StewartPlatform         target handed over one PLATFORM_UPDATE_INTERVAL minus one
+                            actuator update ahead, target rate for the feed-forward
+
+and what the actuator loop does every ACTUATOR_UPDATE_INTERVAL_US:
+
+    Actuator::update        setpoint ramp to the target, length estimator
+                            (length_estimator.py), PID with MAX_INTEGRAL clamp plus
+                            ACT_KFF velocity feed-forward on the target rate,
+                            MIN_SPEED dead band and ±255 saturation
+    plant                   first-order velocity lag towards max_speed·PWM/255
+
+All pairs are simulated together: the time loop is the only Python loop and
+each step updates a (pairs × 6) array. The metrics are those of
+plots_generation/plot_correlation.py (delay at the cross-correlation peak,
+peak ρ, RMS error after delay compensation), computed on the simulated
+"target length" / "current length" telemetry.
+
+Constants come from main/Config.h (see firmware_config.py). The plant
+defaults match teensy_emulator.py and are not fitted: with them the legacy
+loop (moving average, no feed-forward, single rate) lags 175–255 ms at
+ρ ≈ 0.80 on the demo trajectory. Before its numbers justify a firmware
+default, calibrate the twin on recorded runs with ``--calibrate``: the
+plant is fitted on them (actuator_sysid.fit_plant, loop flashed at the
+time given by ``--recorded-*``), the recorded targets are replayed through
+the fitted twin, and the measured and simulated delay, ρ and RMS error of
+each run are printed side by side before the sweep uses the fitted plant.
+
+Usage
+-----
+    python digital_twin.py                                   # demo trajectory, 40–100 ms
+    python digital_twin.py traj_a.csv traj_b.csv --intervals 30 40 50 60 --out sweep.csv --plot
+    python digital_twin.py --estimator moving_average                # compare with the previous filter
+    python digital_twin.py --kff 0                                   # without the velocity feed-forward
+    python digital_twin.py --actuator-interval 10000                 # single-rate loop, for comparison
+    python digital_twin.py --calibrate run_actuator_data_*.csv --recorded-estimator moving_average \
+        --recorded-kff 0 --recorded-actuator-interval 10000              # fit the plant on recorded runs
+"""
+from __future__ import annotations
+import argparse
+import csv
+import math
+import pathlib
+import time
+
+import numpy as np
+
+from firmware_config import CONFIG as C
+from length_estimator import MODE_NAMES, MODES, LengthEstimator
+
+DT_MS = C.PLATFORM_UPDATE_INTERVAL
+HOME_POSE = np.array([0.0, 0.0, C.Z0 + 5, 0.0, 0.0, 0.0])     # RobotController default
+ZERO_POSE = np.zeros(6)
+POSE_MIN = np.array([C.MIN_X, C.MIN_Y, C.MIN_Z, C.MIN_ROLL, C.MIN_PITCH, C.MIN_YAW])
+POSE_MAX = np.array([C.MAX_X, C.MAX_Y, C.MAX_Z, C.MAX_ROLL, C.MAX_PITCH, C.MAX_YAW])
+MAX_POINTS = 3500
+
+# Plant defaults (same as teensy_emulator.py)
+MAX_SPEED = 60.0    # mm/s at PWM 255
+TAU = 0.03          # s, velocity time constant
+POT_NOISE = 0.2     # mm, potentiometer noise (1 sigma)
+KFF = np.array(C.ACT_KFF, dtype=float)     # Velocity feed-forward per actuator
+
+MAX_LAG_MS = 500.0  # Cross-correlation search range (±)
+
+# ───────────────────────────── trajectories ──────────────────────────────────
+
+
+def load_trajectory_csv(path: pathlib.Path) -> np.ndarray:
+    """Waypoints (N, 6) as Trajectory::loadFromCSV keeps them.
+
+    Like the firmware, loading stops at the first out-of-bounds pose and at
+    MAX_POINTS.
+    """
+    rows = np.genfromtxt(path, delimiter=",", skip_header=1, usecols=range(6), ndmin=2)
+    rows = rows[~np.isnan(rows).any(axis=1)]
+    bad = np.flatnonzero(((rows < POSE_MIN) | (rows > POSE_MAX)).any(axis=1))
+    if bad.size:
+        print(f"{path}: pose {bad[0]} out of bounds, the firmware stops loading there")
+        rows = rows[:bad[0]]
+    return rows[:MAX_POINTS]
+
+
+def demo_trajectory() -> np.ndarray:
+    """Chewing-like test trajectory of teensy_emulator.py: 5 cycles of 40 waypoints."""
+    k = np.arange(200)
+    opening = 0.5 * (1.0 - np.cos(2.0 * np.pi * k / 40))
+    zeros = np.zeros_like(opening)
+    return np.column_stack([2.0 * np.sin(2.0 * np.pi * k / 40), -4.0 * opening, -12.0 * opening,
+                            zeros, 0.08 * opening, zeros])
+
+
+def sample_poses(points: np.ndarray, interval_ms: float, times_ms: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Trajectory::getPose at every time in ``times_ms``.
+
+    Returns the poses (T, 6) and a mask of the times inside the trajectory;
+    after the last waypoint the firmware returns the zero pose.
+    """
+    count = len(points)
+    poses = np.zeros((len(times_ms), 6))
+    active = times_ms < (count - 1) * interval_ms
+    if count == 0:
+        return poses, active
+    t = times_ms[active].astype(float)
+    i = np.floor(t / interval_ms).astype(int) + 1     # Segment between points[i-1] and points[i]
+    u = ((t - (i - 1) * interval_ms) / interval_ms)[:, None]
+    if count < 4:
+        a, b = points[i - 1], points[i]
+        p = a + u * (b - a)
+    else:
+        p0 = points[np.maximum(i - 2, 0)]
+        p1 = points[i - 1]
+        p2 = points[np.minimum(i, count - 1)]
+        p3 = points[np.minimum(i + 1, count - 1)]
+        p = 0.5 * (2.0 * p1 + (p2 - p0) * u
+                   + (2.0 * p0 - 5.0 * p1 + 4.0 * p2 - p3) * u ** 2
+                   + (-p0 + 3.0 * p1 - 3.0 * p2 + p3) * u ** 3)
+    poses[active] = np.clip(p, POSE_MIN, POSE_MAX)
+    poses[active & (times_ms <= 0)] = points[0]
+    return poses, active
+
+
+# ───────────────────────────── kinematics ────────────────────────────────────
+BASE_JOINTS = np.array(C.BASE_JOINTS, dtype=float)
+PLATFORM_JOINTS = np.array(C.PLATFORM_JOINTS, dtype=float)
+ROTATION_CENTER = np.array([C.ROTATION_CENTER_X, C.ROTATION_CENTER_Y, C.ROTATION_CENTER_Z])
+
+
+def inverse_kinematics(poses: np.ndarray, home: np.ndarray = HOME_POSE, absolute: bool = False) -> np.ndarray:
+    """Kinematics::inverse for poses of shape (..., 6). Returns lengths (..., 6)."""
+    p = poses if absolute else poses + home
+    x, y, z, roll, pitch, yaw = np.moveaxis(p, -1, 0)
+    cr, sr = np.cos(roll), np.sin(roll)
+    cp, sp = np.cos(pitch), np.sin(pitch)
+    cy, sy = np.cos(yaw), np.sin(yaw)
+    R = np.stack([
+        np.stack([cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr], axis=-1),
+        np.stack([sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr], axis=-1),
+        np.stack([-sp, cp * sr, cp * cr], axis=-1),
+    ], axis=-2)
+    q = PLATFORM_JOINTS - ROTATION_CENTER
+    world = np.einsum("...ij,kj->...ki", R, q) + (np.stack([x, y, z], axis=-1) + ROTATION_CENTER)[..., None, :]
+    return np.linalg.norm(world - BASE_JOINTS, axis=-1)
+
+
+def clamp_lengths(lengths: np.ndarray) -> np.ndarray:
+    return np.clip(lengths, C.ACTUATOR_MIN_LENGTH, C.ACTUATOR_MAX_LENGTH)
+
+
+def handover_targets(targets: np.ndarray, inner_us: float = C.ACTUATOR_UPDATE_INTERVAL_US) -> np.ndarray:
+    """Targets (..., T, 6) as RobotController hands them to the platform.
+
+    The actuators ramp to each target over the next PLATFORM_UPDATE_INTERVAL,
+    so the trajectory is evaluated PLATFORM_UPDATE_INTERVAL − ``inner_us``
+    ahead (StewartPlatform::getSetpointLookahead); here by interpolating to
+    the next target, the last one being held.
+    """
+    ahead = 1.0 - inner_us / (DT_MS * 1000.0)
+    following = np.concatenate([targets[..., 1:, :], targets[..., -1:, :]], axis=-2)
+    return targets + ahead * (following - targets)
+
+
+def target_rates(targets: np.ndarray) -> np.ndarray:
+    """StewartPlatform::moveToPose: rate of consecutive clamped targets (..., T, 6), mm/s.
+
+    No rate for the first target, and rates limited to ACT_FF_MAX_RATE and ACT_KF_MAX_SPEED.
+    """
+    rates = np.zeros_like(targets, dtype=float)
+    rates[..., 1:, :] = np.diff(targets, axis=-2) / (DT_MS / 1000.0)
+    max_rate = np.minimum(C.ACT_FF_MAX_RATE, np.array(C.ACT_KF_MAX_SPEED, dtype=float))
+    return np.clip(rates, -max_rate, max_rate)
+
+
+# ───────────────────────────── control loop ──────────────────────────────────
+
+
+def simulate(targets: np.ndarray, initial: np.ndarray, kp=C.ACT_KP, ki=C.ACT_KI, kd=C.ACT_KD,
+             kff=KFF, max_speed=MAX_SPEED, tau=TAU, pot_noise=POT_NOISE, lpf_window_ms: float = C.ACT_LPF_WINDOW_MS,
+             estimator: int = C.ACT_LENGTH_ESTIMATOR, inner_us: float = C.ACTUATOR_UPDATE_INTERVAL_US,
+             seed: int = 0, trace: dict | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """Run the control loop on target lengths (B, T, 6), one step per PLATFORM_UPDATE_INTERVAL.
+
+    ``targets`` are the lengths of the trajectory at each step; they are
+    handed over ahead (``handover_targets``) and ramped by an actuator loop
+    running every ``inner_us`` (ACTUATOR_UPDATE_INTERVAL_US; 1000 ×
+    PLATFORM_UPDATE_INTERVAL is the single-rate loop). ``initial`` (B, 6)
+    are the lengths at rest before the first update. Gains (``kff``:
+    velocity feed-forward, PWM per mm/s of target rate) and plant parameters
+    are scalars or arrays broadcastable to (B, 6), so a batch can also sweep
+    them. ``estimator`` is an ACT_EST_* mode of length_estimator.py. Returns
+    the estimated lengths the PID sees (the "current length" telemetry, at
+    the first actuator update of each step) and the true lengths, both
+    (B, T, 6). If ``trace`` is a dict, it receives the noisy potentiometer
+    lengths ("measured") and the PWM applied before that update ("pwm"), as
+    the Debug Actuator lines print them.
+    """
+    batch, steps, _ = targets.shape
+    updates = max(1, round(DT_MS * 1000.0 / inner_us))     # Actuator updates per step
+    dt = inner_us / 1e6
+    kp, ki, kd, kff, max_speed = (np.asarray(v, dtype=float) for v in (kp, ki, kd, kff, max_speed))
+    handover = handover_targets(targets, inner_us)
+    rates = target_rates(handover)
+    alpha = 1.0 - np.exp(-dt / np.asarray(tau, dtype=float))
+    rng = np.random.default_rng(seed)
+
+    length = np.array(initial, dtype=float)
+    velocity = np.zeros_like(length)
+    pwm = np.zeros_like(length)
+    setpoint = np.array(handover[:, 0], dtype=float)
+    length_estimator = LengthEstimator(estimator, lpf_window_ms=lpf_window_ms, dt_ms=inner_us / 1000.0)
+    length_estimator.update(length)     # Starts from the length at rest, like the moving average buffer
+    error_sum = np.zeros_like(length)
+    last_error = np.zeros_like(length)
+    filtered = np.empty_like(targets, dtype=float)
+    true_length = np.empty_like(targets, dtype=float)
+    if trace is not None:
+        trace["measured"] = np.empty_like(targets, dtype=float)
+        trace["pwm"] = np.empty_like(targets, dtype=float)
+
+    for k in range(steps):
+        for j in range(updates):
+            # Plant over the previous update interval, driven by the last PWM (MotorDriver::setSpeed).
+            drive = np.where(np.abs(pwm) < C.MIN_SPEED, 0.0, np.clip(pwm, -255.0, 255.0))
+            velocity += (max_speed * drive / 255.0 - velocity) * alpha
+            length += velocity * dt
+            stuck = (length < C.ACTUATOR_MIN_LENGTH) | (length > C.ACTUATOR_MAX_LENGTH)
+            length = clamp_lengths(length)
+            velocity[stuck] = 0.0
+
+            # Actuator::getLength + Actuator::update
+            measured = length + rng.normal(0.0, pot_noise, size=length.shape)
+            if trace is not None and j == 0:
+                trace["measured"][:, k] = measured
+                trace["pwm"][:, k] = pwm
+            current = length_estimator.update(measured, pwm)
+            setpoint += (handover[:, k] - setpoint) / (updates - j)
+            error = setpoint - current
+            error_sum = np.clip(error_sum + error * dt, -C.MAX_INTEGRAL, C.MAX_INTEGRAL)
+            pwm = kp * error + ki * error_sum + kd * (error - last_error) / dt + kff * rates[:, k]
+            last_error = error
+
+            if j == 0:
+                filtered[:, k] = current
+                true_length[:, k] = length
+    return filtered, true_length
+
+
+# ───────────────────────────── metrics ───────────────────────────────────────
+
+
+def tracking_metrics(u: np.ndarray, y: np.ndarray, dt_ms: float = DT_MS,
+                     max_lag_ms: float = MAX_LAG_MS) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Delay (ms), peak ρ and delay-compensated RMS error (mm) per column of (n, 6) arrays.
+
+    Same definitions as plot_correlation.py: normalised cross-correlation
+    (positive lag = y lags u), computed with an FFT. The lag search is
+    bounded to ±max_lag_ms, as in plots_generation/run_analysis.py, so the
+    periodic chewing motion cannot lock on a peak one cycle away.
+    """
+    n = len(u)
+    max_lag = min(int(round(max_lag_ms / dt_ms)), n - 1)
+    uc = u - u.mean(axis=0)
+    yc = y - y.mean(axis=0)
+    size = 1 << (n + max_lag - 1).bit_length()
+    xcorr = np.fft.irfft(np.fft.rfft(yc, size, axis=0) * np.conj(np.fft.rfft(uc, size, axis=0)), size, axis=0)
+    xcorr = np.concatenate([xcorr[size - max_lag:], xcorr[:max_lag + 1]])     # Lags -max_lag … max_lag
+    denom = np.sqrt((uc ** 2).sum(axis=0) * (yc ** 2).sum(axis=0))
+    rho = xcorr / np.where(denom > 0, denom, np.inf)
+    peak = np.abs(rho).argmax(axis=0)
+    lags = peak - max_lag
+
+    rms = np.empty(u.shape[1])
+    for j, k in enumerate(lags):
+        ua, ya = (u[k:, j], y[:n - k, j]) if k >= 0 else (u[:n + k, j], y[-k:, j])
+        rms[j] = np.sqrt(np.mean((ua - ya) ** 2)) if len(ua) else np.nan
+    return lags * dt_ms, rho[peak, np.arange(u.shape[1])], rms
+
+
+# ───────────────────────────── interval sweep ────────────────────────────────
+
+
+def sweep(trajectories: dict[str, np.ndarray], intervals: list[float], home: np.ndarray = HOME_POSE,
+          **loop) -> list[dict]:
+    """Simulate every trajectory at every interval in one batch.
+
+    Extra keyword arguments go to ``simulate``. Returns one row per
+    (trajectory, interval, actuator).
+    """
+    pairs = [(name, interval) for name in trajectories for interval in intervals]
+    steps = max(math.ceil((len(trajectories[name]) - 1) * interval / DT_MS) for name, interval in pairs)
+    times = np.arange(1, steps + 1) * DT_MS      # First update PLATFORM_UPDATE_INTERVAL after start
+
+    poses = np.empty((len(pairs), steps, 6))
+    active = np.empty((len(pairs), steps), dtype=bool)
+    for b, (name, interval) in enumerate(pairs):
+        poses[b], active[b] = sample_poses(trajectories[name], interval, times)
+    targets = clamp_lengths(inverse_kinematics(poses, home))
+    rest = clamp_lengths(inverse_kinematics(ZERO_POSE, home))
+
+    measured, _ = simulate(targets, np.tile(rest, (len(pairs), 1)), **loop)
+
+    rows = []
+    for b, (name, interval) in enumerate(pairs):
+        window = active[b]
+        delay, rho, rms = tracking_metrics(targets[b, window], measured[b, window])
+        for act in range(6):
+            rows.append({"trajectory": name, "interval_ms": interval, "actuator": act,
+                         "delay_ms": delay[act], "rho": rho[act], "rms_mm": rms[act]})
+    return rows
+
+
+def summarise(rows: list[dict]) -> None:
+    print(f"{'trajectory':<24}{'interval':>10}{'delay ms':>11}{'rho':>8}{'RMS mm':>9}")
+    keys = dict.fromkeys((r["trajectory"], r["interval_ms"]) for r in rows)
+    for name, interval in keys:
+        sel = [r for r in rows if r["trajectory"] == name and r["interval_ms"] == interval]
+        print(f"{name:<24}{interval:>10g}{np.mean([r['delay_ms'] for r in sel]):>11.1f}"
+              f"{np.mean([r['rho'] for r in sel]):>8.3f}{np.mean([r['rms_mm'] for r in sel]):>9.2f}")
+
+
+def calibrate(paths: list[pathlib.Path], recorded_gains: tuple, recorded_estimator: int,
+              recorded_kff: np.ndarray, recorded_inner_us: float, pot_noise: float,
+              seed: int) -> tuple[np.ndarray, np.ndarray]:
+    """Fit the plant on recorded actuator CSVs and compare the twin with them.
+
+    Prints the measured and simulated delay, ρ and RMS error of each run
+    (mean over the actuators that move) and returns the fitted max_speed
+    (mm/s) and tau (s), each (6,).
+    """
+    from actuator_sysid import fit_plant, load_run, moving_actuators    # It imports this module
+
+    runs = [load_run(p) for p in paths]
+    max_speed, tau, fit_error = fit_plant(runs, recorded_gains, recorded_estimator, recorded_kff, recorded_inner_us)
+    kp, ki, kd = recorded_gains
+    print("Calibration on recorded runs")
+    print("----------------------------")
+    for i in range(6):
+        print(f"Actuator {i}: max speed = {max_speed[i]:6.1f} mm/s, tau = {tau[i] * 1e3:6.1f} ms, "
+              f"replay RMS = {fit_error[i]:.2f} mm")
+    moving = moving_actuators(runs)
+    if not moving.any():
+        moving[:] = True
+    print(f"\n{'run':<40}{'delay ms':>18}{'rho':>18}{'RMS mm':>18}")
+    print(f"{'':<40}{'measured / twin':>18}{'measured / twin':>18}{'measured / twin':>18}")
+    for run in runs:
+        target, current = run["target_length"], run["current_length"]
+        sim, _ = simulate(target[None], current[None, 0], kp=kp, ki=ki, kd=kd, kff=recorded_kff,
+                          max_speed=max_speed, tau=tau, pot_noise=pot_noise, estimator=recorded_estimator,
+                          inner_us=recorded_inner_us, seed=seed)
+        measured = [m[moving].mean() for m in tracking_metrics(target, current)]
+        twin = [m[moving].mean() for m in tracking_metrics(target, sim[0])]
+        print(f"{run['name'][:39]:<40}{measured[0]:>10.1f} / {twin[0]:>5.1f}{measured[1]:>10.3f} / {twin[1]:>5.3f}"
+              f"{measured[2]:>10.2f} / {twin[2]:>5.2f}")
+    print()
+    return max_speed, tau
+
+
+def plot_sweep(rows: list[dict], out_png: pathlib.Path) -> None:
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(3, 1, figsize=(10, 10), sharex=True)
+    for name in dict.fromkeys(r["trajectory"] for r in rows):
+        intervals = sorted({r["interval_ms"] for r in rows if r["trajectory"] == name})
+        for ax, key in zip(axes, ("delay_ms", "rho", "rms_mm")):
+            values = np.array([[r[key] for r in rows if r["trajectory"] == name and r["interval_ms"] == i]
+                               for i in intervals])
+            mean, std = values.mean(axis=1), values.std(axis=1)
+            ax.plot(intervals, mean, marker="o", label=name)
+            ax.fill_between(intervals, mean - std, mean + std, alpha=0.2)
+    for ax, label in zip(axes, ("Delay (ms)", "Cross-Correlation ρ", "RMS Error (mm)")):
+        ax.set_ylabel(label)
+        ax.grid(True)
+    axes[0].legend()
+    axes[-1].set_xlabel("Time Interval Between Trajectory Points (ms)")
+    axes[-1].invert_xaxis()
+    fig.suptitle("Digital twin: mean ± std over actuators")
+    fig.tight_layout()
+    fig.savefig(out_png, dpi=300)
+    print(f"Saved {out_png}")
+
+
+def main(paths: list[pathlib.Path], intervals: list[float], origin_z: float | None, out: pathlib.Path | None,
+         plot: bool, seed: int, max_speed: float, tau: float, pot_noise: float, estimator: int,
+         kff: float | None, inner_us: float, calibration: list[pathlib.Path], recorded: dict) -> None:
+    if calibration:
+        max_speed, tau = calibrate(calibration, pot_noise=pot_noise, seed=seed, **recorded)
+    else:
+        print(f"Warning: plant not calibrated (max speed {max_speed:g} mm/s, tau {tau * 1e3:g} ms): "
+              f"check the twin against a recorded run with --calibrate before trusting these numbers.\n")
+    trajectories = {p.stem: load_trajectory_csv(p) for p in paths} or {"demo": demo_trajectory()}
+    home = HOME_POSE.copy()
+    if origin_z is not None:
+        home[2] = origin_z
+
+    start = time.perf_counter()
+    rows = sweep(trajectories, intervals, home, seed=seed, max_speed=max_speed, tau=tau, pot_noise=pot_noise,
+                 estimator=estimator, kff=KFF if kff is None else kff, inner_us=inner_us)
+    print(f"Simulated {len(trajectories) * len(intervals)} runs in {time.perf_counter() - start:.2f} s\n")
+    summarise(rows)
+
+    if out is not None:
+        with open(out, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Saved {out}")
+    if plot:
+        plot_sweep(rows, pathlib.Path("twin_interval_sweep.png"))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Offline interval sweep on a model of the X-Jaw control loop")
+    ap.add_argument("trajectories", nargs="*", type=pathlib.Path,
+                    help="Trajectory CSV files as stored on the SD card (default: demo trajectory)")
+    ap.add_argument("--intervals", type=float, nargs="+", default=[40, 50, 60, 70, 80, 90, 100],
+                    metavar="MS", help="Waypoint intervals to simulate (default 40 … 100)")
+    ap.add_argument("--origin-z", type=float, metavar="MM", help="Calibrated origin height (default Z0+5)")
+    ap.add_argument("--out", type=pathlib.Path, help="Write per-actuator metrics to this CSV")
+    ap.add_argument("--plot", action="store_true", help="Save twin_interval_sweep.png")
+    ap.add_argument("--seed", type=int, default=0, help="Potentiometer noise seed (default 0)")
+    ap.add_argument("--max-speed", type=float, default=MAX_SPEED, help=f"Plant speed at PWM 255, mm/s (default {MAX_SPEED})")
+    ap.add_argument("--tau", type=float, default=TAU, help=f"Plant time constant, s (default {TAU})")
+    ap.add_argument("--pot-noise", type=float, default=POT_NOISE, help=f"Length noise, mm (default {POT_NOISE})")
+    ap.add_argument("--estimator", choices=MODES, default=MODE_NAMES[C.ACT_LENGTH_ESTIMATOR],
+                    help="Length estimator (default: Config.h)")
+    ap.add_argument("--kff", type=float, help="Velocity feed-forward of every actuator, PWM per mm/s "
+                                              "(default: Config.h ACT_KFF; 0 disables it)")
+    ap.add_argument("--actuator-interval", type=float, default=C.ACTUATOR_UPDATE_INTERVAL_US, metavar="US",
+                    help=f"Actuator loop period, us (default: Config.h ACTUATOR_UPDATE_INTERVAL_US; "
+                         f"{C.PLATFORM_UPDATE_INTERVAL * 1000} is the single-rate loop)")
+    ap.add_argument("--calibrate", type=pathlib.Path, nargs="+", default=[], metavar="CSV",
+                    help="actuator_data CSV files saved by the GUI: fit the plant on them (replaces "
+                         "--max-speed / --tau) and print the measured vs twin delay, rho and RMS error")
+    ap.add_argument("--recorded-gains", type=float, nargs=3, metavar=("KP", "KI", "KD"),
+                    default=(C.ACT_KP, C.ACT_KI, C.ACT_KD),
+                    help="Gains flashed when the --calibrate runs were recorded (default: Config.h)")
+    ap.add_argument("--recorded-estimator", choices=MODES, default=MODE_NAMES[C.ACT_LENGTH_ESTIMATOR],
+                    help="Length estimator flashed when the --calibrate runs were recorded (default: Config.h)")
+    ap.add_argument("--recorded-kff", type=float, nargs="+", default=list(C.ACT_KFF), metavar="KFF",
+                    help="Velocity feed-forward flashed when the --calibrate runs were recorded, one value or "
+                         "one per actuator (default: Config.h)")
+    ap.add_argument("--recorded-actuator-interval", type=float, default=C.ACTUATOR_UPDATE_INTERVAL_US,
+                    metavar="US", help="Actuator loop period flashed when the --calibrate runs were recorded, "
+                                       "us (default: Config.h)")
+    args = ap.parse_args()
+    recorded = {"recorded_gains": tuple(args.recorded_gains), "recorded_estimator": MODES[args.recorded_estimator],
+                "recorded_kff": np.array(args.recorded_kff), "recorded_inner_us": args.recorded_actuator_interval}
+    main(args.trajectories, args.intervals, args.origin_z, args.out, args.plot, args.seed,
+         args.max_speed, args.tau, args.pot_noise, MODES[args.estimator], args.kff, args.actuator_interval,
+         args.calibrate, recorded)
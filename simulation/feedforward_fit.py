@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+feedforward_fit.py
+------------------
+
+Fit the velocity feed-forward gains ACT_KFF of ``Actuator::update`` on logged
+runs and print the Config.h line to paste.
+
+The feed-forward adds ``ACT_KFF[i] · target rate`` to the PID output, the
+PWM that moves actuator i at the speed of its target, so the PID only has to
+correct the residual error instead of waiting for it to build up.
+
+1. Load ``*_actuator_data_*.csv`` runs as actuator_sysid.py does (cropped to
+   the moving part with the matching pose log).
+2. Per actuator, the logged ``speed`` (|PWM|) is regressed on the measured
+   length rate, |d current_length / dt|, through the origin. Only samples
+   where the motor is driven (MIN_SPEED ≤ speed < 255) and moves towards its
+   target are kept. The rate follows the PWM with the motor time constant and
+   the length filter delay, so the rate is shifted by the lag (0 … 150 ms)
+   that best correlates both. ACT_KFF is the slope, in PWM per mm/s.
+   Actuators that barely move, or fit with R² < MIN_R2, get the median of
+   the others.
+3. Check on the digital twin, with the plant fitted by actuator_sysid.py:
+   the logged targets are replayed with and without the feed-forward, then
+   the demo trajectory is swept over short waypoint intervals.
+
+Usage
+-----
+    python feedforward_fit.py ../Results/benhui_10s_40ms/benhui_gum_10s_40_ms_actuator_data_*.csv
+    python feedforward_fit.py run1.csv run2.csv --recorded-kff 0 --recorded-actuator-interval 10000
+"""
+from __future__ import annotations
+import argparse
+import pathlib
+
+import numpy as np
+
+from firmware_config import CONFIG as C
+from actuator_sysid import MIN_STROKE_MM, _c_float, fit_plant, load_run, moving_actuators
+from digital_twin import KFF, demo_trajectory, simulate, sweep, tracking_metrics
+from length_estimator import MODE_NAMES, MODES
+
+DT = C.PLATFORM_UPDATE_INTERVAL / 1000.0
+MIN_RATE = 2.0          # mm/s: slower samples are dominated by noise and the dead band
+MAX_LAG = 15            # Updates searched between PWM and measured rate
+MIN_R2 = 0.5            # Poorer fits are replaced by the median of the others
+
+
+# ───────────────────────────── fit ───────────────────────────────────────────
+
+
+def rate_samples(runs: list[dict], actuator: int, lag: int) -> tuple[np.ndarray, np.ndarray]:
+    """(speed, |rate|) pairs of one actuator, the rate taken ``lag`` updates after the speed."""
+    speeds, rates = [], []
+    for run in runs:
+        current = run["current_length"][:, actuator]
+        rate = np.gradient(current, DT)
+        speed = run["speed"][:, actuator]
+        towards = np.sign(run["target_length"][:, actuator] - current)
+        n = len(speed) - lag
+        speed, towards, rate = speed[:n], towards[:n], rate[lag:lag + n]
+        keep = (speed >= C.MIN_SPEED) & (speed < 255) & (np.abs(rate) >= MIN_RATE) & (np.sign(rate) == towards)
+        speeds.append(speed[keep])
+        rates.append(np.abs(rate[keep]))
+    return np.concatenate(speeds), np.concatenate(rates)
+
+
+def fit_kff(runs: list[dict]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per actuator: gain (PWM per mm/s), lag (ms) and R² of speed ≈ gain · |rate|."""
+    gain = np.full(6, np.nan)
+    lag_ms = np.full(6, np.nan)
+    r2 = np.full(6, np.nan)
+    moving = moving_actuators(runs)
+    for i in np.flatnonzero(moving):
+        best = None
+        for lag in range(MAX_LAG + 1):
+            speed, rate = rate_samples(runs, i, lag)
+            if len(speed) < 20:
+                continue
+            slope = float((speed * rate).sum() / (rate * rate).sum())
+            residual = ((speed - slope * rate) ** 2).sum()
+            score = 1.0 - residual / ((speed - speed.mean()) ** 2).sum()
+            if best is None or score > best[2]:
+                best = (slope, lag, score)
+        if best is not None:
+            gain[i], lag_ms[i], r2[i] = best[0], best[1] * C.PLATFORM_UPDATE_INTERVAL, best[2]
+    fitted = np.isfinite(gain) & (r2 >= MIN_R2)
+    gain[~fitted] = np.median(gain[fitted]) if fitted.any() else np.array(C.ACT_KFF)[~fitted]
+    return gain, lag_ms, r2
+
+
+# ───────────────────────────── checks on the twin ────────────────────────────
+
+
+def replay_runs(runs: list[dict], kff: np.ndarray, max_speed: np.ndarray, tau: np.ndarray,
+                pot_noise: float) -> tuple[np.ndarray, np.ndarray]:
+    """Mean delay (ms) and RMS error (mm) per actuator of the logged targets replayed with ``kff``."""
+    delay = np.zeros(6)
+    rms = np.zeros(6)
+    for run in runs:
+        target = run["target_length"]
+        sim, _ = simulate(target[None], run["current_length"][:1], kff=kff, max_speed=max_speed, tau=tau,
+                          pot_noise=pot_noise)
+        d, _rho, r = tracking_metrics(target, sim[0])
+        delay += d / len(runs)
+        rms += r / len(runs)
+    return delay, rms
+
+
+def interval_sweep(intervals: list[float], kff: np.ndarray, max_speed: np.ndarray, tau: np.ndarray,
+                   pot_noise: float) -> None:
+    print("\nDemo trajectory on the fitted plant (mean over actuators)")
+    print(f"{'interval ms':>12}{'delay ms':>16}{'RMS mm':>16}")
+    print(f"{'':>12}{'no FF → FF':>16}{'no FF → FF':>16}")
+    results = {}
+    for label, gains in (("off", np.zeros(6)), ("on", kff)):
+        rows = sweep({"demo": demo_trajectory()}, intervals, kff=gains, max_speed=max_speed, tau=tau,
+                     pot_noise=pot_noise)
+        for interval in intervals:
+            sel = [r for r in rows if r["interval_ms"] == interval]
+            results[label, interval] = (np.mean([r["delay_ms"] for r in sel]), np.mean([r["rms_mm"] for r in sel]))
+    for interval in intervals:
+        (d0, r0), (d1, r1) = results["off", interval], results["on", interval]
+        print(f"{interval:>12g}{d0:>8.0f} → {d1:<5.0f}{r0:>8.2f} → {r1:<5.2f}")
+
+
+def config_line(kff: np.ndarray, sources: list[str]) -> str:
+    return (f"// Velocity feed-forward: PWM per mm/s of target length rate (feedforward_fit.py on {', '.join(sources)})\n"
+            f"const float ACT_KFF[NUM_ACTUATORS] = {{{', '.join(_c_float(round(k, 2)) for k in kff)}}};")
+
+
+# ───────────────────────────── main ──────────────────────────────────────────
+
+
+def main(paths: list[pathlib.Path], recorded_gains: tuple, recorded_estimator: int, recorded_kff: np.ndarray,
+         recorded_inner_us: float, intervals: list[float], pot_noise: float) -> None:
+    runs = [load_run(p) for p in paths]
+    print(f"Loaded {len(runs)} run(s), {sum(len(r['time']) for r in runs)} updates per actuator\n")
+
+    kff, lag_ms, r2 = fit_kff(runs)
+    print("Feed-forward fit (speed ≈ KFF · |length rate|)")
+    print("----------------------------------------------")
+    for i in range(6):
+        if np.isnan(r2[i]):
+            print(f"Actuator {i}: KFF = {kff[i]:5.2f} PWM per mm/s "
+                  f"(target moves < {MIN_STROKE_MM:g} mm or too few samples, median of the others)")
+        elif r2[i] < MIN_R2:
+            print(f"Actuator {i}: KFF = {kff[i]:5.2f} PWM per mm/s (R² = {r2[i]:.2f} too low, median of the others)")
+        else:
+            print(f"Actuator {i}: KFF = {kff[i]:5.2f} PWM per mm/s, rate lag {lag_ms[i]:4.0f} ms, R² = {r2[i]:.2f}")
+
+    max_speed, tau, _ = fit_plant(runs, recorded_gains, recorded_estimator, recorded_kff, recorded_inner_us)
+    delay0, rms0 = replay_runs(runs, np.zeros(6), max_speed, tau, pot_noise)
+    delay1, rms1 = replay_runs(runs, kff, max_speed, tau, pot_noise)
+    moving = moving_actuators(runs)
+    print("\nLogged targets replayed on the fitted plant")
+    for i in np.flatnonzero(moving):
+        print(f"Actuator {i}: delay {delay0[i]:6.1f} → {delay1[i]:6.1f} ms, RMS {rms0[i]:.2f} → {rms1[i]:.2f} mm")
+
+    if intervals:
+        interval_sweep(intervals, kff, max_speed, tau, pot_noise)
+
+    print("\nPaste into main/Config.h:\n")
+    print(config_line(kff, [p.name for p in paths]))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Fit the actuator velocity feed-forward gains on logged runs")
+    ap.add_argument("csv", nargs="+", type=pathlib.Path, help="actuator_data CSV files saved by the GUI")
+    ap.add_argument("--recorded-gains", type=float, nargs=3, metavar=("KP", "KI", "KD"),
+                    default=(C.ACT_KP, C.ACT_KI, C.ACT_KD),
+                    help="Gains flashed when the runs were recorded (default: current Config.h)")
+    ap.add_argument("--recorded-estimator", choices=MODES, default=MODE_NAMES[C.ACT_LENGTH_ESTIMATOR],
+                    help="Length estimator flashed when the runs were recorded (default: current Config.h)")
+    ap.add_argument("--recorded-kff", type=float, nargs="+", default=list(KFF), metavar="KFF",
+                    help="Feed-forward flashed when the runs were recorded (default: current Config.h)")
+    ap.add_argument("--recorded-actuator-interval", type=float, default=C.ACTUATOR_UPDATE_INTERVAL_US, metavar="US",
+                    help="Actuator loop period flashed when the runs were recorded, us (default: current Config.h)")
+    ap.add_argument("--intervals", type=float, nargs="*", default=[20, 30, 40, 60, 100], metavar="MS",
+                    help="Waypoint intervals of the demo sweep (none to skip it)")
+    ap.add_argument("--pot-noise", type=float, default=0.2, help="Length noise of the twin, mm (default 0.2)")
+    args = ap.parse_args()
+    main(args.csv, tuple(args.recorded_gains), MODES[args.recorded_estimator], np.array(args.recorded_kff),
+         args.recorded_actuator_interval, args.intervals, args.pot_noise)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+firmware_config.py
+------------------
+
+Read the constants of ``main/Config.h`` so that the host-side models
+(emulator, digital twin, tuning scripts) always use the values that are
+flashed on the Teensy.
+
+Only the simple forms used in Config.h are understood::
+
+    const float NAME = 1.0f;
+    const int NAME[N] = {1, 2, 3};
+    const float NAME[N][3] = {{...}, {...}};
+    const float NAME = degrees2rad(-35.0f);
+    #define NAME 6
+
+Usage
+~~~~~
+    from firmware_config import CONFIG
+    CONFIG.ACT_KP, CONFIG.BASE_JOINTS
+"""
+from __future__ import annotations
+import math
+import pathlib
+import re
+from types import SimpleNamespace
+
+CONFIG_H = pathlib.Path(__file__).resolve().parent.parent / "main" / "Config.h"
+
+_CONST_RE = re.compile(
+    r"^\s*const\s+(?:unsigned\s+)?(?:float|int|long|bool|char)\s+(\w+)((?:\[\w*\])*)\s*=\s*(.+?);",
+    re.MULTILINE | re.DOTALL,
+)
+_DEFINE_RE = re.compile(r"^\s*#define\s+(\w+)\s+([-+\d.]+f?)\s*(?://.*)?$", re.MULTILINE)
+_FLOAT_SUFFIX_RE = re.compile(r"(?<=[\d.])f\b")
+
+
+def _eval(expr: str, names: dict):
+    expr = expr.strip()
+    if expr.startswith('"'):
+        return expr.strip('"')
+    expr = _FLOAT_SUFFIX_RE.sub("", expr)
+    expr = expr.replace("{", "[").replace("}", "]").replace("true", "True").replace("false", "False")
+    return eval(expr, {"__builtins__": {}, "degrees2rad": math.radians, "float": float, "int": int}, names)
+
+
+def load_config(path: pathlib.Path = CONFIG_H) -> SimpleNamespace:
+    """Parse Config.h into a namespace of Python values (lists for C arrays)."""
+    text = re.sub(r"//[^\n]*", "", pathlib.Path(path).read_text(encoding="utf-8"))
+    names: dict = {}
+    for name, value in _DEFINE_RE.findall(text):
+        names[name] = _eval(value, names)
+    for name, _dims, value in _CONST_RE.findall(text):
+        try:
+            names[name] = _eval(value, names)
+        except Exception:
+            continue    # Hardware-only expressions (e.g. BUILTIN_SDCARD) are not needed on the host
+    return SimpleNamespace(**names)
+
+
+CONFIG = load_config()
+
+
+if __name__ == "__main__":
+    for key, value in sorted(vars(CONFIG).items()):
+        print(f"{key} = {value}")
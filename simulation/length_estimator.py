@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+length_estimator.py
+-------------------
+
+Reference implementation of ``main/LengthEstimator`` (the actuator length fed
+to the PID) and its validation on recorded Debug Actuator logs.
+
+Estimators, selected by ACT_LENGTH_ESTIMATOR in Config.h:
+
+    moving_average  mean of the readings of the last ACT_LPF_WINDOW_MS. On a
+                    ramp it lags by (n − 1) / 2 updates, 49.5 ms at 1 ms.
+    alpha_beta      fixed-gain length/velocity tracker, no lag on a ramp. Set by
+                    the natural frequency and damping of its error dynamics.
+    kalman          2-state Kalman filter. The prediction is driven by the PWM
+                    commanded at the previous update through the plant of
+                    digital_twin.py (first-order velocity lag towards
+                    ACT_KF_MAX_SPEED · PWM / 255, same dead band and
+                    saturation as MotorDriver::setSpeed), with the
+                    per-actuator plant fitted by actuator_sysid.py.
+
+The Config.h parameters are in time units; the window, the alpha-beta gains
+(``ab_gains``) and the Kalman process noise per update are derived from the
+update interval, so replaying a 10 ms log and filtering at 1 ms use the same
+filter.
+
+``LengthEstimator`` follows LengthEstimator.cpp statement for statement and
+works element-wise on floats or numpy arrays, so the emulator (one actuator),
+the digital twin ((B, 6) batches) and the validation below share it.
+
+Validation, on ``*_debug_actuator_data_*.csv`` saved by the GUI
+(actuator, raw_value, length, filtered_length, time[, pwm]). The firmware
+prints a Debug line with the telemetry, every PLATFORM_UPDATE_INTERVAL, and
+the estimators here are replayed at that rate. With the multi-rate loop
+(ACTUATOR_UPDATE_INTERVAL_US below 1000 × PLATFORM_UPDATE_INTERVAL) the
+firmware filters every actuator update in between, so check 1 only holds
+for logs of a single-rate build, and steps 2–3 compare the estimators on the
+logged samples rather than reproduce the firmware:
+
+1. The moving average replayed on the logged ``length`` must give the logged
+   ``filtered_length`` to print precision. This checks the reference and the
+   sample alignment (lost serial lines show up here).
+2. Every estimator runs on the logged lengths. The PWM input is the ``pwm``
+   column (firmware built with ACT_DEBUG_LENGTH), or is recomputed with the
+   firmware PID from the matching ``*_actuator_data_*.csv``; without either
+   the Kalman filter is skipped.
+3. The reference is a zero-phase Savitzky-Golay smoothing of the logged
+   lengths. Per estimator: delay behind it (sub-sample, by shifting the
+   reference), RMS error against it, and noise (RMS of the estimate minus its
+   own zero-phase smoothing). A lower-latency estimator should cut the delay
+   without raising the noise above the moving average's.
+
+``--tune`` grid-searches the alpha-beta and Kalman noise parameters on the
+logs (lowest RMS error whose noise stays at or below the moving average's)
+and prints the Config.h block. ``--demo`` validates on a log synthesised by
+digital_twin.py instead of a recording.
+
+Usage
+-----
+    python length_estimator.py ../Results/benhui_gum_10s_40_ms_debug_actuator_data_*.csv
+    python length_estimator.py run_debug_actuator_data.csv --actuator-csv run_actuator_data.csv --tune --plot
+    python length_estimator.py --demo --tune
+"""
+from __future__ import annotations
+import argparse
+import itertools
+import math
+import pathlib
+
+import numpy as np
+
+from firmware_config import CONFIG as C
+
+DT_MS = C.ACTUATOR_UPDATE_INTERVAL_US / 1000.0     # Actuator loop, where the firmware runs the estimator
+LOG_DT_MS = C.PLATFORM_UPDATE_INTERVAL              # Debug Actuator lines
+MODES = {"moving_average": C.ACT_EST_MOVING_AVERAGE, "alpha_beta": C.ACT_EST_ALPHA_BETA, "kalman": C.ACT_EST_KALMAN}
+MODE_NAMES = {mode: name for name, mode in MODES.items()}
+KF_MAX_SPEED = np.array(C.ACT_KF_MAX_SPEED, dtype=float)     # Per actuator, broadcast over (..., 6)
+KF_TAU = np.array(C.ACT_KF_TAU, dtype=float)
+
+PRINT_TOLERANCE = 0.011     # mm: firmware prints lengths with 2 decimals
+SMOOTH_WINDOW = 21          # Updates in the zero-phase reference smoothing (210 ms)
+SMOOTH_ORDER = 3
+MAX_DELAY_MS = 100.0        # Delay search range
+MIN_STROKE_MM = 2.0         # Actuators moving less have no measurable delay (same as actuator_sysid.py)
+
+
+# ───────────────────────────── estimator ─────────────────────────────────────
+
+
+def ab_gains(frequency: float, damping: float, dt_ms: float) -> tuple[float, float]:
+    """Alpha-beta gains per update of ``dt_ms`` for error dynamics of ``frequency`` (rad/s) and ``damping``.
+
+    The poles of z² − (2 − α − β) z + 1 − α are those of the continuous
+    second-order dynamics sampled every dt (LengthEstimator.cpp).
+    """
+    dt = dt_ms / 1000.0
+    r = math.exp(-damping * frequency * dt)
+    wd = frequency * math.sqrt(abs(1.0 - damping * damping)) * dt
+    pole_sum = 2.0 * r * (math.cos(wd) if damping < 1.0 else math.cosh(wd))
+    alpha = 1.0 - r * r
+    return alpha, 2.0 - alpha - pole_sum
+
+
+def ab_frequency(alpha: float, beta: float, dt_ms: float) -> tuple[float, float]:
+    """Inverse of ``ab_gains``: (frequency rad/s, damping) of per-update gains."""
+    dt = dt_ms / 1000.0
+    decay = -math.log(1.0 - alpha) / (2.0 * dt)                 # damping × frequency
+    c = (2.0 - alpha - beta) / (2.0 * math.sqrt(1.0 - alpha))
+    wd = (math.acos(c) if c <= 1.0 else math.acosh(c)) / dt
+    frequency = math.sqrt(decay * decay + (wd * wd if c <= 1.0 else -wd * wd))
+    return frequency, decay / frequency
+
+
+def lpf_n(dt_ms: float, window_ms: float = C.ACT_LPF_WINDOW_MS) -> int:
+    """Readings the moving average keeps at one update every ``dt_ms`` (LengthEstimator.cpp)."""
+    return min(max(int(round(window_ms / dt_ms)), 1), C.ACT_LPF_N)
+
+
+class LengthEstimator:
+    """LengthEstimator.cpp, element-wise on floats or arrays."""
+
+    def __init__(self, mode: int = C.ACT_LENGTH_ESTIMATOR, lpf_window_ms: float = C.ACT_LPF_WINDOW_MS,
+                 frequency: float = C.ACT_AB_FREQUENCY, damping: float = C.ACT_AB_DAMPING,
+                 max_speed=KF_MAX_SPEED, tau=KF_TAU, q_length=C.ACT_KF_Q_LENGTH, q_velocity=C.ACT_KF_Q_VELOCITY,
+                 r=C.ACT_KF_R, dt_ms: float = DT_MS):
+        if mode not in MODE_NAMES:
+            raise ValueError(f"Unknown estimator mode {mode}")
+        self.mode = mode
+        self.lpf_n = lpf_n(dt_ms, lpf_window_ms)
+        self.alpha, self.beta = ab_gains(frequency, damping, dt_ms)
+        self.dt = dt_ms / 1000.0
+        self.decay = np.exp(-self.dt / np.asarray(tau, dtype=float))
+        self.gain = (1.0 - self.decay) * np.asarray(max_speed, dtype=float) / 255.0
+        self.q_length, self.q_velocity, self.r = q_length * self.dt, q_velocity * self.dt, r
+        self.reset()
+
+    def reset(self) -> None:
+        self.length = None
+
+    def _start(self, measured) -> None:
+        self.length = np.array(measured, dtype=float)
+        self.velocity = np.zeros_like(self.length)
+        self.buffer = np.repeat(self.length[None], self.lpf_n, axis=0)
+        self.index = 0
+        self.p00 = np.full_like(self.length, self.r)
+        self.p01 = np.zeros_like(self.length)
+        self.p11 = np.zeros_like(self.length)
+
+    def update(self, measured, pwm=0.0):
+        """New potentiometer length (mm) and the PWM applied since the last update."""
+        if self.length is None:
+            self._start(measured)
+            return self.length.copy()
+
+        if self.mode == C.ACT_EST_ALPHA_BETA:
+            predicted = self.length + self.velocity * self.dt
+            residual = measured - predicted
+            self.length = predicted + self.alpha * residual
+            self.velocity = self.velocity + self.beta / self.dt * residual
+
+        elif self.mode == C.ACT_EST_KALMAN:
+            pwm = np.asarray(pwm, dtype=float)
+            drive = np.where(np.abs(pwm) < C.MIN_SPEED, 0.0, np.clip(pwm, -255.0, 255.0))
+            predicted = self.length + self.velocity * self.dt
+            self.velocity = self.decay * self.velocity + self.gain * drive
+            q00 = self.p00 + self.dt * (2.0 * self.p01 + self.dt * self.p11) + self.q_length
+            q01 = self.decay * (self.p01 + self.dt * self.p11)
+            q11 = self.decay * self.decay * self.p11 + self.q_velocity
+            k0 = q00 / (q00 + self.r)
+            k1 = q01 / (q00 + self.r)
+            residual = measured - predicted
+            self.length = predicted + k0 * residual
+            self.velocity = self.velocity + k1 * residual
+            self.p00 = (1.0 - k0) * q00
+            self.p01 = (1.0 - k0) * q01
+            self.p11 = q11 - k1 * q01
+
+        else:   # Moving average (the firmware keeps a running sum, same value)
+            self.buffer[self.index] = measured
+            self.index = (self.index + 1) % self.lpf_n
+            self.length = self.buffer.mean(axis=0)
+        return self.length.copy()
+
+
+def replay(measured: np.ndarray, pwm: np.ndarray | None, mode: int, **params) -> np.ndarray:
+    """Estimates (T, ...) for measurements (T, ...) and the PWM applied before each of them.
+
+    The samples are LOG_DT_MS apart unless ``dt_ms`` is given.
+    """
+    estimator = LengthEstimator(mode, **{"dt_ms": LOG_DT_MS, **params})
+    out = np.empty_like(measured, dtype=float)
+    for k in range(len(measured)):
+        out[k] = estimator.update(measured[k], 0.0 if pwm is None else pwm[k])
+    return out
+
+
+# ───────────────────────────── logs ──────────────────────────────────────────
+
+
+def _wide(df, columns: list[str]) -> dict:
+    df = df.assign(sample=df.groupby("actuator").cumcount())
+    wide = df.pivot(index="sample", columns="actuator").dropna()
+    return {key: wide[key].to_numpy(dtype=float) for key in columns}
+
+
+def load_debug_log(path: pathlib.Path) -> dict:
+    """Debug Actuator log as (T, 6) arrays, one row per update."""
+    import pandas as pd
+
+    df = pd.read_csv(path)
+    required = {"actuator", "length", "filtered_length", "time"}
+    if not required.issubset(df.columns):
+        raise ValueError(f"{path}: CSV must contain columns: {', '.join(sorted(required))}")
+    columns = ["length", "filtered_length", "time"]
+    if "pwm" in df.columns and df["pwm"].notna().all():
+        columns.append("pwm")
+    log = _wide(df, columns)
+    log["name"] = path.name
+    return log
+
+
+def pid_pwm(path: pathlib.Path, times: np.ndarray) -> np.ndarray:
+    """PWM applied before each debug sample, from the firmware PID on an actuator_data CSV.
+
+    Actuator::update prints the Debug line and the Actuator line of the same
+    update with the same time; the PWM computed at one update drives the
+    motor until the next, so the estimator input is the previous output.
+    """
+    import pandas as pd
+
+    run = _wide(pd.read_csv(path), ["target_length", "current_length", "time"])
+    dt = LOG_DT_MS / 1000.0
+    error = run["target_length"] - run["current_length"]
+    error_sum = np.zeros(error.shape[1])
+    last_error = error[0]
+    output = np.empty_like(error)
+    for k in range(len(error)):
+        error_sum = np.clip(error_sum + error[k] * dt, -C.MAX_INTEGRAL, C.MAX_INTEGRAL)
+        output[k] = C.ACT_KP * error[k] + C.ACT_KI * error_sum + C.ACT_KD * (error[k] - last_error) / dt
+        last_error = error[k]
+
+    pwm = np.zeros_like(times)
+    for i in range(times.shape[1]):
+        k = np.searchsorted(run["time"][:, i], times[:, i])     # Update of the same time
+        known = (k > 0) & (k < len(output))
+        pwm[known, i] = output[k[known] - 1, i]
+    return pwm
+
+
+def demo_log(seconds: float = 20.0, seed: int = 0) -> dict:
+    """Debug log of the demo trajectory from digital_twin.py, single-rate moving-average firmware."""
+    from digital_twin import HOME_POSE, ZERO_POSE, clamp_lengths, demo_trajectory, inverse_kinematics, \
+        sample_poses, simulate
+
+    times = np.arange(1, int(seconds * 1000 / LOG_DT_MS) + 1) * LOG_DT_MS
+    points = np.tile(demo_trajectory(), (int(seconds * 1000 / (40 * len(demo_trajectory()))) + 1, 1))
+    poses, _ = sample_poses(points, 40, times)
+    targets = clamp_lengths(inverse_kinematics(poses, HOME_POSE))[None]
+    rest = clamp_lengths(inverse_kinematics(ZERO_POSE, HOME_POSE))[None]
+    trace = {}
+    filtered, true_length = simulate(targets, rest, estimator=C.ACT_EST_MOVING_AVERAGE,
+                                     inner_us=LOG_DT_MS * 1000, seed=seed, trace=trace)
+    # The firmware prints with 2 decimals.
+    return {"length": np.round(trace["measured"][0], 2), "filtered_length": np.round(filtered[0], 2),
+            "pwm": trace["pwm"][0], "time": np.broadcast_to(times[:, None], filtered[0].shape).astype(float),
+            "true_length": true_length[0], "name": "demo"}
+
+
+# ───────────────────────────── metrics ───────────────────────────────────────
+
+
+def smooth(x: np.ndarray) -> np.ndarray:
+    from scipy.signal import savgol_filter
+
+    return savgol_filter(x, SMOOTH_WINDOW, SMOOTH_ORDER, axis=0, mode="interp")
+
+
+def delay_ms(reference: np.ndarray, estimate: np.ndarray, max_delay_ms: float = MAX_DELAY_MS) -> np.ndarray:
+    """Per column, the delay (ms, 0.5 ms steps) of ``estimate`` behind ``reference``.
+
+    The reference is shifted by linear interpolation and the delay with the
+    lowest RMS difference is kept.
+    """
+    n = len(reference)
+    t = np.arange(n, dtype=float)
+    margin = int(math.ceil(max_delay_ms / LOG_DT_MS))
+    shifts = np.arange(0.0, max_delay_ms + 0.25, 0.5)
+    best = np.full(reference.shape[1], np.nan)
+    for i in range(reference.shape[1]):
+        if np.ptp(reference[:, i]) < MIN_STROKE_MM:
+            continue
+        errors = [np.mean((np.interp(t[margin:] - s / LOG_DT_MS, t, reference[:, i]) - estimate[margin:, i]) ** 2)
+                  for s in shifts]
+        best[i] = shifts[int(np.argmin(errors))]
+    return best
+
+
+def estimator_metrics(length: np.ndarray, estimate: np.ndarray, skip: int = lpf_n(LOG_DT_MS)) -> dict:
+    """Delay (ms), RMS error against the reference (mm) and noise (mm) per actuator."""
+    reference = smooth(length)[skip:]
+    estimate = estimate[skip:]
+    return {"delay_ms": delay_ms(reference, estimate),
+            "rms_mm": np.sqrt(np.mean((estimate - reference) ** 2, axis=0)),
+            "noise_mm": np.sqrt(np.mean((estimate - smooth(estimate)) ** 2, axis=0))}
+
+
+def check_moving_average(log: dict) -> tuple[float, float]:
+    """Largest |replayed − logged| filtered length (mm) and fraction within print precision."""
+    n = lpf_n(LOG_DT_MS)
+    replayed = replay(log["length"], None, C.ACT_EST_MOVING_AVERAGE)
+    diff = np.abs(replayed[n - 1:] - log["filtered_length"][n - 1:])    # Buffer filled by logged samples
+    return float(diff.max()), float((diff <= PRINT_TOLERANCE).mean())
+
+
+# ───────────────────────────── tuning ────────────────────────────────────────
+
+
+def candidates(mode: int) -> list[dict]:
+    if mode == C.ACT_EST_ALPHA_BETA:      # Benedict-Bordner gains at the log rate: beta = alpha² / (2 − alpha)
+        gains = [(a, a * a / (2.0 - a)) for a in np.round(np.arange(0.05, 0.55, 0.025), 3)]
+        return [dict(zip(("frequency", "damping"), ab_frequency(a, b, LOG_DT_MS))) for a, b in gains]
+    if mode == C.ACT_EST_KALMAN:        # Per second
+        return [{"q_velocity": q, "q_length": ql}
+                for q, ql in itertools.product(np.geomspace(25, 25600, 11), (0.0, 0.1, 0.4))]
+    return [{}]
+
+
+def evaluate(logs: list[dict], mode: int, params: dict) -> dict:
+    """Metrics averaged over the logs, each (6,)."""
+    total = None
+    for log in logs:
+        m = estimator_metrics(log["length"], replay(log["length"], log.get("pwm"), mode, **params))
+        total = m if total is None else {k: total[k] + m[k] for k in m}
+    return {k: v / len(logs) for k, v in total.items()}
+
+
+def tune(logs: list[dict], mode: int, noise_limit: float) -> tuple[dict, dict]:
+    """Parameters with the lowest mean RMS error whose mean noise is at most ``noise_limit``."""
+    best = None
+    for params in candidates(mode):
+        m = evaluate(logs, mode, params)
+        if np.nanmean(m["noise_mm"]) > noise_limit:
+            continue
+        if best is None or np.nanmean(m["rms_mm"]) < np.nanmean(best[1]["rms_mm"]):
+            best = (params, m)
+    return best if best is not None else ({}, evaluate(logs, mode, {}))
+
+
+def format_params(params: dict) -> str:
+    return ", ".join(f"{k} = {v:.4g}" for k, v in params.items()) if params else "Config.h"
+
+
+def _c_float(value: float) -> str:
+    text = f"{value:.4g}"
+    return text + ("f" if any(c in text for c in ".e") else ".0f")
+
+
+def config_block(alpha_beta: dict, kalman: dict, sources: list[str]) -> str:
+    lines = [f"// Length estimator parameters (length_estimator.py on {', '.join(sources)})"]
+    if alpha_beta:
+        lines += [f"const float ACT_AB_FREQUENCY = {_c_float(alpha_beta['frequency'])}; // rad/s",
+                  f"const float ACT_AB_DAMPING = {_c_float(alpha_beta['damping'])};"]
+    if kalman:
+        lines += [f"const float ACT_KF_Q_LENGTH = {_c_float(kalman['q_length'])}; // mm^2/s",
+                  f"const float ACT_KF_Q_VELOCITY = {_c_float(kalman['q_velocity'])}; // (mm/s)^2/s"]
+    return "\n".join(lines)
+
+
+# ───────────────────────────── main ──────────────────────────────────────────
+
+
+def plot_estimates(log: dict, estimates: dict, out_png: pathlib.Path) -> None:
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(3, 2, figsize=(12, 9), sharex=True)
+    t = (log["time"][:, 0] - log["time"][0, 0]) / 1000.0
+    for i, ax in enumerate(axes.flat):
+        ax.plot(t, log["length"][:, i], color="lightgray", label="Length")
+        for name, est in estimates.items():
+            ax.plot(t, est[:, i], label=name.replace("_", " ").capitalize())
+        ax.set_title(f"Actuator {i}")
+        ax.set_ylabel("Length (mm)")
+        ax.grid(True)
+    axes[0, 0].legend()
+    for ax in axes[-1]:
+        ax.set_xlabel("Time (s)")
+    fig.suptitle(f"Length estimators on {log['name']}")
+    fig.tight_layout()
+    fig.savefig(out_png, dpi=150)
+    print(f"Saved {out_png}")
+
+
+def main(paths: list[pathlib.Path], actuator_csvs: list[pathlib.Path], demo: bool, do_tune: bool,
+         plot: bool) -> None:
+    logs = [demo_log()] if demo else [load_debug_log(p) for p in paths]
+    for k, log in enumerate(logs):
+        if "pwm" not in log and k < len(actuator_csvs):
+            log["pwm"] = pid_pwm(actuator_csvs[k], log["time"])
+    with_pwm = all("pwm" in log for log in logs)
+
+    print("Moving average replay against the logged filtered length")
+    print("---------------------------------------------------------")
+    for log in logs:
+        worst, share = check_moving_average(log)
+        status = "OK" if share == 1.0 else "MISMATCH (lost lines, multi-rate or different firmware?)"
+        print(f"{log['name']}: {len(log['length'])} updates, max |diff| = {worst:.3f} mm, "
+              f"{100 * share:.1f} % within {PRINT_TOLERANCE} mm  {status}")
+
+    modes = [C.ACT_EST_MOVING_AVERAGE, C.ACT_EST_ALPHA_BETA] + ([C.ACT_EST_KALMAN] if with_pwm else [])
+    if not with_pwm:
+        print("\nNo PWM in the logs (no pwm column, no --actuator-csv): Kalman filter skipped")
+
+    results = {mode: ({}, evaluate(logs, mode, {})) for mode in modes}
+    noise_limit = np.nanmean(results[C.ACT_EST_MOVING_AVERAGE][1]["noise_mm"])
+    if do_tune:
+        for mode in modes[1:]:
+            results[mode] = tune(logs, mode, noise_limit)
+
+    print(f"\n{'estimator':<16}{'delay ms':>10}{'RMS mm':>9}{'noise mm':>10}   (mean over moving actuators)")
+    for mode, (params, m) in results.items():
+        print(f"{MODE_NAMES[mode]:<16}{np.nanmean(m['delay_ms']):>10.1f}{np.nanmean(m['rms_mm']):>9.3f}"
+              f"{np.nanmean(m['noise_mm']):>10.3f}   {format_params(params)}")
+    if demo:
+        log = logs[0]
+        print("\nAgainst the true (simulated) length, RMS mm:")
+        for mode in modes:
+            est = replay(log["length"], log.get("pwm"), mode, **results[mode][0])
+            print(f"{MODE_NAMES[mode]:<16}{np.sqrt(np.mean((est - log['true_length']) ** 2)):>9.3f}")
+
+    if do_tune:
+        tuned = {MODE_NAMES[mode]: params for mode, (params, _m) in results.items() if params}
+        print("\nPaste into main/Config.h:\n")
+        print(config_block(tuned.get("alpha_beta", {}), tuned.get("kalman", {}), [log["name"] for log in logs]))
+    if plot:
+        log = logs[0]
+        estimates = {MODE_NAMES[mode]: replay(log["length"], log.get("pwm"), mode, **params)
+                     for mode, (params, _m) in results.items()}
+        plot_estimates(log, estimates, pathlib.Path("length_estimators.png"))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Validate and tune the actuator length estimators on Debug Actuator logs")
+    ap.add_argument("csv", nargs="*", type=pathlib.Path, help="debug_actuator_data CSV files saved by the GUI")
+    ap.add_argument("--actuator-csv", nargs="+", type=pathlib.Path, default=[],
+                    help="Matching actuator_data CSV files, to recompute the PWM of logs without a pwm column")
+    ap.add_argument("--demo", action="store_true", help="Use a log synthesised by digital_twin.py")
+    ap.add_argument("--tune", action="store_true", help="Tune the alpha-beta and Kalman parameters")
+    ap.add_argument("--plot", action="store_true", help="Save length_estimators.png (first log)")
+    args = ap.parse_args()
+    if not args.csv and not args.demo:
+        ap.error("give debug_actuator_data CSV files or --demo")
+    main(args.csv, args.actuator_csv, args.demo, args.tune, args.plot)
@@ -0,0 +1,1032 @@
+#!/usr/bin/env python3
+"""
+teensy_emulator.py
+------------------
+
+Emulate the X-Jaw Teensy on a pseudo-terminal so that ``gui/jaw_gui.py`` and
+any serial tooling can be exercised without the robot.
+
+* Speaks the serial protocol of ``main/main.ino``: start, stop, calibrate,
+  list_csv_files, trajectory:<file>, set position:, set origin:,
+  set fixed interval:, get timing, ping:, stream begin:, stream:, stream end,
+  get stream, set offset:, including ``#<id>`` tagged requests.
+* Reproduces the ``RobotController`` state machine (STOP / CALIBRATING /
+  MOVING) with the firmware's messages and transition rules.
+* Runs the firmware control path: every PLATFORM_UPDATE_INTERVAL the
+  trajectory Catmull-Rom interpolation (one interval ahead) and inverse
+  kinematics; every ACTUATOR_UPDATE_INTERVAL_US the setpoint ramp, length
+  estimator (length_estimator.py, as selected in Config.h), PID and velocity
+  feed-forward, on top of a first-order actuator model. A pose stream is
+  played from the same jitter buffer as PoseStream.cpp (a lengths stream
+  leaves the food model open), with the z / pitch offset of the host's
+  bite-force control (PoseOffset.cpp) on top. The telemetry lines
+  are emitted with the exact firmware formats (Debug Actuator lines too when
+  ACT_DEBUG_LENGTH is set). The loop timing lines printed when a run stops
+  report ideal ticks.
+* A simple food model turns the jaw closing onto a bolus into load-cell
+  forces (front / back right / back left / total).
+* Time can run faster than real time (``--speed 20``) or as fast as the host
+  allows (``--speed 0``).
+
+Constants come from main/Config.h (see firmware_config.py). Only the Python
+standard library and numpy (for the length estimator) are needed.
+
+Usage
+-----
+    python teensy_emulator.py                     # prints the pty path to connect to
+    python teensy_emulator.py --sd-dir trajs/ --speed 10 --origin-z 360
+    python ../gui/jaw_gui.py --port /dev/pts/5
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import math
+import os
+import pathlib
+import pty
+import random
+import select
+import sys
+import tempfile
+import time
+import tty
+
+from firmware_config import CONFIG as C
+from length_estimator import KF_MAX_SPEED, KF_TAU, LengthEstimator
+
+# ───────────────────────────── firmware formatting ───────────────────────────
+
+
+def fmt(value: float, digits: int = 2) -> str:
+    """Serial.print(float, digits): two decimals by default, no negative zero."""
+    text = f"{value:.{digits}f}"
+    return text[1:] if text.startswith("-") and float(text) == 0 else text
+
+
+# ───────────────────────────── Trajectory.cpp ────────────────────────────────
+POSE_LIMITS = [
+    (C.MIN_X, C.MAX_X), (C.MIN_Y, C.MAX_Y), (C.MIN_Z, C.MAX_Z),
+    (C.MIN_ROLL, C.MAX_ROLL), (C.MIN_PITCH, C.MAX_PITCH), (C.MIN_YAW, C.MAX_YAW),
+]
+ZERO_POSE = (0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+
+def catmull_rom(p0, p1, p2, p3, t):
+    t2 = t * t
+    t3 = t2 * t
+    return 0.5 * (2.0 * p1 + (p2 - p0) * t
+                  + (2.0 * p0 - 5.0 * p1 + 4.0 * p2 - p3) * t2
+                  + (-p0 + 3.0 * p1 - 3.0 * p2 + p3) * t3)
+
+
+class EmulatedTrajectory:
+    MAX_POINTS = 3500
+
+    def __init__(self, println, fixed_interval: int = 100):
+        self.println = println
+        self.fixed_interval = fixed_interval
+        self.points: list[tuple] = []     # poses; waypoint i is at i * fixed_interval ms
+
+    def load_from_csv(self, path: pathlib.Path) -> bool:
+        try:
+            lines = path.read_text().splitlines()
+        except OSError:
+            self.println("Failed to open file.")
+            return False
+        self.points = []
+        self.println("Reading file content:")
+        for line in lines[1:]:
+            if not line:
+                continue
+            fields = line.split(",")
+            if len(fields) < 6:
+                self.println("Error: Malformed CSV line.")
+                continue
+            pose = tuple(_to_float(f) for f in fields[:5]) + (_to_float(",".join(fields[5:])),)
+            if not self.add_waypoint(pose):
+                self.println("Error: Failed to add waypoint from CSV.")
+                break
+        return True
+
+    def add_waypoint(self, pose) -> bool:
+        if any(v < lo or v > hi for v, (lo, hi) in zip(pose, POSE_LIMITS)):
+            self.println("Error: Pose out of bounds.")
+            return False
+        if len(self.points) >= self.MAX_POINTS:
+            self.println("Error: Maximum number of waypoints reached.")
+            return False
+        self.points.append(pose)
+        return True
+
+    def get_pose(self, t: int) -> tuple:
+        count = len(self.points)
+        dt = self.fixed_interval
+        if count == 0 or t >= (count - 1) * dt:
+            return ZERO_POSE
+        if t <= 0:
+            return self.points[0]
+        i = t // dt + 1     # Segment between points[i-1] and points[i]
+        u = (t - (i - 1) * dt) / dt
+        if count < 4:
+            a, b = self.points[i - 1], self.points[i]
+            return self.clamp_pose(tuple(pa + u * (pb - pa) for pa, pb in zip(a, b)))
+        p0 = self.points[max(0, i - 2)]
+        p1 = self.points[max(0, i - 1)]
+        p2 = self.points[min(count - 1, i)]
+        p3 = self.points[min(count - 1, i + 1)]
+        return self.clamp_pose(tuple(catmull_rom(*c, u) for c in zip(p0, p1, p2, p3)))
+
+    def clamp_pose(self, pose) -> tuple:
+        out = []
+        for value, (lo, hi) in zip(pose, POSE_LIMITS):
+            if value < lo:
+                self.println(f"Warning: Value {fmt(value)} is below minimum {fmt(lo)}")
+                value = lo
+            elif value > hi:
+                self.println(f"Warning: Value {fmt(value)} is above maximum {fmt(hi)}")
+                value = hi
+            out.append(value)
+        return tuple(out)
+
+    def print_points(self) -> None:
+        self.println("Trajectory Points:")
+        for i, p in enumerate(self.points[:20]):
+            self.println(f"Point {i}: Time: {i * self.fixed_interval}, Pose: ("
+                         + ", ".join(fmt(v) for v in p) + ")")
+
+
+def _to_float(text: str) -> float:
+    # String::toFloat() returns 0 on garbage instead of raising.
+    try:
+        return float(text.strip())
+    except ValueError:
+        return 0.0
+
+
+# ───────────────────────────── PoseStream.cpp ────────────────────────────────
+STREAM_POSE, STREAM_LENGTHS = "pose", "lengths"
+
+
+class EmulatedPoseStream:
+    """Jitter buffer of the streamed setpoints, played in MOVING instead of the trajectory."""
+
+    def __init__(self, println):
+        self.println = println
+        self.begin(None)
+
+    def begin(self, mode) -> None:
+        self.mode = mode                # None (off), STREAM_POSE or STREAM_LENGTHS
+        self.points: list[tuple] = []   # (time ms, 6 values)
+        self.received = False
+        self.last_time = 0
+        self.playhead = 0
+        self.underruns = 0
+        self.ended = self.starved = self.finished = False
+
+    @property
+    def active(self) -> bool:
+        return self.mode is not None
+
+    def add_batch(self, batch: str) -> bool:
+        if not self.active:
+            self.println("Error: No stream started. Send stream begin:pose or stream begin:lengths first.")
+            return False
+        header, *items = batch.split(";")
+        try:
+            t0, dt = (int(v) for v in header.split(","))
+        except ValueError:
+            t0, dt = 0, 0
+        if dt <= 0:
+            self.println(f"Error: Malformed stream batch at: {batch}")
+            return False
+        angle_scale = C.STREAM_ANGLE_SCALE if self.mode == STREAM_POSE else C.STREAM_LENGTH_SCALE
+        for k, item in enumerate(items):
+            try:
+                values = [int(v) for v in item.split(",")]
+            except ValueError:
+                values = []
+            if len(values) != C.NUM_ACTUATORS:
+                self.println(f"Error: Malformed stream batch at: {item}")
+                return False
+            point = tuple(v / C.STREAM_LENGTH_SCALE for v in values[:3]) + tuple(v / angle_scale for v in values[3:])
+            if not self.add(t0 + k * dt, point):
+                return False
+        return True
+
+    def add(self, t: int, point: tuple) -> bool:
+        if self.received and t <= self.last_time:
+            self.println(f"Error: Stream point at {t} ms is not after the previous one.")
+            return False
+        if self.mode == STREAM_POSE:
+            valid = all(lo <= v <= hi for v, (lo, hi) in zip(point, POSE_LIMITS))
+        else:
+            valid = all(C.ACTUATOR_MIN_LENGTH <= v <= C.ACTUATOR_MAX_LENGTH for v in point)
+        if not valid:
+            self.println(f"Error: Stream point at {t} ms out of bounds.")
+            return False
+        if len(self.points) >= C.STREAM_BUFFER_SIZE:
+            self.println("Error: Stream buffer full.")
+            return False
+        self.points.append((t, point))
+        self.last_time, self.received = t, True
+        return True
+
+    def advance(self, now: int) -> None:
+        self.playhead = now
+        while len(self.points) >= 3 and self.points[2][0] <= now:
+            del self.points[0]
+        drained = not self.points or now >= self.points[-1][0]
+        if drained and not self.ended and not self.starved:
+            self.underruns += 1
+            self.println(f"Warning: Stream buffer underrun at {now} ms, holding the last point.")
+        self.starved = drained and not self.ended
+        if drained and self.ended and not self.finished:
+            self.println("Stream finished.")
+        self.finished = drained and self.ended
+
+    def get_point(self, t: int, clamp_pose) -> tuple:
+        points = self.points
+        i = 0
+        while i < len(points) and t >= points[i][0]:
+            i += 1
+        if i == 0:
+            return points[0][1]
+        if i == len(points):
+            return points[-1][1]
+        u = (t - points[i - 1][0]) / (points[i][0] - points[i - 1][0])
+        p0, p1 = points[max(0, i - 2)][1], points[i - 1][1]
+        p2, p3 = points[i][1], points[min(len(points) - 1, i + 1)][1]
+        point = tuple(catmull_rom(*c, u) for c in zip(p0, p1, p2, p3))
+        return clamp_pose(point) if self.mode == STREAM_POSE else point
+
+    def lead_ms(self) -> int:
+        return self.last_time - self.playhead if self.points and self.last_time > self.playhead else 0
+
+    def status_line(self) -> str:
+        return (f"Stream - mode: {self.mode or 'off'}, points: {len(self.points)}/{C.STREAM_BUFFER_SIZE}, "
+                f"lead: {self.lead_ms()} ms, playhead: {self.playhead} ms, underruns: {self.underruns}")
+
+
+# ───────────────────────────── PoseOffset.cpp ────────────────────────────────
+class EmulatedPoseOffset:
+    """Host z / pitch offset of the played poses: bounded, rate-limited, back to zero on timeout."""
+
+    def __init__(self, println):
+        self.println = println
+        self.last_set = 0
+        self.reset()
+
+    def reset(self) -> None:
+        self.z = self.pitch = self.target_z = self.target_pitch = 0.0
+        self.timed_out = False
+
+    def set(self, z: float, pitch: float, now: int) -> bool:
+        if abs(z) > C.OFFSET_MAX_Z or abs(pitch) > C.OFFSET_MAX_PITCH:
+            self.println(f"Error: Offset out of bounds (z: +/-{fmt(C.OFFSET_MAX_Z)} mm, "
+                         f"pitch: +/-{fmt(C.OFFSET_MAX_PITCH, 4)} rad).")
+            return False
+        self.target_z, self.target_pitch, self.last_set = z, pitch, now
+        self.timed_out = False
+        return True
+
+    def update(self, now: int) -> None:
+        if now - self.last_set > C.OFFSET_TIMEOUT_MS and not self.timed_out and (self.target_z or self.target_pitch):
+            self.println(f"Warning: Offset not refreshed for {now - self.last_set} ms, returning to the trajectory.")
+            self.target_z = self.target_pitch = 0.0
+            self.timed_out = True
+        dt = C.PLATFORM_UPDATE_INTERVAL / 1000.0
+        step = lambda value, target, max_step: min(max(target, value - max_step), value + max_step)
+        self.z = step(self.z, self.target_z, C.OFFSET_MAX_RATE_Z * dt)
+        self.pitch = step(self.pitch, self.target_pitch, C.OFFSET_MAX_RATE_PITCH * dt)
+
+    def apply(self, pose, clamp_pose) -> tuple:
+        x, y, z, roll, pitch, yaw = pose
+        return clamp_pose((x, y, z + self.z, roll, pitch + self.pitch, yaw))
+
+    def status_line(self) -> str:
+        return (f"Offset - z: {fmt(self.z)} mm, pitch: {fmt(self.pitch, 4)} rad, "
+                f"target z: {fmt(self.target_z)} mm, target pitch: {fmt(self.target_pitch, 4)} rad")
+
+
+# ───────────────────────────── Kinematics.cpp ────────────────────────────────
+ROTATION_CENTER = (C.ROTATION_CENTER_X, C.ROTATION_CENTER_Y, C.ROTATION_CENTER_Z)
+
+
+def inverse_kinematics(pose, home, absolute: bool) -> list[float]:
+    if absolute:
+        x, y, z, roll, pitch, yaw = pose
+    else:
+        x, y, z, roll, pitch, yaw = (h + p for h, p in zip(home, pose))
+    cr, sr = math.cos(roll), math.sin(roll)
+    cp, sp = math.cos(pitch), math.sin(pitch)
+    cy, sy = math.cos(yaw), math.sin(yaw)
+    R = ((cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr),
+         (sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr),
+         (-sp, cp * sr, cp * cr))
+    cx, cyy, cz = ROTATION_CENTER
+    lengths = []
+    for (px, py, pz), (bx, by, bz) in zip(C.PLATFORM_JOINTS, C.BASE_JOINTS):
+        qx, qy, qz = px - cx, py - cyy, pz - cz
+        wx = R[0][0] * qx + R[0][1] * qy + R[0][2] * qz + x + cx
+        wy = R[1][0] * qx + R[1][1] * qy + R[1][2] * qz + y + cyy
+        wz = R[2][0] * qx + R[2][1] * qy + R[2][2] * qz + z + cz
+        lengths.append(math.sqrt((wx - bx) ** 2 + (wy - by) ** 2 + (wz - bz) ** 2))
+    return lengths
+
+
+# ───────────────────────────── Actuator.cpp + plant ──────────────────────────
+POT_RANGE = (100, 900)   # Emulated calibration (minPotValue, maxPotValue, see boot()), for the raw pot value
+ACTUATOR_UPDATES = max(1, C.PLATFORM_UPDATE_INTERVAL * 1000 // C.ACTUATOR_UPDATE_INTERVAL_US)   # Per trajectory update
+SETPOINT_LOOKAHEAD = (C.PLATFORM_UPDATE_INTERVAL * 1000 - C.ACTUATOR_UPDATE_INTERVAL_US) // 1000  # ms
+
+
+class EmulatedActuator:
+    """Firmware PID + length estimator driving a first-order linear actuator."""
+
+    def __init__(self, index: int, rng: random.Random, max_speed: float, tau: float, noise: float):
+        self.index = index
+        self.rng = rng
+        self.max_speed = max_speed          # mm/s at PWM 255
+        self.tau = tau                      # s, velocity time constant
+        self.noise = noise                  # mm, potentiometer noise (1 sigma)
+        self.length = C.ACTUATOR_MIN_LENGTH
+        self.velocity = 0.0
+        self.pwm = 0.0
+        self.estimator = LengthEstimator(C.ACT_LENGTH_ESTIMATOR, max_speed=KF_MAX_SPEED[index], tau=KF_TAU[index],
+                                         dt_ms=C.ACTUATOR_UPDATE_INTERVAL_US / 1000.0)
+        self.target = 0.0
+        self.target_rate = 0.0
+        self.setpoint = None            # Ramped target fed to the PID, None before the first target
+        self.ramp_left = 0
+        self.error_sum = 0.0
+        self.last_error = 0.0
+
+    def step_plant(self, dt: float) -> None:
+        pwm = 0.0 if abs(self.pwm) < C.MIN_SPEED else max(-255.0, min(255.0, self.pwm))
+        v_ss = self.max_speed * pwm / 255.0
+        self.velocity += (v_ss - self.velocity) * (1.0 - math.exp(-dt / self.tau))
+        self.length += self.velocity * dt
+        if not C.ACTUATOR_MIN_LENGTH <= self.length <= C.ACTUATOR_MAX_LENGTH:
+            self.length = min(max(self.length, C.ACTUATOR_MIN_LENGTH), C.ACTUATOR_MAX_LENGTH)
+            self.velocity = 0.0
+
+    def get_length(self, println=None, now_ms: int = 0) -> float:
+        length = self.length + self.rng.gauss(0.0, self.noise)
+        filtered = float(self.estimator.update(length, self.pwm))
+        if println is not None:
+            lo, hi = POT_RANGE
+            raw = round(lo + (length - C.ACTUATOR_MIN_LENGTH) * (hi - lo) / (C.ACTUATOR_MAX_LENGTH - C.ACTUATOR_MIN_LENGTH))
+            println(f"Debug Actuator {self.index} raw pot value: {raw}, length: {fmt(length)}, "
+                    f"filtered length: {fmt(filtered)} time: {now_ms}, pwm: {fmt(self.pwm)}")
+        return filtered
+
+    def set_target_length(self, length: float, rate: float = 0.0) -> None:
+        self.target = min(max(length, C.ACTUATOR_MIN_LENGTH), C.ACTUATOR_MAX_LENGTH)
+        self.target_rate = rate
+        if self.setpoint is None:
+            self.setpoint = self.target
+        self.ramp_left = ACTUATOR_UPDATES
+
+    def update(self, println, now_ms: int, verbose: bool) -> None:
+        if self.setpoint is None:
+            return
+        dt = C.ACTUATOR_UPDATE_INTERVAL_US / 1e6
+        current = self.get_length(println if verbose and C.ACT_DEBUG_LENGTH else None, now_ms)
+        rate = 0.0
+        if self.ramp_left > 0:
+            self.setpoint += (self.target - self.setpoint) / self.ramp_left
+            self.ramp_left -= 1
+            rate = self.target_rate
+        error = self.setpoint - current
+        self.error_sum = min(max(self.error_sum + error * dt, -C.MAX_INTEGRAL), C.MAX_INTEGRAL)
+        d_error = (error - self.last_error) / dt
+        self.pwm = (C.ACT_KP * error + C.ACT_KI * self.error_sum + C.ACT_KD * d_error
+                    + C.ACT_KFF[self.index] * rate)
+        self.last_error = error
+        if verbose:
+            println(f"Actuator {self.index} target speed: {int(min(abs(self.pwm), 255.0))}, "
+                    f"target length: {fmt(self.target)}, current length: {fmt(current)}, time: {now_ms}")
+
+    def stop(self) -> None:
+        self.pwm = 0.0
+
+
+# ───────────────────────────── ForceSensing.cpp + food ───────────────────────
+class EmulatedForceSensing:
+    """Bolus between the teeth: linear spring once the jaw closes past -thickness."""
+
+    FRONT_SHARE = 0.4
+
+    def __init__(self, rng: random.Random, stiffness: float, thickness: float, noise: float):
+        self.rng = rng
+        self.stiffness = stiffness      # N/mm
+        self.thickness = thickness      # mm, contact when pose z > -thickness
+        self.noise = noise              # N, 1 sigma
+        self.front = self.back_r = self.back_l = self.total = (0.0, 0.0, 0.0)
+
+    def update(self, z: float, roll: float) -> bool:
+        fz = self.stiffness * max(0.0, z + self.thickness)
+        back = fz * (1.0 - self.FRONT_SHARE)
+        right_share = min(max(0.5 + roll, 0.0), 1.0)    # Rolling shifts load left/right
+
+        def cell(share_fz):
+            clip = lambda v: min(max(v, C.LOAD_CELL_MIN_FORCE), C.LOAD_CELL_MAX_FORCE)
+            return (clip(0.05 * share_fz + self.rng.gauss(0, self.noise)),
+                    clip(0.05 * share_fz + self.rng.gauss(0, self.noise)),
+                    clip(share_fz + self.rng.gauss(0, self.noise)))
+
+        self.front = cell(fz * self.FRONT_SHARE)
+        self.back_r = cell(back * right_share)
+        self.back_l = cell(back * (1.0 - right_share))
+        f, r, l = self.front, self.back_r, self.back_l
+        self.total = (f[0] + l[0] - r[0], f[1] + l[1] - r[1], f[2] + r[2] + l[2])
+        return self.total[2] <= C.FORCE_THRESHOLD
+
+    def print_force(self, println, now_ms: int) -> None:
+        for name, (x, y, z) in (("Total", self.total), ("Front", self.front),
+                                ("Back Right", self.back_r), ("Back Left", self.back_l)):
+            println(f"{name} Force - X: {fmt(x)}, Y: {fmt(y)}, Z: {fmt(z)}, Time: {now_ms}")
+
+
+# ───────────────────────────── LoopTiming.cpp ───────────────────────────────
+TIMING_PHASES = ("commands", "force", "trajectory", "kinematics", "actuators", "telemetry")
+TIMING_CYCLES_PER_US = 1000         # perf_counter_ns: one "cycle" per ns
+
+
+def timing_bin(cycles: int) -> int:
+    """Half-octave histogram bin: bin 2k starts at 2^k cycles, bin 2k+1 at 1.5 * 2^k."""
+    if cycles < 2:
+        return 0
+    msb = cycles.bit_length() - 1
+    return 2 * msb + ((cycles >> (msb - 1)) & 1)
+
+
+class EmulatedLoopTiming:
+    """LoopTiming of the firmware, on the execution time of the emulator itself.
+
+    A "loop" is one tick or one command line. Nested phases only get their
+    own time, as with PhaseTimer.
+    """
+
+    def __init__(self):
+        self.stack = []         # [phase, start ns, nested ns] of the open phases
+        self.reset(0)
+
+    def reset(self, now_ms: int) -> None:
+        self.window_start = now_ms
+        self.stats = {name: [] for name in ("loop",) + TIMING_PHASES}
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        entry = [name, time.perf_counter_ns(), 0]
+        self.stack.append(entry)
+        try:
+            yield
+        finally:
+            self.stack.pop()
+            total = time.perf_counter_ns() - entry[1]
+            self.stats[name].append(total - entry[2] if name != "loop" else total)
+            if self.stack and name != "loop":
+                self.stack[-1][2] += total
+
+    def lines(self, now_ms: int) -> list[str]:
+        out = [f"Timing window - {now_ms - self.window_start} ms, cycles per us: {fmt(TIMING_CYCLES_PER_US)}"]
+        for name, samples in self.stats.items():
+            n = len(samples)
+            histogram = {}
+            for cycles in samples:
+                histogram[timing_bin(cycles)] = histogram.get(timing_bin(cycles), 0) + 1
+            p99 = 0
+            if n:
+                rank, seen = math.ceil(0.99 * n), 0
+                for index in sorted(histogram):
+                    seen += histogram[index]
+                    if seen >= rank:
+                        upper = index + 1
+                        p99 = min((1.5 if upper % 2 else 1.0) * 2 ** (upper // 2), max(samples))
+                        break
+            us = [x / TIMING_CYCLES_PER_US for x in (min(samples, default=0), sum(samples) / n if n else 0,
+                                                     max(samples, default=0), p99)]
+            out.append(f"Timing phase {name} - n: {n}, min: {fmt(us[0])}, mean: {fmt(us[1])}, max: {fmt(us[2])}, "
+                       f"p99: {fmt(us[3])}, hist:" + "".join(f" {k}={histogram[k]}" for k in sorted(histogram)))
+        return out
+
+
+# ───────────────────────────── RobotController + main.ino ────────────────────
+STOP, CALIBRATING, MOVING = "STOP", "CALIBRATING", "MOVING"
+HOME_POSE = (0.0, 0.0, C.Z0 + 5, 0.0, 0.0, 0.0)
+
+
+class TeensyEmulator:
+    def __init__(self, sd_dir: pathlib.Path, write, seed: int = 0,
+                 max_speed: float = 60.0, tau: float = 0.03, pot_noise: float = 0.2,
+                 stiffness: float = 15.0, thickness: float = 5.0, force_noise: float = 0.3):
+        self.sd_dir = sd_dir
+        self.write = write
+        self.rng = random.Random(seed)
+        self.now_ms = 0
+        self.state = STOP
+        self.trajectory = EmulatedTrajectory(self.println)
+        self.stream = EmulatedPoseStream(self.println)
+        self.offset = EmulatedPoseOffset(self.println)
+        self.actuators = [EmulatedActuator(i, self.rng, max_speed, tau, pot_noise)
+                          for i in range(C.NUM_ACTUATORS)]
+        self.force = EmulatedForceSensing(self.rng, stiffness, thickness, force_noise)
+        self.home_pose = HOME_POSE
+        self.calibration_target = HOME_POSE
+        self.previous_targets = None        # StewartPlatform target rates
+        self.trajectory_file = "test_trajectory.csv"
+        self.loaded_trajectory_file = ""
+        self.fixed_interval = 100
+        self.trajectory_init_time = 0
+        self.run_ticks = 0                  # Trajectory loop ticks of the current MOVING run
+        self.timing = EmulatedLoopTiming()
+        self.commands = [
+            ("start", False, self.cmd_start),
+            ("stop", False, self.cmd_stop),
+            ("calibrate", False, self.cmd_calibrate),
+            ("list_csv_files", False, self.cmd_list_csv_files),
+            ("trajectory:", True, self.cmd_trajectory),
+            ("set position:", True, self.cmd_set_position),
+            ("set origin:", True, self.cmd_set_origin),
+            ("set fixed interval:", True, self.cmd_set_fixed_interval),
+            ("get timing", False, self.cmd_get_timing),
+            ("ping:", True, self.cmd_ping),
+            ("stream begin:", True, self.cmd_stream_begin),
+            ("stream:", True, self.cmd_stream_batch),
+            ("stream end", False, self.cmd_stream_end),
+            ("get stream", False, self.cmd_get_stream),
+            ("set offset:", True, self.cmd_set_offset),
+        ]
+
+    def println(self, text: str = "") -> None:
+        self.write(text + "\r\n")
+
+    def telemetry_println(self, text: str = "") -> None:
+        with self.timing.phase("telemetry"):
+            self.println(text)
+
+    # ---- setup() ----
+    def boot(self) -> bool:
+        for i in range(C.NUM_ACTUATORS):
+            self.println(f"Actuator {i} calibration loaded:")
+            self.println("Min: 100")
+            self.println("Max: 900")
+        self.println("Calibrating actuators (min only)...")
+        for i in range(C.NUM_ACTUATORS):
+            self.println(f"Actuator {i}: minPotValue = 100")
+        self.println("Calibration done.")
+        if not self.load_trajectory(self.trajectory_file):
+            self.println("Error: Failed to load trajectory from file.")
+            self.println("Error: RobotController initialization failed. Stopping execution.")
+            return False
+        self.trajectory.print_points()
+        for _ in range(3):
+            self.println("Taring load cell...")
+            self.println("Raw X: 0")
+            self.println("Raw Y: 0")
+            self.println("Raw Z: 0")
+        return True
+
+    def load_trajectory(self, filename: str) -> bool:
+        if self.trajectory.load_from_csv(self.sd_dir / filename):
+            self.loaded_trajectory_file = filename
+            self.trajectory.print_points()
+            return True
+        self.println("Error: Failed to load trajectory from file.")
+        return False
+
+    # ---- loop(): commands ----
+    def handle_line(self, line: str) -> None:
+        with self.timing.phase("loop"), self.timing.phase("commands"):
+            self._handle_line(line)
+
+    def _handle_line(self, line: str) -> None:
+        line = line.strip()
+        if not line:
+            return
+        if line.startswith("#"):
+            tag, _, command = line[1:].partition(" ")
+            self.println(f"#{tag} begin")
+            ok = self.run_command(command.strip())
+            self.println(f"#{tag} end {'ok' if ok else 'error'}")
+        else:
+            self.run_command(line)
+
+    def run_command(self, command: str) -> bool:
+        for name, has_args, handler in self.commands:
+            if has_args and command.startswith(name):
+                return handler(command[len(name):].lstrip())
+            if not has_args and command.lower() == name:
+                return handler("")
+        names = ", ".join(name + ("<...>" if has_args else "") for name, has_args, _ in self.commands)
+        self.println(f"Unknown command. Available commands: {names}")
+        return False
+
+    def cmd_start(self, _args: str) -> bool:
+        self.println("Starting robot.")
+        return self.set_state(MOVING)
+
+    def cmd_stop(self, _args: str) -> bool:
+        self.println("Stopping robot.")
+        return self.set_state(STOP)
+
+    def cmd_get_timing(self, _args: str) -> bool:
+        for line in self.timing.lines(self.now_ms):
+            self.println(line)
+        self.timing.reset(self.now_ms)
+        self.print_loop_timing()
+        return True
+
+    def cmd_ping(self, token: str) -> bool:
+        # micros() of the emulated clock: it only advances by whole ticks.
+        if not token:
+            self.println("Error: ping needs the host timestamp.")
+            return False
+        micros = (self.now_ms * 1000) % (1 << 32)
+        self.println(f"Pong: {token}, {micros}, {micros}")
+        return True
+
+    def cmd_stream_begin(self, args: str) -> bool:
+        mode = args.strip().lower()
+        if mode not in (STREAM_POSE, STREAM_LENGTHS, "off"):
+            self.println(f"Error: Invalid stream mode (pose, lengths or off). Message received: {args}")
+            return False
+        if self.state == MOVING:
+            self.println("Error: Cannot change the stream while MOVING.")
+            return False
+        if mode == "off":
+            self.stream.begin(None)
+            self.println("Stream off, playing the SD card trajectory.")
+        else:
+            self.stream.begin(mode)
+            self.println(f"Streaming {'poses' if mode == STREAM_POSE else 'actuator lengths'}, "
+                         f"buffer of {C.STREAM_BUFFER_SIZE} points.")
+            self.println(self.stream.status_line())
+        return True
+
+    def cmd_stream_batch(self, batch: str) -> bool:
+        ok = self.stream.add_batch(batch)
+        if self.stream.active:
+            self.println(self.stream.status_line())
+        return ok
+
+    def cmd_stream_end(self, _args: str) -> bool:
+        if not self.stream.active:
+            self.println("Error: No stream to end.")
+            return False
+        self.stream.ended = True
+        self.println(self.stream.status_line())
+        return True
+
+    def cmd_get_stream(self, _args: str) -> bool:
+        self.println(self.stream.status_line())
+        return True
+
+    def cmd_set_offset(self, args: str) -> bool:
+        try:
+            z, pitch = (float(v) for v in args.split(",")[:2])
+        except ValueError:
+            self.println(f"Error: Invalid parameters for set offset. Message received: {args}")
+            return False
+        if self.state != MOVING:
+            self.println("Error: The offset only applies while MOVING.")
+            return False
+        ok = self.offset.set(z, pitch, self.now_ms)
+        self.println(self.offset.status_line())
+        return ok
+
+    def cmd_calibrate(self, _args: str) -> bool:
+        self.println("Calibration state")
+        return self.set_state(CALIBRATING)
+
+    def cmd_list_csv_files(self, _args: str) -> bool:
+        if not self.sd_dir.is_dir():
+            self.println("Failed to open directory.")
+            return True
+        names = sorted(p.name for p in self.sd_dir.iterdir() if p.is_file() and p.suffix == ".csv")[:20]
+        self.println(", ".join(names))
+        return True
+
+    def cmd_trajectory(self, filename: str) -> bool:
+        self.println(f"Loading trajectory from file: {filename}")
+        self.trajectory_file = filename
+        return True
+
+    def _parse_xyz(self, args: str):
+        try:
+            x, y, z = (float(v) for v in args.split(",")[:3])
+            return x, y, z
+        except ValueError:
+            return None
+
+    def cmd_set_position(self, args: str) -> bool:
+        xyz = self._parse_xyz(args)
+        if xyz is None:
+            self.println(f"Error: Invalid parameters for set position. Message received: {args}")
+            return False
+        if self.state == CALIBRATING:
+            self.calibration_target = (*xyz, 0.0, 0.0, 0.0)
+        else:
+            self.println("Error: Platform is not in CALIBRATING state. Setting calibration target pose not possible.")
+        return True
+
+    def cmd_set_origin(self, args: str) -> bool:
+        xyz = self._parse_xyz(args)
+        if xyz is None:
+            self.println(f"Error: Invalid parameters for set origin. Message received: {args}")
+            return False
+        self.home_pose = (*xyz, 0.0, 0.0, 0.0)
+        self.println("Origin set to: " + ", ".join(fmt(v) for v in xyz))
+        return True
+
+    def cmd_set_fixed_interval(self, args: str) -> bool:
+        try:
+            interval = int(args.split()[0]) if args.split() else 0
+        except ValueError:
+            interval = 0
+        if interval <= 0:
+            self.println(f"Error: Invalid fixed interval value. Message received: {args}")
+            return False
+        self.fixed_interval = interval
+        return True
+
+    # ---- RobotController state machine ----
+    def set_state(self, new_state: str) -> bool:
+        if new_state == self.state:
+            return True
+        if self.state == MOVING and new_state == CALIBRATING:
+            self.println("Error: Cannot transition from MOVING to CALIBRATING.")
+            return False
+        if self.state == CALIBRATING and new_state == MOVING:
+            self.println("Error: Cannot transition from CALIBRATING to MOVING.")
+            return False
+        previous, self.state = self.state, new_state
+        self.previous_targets = None        # StewartPlatform::resetTargetRates
+        self.offset.reset()
+        if new_state == CALIBRATING:
+            self.println("Entering calibration state.")
+            self.stop_platform()
+            self.calibration_target = HOME_POSE
+        elif new_state == MOVING:
+            self.println("Entering moving state.")
+            # The trajectory task restarts: its tick 0, the start of the trajectory, is the next tick.
+            self.trajectory_init_time = self.now_ms + C.PLATFORM_UPDATE_INTERVAL
+            self.run_ticks = 0
+        else:
+            self.println("Entering stop state.")
+            self.stop_platform()
+        if previous == MOVING:
+            self.print_loop_timing()
+            if self.stream.active:
+                self.println(self.stream.status_line())
+                self.stream.begin(None)
+                self.println("Stream closed.")
+        return True
+
+    def print_loop_timing(self) -> None:
+        """PeriodicTask::printTiming of both loops; the emulated ticks are never late."""
+        for name, ticks, period in (("Trajectory", self.run_ticks, C.PLATFORM_UPDATE_INTERVAL * 1000),
+                                    ("Actuator", self.run_ticks * ACTUATOR_UPDATES, C.ACTUATOR_UPDATE_INTERVAL_US)):
+            self.println(f"Timing - {name} loop: {ticks} ticks of {period} us, "
+                         f"late min 0 / mean 0.0 / max 0 us, 0 ticks dropped in 0 overruns")
+
+    def stop_platform(self) -> None:
+        for act in self.actuators:
+            act.stop()
+        self.previous_targets = None
+
+    def move_to_pose(self, pose, absolute: bool = False) -> None:
+        self.move_to_lengths(inverse_kinematics(pose, self.home_pose, absolute))
+
+    def move_to_lengths(self, lengths) -> None:
+        targets = []
+        for i, (act, length) in enumerate(zip(self.actuators, lengths)):
+            clamped = min(max(length, C.ACTUATOR_MIN_LENGTH), C.ACTUATOR_MAX_LENGTH)
+            if clamped != length:
+                self.println(f"Warning: actuator {i} target length out of range, clamped. "
+                             f"Target: {fmt(length)} Clamped: {fmt(clamped)}")
+            rate = 0.0
+            if self.previous_targets is not None:
+                rate = (clamped - self.previous_targets[i]) / (C.PLATFORM_UPDATE_INTERVAL / 1000.0)
+                max_rate = min(C.ACT_FF_MAX_RATE, C.ACT_KF_MAX_SPEED[i])
+                rate = min(max(rate, -max_rate), max_rate)
+            act.set_target_length(clamped, rate)
+            targets.append(clamped)
+        self.previous_targets = targets
+
+    def tick(self) -> None:
+        """Advance one PLATFORM_UPDATE_INTERVAL of RobotController::update().
+
+        The trajectory loop runs once, then the actuator loop every
+        ACTUATOR_UPDATE_INTERVAL_US (the first update prints the telemetry).
+        """
+        with self.timing.phase("loop"):
+            self.now_ms += C.PLATFORM_UPDATE_INTERVAL
+            self.trajectory_tick()
+            dt = C.ACTUATOR_UPDATE_INTERVAL_US / 1e6
+            with self.timing.phase("actuators"):
+                for j in range(ACTUATOR_UPDATES):
+                    for act in self.actuators:
+                        act.step_plant(dt)
+                        act.update(self.telemetry_println, self.now_ms, verbose=self.state == MOVING and j == 0)
+
+    def trajectory_tick(self) -> None:
+        if self.state == MOVING:
+            self.offset.update(self.now_ms)
+        if self.state == MOVING and self.stream.active:
+            self.stream_tick()
+            return
+        with self.timing.phase("trajectory"):
+            pose = self.commanded_pose()
+        # Estimate of the real jaw height: commanded z shifted by the mean actuator tracking error.
+        lag = sum(a.length - (a.target if a.setpoint is None else a.setpoint) for a in self.actuators) / C.NUM_ACTUATORS
+        with self.timing.phase("force"):
+            force_ok = self.force.update(pose[2] + lag if self.state == MOVING else -1e9, pose[3])
+        if not force_ok:
+            self.println("Error: Too much vertical force. Stopping execution.")
+            self.set_state(STOP)
+            return
+
+        if self.state == MOVING:
+            with self.timing.phase("trajectory"):
+                target = self.commanded_pose(SETPOINT_LOOKAHEAD)
+            self.telemetry_println("Pose: " + ", ".join(f"{k}: {fmt(v)}" for k, v in zip(
+                ("x", "y", "z", "roll", "pitch", "yaw"), pose)) + f", time: {self.now_ms}")
+            with self.timing.phase("kinematics"):
+                self.move_to_pose(target)
+            self.run_ticks += 1
+            with self.timing.phase("telemetry"):
+                self.force.print_force(self.println, self.now_ms)
+        elif self.state == CALIBRATING:
+            with self.timing.phase("kinematics"):
+                self.move_to_pose(self.calibration_target, absolute=True)
+        else:
+            self.stop_state_housekeeping()
+            with self.timing.phase("kinematics"):
+                self.previous_targets = None    # moveToHomePose: static target, no rate
+                self.move_to_pose(self.home_pose, absolute=True)
+
+    def stream_tick(self) -> None:
+        """trajectory_tick of RobotController::moveStream."""
+        now = self.now_ms - self.trajectory_init_time
+        with self.timing.phase("trajectory"):
+            self.stream.advance(now)
+            if self.stream.points:
+                point = self.stream.get_point(now, self.trajectory.clamp_pose)
+                target = self.stream.get_point(now + SETPOINT_LOOKAHEAD, self.trajectory.clamp_pose)
+                if self.stream.mode == STREAM_POSE:
+                    point = self.offset.apply(point, self.trajectory.clamp_pose)
+                    target = self.offset.apply(target, self.trajectory.clamp_pose)
+        lag = sum(a.length - (a.target if a.setpoint is None else a.setpoint) for a in self.actuators) / C.NUM_ACTUATORS
+        bite = self.stream.points and self.stream.mode == STREAM_POSE
+        with self.timing.phase("force"):
+            force_ok = self.force.update(point[2] + lag if bite else -1e9, point[3] if bite else 0.0)
+        if not force_ok:
+            self.println("Error: Too much vertical force. Stopping execution.")
+            self.set_state(STOP)
+            return
+        if self.stream.points:
+            if self.stream.mode == STREAM_POSE:
+                self.telemetry_println("Pose: " + ", ".join(f"{k}: {fmt(v)}" for k, v in zip(
+                    ("x", "y", "z", "roll", "pitch", "yaw"), point)) + f", time: {self.now_ms}")
+            with self.timing.phase("kinematics"):
+                if self.stream.mode == STREAM_POSE:
+                    self.move_to_pose(target)
+                else:
+                    self.move_to_lengths(target)
+        self.run_ticks += 1
+        with self.timing.phase("telemetry"):
+            self.force.print_force(self.println, self.now_ms)
+
+    def commanded_pose(self, ahead_ms: int = 0) -> tuple:
+        if self.state != MOVING:
+            return ZERO_POSE
+        pose = self.trajectory.get_pose(self.now_ms - self.trajectory_init_time + ahead_ms)
+        return self.offset.apply(pose, self.trajectory.clamp_pose)
+
+    def stop_state_housekeeping(self) -> None:
+        if self.loaded_trajectory_file != self.trajectory_file:
+            if not self.load_trajectory(self.trajectory_file):
+                self.println("Error: Failed to load trajectory from file.")
+        if self.trajectory.fixed_interval != self.fixed_interval:
+            self.trajectory.fixed_interval = self.fixed_interval
+            self.println(f"Fixed interval set to: {self.fixed_interval}")
+            if not self.trajectory.load_from_csv(self.sd_dir / self.trajectory_file):
+                self.println("Error: Failed to reload trajectory with new fixed interval.")
+            else:
+                self.loaded_trajectory_file = self.trajectory_file
+
+
+# ───────────────────────────── pseudo-terminal link ──────────────────────────
+class PtyPort:
+    """Master side of a raw pty; the slave path is what the GUI opens."""
+
+    MAX_BACKLOG = 1 << 20   # Bytes kept when the client is not reading (then dropped)
+
+    def __init__(self):
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        os.set_blocking(self.master, False)
+        self.name = os.ttyname(self.slave)
+        self.rx = b""
+        self.tx = bytearray()
+        self.bytes_sent = 0
+        self.bytes_dropped = 0
+
+    def write(self, text: str) -> None:
+        data = text.encode()
+        if len(self.tx) + len(data) > self.MAX_BACKLOG:
+            self.bytes_dropped += len(data)
+            return
+        self.tx += data
+
+    def flush(self) -> None:
+        while self.tx:
+            try:
+                n = os.write(self.master, self.tx)
+            except (BlockingIOError, OSError):
+                return
+            self.bytes_sent += n
+            del self.tx[:n]
+
+    def read_lines(self, timeout: float) -> list[str]:
+        readable, _, _ = select.select([self.master], [], [], max(timeout, 0.0))
+        if not readable:
+            return []
+        try:
+            self.rx += os.read(self.master, 4096)
+        except (BlockingIOError, OSError):
+            return []
+        *lines, self.rx = self.rx.split(b"\n")
+        return [line.decode(errors="replace") for line in lines]
+
+
+def write_demo_trajectory(sd_dir: pathlib.Path) -> None:
+    """Chewing-like test trajectory: 5 open/close cycles of 40 waypoints."""
+    rows = ["x_mm,y_mm,z_mm,roll_rad,pitch_rad,yaw_rad"]
+    for k in range(200):
+        opening = 0.5 * (1.0 - math.cos(2.0 * math.pi * k / 40))
+        z = -12.0 * opening
+        rows.append(f"{2.0 * math.sin(2.0 * math.pi * k / 40):.4f},{-4.0 * opening:.4f},{z:.4f},"
+                    f"0.0,{0.08 * opening:.4f},0.0")
+    (sd_dir / "test_trajectory.csv").write_text("\n".join(rows) + "\n")
+
+
+def main(sd_dir: pathlib.Path | None, speed: float, seed: int, origin_z: float | None,
+         stats_every: float) -> None:
+    if sd_dir is None:
+        sd_dir = pathlib.Path(tempfile.mkdtemp(prefix="robotics_jaw_"))
+        write_demo_trajectory(sd_dir)
+
+    port = PtyPort()
+    emulator = TeensyEmulator(sd_dir, port.write, seed=seed)
+    if origin_z is not None:
+        # Same as "set origin:0,0,<z>" from the calibration window.
+        emulator.home_pose = (0.0, 0.0, origin_z, 0.0, 0.0, 0.0)
+    print(f"Teensy emulator on {port.name}  (SD card: {sd_dir}, speed: {speed or 'max'}x)", flush=True)
+    if not emulator.boot():
+        port.flush()
+        sys.exit(1)
+
+    dt = C.PLATFORM_UPDATE_INTERVAL / 1000.0
+    start = time.monotonic()
+    next_stats = start + stats_every
+    ticks = 0
+    while True:
+        deadline = start + ticks * dt / speed if speed > 0 else time.monotonic()
+        # Serve commands until the next tick is due, like loop() between control updates.
+        while True:
+            for line in port.read_lines(deadline - time.monotonic()):
+                emulator.handle_line(line)
+                port.flush()
+            if time.monotonic() >= deadline:
+                break
+        emulator.tick()
+        ticks += 1
+        port.flush()
+
+        now = time.monotonic()
+        if stats_every and now >= next_stats:
+            next_stats = now + stats_every
+            print(f"t_sim = {emulator.now_ms / 1000:8.1f} s  ({emulator.now_ms / 1000 / (now - start):5.1f}x real time)  "
+                  f"state = {emulator.state:<11}  sent = {port.bytes_sent / 1e6:7.2f} MB  "
+                  f"dropped = {port.bytes_dropped / 1e6:.2f} MB", file=sys.stderr, flush=True)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Pseudo-terminal emulator of the X-Jaw Teensy firmware")
+    ap.add_argument("--sd-dir", type=pathlib.Path,
+                    help="Directory playing the SD card robotics_jaw/ folder (default: demo trajectory)")
+    ap.add_argument("--speed", type=float, default=1.0,
+                    help="Simulated time per real time, 0 = as fast as possible (default 1)")
+    ap.add_argument("--seed", type=int, default=0, help="Noise seed (default 0)")
+    ap.add_argument("--origin-z", type=float, metavar="MM",
+                    help="Start with a calibrated origin at this height (default: firmware Z0+5)")
+    ap.add_argument("--stats-every", type=float, default=5.0,
+                    help="Seconds between throughput reports on stderr, 0 = never (default 5)")
+    args = ap.parse_args()
+    try:
+        main(args.sd_dir, args.speed, args.seed, args.origin_z, args.stats_every)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,175 @@
+"""Tests of gui/bite_force.py: the PI controller, and the control loop against simulation/teensy_emulator.py.
+
+The emulated jaw closes on a 15 N/mm bolus (contact at z = -5 mm) within the
+first 2 s, then the trajectory holds it 1 mm into the bolus (nominally 15 N,
+less with the actuator lag): the controller has to find the offset for the
+target.
+
+Run from the repository root:  python -m pytest tests/gui_test
+"""
+import pathlib
+import sys
+from concurrent.futures import Future
+
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "gui"))
+sys.path.insert(0, str(ROOT / "simulation"))
+from bite_force import BiteForceControl, BiteForcePI, ForceProfile  # noqa: E402
+from command_channel import Reply  # noqa: E402
+from teensy_emulator import TeensyEmulator  # noqa: E402
+
+
+class EmulatedRobot:
+    """TeensyEmulator in process: requests run at once, the force lines go to the control."""
+
+    def __init__(self, sd_dir):
+        closing = [-10.0] * 10 + [-10.0 + 0.6 * k for k in range(1, 11)] + [-4.0] * 180
+        rows = ["x_mm,y_mm,z_mm,roll_rad,pitch_rad,yaw_rad"] + [f"0,0,{z:.2f},0,0,0" for z in closing]
+        (sd_dir / "test_trajectory.csv").write_text("\n".join(rows) + "\n")
+        self.lines = []
+        self.emulator = TeensyEmulator(sd_dir, self._write, seed=1)
+        assert self.emulator.boot()
+        for _ in range(100):        # 1 s in STOP: the actuators settle at the home pose
+            self.emulator.tick()
+        self.requests = []
+        self.warnings = []
+        self.lines.clear()
+
+    def _write(self, text):
+        self.lines.append(text.rstrip("\r\n"))
+
+    def clock(self):
+        return self.emulator.now_ms * 1_000_000
+
+    def request(self, command, timeout=1.0):
+        self.requests.append(command)
+        start = len(self.lines)
+        ok = self.emulator.run_command(command)
+        reply_lines = self.lines[start:]
+        del self.lines[start:]
+        future = Future()
+        future.set_result(Reply(command, reply_lines, ok, 0.002))
+        return future
+
+    def run(self, control, seconds, feed=True, pump=True, latency_ms=None):
+        """Tick the emulator; returns the Fz printed by the firmware."""
+        forces = []
+        for _ in range(round(seconds * 100)):
+            self.emulator.tick()
+            lines, self.lines = self.lines, []
+            for line in lines:
+                if line.startswith("Total Force"):
+                    forces.append(float(line.split("Z: ")[1].split(",")[0]))
+                    if feed:
+                        control.feed(line, self.clock(), latency_ms)
+                elif line.startswith("Warning"):
+                    self.warnings.append(line)
+            if pump:
+                control.pump()
+        return forces
+
+
+@pytest.fixture
+def robot(tmp_path):
+    return EmulatedRobot(tmp_path)
+
+
+def start_control(robot, force=30.0, **kwargs):
+    log = []
+    control = BiteForceControl(robot.request, ForceProfile.constant(force, ramp_s=0.5),
+                               log=log.append, clock=robot.clock, **kwargs)
+    assert robot.request("start").result().ok
+    control.start()
+    return control, log
+
+
+def mean(values):
+    return sum(values) / len(values)
+
+
+# ---- BiteForcePI ----
+
+def test_integrator_frozen_while_rate_limited():
+    pi = BiteForcePI(kp=0.02, ki=0.5, max_offset=10.0, max_rate=10.0)
+    pi.step(100.0, 0.0, 0.02)
+    assert pi.output == pytest.approx(0.2)      # max_rate * dt
+    assert pi.integral == 0.0
+
+
+def test_integrator_frozen_while_at_the_bound():
+    pi = BiteForcePI(kp=0.02, ki=0.5, max_offset=1.0, max_rate=1000.0)
+    for _ in range(3):
+        pi.step(10.0, 0.0, 0.02)
+    integral = pi.integral
+    for _ in range(200):                        # 4 s at the bound, 10 N short
+        pi.step(100.0, 0.0, 0.02)
+    assert pi.output == 1.0
+    assert pi.integral == integral
+    pi.step(0.0, 10.0, 0.02)                    # Error reverses: leaves the bound at once
+    assert pi.output < 1.0
+
+
+# ---- BiteForceControl on the emulator ----
+
+def test_holds_30_n(robot):
+    control, log = start_control(robot)
+    forces = robot.run(control, 5.0)
+    assert control.state == "control", log
+    assert mean(forces[-100:]) == pytest.approx(30.0, abs=1.0)
+    assert robot.emulator.offset.z == pytest.approx(1.0, abs=0.2)
+    rms, _ = control.tracking_error()
+    assert rms < 5.0
+
+
+def test_output_held_before_contact(robot):
+    control, log = start_control(robot)
+    robot.run(control, 1.5)                     # Jaw still open, the target already at 30 N
+    assert control.state == "control", log
+    assert control.history[-1][1] == 30.0
+    assert control.controller.output == 0.0
+    assert control.controller.integral == 0.0
+    assert robot.requests[-1] == "set offset:0.000,0.00000"
+
+
+def test_stale_samples_fall_back(robot):
+    control, log = start_control(robot)
+    robot.run(control, 3.0)
+    assert control.state == "control"
+    robot.run(control, 0.2, feed=False)         # Force lines lost
+    assert control.state == "fallback"
+    assert "no force sample" in log[-1]
+    assert robot.requests[-1] == "set offset:0,0"
+    assert robot.emulator.offset.target_z == 0.0
+
+
+def test_latency_falls_back(robot):
+    control, log = start_control(robot)
+    robot.run(control, 3.0)
+    assert control.state == "control"
+    steps = len(control.history)
+    robot.run(control, 0.2, latency_ms=80.0)    # Over MAX_LATENCY_MS
+    assert control.state == "fallback"
+    assert "loop latency" in log[-1]
+    assert len(control.history) - steps == control.latency_strikes - 1
+    assert robot.emulator.offset.target_z == 0.0
+
+
+def test_over_force_falls_back(robot):
+    control, log = start_control(robot, force_limit=25.0)
+    robot.run(control, 3.0)
+    assert control.state == "fallback"
+    assert "over the 25 N limit" in log[-1]
+    forces = robot.run(control, 1.0)
+    assert robot.emulator.offset.z == 0.0       # Back on the trajectory
+    assert max(forces[-50:]) < 25.0
+
+
+def test_firmware_watchdog_when_the_host_stalls(robot):
+    control, log = start_control(robot)
+    robot.run(control, 4.0)
+    forces = robot.run(control, 1.0, pump=False)    # No more offset commands
+    assert any("Offset not refreshed" in line for line in robot.warnings)
+    assert robot.emulator.offset.z == 0.0
+    assert mean(forces[-20:]) < 20.0
@@ -0,0 +1,108 @@
+"""Tests of gui/clock_sync.py with synthetic pongs from a drifting device clock.
+
+Run from the repository root:  python -m pytest tests/gui_test
+"""
+import pathlib
+import sys
+
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "gui"))
+from clock_sync import ClockSync  # noqa: E402
+
+WRAP = 1 << 32          # micros() and millis() period
+HOST0 = 10_000_000_000  # ns, host clock at the first ping
+DAY_US = 86_400 * 10**6
+
+
+class Device:
+    """Teensy clock: uptime in us at HOST0, running drift_ppm fast."""
+
+    def __init__(self, uptime_us, drift_ppm):
+        self.uptime_us = uptime_us
+        self.drift_ppm = drift_ppm
+
+    def uptime(self, host_ns):
+        return self.uptime_us + (host_ns - HOST0) * (1 + self.drift_ppm * 1e-6) / 1000
+
+    def micros(self, host_ns):
+        return int(self.uptime(host_ns)) % WRAP
+
+    def millis(self, host_ns):
+        return int(self.uptime(host_ns) // 1000) % WRAP
+
+    def offset_ms(self, host_ns):
+        """Device minus host clock, for a device clock unwrapped from its micros() at HOST0."""
+        return ((self.uptime(host_ns) - self.uptime_us + self.micros(HOST0)) * 1000 - host_ns) / 1e6
+
+
+def exchange(sync, device, t1, forward_ns=400_000, back_ns=400_000, handling_ns=30_000):
+    t2 = device.micros(t1 + forward_ns)
+    t3 = device.micros(t1 + forward_ns + handling_ns)
+    t4 = t1 + forward_ns + handling_ns + back_ns
+    assert sync.feed(f"Pong: {t1}, {t2}, {t3}", t4)
+
+
+def synced(device, seconds=20, every_ms=500, queued_every=4):
+    """Pings every every_ms; one in queued_every waits 3 ms behind telemetry on the way in."""
+    sync = ClockSync(clock=lambda: HOST0)
+    for k in range(int(seconds * 1000 / every_ms)):
+        extra = 3_000_000 if k % queued_every == 1 else 0
+        exchange(sync, device, HOST0 + k * every_ms * 1_000_000, forward_ns=400_000 + extra)
+    return sync
+
+
+def test_offset_and_drift_recovered():
+    device = Device(uptime_us=1_234_567_890, drift_ppm=40.0)
+    sync = synced(device)
+    end = HOST0 + 20 * 10**9
+    assert sync.drift_ppm == pytest.approx(40.0, abs=1.0)
+    assert sync.offset_ms(end) == pytest.approx(device.offset_ms(end), abs=0.01)
+    assert min(s.delay_ns for s in sync.samples) == pytest.approx(800_000, abs=2_000)
+
+
+def test_queued_pings_do_not_bias_the_offset():
+    device = Device(uptime_us=1_234_567_890, drift_ppm=0.0)
+    sync = synced(device, queued_every=2)       # Half of them 3 ms late
+    assert sync.offset_ms(HOST0) == pytest.approx(device.offset_ms(HOST0), abs=0.01)
+
+
+def test_micros_wrap():
+    device = Device(uptime_us=WRAP - 5_000_000, drift_ppm=-25.0)    # Wraps 5 s in
+    sync = synced(device)
+    t2 = [s.t2 for s in sync.samples]
+    assert t2 == sorted(t2) and t2[-1] > WRAP
+    assert max(s.delay_ns for s in sync.samples) < 4_000_000
+    assert sync.drift_ppm == pytest.approx(-25.0, abs=1.0)
+    end = HOST0 + 20 * 10**9
+    assert sync.offset_ms(end) == pytest.approx(device.offset_ms(end), abs=0.01)
+
+
+def test_ping_handled_across_the_micros_wrap():
+    device = Device(uptime_us=WRAP - 10, drift_ppm=0.0)
+    sync = ClockSync(clock=lambda: HOST0)
+    exchange(sync, device, HOST0 - 400_000)     # t2 just before the wrap, t3 after it
+    sample = sync.samples[0]
+    assert sample.t3 - sample.t2 == 30
+    assert sample.delay_ns == pytest.approx(800_000, abs=1_000)
+
+
+def test_tag_before_sync():
+    sync = ClockSync(clock=lambda: HOST0)
+    assert sync.tag(1000, HOST0) is None
+
+
+@pytest.mark.parametrize("uptime_us", [
+    1_234_567_890,                  # Nothing wrapped
+    3 * WRAP + 123_456_789,         # micros() wrapped before the link was opened
+    WRAP * 1000 - 5_000_000,        # millis() wraps 5 s in (49.7 days)
+    60 * DAY_US,                    # Both wrapped
+])
+def test_tag_unwraps_millis(uptime_us):
+    device = Device(uptime_us, drift_ppm=15.0)
+    sync = synced(device)
+    for k in range(100):
+        printed = HOST0 + k * 200_000_000 + 123_456
+        latency = sync.tag(device.millis(printed), printed + 3_000_000)
+        assert latency == pytest.approx(3.0, abs=0.6)      # millis() truncated to the ms
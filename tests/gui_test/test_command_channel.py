@@ -0,0 +1,93 @@
+"""Tests of gui/command_channel.py: tagged replies, timeouts and a reply whose end marker is lost.
+
+Run from the repository root:  python -m pytest tests/gui_test
+"""
+import pathlib
+import sys
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[2] / "gui"))
+from command_channel import CommandChannel  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def link():
+    clock = FakeClock()
+    sent = []
+    return CommandChannel(sent.append, clock=clock), sent, clock
+
+
+def test_reply_lines_and_status(link):
+    channel, sent, clock = link
+    future = channel.request("get stream")
+    assert sent == ["#1 get stream"]
+    assert channel.feed("#1 begin")
+    assert channel.feed("Stream - mode: off")
+    clock.now = 0.25
+    assert channel.feed("#1 end ok")
+    reply = future.result(timeout=0)
+    assert reply.ok and reply.lines == ["Stream - mode: off"] and reply.rtt == pytest.approx(0.25)
+    assert not channel.feed("Total Force - X: 0.00, Y: 0.00, Z: 1.00, Time: 10")
+
+
+def test_timeout_and_retry(link):
+    channel, sent, clock = link
+    future = channel.request("start", timeout=0.1, retries=1)
+    clock.now = 0.2
+    channel.poll()
+    assert sent == ["#1 start", "#1 start"] and not future.done()
+    clock.now = 0.4
+    channel.poll()
+    with pytest.raises(TimeoutError):
+        future.result(timeout=0)
+
+
+def test_lost_end_marker_does_not_wedge_the_channel(link):
+    channel, sent, clock = link
+    lost = channel.request("list_csv_files", timeout=0.1)
+    assert channel.feed("#1 begin")
+    assert channel.feed("a.csv, b.csv")        # Reply body before the deadline
+    # "#1 end ok" never arrives (garbled, or the firmware reset mid-reply).
+    clock.now = 0.2
+    assert not channel.feed("Pose: x: 0.00, y: 0.00, z: 0.00, roll: 0.00, pitch: 0.00, yaw: 0.00, time: 200")
+    channel.poll()
+    with pytest.raises(TimeoutError):
+        lost.result(timeout=0)
+    assert not channel.feed("Total Force - X: 0.00, Y: 0.00, Z: 1.00, Time: 210")
+
+    # Later commands still complete, and the telemetry goes on reaching the parser.
+    future = channel.request("get timing")
+    assert channel.feed("#2 begin")
+    assert channel.feed("#2 end ok")
+    assert future.result(timeout=0).ok
+    assert not channel.feed("Total Force - X: 0.00, Y: 0.00, Z: 1.00, Time: 220")
+
+
+def test_active_request_expires_even_without_telemetry(link):
+    channel, sent, clock = link
+    lost = channel.request("stop", timeout=0.1)
+    channel.feed("#1 begin")
+    clock.now = 0.2
+    channel.poll()                              # No line since the begin: poll alone expires it
+    assert isinstance(lost.exception(timeout=0), TimeoutError)
+    assert not channel.feed("Entering stop state.")
+
+
+def test_late_reply_is_left_to_the_parser(link):
+    channel, sent, clock = link
+    future = channel.request("start", timeout=0.1)
+    clock.now = 0.2
+    channel.poll()
+    assert future.done()
+    assert channel.feed("#1 begin")             # Markers are always consumed
+    assert not channel.feed("Starting robot.")  # but the body of an expired request is not
+    assert channel.feed("#1 end ok")
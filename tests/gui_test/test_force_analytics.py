@@ -0,0 +1,46 @@
+"""Tests of the session statistics of gui/force_analytics.py.
+
+Run from the repository root:  python -m pytest tests/gui_test
+"""
+import math
+import pathlib
+import sys
+
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "gui"))
+from force_analytics import ForceAnalyser, format_summary  # noqa: E402
+
+
+def bite(analyser, start_ms, with_cells=True, front_share=0.4):
+    """30 N for 500 ms, sampled every 10 ms as the firmware prints it: Total, then the cells."""
+    for t in range(start_ms, start_ms + 700, 10):
+        fz = 30.0 if start_ms + 100 <= t < start_ms + 600 else 0.0
+        analyser.add("Total", {"Fx": 0.0, "Fy": 0.0, "Fz": fz, "time": t})
+        if with_cells:
+            back = fz * (1.0 - front_share) / 2
+            for cell, value in (("Front", fz * front_share), ("Back Right", back), ("Back Left", back)):
+                analyser.add(cell, {"Fx": 0.0, "Fy": 0.0, "Fz": value, "time": t})
+
+
+def test_front_share_of_the_cycles_with_cell_data():
+    analyser = ForceAnalyser()
+    bite(analyser, 0)
+    bite(analyser, 1000, with_cells=False)     # Cell lines lost: no share
+    bite(analyser, 2000)
+    summary = analyser.summary()
+    assert summary["cycles"] == 3
+    assert math.isnan(analyser.cycles[1].shares()["Front"])
+    assert summary["mean_front_share"] == pytest.approx(0.4)
+    assert "front 40 %" in format_summary(summary)
+
+
+def test_no_front_share_without_cell_data():
+    analyser = ForceAnalyser()
+    bite(analyser, 0, with_cells=False)
+    bite(analyser, 1000, with_cells=False)
+    summary = analyser.summary()
+    assert summary["cycles"] == 2
+    assert math.isnan(summary["mean_front_share"])
+    assert "front -" in format_summary(summary)
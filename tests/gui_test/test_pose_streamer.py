@@ -0,0 +1,73 @@
+"""Tests of gui/pose_streamer.py against the jitter buffer of simulation/teensy_emulator.py.
+
+Run from the repository root:  python -m pytest tests/gui_test
+"""
+import pathlib
+import sys
+from concurrent.futures import Future
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "gui"))
+sys.path.insert(0, str(ROOT / "simulation"))
+from command_channel import Reply  # noqa: E402
+from pose_streamer import PoseStreamer  # noqa: E402
+from teensy_emulator import STREAM_POSE, EmulatedPoseStream  # noqa: E402
+
+
+class FakeFirmware:
+    """Answers the stream commands at once, as a tagged request would be."""
+
+    def __init__(self):
+        self.lines = []
+        self.stream = EmulatedPoseStream(self.lines.append)
+
+    def request(self, command, timeout=1.0):
+        self.lines.clear()
+        if command.startswith("stream begin:"):
+            self.stream.begin(STREAM_POSE)
+            ok = True
+        elif command.startswith("stream:"):
+            ok = self.stream.add_batch(command[len("stream:"):])
+        elif command == "stream end":
+            self.stream.ended = True
+            ok = True
+        else:
+            ok = True
+        self.lines.append(self.stream.status_line())
+        future = Future()
+        future.set_result(Reply(command, list(self.lines), ok, 0.001))
+        return future
+
+
+def make_streamer(lead_ms=50):
+    firmware = FakeFirmware()
+    ready = []
+    streamer = PoseStreamer(firmware.request, 10, lead_ms=lead_ms, log=lambda text: None, clock=lambda: 0.0)
+    return firmware, streamer, ready
+
+
+def test_live_source_waits_for_the_lead():
+    firmware, streamer, ready = make_streamer(lead_ms=50)
+    streamer.begin(on_ready=lambda: ready.append(firmware.stream.lead_ms()))
+    for _ in range(5):
+        streamer.pump()
+    assert not ready                            # Nothing buffered yet, the source is not closed
+    for _ in range(2):
+        streamer.extend([(0, 0, 0, 0, 0, 0)] * 2)
+        streamer.pump()
+    assert not ready                            # 4 points: 30 ms buffered
+    streamer.extend([(0, 0, 0, 0, 0, 0)] * 2)
+    streamer.pump()
+    streamer.pump()
+    assert ready == [50]
+
+
+def test_closed_short_stream_is_ready():
+    firmware, streamer, ready = make_streamer(lead_ms=300)
+    streamer.extend([(0, 0, 0, 0, 0, 0)] * 3)
+    streamer.close()
+    streamer.begin(on_ready=lambda: ready.append(firmware.stream.lead_ms()))
+    for _ in range(4):
+        streamer.pump()
+    assert ready == [20]
+    assert streamer.state == "draining"
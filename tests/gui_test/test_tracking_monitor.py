@@ -0,0 +1,38 @@
+"""Tests of the delay estimate of gui/tracking_monitor.py on a delayed sine.
+
+Run from the repository root:  python -m pytest tests/gui_test
+"""
+import math
+import pathlib
+import sys
+
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "gui"))
+from tracking_monitor import ActuatorTracker  # noqa: E402
+
+DT_MS = 10
+
+
+def tracker_after(delay_ms, max_lag=50, window=300, period_s=2.0):
+    """Target: 10 mm sine; current: the target delay_ms later."""
+    tracker = ActuatorTracker(window, max_lag)
+    target = lambda t: 10.0 * math.sin(2 * math.pi * t / period_s)
+    for n in range(window + max_lag + 100):
+        t = n * DT_MS / 1000
+        tracker.add(target(t), target(t - delay_ms / 1000))
+    return tracker
+
+
+def test_delay_within_the_searched_lags():
+    delay, rho, rms, raw_rms = tracker_after(83.0).estimate()
+    assert delay * DT_MS == pytest.approx(83.0, abs=2.0)
+    assert rho > 0.99
+    assert rms < 0.1 * raw_rms
+
+
+def test_peak_at_max_lag_gives_no_delay():
+    delay, rho, rms, raw_rms = tracker_after(700.0, period_s=4.0).estimate()    # Beyond the 500 ms searched
+    assert math.isnan(delay) and math.isnan(rho)
+    assert rms == raw_rms
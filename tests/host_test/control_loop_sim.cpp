@@ -0,0 +1,175 @@
+// Host simulation of the platform control loop: the firmware's Trajectory, Kinematics,
+// StewartPlatform, Actuator, LengthEstimator and MotorDriver, linked against the shims,
+// drive six simulated actuators (plant of simulation/digital_twin.py) through a chewing-like
+// trajectory. The trajectory loop runs every PLATFORM_UPDATE_INTERVAL as in
+// RobotController::move(); the actuator loop runs at the single rate (one update per
+// trajectory update, as before ACTUATOR_UPDATE_INTERVAL_US) and at ACTUATOR_UPDATE_INTERVAL_US.
+// The true actuator lengths are compared with the IK of the trajectory at the same instant.
+// The multi-rate loop does not raise the loop gain; it removes the hold of each setpoint and
+// PWM over a whole PLATFORM_UPDATE_INTERVAL. With the velocity feed-forward (ACT_KFF) it must
+// lag and err clearly less with the same gains.
+//
+// Build and run:  make test   (from tests/host_test)
+
+#include "StewartPlatform.h"
+#include "Trajectory.h"
+#include <random>
+#include <vector>
+
+static int failures = 0;
+#define CHECK(cond) do { if (!(cond)) { printf("FAIL %s:%d: %s\n", __FILE__, __LINE__, #cond); failures++; } } while (0)
+
+const unsigned long PLANT_STEP_US = 100;
+const float MAX_SPEED = 60.0f;      // mm/s at PWM 255 (digital_twin.py defaults)
+const float TAU = 0.03f;            // s
+const float POT_NOISE = 0.2f;       // mm, 1 sigma
+const int POT_MIN = 100, POT_MAX = 900;     // Calibration written to the SD card
+const unsigned long ADC_US = 5;     // Assumed analogRead time on the Teensy 4.1
+const unsigned long WAYPOINT_INTERVAL = 20;     // ms, fastest interval of the twin sweeps
+const unsigned long SETTLE_MS = 1000;           // At the first pose before the trajectory starts
+
+// ---- Plant: first-order velocity lag, driven through the motor driver pins ----
+static float plantLength[NUM_ACTUATORS], plantVelocity[NUM_ACTUATORS];
+static std::mt19937 rng(1);
+static std::normal_distribution<float> potNoise(0.0f, POT_NOISE);
+
+static int readPot(int pin) {
+    if (pin != POT_MUX_SIG) return 0;
+    for (int i = 0; i < NUM_ACTUATORS; i++) {
+        if (ACT_POT_CH[i] != CD74HC4067::selected) continue;
+        float length = plantLength[i] + potNoise(rng);
+        float raw = POT_MIN + (length - ACTUATOR_MIN_LENGTH) * (POT_MAX - POT_MIN) / (ACTUATOR_MAX_LENGTH - ACTUATOR_MIN_LENGTH);
+        return constrain((int)lroundf(raw), 0, 1023);
+    }
+    return 0;
+}
+
+static void stepPlant(float dt) {
+    float decay = expf(-dt / TAU);
+    for (int i = 0; i < NUM_ACTUATORS; i++) {
+        float pwm = hostAnalogWriteValue(ACT_PWM_PINS[i]) * (digitalRead(ACT_A_PINS[i]) == HIGH ? -1.0f : 1.0f);
+        plantVelocity[i] = decay * plantVelocity[i] + (1.0f - decay) * MAX_SPEED * pwm / 255.0f;
+        plantLength[i] += plantVelocity[i] * dt;
+        if (plantLength[i] < ACTUATOR_MIN_LENGTH || plantLength[i] > ACTUATOR_MAX_LENGTH) {
+            plantLength[i] = constrain(plantLength[i], ACTUATOR_MIN_LENGTH, ACTUATOR_MAX_LENGTH);
+            plantVelocity[i] = 0;
+        }
+    }
+}
+
+// ---- Trajectory: 5 chewing cycles of 40 waypoints (digital_twin.py demo_trajectory) ----
+static void writeDemoTrajectory() {
+    std::string csv = "x,y,z,roll,pitch,yaw\n";
+    char line[128];
+    for (int k = 0; k < 200; k++) {
+        float opening = 0.5f * (1.0f - cosf(2.0f * (float)M_PI * k / 40));
+        snprintf(line, sizeof(line), "%.4f,%.4f,%.4f,0,%.5f,0\n",
+                 2.0f * sinf(2.0f * (float)M_PI * k / 40), -4.0f * opening, -12.0f * opening, 0.08f * opening);
+        csv += line;
+    }
+    SD.files[std::string(SD_ROOT) + "demo.csv"] = csv;
+    for (int i = 0; i < NUM_ACTUATORS; i++) {
+        SD.files[std::string(SD_ROOT) + "cal_act" + std::to_string(i) + ".txt"] =
+            std::to_string(POT_MIN) + "\n" + std::to_string(POT_MAX) + "\n";
+    }
+}
+
+struct Result {
+    float rmsMm;            // True length - target at the same instant
+    float delayMs;          // Shift of the target that fits the true length best
+    float rmsDelayedMm;     // RMS error at that shift
+    float adcLoad;          // Share of the actuator loop period spent in analogRead
+};
+
+static Trajectory trajectory(WAYPOINT_INTERVAL);
+
+// Moving state of RobotController with the actuator loop every actuatorIntervalUs.
+static Result run(unsigned long actuatorIntervalUs) {
+    StewartPlatform platform(actuatorIntervalUs);
+    platform.begin();
+    Kinematics reference;       // IK of the trajectory at the current time
+    reference.setRotationCenter(ROTATION_CENTER_X, ROTATION_CENTER_Y, ROTATION_CENTER_Z);
+    reference.setHomePose(platform.getHomePose());
+
+    float lengths[NUM_ACTUATORS];
+    reference.inverse(trajectory.getPose(0), lengths);
+    for (int i = 0; i < NUM_ACTUATORS; i++) {
+        plantLength[i] = constrain(lengths[i], ACTUATOR_MIN_LENGTH, ACTUATOR_MAX_LENGTH);
+        plantVelocity[i] = 0;
+    }
+
+    // One sample per ms of the moving part: target at that time and true length.
+    std::vector<float> target, truth;
+    unsigned long duration = 199 * WAYPOINT_INTERVAL;
+    unsigned long adcTime = 0, updates = 0;
+    hostSetAnalogReadMicros(ADC_US);
+    for (unsigned long t = 0; t < (SETTLE_MS + duration) * 1000; t += PLANT_STEP_US) {
+        long now = (long)(t / 1000) - (long)SETTLE_MS;     // Trajectory time, ms
+        unsigned long trajectoryTime = now > 0 ? now : 0;
+        if (t % (PLATFORM_UPDATE_INTERVAL * 1000) == 0) {
+            platform.moveToPose(trajectory.getPose(trajectoryTime + platform.getSetpointLookahead()));
+        }
+        if (t % actuatorIntervalUs == 0) {
+            hostSetMicros(t);
+            platform.update(false);
+            adcTime += micros() - t;
+            updates++;
+        }
+        if (now >= 0 && t % 1000 == 0) {
+            reference.inverse(trajectory.getPose(trajectoryTime), lengths);
+            for (int i = 0; i < NUM_ACTUATORS; i++) {
+                target.push_back(constrain(lengths[i], ACTUATOR_MIN_LENGTH, ACTUATOR_MAX_LENGTH));
+                truth.push_back(plantLength[i]);
+            }
+        }
+        hostSetMicros(t + PLANT_STEP_US);
+        stepPlant(PLANT_STEP_US / 1e6f);
+        Serial.output.clear();
+    }
+
+    // RMS error, delay (1 ms steps, up to 300 ms: the PID alone lags over 100 ms) of the true lengths behind the targets and RMS error at that delay.
+    int samples = (int)(target.size() / NUM_ACTUATORS);
+    Result result = {0, 0, INFINITY, (float)adcTime / (updates * actuatorIntervalUs)};
+    for (int d = 0; d <= 300; d++) {
+        double sq = 0;
+        for (int k = 300; k < samples; k++)
+            for (int i = 0; i < NUM_ACTUATORS; i++) {
+                float e = truth[k * NUM_ACTUATORS + i] - target[(k - d) * NUM_ACTUATORS + i];
+                sq += e * e;
+            }
+        float rms = sqrtf(sq / ((samples - 300) * NUM_ACTUATORS));
+        if (d == 0) result.rmsMm = rms;
+        if (rms < result.rmsDelayedMm) { result.rmsDelayedMm = rms; result.delayMs = d; }
+    }
+    return result;
+}
+
+int main() {
+    writeDemoTrajectory();
+    hostSetAnalogReader(readPot);
+    CHECK(trajectory.loadFromCSV("demo.csv"));
+
+    Result single = run(PLATFORM_UPDATE_INTERVAL * 1000);
+    Result multi = run(ACTUATOR_UPDATE_INTERVAL_US);
+    const char* names[2] = {"single rate", "multi-rate"};
+    Result* results[2] = {&single, &multi};
+    unsigned long intervals[2] = {PLATFORM_UPDATE_INTERVAL * 1000, ACTUATOR_UPDATE_INTERVAL_US};
+    for (int r = 0; r < 2; r++) {
+        printf("%-12s (%5lu us): RMS error %.3f mm, delay %4.1f ms (RMS %.3f mm after it), ADC load %.1f %%\n",
+               names[r], intervals[r], results[r]->rmsMm, results[r]->delayMs, results[r]->rmsDelayedMm,
+               100 * results[r]->adcLoad);
+    }
+
+    CHECK(multi.rmsMm < 0.85f * single.rmsMm);
+    CHECK(multi.delayMs <= single.delayMs - 5);
+    // The length estimators keep their time constants at the faster rate: once the delay is
+    // removed, the multi-rate loop must not track worse either.
+    CHECK(multi.rmsDelayedMm <= single.rmsDelayedMm);
+    CHECK(multi.adcLoad < 0.1f);        // Six conversions per update leave the loop time to the rest
+    if (failures) {
+        printf("control_loop_sim: %d check(s) failed\n", failures);
+        return 1;
+    }
+    printf("control_loop_sim: all checks passed\n");
+    return 0;
+}
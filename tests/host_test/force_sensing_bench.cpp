@@ -0,0 +1,179 @@
+// Host benchmark for main/ForceSensing: one force update per loop, as RobotController does.
+// The previous sampler (LegacyLoadCell below, a copy of the old LoadCell3Axis::readForce)
+// ran readForce() twice per cell and per loop: 2 conversions after each of 3 mux switches,
+// then a re-sum of the 10-sample buffers. The round-robin sampler converts each of the nine
+// channels once and pushes one sample per loop, so LC_SAMPLES is 5: the same 5-loop window
+// as the old buffers filled at two samples per loop, and the same lag before FORCE_THRESHOLD. Conversions, mux switches and the fake-clock time they cost on the Teensy
+// are counted, and the host CPU time of both versions is measured.
+//
+// The old buffers were uint8_t: a 10-bit reading above 255 was stored modulo 256 (300 counts
+// averaged as 44, 21 N instead of 146 N). The new ones keep the full reading, so forces are
+// identical only while every reading stays below 256 counts (124 N per axis); above it the
+// measured forces, the force CSVs and what FORCE_THRESHOLD compares against all change.
+//
+// Build and run:  make test   (from tests/host_test)
+
+#include "ForceSensing.h"
+#include <chrono>
+#include <random>
+
+static int failures = 0;
+#define CHECK(cond) do { if (!(cond)) { printf("FAIL %s:%d: %s\n", __FILE__, __LINE__, #cond); failures++; } } while (0)
+
+const unsigned long ADC_US = 5;        // Assumed analogRead time on the Teensy 4.1 (10 bit, default averaging)
+const int LOOPS = 200000;
+const int LEGACY_LC_SAMPLES = 10;      // Old LC_SAMPLES, two samples per loop
+
+// ---- Fake load cell signals: one value per mux channel ----
+static uint16_t channelValue[16];
+static int readChannel(int pin) { return pin == LC_MUX_SIG ? channelValue[CD74HC4067::selected] : 0; }
+
+// ---- Previous implementation, kept for comparison (8-bit buffers, as on the robot) ----
+class LegacyLoadCell {
+public:
+    LegacyLoadCell(CD74HC4067& mux, int chX, int chY, int chZ) : mux(mux), ch{chX, chY, chZ} {}
+
+    void update() { force = readForce(); }
+
+    ForceVector readForce() {
+        int raw[3];
+        for (int axis = 0; axis < 3; axis++) {
+            mux.channel(ch[axis]);
+            raw[axis] = analogRead(LC_MUX_SIG);
+            raw[axis] = analogRead(LC_MUX_SIG);   // Read again to ensure stability
+        }
+        for (int axis = 0; axis < 3; axis++) buffer[axis][index] = raw[axis];
+        index = (index + 1) % LEGACY_LC_SAMPLES;
+        float avg[3] = {0, 0, 0};
+        for (int i = 0; i < LEGACY_LC_SAMPLES; i++)
+            for (int axis = 0; axis < 3; axis++) avg[axis] += buffer[axis][i];
+        ForceVector f;
+        f.x = constrain(map(avg[0] / LEGACY_LC_SAMPLES, LOAD_CELL_MIN, LOAD_CELL_MAX, LOAD_CELL_MIN_FORCE, LOAD_CELL_MAX_FORCE), LOAD_CELL_MIN_FORCE, LOAD_CELL_MAX_FORCE);
+        f.y = constrain(map(avg[1] / LEGACY_LC_SAMPLES, LOAD_CELL_MIN, LOAD_CELL_MAX, LOAD_CELL_MIN_FORCE, LOAD_CELL_MAX_FORCE), LOAD_CELL_MIN_FORCE, LOAD_CELL_MAX_FORCE);
+        f.z = constrain(map(avg[2] / LEGACY_LC_SAMPLES, LOAD_CELL_MIN, LOAD_CELL_MAX, LOAD_CELL_MIN_FORCE, LOAD_CELL_MAX_FORCE), LOAD_CELL_MIN_FORCE, LOAD_CELL_MAX_FORCE);
+        return f;
+    }
+
+    ForceVector force{0, 0, 0};
+
+private:
+    CD74HC4067& mux;
+    int ch[3];
+    uint8_t buffer[3][LEGACY_LC_SAMPLES] = {};
+    int index = 0;
+};
+
+class LegacyForceSensing {
+public:
+    LegacyForceSensing() : mux(LC_MUX_S0, LC_MUX_S1, LC_MUX_S2, LC_MUX_S3),
+        front(mux, LC_FRONT[0], LC_FRONT[1], LC_FRONT[2]),
+        backR(mux, LC_BACK_R[0], LC_BACK_R[1], LC_BACK_R[2]),
+        backL(mux, LC_BACK_L[0], LC_BACK_L[1], LC_BACK_L[2]) {}
+
+    float update() {
+        front.update();
+        backR.update();
+        backL.update();
+        last[0] = front.readForce();
+        last[1] = backR.readForce();
+        last[2] = backL.readForce();
+        return last[0].z + last[1].z + last[2].z;
+    }
+
+    CD74HC4067 mux;
+    LegacyLoadCell front, backR, backL;
+    ForceVector last[3] = {};     // Front, back right, back left, after the second sample of the loop
+};
+
+struct Cost {
+    double conversions, switches, fakeMicros, hostNs;
+};
+
+template <typename Update>
+static Cost measure(Update update) {
+    unsigned long reads0 = hostAnalogReads, switches0 = CD74HC4067::switches, us0 = micros();
+    auto start = std::chrono::steady_clock::now();
+    for (int i = 0; i < LOOPS; i++) {
+        channelValue[LC_FRONT[2]] = 200 + (i & 255);     // Moving Fz so nothing is constant-folded
+        update();
+    }
+    double ns = std::chrono::duration<double, std::nano>(std::chrono::steady_clock::now() - start).count();
+    return {double(hostAnalogReads - reads0) / LOOPS, double(CD74HC4067::switches - switches0) / LOOPS,
+            double(micros() - us0) / LOOPS, ns / LOOPS};
+}
+
+static void testSamplingCost() {
+    hostSetAnalogReader(readChannel);
+    hostSetAnalogReadMicros(ADC_US);
+    ForceSensing sensing;
+    LegacyForceSensing legacy;
+    volatile float sink = 0;
+
+    Cost before = measure([&] { sink = sink + legacy.update(); });
+    Cost after = measure([&] { sensing.update(); sink = sink + sensing.getTotalForce().z; });
+
+    printf("legacy:      %4.0f conversions, %4.0f mux switches, %6.1f us on the Teensy (model), %6.1f ns on the host per loop\n",
+           before.conversions, before.switches, before.fakeMicros, before.hostNs);
+    printf("round-robin: %4.0f conversions, %4.0f mux switches, %6.1f us on the Teensy (model), %6.1f ns on the host per loop\n",
+           after.conversions, after.switches, after.fakeMicros, after.hostNs);
+    CHECK(before.conversions == 36 && before.switches == 18);
+    CHECK(after.conversions == 9 && after.switches == 9);
+    CHECK(after.fakeMicros * 2 < before.fakeMicros);
+    CHECK(after.hostNs < before.hostNs);
+}
+
+// Same averaged forces, loop by loop, as the previous sampler while the readings fit its 8-bit
+// buffers: its 10 slots held 5 loops, as LC_SAMPLES does now. Above 255 counts it wrapped
+// them and the new sampler does not.
+static void testSameForces() {
+    hostSetAnalogReadMicros(0);
+    const int* cells[3] = {LC_FRONT, LC_BACK_R, LC_BACK_L};
+    std::mt19937 rng(1);
+    std::uniform_int_distribution<int> adc(0, 255);
+    ForceSensing sensing;
+    LegacyForceSensing legacy;
+    float worst = 0;
+    for (int i = 0; i < 1000; i++) {
+        for (const int* cell : cells)
+            for (int axis = 0; axis < 3; axis++) channelValue[cell[axis]] = adc(rng);
+        sensing.update();
+        legacy.update();
+        ForceVector got[3] = {sensing.getFrontForce(), sensing.getBackRightForce(), sensing.getBackLeftForce()};
+        const ForceVector* want = legacy.last;
+        for (int c = 0; c < 3; c++) {
+            worst = max(worst, fabsf(got[c].x - want[c].x));
+            worst = max(worst, fabsf(got[c].y - want[c].y));
+            worst = max(worst, fabsf(got[c].z - want[c].z));
+        }
+    }
+    CHECK(worst == 0.0f);
+
+    // Behaviour change: 300 counts on every axis
+    for (const int* cell : cells)
+        for (int axis = 0; axis < 3; axis++) channelValue[cell[axis]] = 300;
+    float before = 0;
+    for (int i = 0; i < LC_SAMPLES; i++) {
+        sensing.update();
+        before = legacy.update();
+    }
+    printf("300 counts per cell: total Fz %.0f N before (8-bit wrap), %.0f N now\n", before, sensing.getTotalForce().z);
+    CHECK(legacy.last[0].z == map(300 & 0xFF, LOAD_CELL_MIN, LOAD_CELL_MAX, LOAD_CELL_MIN_FORCE, LOAD_CELL_MAX_FORCE));
+    CHECK(sensing.getFrontForce().z == map(300, LOAD_CELL_MIN, LOAD_CELL_MAX, LOAD_CELL_MIN_FORCE, LOAD_CELL_MAX_FORCE));
+    CHECK(before < FORCE_THRESHOLD && sensing.getTotalForce().z > FORCE_THRESHOLD);   // Now stops the robot
+
+    for (const int* cell : cells)
+        for (int axis = 0; axis < 3; axis++) channelValue[cell[axis]] = 1000;
+    for (int i = 0; i < LC_SAMPLES; i++) sensing.update();
+    CHECK(sensing.getFrontForce().z == map(1000, LOAD_CELL_MIN, LOAD_CELL_MAX, LOAD_CELL_MIN_FORCE, LOAD_CELL_MAX_FORCE));
+}
+
+int main() {
+    testSamplingCost();
+    testSameForces();
+    if (failures) {
+        printf("force_sensing_bench: %d check(s) failed\n", failures);
+        return 1;
+    }
+    printf("force_sensing_bench: all checks passed\n");
+    return 0;
+}
@@ -0,0 +1,130 @@
+// Host test for main/LengthEstimator: the three estimators track a simulated actuator
+// (plant of simulation/digital_twin.py) read through a noisy potentiometer.
+// The moving average must give the same value as the previous buffer average in
+// Actuator::getLength; the alpha-beta and Kalman filters must lag less without
+// passing more potentiometer noise at rest.
+//
+// Build and run:  make test   (from tests/host_test)
+
+#include "LengthEstimator.h"
+#include <cmath>
+#include <random>
+#include <vector>
+
+static int failures = 0;
+#define CHECK(cond) do { if (!(cond)) { printf("FAIL %s:%d: %s\n", __FILE__, __LINE__, #cond); failures++; } } while (0)
+
+const float DT = ACTUATOR_UPDATE_INTERVAL_US / 1e6f;     // Actuator loop period
+const float DT_MS = DT * 1000.0f;
+const float POT_NOISE = 0.2f;       // mm, 1 sigma (digital_twin.py default)
+const int STEPS = (int)(30.0f / DT);    // 30 s
+const int SKIP = (int)(2.0f / DT);      // Start-up excluded from the metrics
+
+struct Run {
+    std::vector<float> truth, estimate;
+};
+
+// Open-loop chewing-like drive: the PWM swings at 1 Hz, the plant is the one the
+// Kalman filter assumes (actuator 0 of Config.h).
+static Run simulate(int mode, float amplitude, unsigned seed) {
+    std::mt19937 rng(seed);
+    std::normal_distribution<float> noise(0.0f, POT_NOISE);
+    LengthEstimator estimator(mode, ACT_KF_MAX_SPEED[0], ACT_KF_TAU[0]);
+    float length = 420.0f, velocity = 0.0f, pwm = 0.0f;
+    float decay = expf(-DT / ACT_KF_TAU[0]);
+    Run run;
+    for (int k = 0; k < STEPS; k++) {
+        float drive = fabsf(pwm) < MIN_SPEED ? 0.0f : constrain(pwm, -255.0f, 255.0f);
+        velocity = decay * velocity + (1.0f - decay) * ACT_KF_MAX_SPEED[0] * drive / 255.0f;
+        length += velocity * DT;
+        run.truth.push_back(length);
+        run.estimate.push_back(estimator.update(length + noise(rng), pwm));
+        pwm = amplitude * cosf(2.0f * (float)M_PI * k * DT);
+    }
+    return run;
+}
+
+// Delay (ms, 0.1 ms steps) of the estimate behind the true length, and the RMS error at that delay.
+static float delayMs(const Run& run, float* rmsAtDelay = nullptr) {
+    float best = 0, bestError = INFINITY;
+    for (float d = 0; d <= 100; d += 0.1f) {
+        float shift = d / DT_MS, error = 0;
+        int n = 0;
+        for (int k = SKIP; k < STEPS; k++) {
+            float t = k - shift;
+            int i = (int)floorf(t);
+            float truth = run.truth[i] + (t - i) * (run.truth[i + 1] - run.truth[i]);
+            error += (run.estimate[k] - truth) * (run.estimate[k] - truth);
+            n++;
+        }
+        if (error < bestError) { bestError = error; best = d; if (rmsAtDelay) *rmsAtDelay = sqrtf(error / n); }
+    }
+    return best;
+}
+
+static float rmsError(const Run& run) {
+    double sq = 0;
+    for (int k = SKIP; k < STEPS; k++) sq += (run.estimate[k] - run.truth[k]) * (run.estimate[k] - run.truth[k]);
+    return sqrtf(sq / (STEPS - SKIP));
+}
+
+// Same value as the buffer average Actuator::getLength used to compute, despite the running sum.
+static void testMovingAverageUnchanged() {
+    std::mt19937 rng(3);
+    std::uniform_real_distribution<float> reading(ACTUATOR_MIN_LENGTH, ACTUATOR_MAX_LENGTH);
+    LengthEstimator estimator(ACT_EST_MOVING_AVERAGE, ACT_KF_MAX_SPEED[0], ACT_KF_TAU[0]);
+    float buffer[ACT_LPF_N];
+    int index = 0;
+    float worst = 0;
+    for (int k = 0; k < 100000; k++) {
+        float length = reading(rng);
+        if (k == 0) for (float& b : buffer) b = length;      // Both start from the first reading
+        buffer[index] = length;
+        index = (index + 1) % ACT_LPF_N;
+        float sum = 0;
+        for (int i = 0; i < ACT_LPF_N; i++) sum += buffer[i];
+        worst = max(worst, fabsf(estimator.update(length, 0) - sum / ACT_LPF_N));
+    }
+    printf("moving average: max |running sum - buffer sum| = %.2g mm\n", worst);
+    CHECK(worst < 1e-3f);
+}
+
+static void testLatencyAndNoise() {
+    const char* names[3] = {"moving average", "alpha-beta", "kalman"};
+    float delay[3], rms[3], noise[3];
+    for (int mode = 0; mode < 3; mode++) {
+        Run moving = simulate(mode, 200.0f, 1);
+        delay[mode] = delayMs(moving);
+        rms[mode] = rmsError(moving);
+        Run still = simulate(mode, 0.0f, 2);    // At rest: the estimate only carries noise
+        noise[mode] = rmsError(still);
+        printf("%-15s delay %5.1f ms, RMS error %.3f mm, noise at rest %.3f mm\n",
+               names[mode], delay[mode], rms[mode], noise[mode]);
+    }
+    CHECK(fabsf(delay[ACT_EST_MOVING_AVERAGE] - (ACT_LPF_N - 1) / 2.0f * DT_MS) <= 0.5f * DT_MS);
+    CHECK(delay[ACT_EST_ALPHA_BETA] < delay[ACT_EST_MOVING_AVERAGE]);
+    CHECK(delay[ACT_EST_KALMAN] <= DT_MS);
+    CHECK(rms[ACT_EST_KALMAN] < 0.5f * rms[ACT_EST_MOVING_AVERAGE]);
+    CHECK(noise[ACT_EST_KALMAN] <= noise[ACT_EST_MOVING_AVERAGE]);
+}
+
+// A reset (new calibration) restarts from the next reading instead of converging slowly.
+static void testReset() {
+    LengthEstimator estimator(ACT_EST_KALMAN, ACT_KF_MAX_SPEED[0], ACT_KF_TAU[0]);
+    for (int k = 0; k < 100; k++) estimator.update(400.0f, 0);
+    estimator.reset();
+    CHECK(estimator.update(450.0f, 0) == 450.0f);
+    CHECK(estimator.getVelocity() == 0.0f);
+}
+
+int main() {
+    testMovingAverageUnchanged();
+    testLatencyAndNoise();
+    testReset();
+    if (failures) {
+        printf("length_estimator_test: %d check(s) failed\n", failures);
+        return 1;
+    }
+    printf("length_estimator_test: all checks passed\n");
+    return 0;
+}
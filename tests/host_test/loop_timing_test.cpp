@@ -0,0 +1,114 @@
+// Host test for main/LoopTiming: phase timers read the fake clock (one "cycle" per
+// microsecond on the host). Nested timers must split the time between their phases,
+// the half-octave histogram must bracket every duration, the p99 must come from it,
+// and "get timing" must print and restart the window.
+//
+// Build and run:  make test   (from tests/host_test)
+
+#include "LoopTiming.h"
+
+static int failures = 0;
+#define CHECK(cond) do { if (!(cond)) { printf("FAIL %s:%d: %s\n", __FILE__, __LINE__, #cond); failures++; } } while (0)
+
+// Bin edges as documented in LoopTiming.h: bin 2k starts at 2^k, bin 2k+1 at 1.5 * 2^k.
+static double binLower(int bin) {
+    return bin == 0 ? 0.0 : (bin % 2 ? 1.5 : 1.0) * (double)(1ULL << (bin / 2));
+}
+
+static int binOf(const PhaseStats& stats) {
+    for (int bin = 0; bin < TIMING_BINS; bin++)
+        if (stats.histogram[bin]) return bin;
+    return -1;
+}
+
+static void testNesting() {
+    hostSetMicros(1000);
+    loopTiming.reset();
+    loopTiming.beginLoop();
+    {
+        PhaseTimer actuators(PHASE_ACTUATORS);
+        hostAdvanceMicros(10);
+        {
+            PhaseTimer telemetry(PHASE_TELEMETRY);
+            hostAdvanceMicros(5);
+        }
+        hostAdvanceMicros(3);
+    }
+    {
+        PhaseTimer force(PHASE_FORCE);
+        hostAdvanceMicros(7);
+    }
+    hostAdvanceMicros(2);
+    loopTiming.endLoop();
+
+    CHECK(loopTiming.getPhase(PHASE_ACTUATORS).count == 1);
+    CHECK(loopTiming.getPhase(PHASE_ACTUATORS).sumCycles == 13);
+    CHECK(loopTiming.getPhase(PHASE_TELEMETRY).sumCycles == 5);
+    CHECK(loopTiming.getPhase(PHASE_FORCE).sumCycles == 7);
+    CHECK(loopTiming.getPhase(PHASE_COMMANDS).count == 0);
+    CHECK(loopTiming.getLoop().count == 1 && loopTiming.getLoop().sumCycles == 27);
+}
+
+static void testBins() {
+    for (uint32_t cycles : {0u, 1u, 2u, 3u, 5u, 6u, 7u, 8u, 11u, 12u, 1000u, 65535u, 65536u, 4000000000u}) {
+        PhaseStats stats;
+        stats.add(cycles);
+        int bin = binOf(stats);
+        CHECK(bin >= 0 && bin < TIMING_BINS);
+        CHECK(binLower(bin) <= cycles && cycles < binLower(bin + 1) + (bin == 0));
+    }
+}
+
+static void testPercentile() {
+    PhaseStats stats;
+    for (int k = 0; k < 100; k++) stats.add(10);
+    stats.add(1000);
+    CHECK(stats.minCycles == 10 && stats.maxCycles == 1000);
+    CHECK(stats.sumCycles == 2000);
+    CHECK(stats.percentileCycles(0.99f) == 12);     // Upper edge of [8, 12)
+    CHECK(stats.percentileCycles(1.0f) == 1000);    // Last bin capped at the max
+    PhaseStats empty;
+    CHECK(empty.percentileCycles(0.99f) == 0);
+}
+
+static void testReport() {
+    hostSetMicros(2000000);
+    loopTiming.reset();
+    for (int k = 0; k < 4; k++) {
+        loopTiming.beginLoop();
+        {
+            PhaseTimer commands(PHASE_COMMANDS);
+            hostAdvanceMicros(k == 3 ? 40 : 4);
+        }
+        loopTiming.endLoop();
+    }
+    hostAdvanceMicros(250000);
+    Serial.output.clear();
+    loopTiming.print();
+    const std::string& out = Serial.output;
+    CHECK(out.find("Timing window - 250 ms, cycles per us: 1.00\r\n") == 0);
+    CHECK(out.find("Timing phase loop - n: 4, min: 4.00, mean: 13.00, max: 40.00, p99: 40.00, hist: 4=3 10=1\r\n")
+          != std::string::npos);
+    CHECK(out.find("Timing phase commands - n: 4, ") != std::string::npos);
+    CHECK(out.find("Timing phase telemetry - n: 0, min: 0.00, mean: 0.00, max: 0.00, p99: 0.00, hist:\r\n")
+          != std::string::npos);
+    int lines = 0;
+    for (char c : out) lines += c == '\n';
+    CHECK(lines == 2 + NUM_LOOP_PHASES);
+
+    loopTiming.reset();
+    CHECK(loopTiming.getLoop().count == 0 && loopTiming.getPhase(PHASE_COMMANDS).count == 0);
+}
+
+int main() {
+    testNesting();
+    testBins();
+    testPercentile();
+    testReport();
+    if (failures) {
+        printf("loop_timing_test: %d check(s) failed\n", failures);
+        return 1;
+    }
+    printf("loop_timing_test: all checks passed\n");
+    return 0;
+}
@@ -0,0 +1,94 @@
+// Host test for main/PoseOffset: the host z / pitch offset of the played poses. Targets out
+// of bounds must be rejected, the applied offset must follow the target at the Config.h rates,
+// stay within the pose limits once applied, and fall back to zero when the host stops
+// refreshing it.
+//
+// Build and run:  make test   (from tests/host_test)
+
+#include "PoseOffset.h"
+#include <cmath>
+#include <string>
+
+static int failures = 0;
+#define CHECK(cond) do { if (!(cond)) { printf("FAIL %s:%d: %s\n", __FILE__, __LINE__, #cond); failures++; } } while (0)
+
+static bool near(float a, float b) { return std::fabs(a - b) < 1e-4f; }
+
+static bool printed(const char* text) { return Serial.output.find(text) != std::string::npos; }
+
+static const float Z_STEP = OFFSET_MAX_RATE_Z * PLATFORM_UPDATE_INTERVAL / 1000.0f;
+static const float PITCH_STEP = OFFSET_MAX_RATE_PITCH * PLATFORM_UPDATE_INTERVAL / 1000.0f;
+
+static void testBounds() {
+    Serial.output.clear();
+    PoseOffset offset;
+    CHECK(!offset.set(OFFSET_MAX_Z + 0.1f, 0, 0));
+    CHECK(!offset.set(0, -OFFSET_MAX_PITCH - 0.01f, 0));
+    CHECK(printed("Error: Offset out of bounds"));
+    CHECK(offset.set(-OFFSET_MAX_Z, OFFSET_MAX_PITCH, 0));
+}
+
+static void testRateLimit() {
+    PoseOffset offset;
+    CHECK(offset.set(1.0f, 0.01f, 0));
+    unsigned long now = 0;
+    offset.update(now);
+    CHECK(near(offset.getZ(), Z_STEP) && near(offset.getPitch(), PITCH_STEP));
+    for (int k = 0; k < 100; k++) {
+        now += PLATFORM_UPDATE_INTERVAL;
+        float previous = offset.getZ();
+        if (k % 10 == 0) CHECK(offset.set(1.0f, 0.01f, now));   // Refreshed every 100 ms
+        offset.update(now);
+        CHECK(offset.getZ() - previous <= Z_STEP + 1e-5f);
+    }
+    CHECK(near(offset.getZ(), 1.0f) && near(offset.getPitch(), 0.01f));
+
+    // Applied on top of the pose, within its limits
+    Pose pose = offset.apply({0, 0, MAX_Z - 0.5f, 0, 0.1f, 0});
+    CHECK(near(pose.z, MAX_Z) && near(pose.pitch, 0.11f));
+
+    offset.reset();
+    CHECK(offset.getZ() == 0 && offset.getPitch() == 0);
+}
+
+static void testWatchdog() {
+    Serial.output.clear();
+    PoseOffset offset;
+    CHECK(offset.set(2.0f, 0, 1000));
+    unsigned long now = 1000;
+    for (; now <= 1000 + OFFSET_TIMEOUT_MS; now += PLATFORM_UPDATE_INTERVAL) offset.update(now);
+    CHECK(!offset.isTimedOut() && near(offset.getZ(), 2.0f));
+    offset.update(now);
+    CHECK(offset.isTimedOut() && printed("Warning: Offset not refreshed for 260 ms, returning to the trajectory."));
+    CHECK(near(offset.getZ(), 2.0f - Z_STEP));          // Back to zero at the same rate, not a jump
+    for (int k = 0; k < 20; k++) offset.update(now += PLATFORM_UPDATE_INTERVAL);
+    CHECK(offset.getZ() == 0);
+    Serial.output.clear();
+    offset.update(now += PLATFORM_UPDATE_INTERVAL);
+    CHECK(Serial.output.empty());                       // Warned once
+
+    CHECK(offset.set(0.5f, 0, now));                    // A new target resumes the control
+    CHECK(!offset.isTimedOut());
+}
+
+static void testStatus() {
+    PoseOffset offset;
+    CHECK(offset.set(1.0f, 0.01f, 0));
+    offset.update(0);
+    Serial.output.clear();
+    offset.printStatus();
+    CHECK(Serial.output == "Offset - z: 0.20 mm, pitch: 0.0017 rad, target z: 1.00 mm, target pitch: 0.0100 rad\r\n");
+}
+
+int main() {
+    testBounds();
+    testRateLimit();
+    testWatchdog();
+    testStatus();
+    if (failures) {
+        printf("pose_offset_test: %d check(s) failed\n", failures);
+        return 1;
+    }
+    printf("pose_offset_test: all checks passed\n");
+    return 0;
+}
@@ -0,0 +1,140 @@
+// Host test for main/PoseStream: the jitter buffer of streamed setpoints. Batches must be
+// parsed with their scales and timestamps, the interpolation must match the Catmull-Rom
+// of Trajectory on the same points, played points must be dropped while the segment in
+// use is kept, and underruns, the end of the stream and invalid batches must be reported.
+//
+// Build and run:  make test   (from tests/host_test)
+
+#include "PoseStream.h"
+#include "Trajectory.h"
+#include <cmath>
+#include <string>
+
+static int failures = 0;
+#define CHECK(cond) do { if (!(cond)) { printf("FAIL %s:%d: %s\n", __FILE__, __LINE__, #cond); failures++; } } while (0)
+
+static PoseStream stream;       // Too large for the stack of a test function
+
+static bool near(float a, float b) { return std::fabs(a - b) < 1e-4f; }
+
+static bool printed(const char* text) { return Serial.output.find(text) != std::string::npos; }
+
+// Batch of count poses from index first of a test trajectory, dt ms apart.
+static std::string poseBatch(int first, int count, unsigned long dt) {
+    std::string batch = std::to_string(first * dt) + "," + std::to_string(dt);
+    for (int k = first; k < first + count; k++) {
+        int z = (int)lroundf(1000.0f * std::sin(0.3f * k));        // 1/100 mm
+        int pitch = (int)lroundf(2000.0f * std::cos(0.2f * k));    // 1/10000 rad
+        batch += ";0,0," + std::to_string(z) + ",0," + std::to_string(pitch) + ",0";
+    }
+    return batch;
+}
+
+static Pose testPose(int k) {
+    return {0, 0, lroundf(1000.0f * std::sin(0.3f * k)) / 100.0f, 0,
+            lroundf(2000.0f * std::cos(0.2f * k)) / 10000.0f, 0};
+}
+
+static void testMatchesTrajectory() {
+    // The same points played from the stream and from a Trajectory give the same poses.
+    static Trajectory trajectory(20);
+    for (int k = 0; k < 40; k++) {
+        Pose pose = testPose(k);
+        CHECK(trajectory.addWaypoint(pose));
+    }
+    stream.begin(StreamMode::POSE);
+    CHECK(stream.addBatch(poseBatch(0, 10, 20).c_str()));
+    CHECK(stream.getLevel() == 10);
+    CHECK(stream.getLeadMs() == 180);
+    int next = 10;
+    for (unsigned long now = 0; now < 38 * 20; now += 10) {
+        if (stream.getLeadMs() < 100 && next < 40) {       // Keep 100 ms buffered, like the host
+            CHECK(stream.addBatch(poseBatch(next, 5, 20).c_str()));
+            next += 5;
+        }
+        stream.advance(now);
+        CHECK(stream.getLevel() <= 12);
+        Pose a = stream.getPoint(now), b = trajectory.getPose(now);
+        CHECK(near(a.z, b.z) && near(a.pitch, b.pitch));
+        Pose ahead = stream.getPoint(now + 9), aheadRef = trajectory.getPose(now + 9);
+        CHECK(near(ahead.z, aheadRef.z) && near(ahead.pitch, aheadRef.pitch));
+    }
+    CHECK(stream.getUnderruns() == 0);
+}
+
+static void testUnderrunAndEnd() {
+    Serial.output.clear();
+    stream.begin(StreamMode::POSE);
+    CHECK(stream.addBatch("0,10;100,0,0,0,0,0;200,0,0,0,0,0;300,0,0,0,0,0"));
+    stream.advance(10);
+    float x = stream.getPoint(15).x;
+    CHECK(x > 2.0f && x < 3.0f);
+    stream.advance(20);
+    CHECK(stream.getUnderruns() == 1 && printed("Warning: Stream buffer underrun at 20 ms"));
+    stream.advance(30);
+    CHECK(stream.getUnderruns() == 1);                  // One per starvation
+    CHECK(near(stream.getPoint(40).x, 3.0f));           // Holds the last point
+    CHECK(stream.getLeadMs() == 0);
+
+    CHECK(stream.addBatch("40,10;300,0,0,0,0,0;200,0,0,0,0,0"));
+    stream.advance(40);
+    CHECK(stream.getLeadMs() == 10);
+    stream.end();
+    stream.advance(50);
+    CHECK(stream.getUnderruns() == 1 && printed("Stream finished."));
+}
+
+static void testLengths() {
+    stream.begin(StreamMode::LENGTHS);
+    CHECK(stream.addBatch("0,10;40000,40100,40200,40300,40400,40500;40000,40000,40000,40000,40000,40000"));
+    stream.advance(0);
+    Pose lengths = stream.getPoint(0);
+    CHECK(near(lengths.x, 400.0f) && near(lengths.pitch, 404.0f) && near(lengths.yaw, 405.0f));
+    CHECK(!stream.addBatch("20,10;30000,40000,40000,40000,40000,40000"));  // Shorter than ACTUATOR_MIN_LENGTH
+    CHECK(stream.getLevel() == 2);
+}
+
+static void testInvalidBatches() {
+    Serial.output.clear();
+    stream.begin(StreamMode::OFF);
+    CHECK(!stream.addBatch("0,10;0,0,0,0,0,0"));
+    CHECK(printed("Error: No stream started."));
+
+    stream.begin(StreamMode::POSE);
+    CHECK(!stream.addBatch("0,0;0,0,0,0,0,0"));         // dt 0
+    CHECK(!stream.addBatch("0,10;0,0,0,0,0"));          // Five values
+    CHECK(!stream.addBatch("0,10;0,0,0,0,0,0;x"));
+    CHECK(printed("Error: Malformed stream batch at: x"));
+    CHECK(stream.getLevel() == 1);                      // The valid point before the error is kept
+    CHECK(!stream.addBatch("0,10;0,0,0,0,0,0"));        // Not after the previous point
+    CHECK(!stream.addBatch("10,10;5000,0,0,0,0,0"));    // x = 50 mm, out of bounds
+    CHECK(stream.getLevel() == 1);
+
+    stream.begin(StreamMode::POSE);
+    for (int k = 0; k < STREAM_BUFFER_SIZE; k++) CHECK(stream.add(k, {0, 0, 0, 0, 0, 0}));
+    CHECK(!stream.add(STREAM_BUFFER_SIZE, {0, 0, 0, 0, 0, 0}));
+    CHECK(printed("Error: Stream buffer full."));
+}
+
+static void testStatus() {
+    stream.begin(StreamMode::POSE);
+    CHECK(stream.addBatch("100,20;0,0,0,0,0,0;0,0,0,0,0,0;0,0,0,0,0,0"));
+    stream.advance(110);
+    Serial.output.clear();
+    stream.printStatus();
+    CHECK(Serial.output == "Stream - mode: pose, points: 3/512, lead: 30 ms, playhead: 110 ms, underruns: 0\r\n");
+}
+
+int main() {
+    testMatchesTrajectory();
+    testUnderrunAndEnd();
+    testLengths();
+    testInvalidBatches();
+    testStatus();
+    if (failures) {
+        printf("pose_stream_test: %d check(s) failed\n", failures);
+        return 1;
+    }
+    printf("pose_stream_test: all checks passed\n");
+    return 0;
+}
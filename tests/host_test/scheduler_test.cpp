@@ -0,0 +1,139 @@
+// Host test for main/Scheduler: PeriodicTask driven by a fake clock injected in
+// place of micros(). Ticks must stay on the deadline grid whatever the polling
+// jitter, whole missed periods must be dropped and reported as overruns, the
+// lateness statistics must match the polling, and the grid must survive the
+// 32-bit wrap of the clock.
+//
+// Build and run:  make test   (from tests/host_test)
+
+#include "Config.h"
+#include "Scheduler.h"
+#include <random>
+#include <vector>
+
+static int failures = 0;
+#define CHECK(cond) do { if (!(cond)) { printf("FAIL %s:%d: %s\n", __FILE__, __LINE__, #cond); failures++; } } while (0)
+
+static unsigned long fakeNow = 0;
+static unsigned long fakeClock() { return fakeNow; }
+
+const unsigned long PERIOD = 1000;  // us
+
+// Poll every pollUs for durationUs from now; returns the poll times of the ticks.
+static std::vector<unsigned long> poll(PeriodicTask& task, unsigned long pollUs, unsigned long durationUs) {
+    std::vector<unsigned long> ticks;
+    unsigned long end = fakeNow + durationUs;
+    for (; fakeNow != end; fakeNow += pollUs) {
+        if (task.due()) ticks.push_back(fakeNow);
+    }
+    return ticks;
+}
+
+static void testOnTime() {
+    fakeNow = 5000;
+    PeriodicTask task(PERIOD, fakeClock);
+    task.start();
+    std::vector<unsigned long> ticks = poll(task, 10, 100 * PERIOD);
+    CHECK(ticks.size() == 100);
+    for (size_t k = 0; k < ticks.size(); k++) CHECK(ticks[k] == 5000 + k * PERIOD);
+    CHECK(task.getTickTimeMs() == 99);
+    CHECK(task.getTiming().ticks == 100);
+    CHECK(task.getTiming().maxLateUs == 0);
+    CHECK(task.getTiming().skipped == 0 && task.getTiming().overruns == 0);
+    CHECK(task.due());      // The clock stopped on the deadline of tick 100
+    CHECK(!task.due());     // Polled again in the same microsecond
+}
+
+static void testJitterDoesNotDrift() {
+    // Random poll intervals below one period: every tick runs late but the grid does not move.
+    fakeNow = 0;
+    PeriodicTask task(PERIOD, fakeClock);
+    task.start();
+    std::mt19937 rng(3);
+    std::uniform_int_distribution<unsigned long> gap(1, 700);
+    unsigned long maxLate = 0, sumLate = 0, ticks = 0;
+    while (fakeNow < 1000 * PERIOD) {
+        if (task.due()) {
+            unsigned long late = fakeNow - task.getTickTimeUs();
+            CHECK(late < PERIOD);
+            CHECK(task.getTickTimeUs() == ticks * PERIOD);
+            maxLate = max(maxLate, late);
+            sumLate += late;
+            ticks++;
+        }
+        fakeNow += gap(rng);
+    }
+    const TaskTiming& timing = task.getTiming();
+    CHECK(timing.ticks == ticks);
+    CHECK(ticks >= 999);
+    CHECK(timing.skipped == 0);
+    CHECK(timing.maxLateUs == maxLate && maxLate > 0);
+    CHECK(fabsf(timing.meanLateUs() - (float)sumLate / ticks) < 0.01f);
+}
+
+static void testOverrun() {
+    fakeNow = 0;
+    PeriodicTask task(PERIOD, fakeClock);
+    task.start();
+    CHECK(task.due());              // Tick 0
+    fakeNow = 3500;                 // Stalled: ticks 1 and 2 missed, tick 3 is 500 us late
+    CHECK(task.due());
+    CHECK(task.getTickTimeUs() == 3000);
+    CHECK(!task.due());
+    fakeNow = 4000;                 // Back on the grid
+    CHECK(task.due());
+    CHECK(task.getTickTimeUs() == 4000);
+
+    const TaskTiming& timing = task.getTiming();
+    CHECK(timing.ticks == 3);
+    CHECK(timing.skipped == 2);
+    CHECK(timing.overruns == 1);
+    CHECK(timing.minLateUs == 0 && timing.maxLateUs == 500);
+
+    Serial.output.clear();
+    task.printTiming("Test");
+    CHECK(Serial.output == "Warning: Timing - Test loop: 3 ticks of 1000 us, late min 0 / mean 166.7 / max 500 us, "
+                           "2 ticks dropped in 1 overruns\r\n");
+
+    task.start();                   // Restart: new grid, timing cleared
+    CHECK(task.getTiming().ticks == 0 && task.getTiming().skipped == 0);
+    CHECK(task.due() && task.getTickTimeUs() == 0);
+}
+
+static void testClockWrap() {
+    fakeNow = 0xFFFFFFFFUL - 2500;  // micros() wraps after 71 minutes
+    PeriodicTask task(PERIOD, fakeClock);
+    task.start();
+    std::vector<unsigned long> ticks = poll(task, 1, 10 * PERIOD);
+    CHECK(ticks.size() == 10);
+    for (size_t k = 1; k < ticks.size(); k++) CHECK(ticks[k] - ticks[k - 1] == PERIOD);
+    CHECK(task.getTiming().maxLateUs == 0 && task.getTiming().skipped == 0);
+}
+
+static void testTrajectoryPeriod() {
+    // The trajectory loop of RobotController: tick times in ms on the PLATFORM_UPDATE_INTERVAL grid.
+    fakeNow = 123;
+    PeriodicTask task(PLATFORM_UPDATE_INTERVAL * 1000, fakeClock);
+    task.start();
+    std::vector<unsigned long> ms;
+    for (int k = 0; k < 50; k++) {
+        fakeNow += 3700;            // Polled slower than the actuator loop, not in phase with the grid
+        if (task.due()) ms.push_back(task.getTickTimeMs());
+    }
+    for (size_t k = 0; k < ms.size(); k++) CHECK(ms[k] == k * PLATFORM_UPDATE_INTERVAL);
+    CHECK(ms.size() == (50 * 3700) / (PLATFORM_UPDATE_INTERVAL * 1000) + 1);
+}
+
+int main() {
+    testOnTime();
+    testJitterDoesNotDrift();
+    testOverrun();
+    testClockWrap();
+    testTrajectoryPeriod();
+    if (failures) {
+        printf("scheduler_test: %d check(s) failed\n", failures);
+        return 1;
+    }
+    printf("scheduler_test: all checks passed\n");
+    return 0;
+}
@@ -0,0 +1,155 @@
+// Host test for main/SerialCommand: commands arrive split across "USB packets",
+// one packet per loop iteration, and the loop must keep running the control update
+// instead of waiting for the rest of the line like Serial.readStringUntil() does.
+//
+// Build and run:  make test   (from tests/host_test)
+
+#include "SerialCommand.h"
+#include <chrono>
+#include <deque>
+#include <vector>
+
+static int failures = 0;
+#define CHECK(cond) do { if (!(cond)) { printf("FAIL %s:%d: %s\n", __FILE__, __LINE__, #cond); failures++; } } while (0)
+
+// Stream that receives one queued packet per loop iteration and counts reads on an empty buffer.
+class PacketStream : public Stream {
+public:
+    std::deque<std::string> packets;
+    std::string data;
+    size_t pos = 0;
+    int emptyReads = 0;
+
+    void deliverNext() {
+        if (packets.empty()) return;
+        data += packets.front();
+        packets.pop_front();
+    }
+    int available() override { return (int)(data.size() - pos); }
+    int read() override {
+        if (pos >= data.size()) { emptyReads++; return -1; }
+        return (uint8_t)data[pos++];
+    }
+    size_t write(uint8_t) override { return 1; }
+};
+
+static std::vector<std::string> calls;
+
+static bool onStart(const char*) { calls.push_back("start"); return true; }
+static bool onStop(const char*) { calls.push_back("stop"); return true; }
+static bool onPosition(const char* args) {
+    calls.push_back(std::string("position ") + args);
+    float x, y, z;
+    return sscanf(args, "%f,%f,%f", &x, &y, &z) == 3;
+}
+
+static const CommandEntry TABLE[] = {
+    {"start",         false, onStart},
+    {"stop",          false, onStop},
+    {"set position:", true,  onPosition},
+};
+static const int TABLE_SIZE = sizeof(TABLE) / sizeof(TABLE[0]);
+
+struct LoopStats {
+    int iterations = 0;
+    int updates = 0;        // Iterations that reached the control update
+    double maxIterationUs = 0;
+};
+
+// Same structure as loop() in main.ino.
+static LoopStats runLoop(PacketStream& stream, LineAssembler& assembler, int iterations) {
+    LoopStats stats;
+    for (int i = 0; i < iterations; i++) {
+        stream.deliverNext();
+        auto t0 = std::chrono::steady_clock::now();
+        bool handled = false;
+        if (assembler.poll(stream)) {
+            if (!assembler.overflowed() && assembler.line()[0] != '\0') {
+                dispatchCommand(assembler.line(), TABLE, TABLE_SIZE);
+            }
+            assembler.clear();
+            handled = true;
+        }
+        double us = std::chrono::duration<double, std::micro>(std::chrono::steady_clock::now() - t0).count();
+        stats.maxIterationUs = std::max(stats.maxIterationUs, us);
+        stats.iterations++;
+        if (!handled) stats.updates++;
+    }
+    return stats;
+}
+
+static void testFragmentedCommands() {
+    PacketStream stream;
+    LineAssembler assembler;
+    assembler.clear();
+    calls.clear();
+    // One byte per packet for the first command, odd splits for the others.
+    for (char c : std::string("start\n")) stream.packets.push_back(std::string(1, c));
+    stream.packets.push_back("set posi");
+    stream.packets.push_back("tion: 1.5,-2,");
+    stream.packets.push_back("330\r\n");
+    stream.packets.push_back("STOP\nstart\n");
+
+    LoopStats stats = runLoop(stream, assembler, 20);
+    CHECK(calls.size() == 4);
+    CHECK(calls.size() > 0 && calls[0] == "start");
+    CHECK(calls.size() > 1 && calls[1] == "position 1.5,-2,330");
+    CHECK(calls.size() > 2 && calls[2] == "stop");
+    CHECK(calls.size() > 3 && calls[3] == "start");
+    // Every iteration that did not complete a command ran the control update.
+    CHECK(stats.updates == stats.iterations - 4);
+    // The assembler never tried to read bytes that had not arrived yet.
+    CHECK(stream.emptyReads == 0);
+    printf("fragmented input: %d iterations, %d control updates, max iteration %.2f us\n",
+           stats.iterations, stats.updates, stats.maxIterationUs);
+    CHECK(stats.maxIterationUs < 1000.0); // Far below the 10 ms control period
+}
+
+static void testTaggedCommands() {
+    PacketStream stream;
+    LineAssembler assembler;
+    assembler.clear();
+    calls.clear();
+    Serial.output.clear();
+    stream.packets.push_back("#7 set position:1,2");
+    stream.packets.push_back(",3\n#8 set position:oops\n");
+    stream.packets.push_back("#9 dance\n");
+    runLoop(stream, assembler, 6);
+    CHECK(Serial.output.find("#7 begin\r\n#7 end ok\r\n") != std::string::npos);
+    CHECK(Serial.output.find("#8 begin\r\n#8 end error\r\n") != std::string::npos);
+    CHECK(Serial.output.find("#9 begin\r\nUnknown command.") != std::string::npos);
+    CHECK(Serial.output.find("#9 end error\r\n") != std::string::npos);
+    CHECK(calls.size() == 2);
+}
+
+static void testOverflow() {
+    PacketStream stream;
+    LineAssembler assembler;
+    assembler.clear();
+    calls.clear();
+    stream.packets.push_back(std::string(3 * CMD_BUFFER_SIZE, 'x'));
+    stream.packets.push_back("\nstop\n");
+    int overflows = 0;
+    for (int i = 0; i < 4; i++) {
+        stream.deliverNext();
+        if (assembler.poll(stream)) {
+            if (assembler.overflowed()) overflows++;
+            else dispatchCommand(assembler.line(), TABLE, TABLE_SIZE);
+            assembler.clear();
+        }
+    }
+    CHECK(overflows == 1);
+    CHECK(calls.size() == 1 && calls[0] == "stop");
+}
+
+int main() {
+    testFragmentedCommands();
+    testTaggedCommands();
+    testOverflow();
+    if (failures) {
+        printf("serial_command_test: %d failure(s)\n", failures);
+        return 1;
+    }
+    printf("serial_command_test: all checks passed\n");
+    return 0;
+}
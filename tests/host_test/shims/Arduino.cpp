@@ -0,0 +1,48 @@
+#include "Arduino.h"
+
+HostSerial Serial;
+
+static unsigned long fakeMicros = 0;
+
+unsigned long millis() { return fakeMicros / 1000; }
+unsigned long micros() { return fakeMicros; }
+void hostSetMicros(unsigned long us) { fakeMicros = us; }
+void hostAdvanceMicros(unsigned long us) { fakeMicros += us; }
+
+size_t Print::print(double v, int digits) {
+    char buf[48];
+    snprintf(buf, sizeof(buf), "%.*f", digits, v);
+    return write(buf);
+}
+
+unsigned long hostAnalogReads = 0;
+static int (*analogReader)(int) = nullptr;
+static unsigned long analogReadMicros = 0;
+static std::map<int, int> digitalPins;
+static std::map<int, int> analogPins;
+
+void pinMode(int, int) {}
+void digitalWrite(int pin, int value) { digitalPins[pin] = value; }
+int digitalRead(int pin) { return digitalPins.count(pin) ? digitalPins[pin] : LOW; }
+void analogWrite(int pin, int value) { analogPins[pin] = value; }
+void analogWriteFrequency(int, float) {}
+int hostAnalogWriteValue(int pin) { return analogPins.count(pin) ? analogPins[pin] : 0; }
+void delay(unsigned long ms) { fakeMicros += ms * 1000; }
+void delayMicroseconds(unsigned int us) { fakeMicros += us; }
+
+int analogRead(int pin) {
+    hostAnalogReads++;
+    fakeMicros += analogReadMicros;
+    return analogReader ? analogReader(pin) : 0;
+}
+
+void hostSetAnalogReader(int (*reader)(int pin)) { analogReader = reader; }
+void hostSetAnalogReadMicros(unsigned long us) { analogReadMicros = us; }
+
+#include "CD74HC4067.h"
+int CD74HC4067::selected = -1;
+unsigned long CD74HC4067::switches = 0;
+unsigned long CD74HC4067::switchMicros = 0;
+
+#include "SD.h"
+HostSD SD;
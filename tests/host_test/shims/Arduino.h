@@ -0,0 +1,141 @@
+#ifndef HOST_ARDUINO_H
+#define HOST_ARDUINO_H
+
+// Minimal Arduino core for compiling firmware modules on the host (g++).
+// Only what the host tests need is provided; time is a fake clock driven by the test.
+
+#include <stdint.h>
+#include <stddef.h>
+#include <string.h>
+#include <strings.h>
+#include <stdlib.h>
+#include <stdio.h>
+#include <math.h>
+#include <string>
+#include <map>
+#include <algorithm>
+
+#define DEG_TO_RAD 0.017453292519943295769236907684886
+#define RAD_TO_DEG 57.295779513082320876798154814105
+#define HIGH 1
+#define LOW 0
+#define INPUT 0
+#define OUTPUT 1
+
+using std::min;
+using std::max;
+#define constrain(amt, low, high) ((amt) < (low) ? (low) : ((amt) > (high) ? (high) : (amt)))
+
+inline long map(long x, long in_min, long in_max, long out_min, long out_max) {
+    return (x - in_min) * (out_max - out_min) / (in_max - in_min) + out_min;
+}
+
+// ---- String: std::string with the Arduino methods used by the firmware ----
+class String : public std::string {
+public:
+    String() {}
+    String(const char* s) : std::string(s ? s : "") {}
+    String(const std::string& s) : std::string(s) {}
+    String(char c) : std::string(1, c) {}
+    String(int v) : std::string(std::to_string(v)) {}
+    String(unsigned int v) : std::string(std::to_string(v)) {}
+    String(long v) : std::string(std::to_string(v)) {}
+    String(unsigned long v) : std::string(std::to_string(v)) {}
+
+    unsigned int length() const { return (unsigned int)size(); }
+    int indexOf(char c, unsigned int from = 0) const { size_t i = find(c, from); return i == npos ? -1 : (int)i; }
+    int indexOf(const char* s, unsigned int from = 0) const { size_t i = find(s, from); return i == npos ? -1 : (int)i; }
+    String substring(unsigned int from) const { return from < size() ? String(substr(from)) : String(); }
+    String substring(unsigned int from, unsigned int to) const {
+        return from < size() && from < to ? String(substr(from, to - from)) : String();
+    }
+    bool startsWith(const char* s) const { return compare(0, strlen(s), s) == 0; }
+    bool endsWith(const char* s) const {
+        size_t n = strlen(s);
+        return size() >= n && compare(size() - n, n, s) == 0;
+    }
+    void remove(unsigned int index) { if (index < size()) erase(index); }
+    void remove(unsigned int index, unsigned int count) { if (index < size()) erase(index, count); }
+    void trim() {
+        size_t b = find_first_not_of(" \t\r\n");
+        size_t e = find_last_not_of(" \t\r\n");
+        *this = b == npos ? String() : String(substr(b, e - b + 1));
+    }
+    long toInt() const { return strtol(c_str(), nullptr, 10); }
+    float toFloat() const { return strtof(c_str(), nullptr); }
+};
+
+// ---- GPIO / ADC ----
+// analogRead returns what the test's reader gives for the pin and advances the fake
+// clock by the configured conversion time, so firmware timing can be measured.
+void pinMode(int pin, int mode);
+void digitalWrite(int pin, int value);
+int digitalRead(int pin);
+void analogWrite(int pin, int value);
+void analogWriteFrequency(int pin, float frequency);
+int hostAnalogWriteValue(int pin);         // Last analogWrite value of the pin (PWM duty, 0 … 255)
+int analogRead(int pin);
+void delay(unsigned long ms);
+void delayMicroseconds(unsigned int us);
+void hostSetAnalogReader(int (*reader)(int pin));
+void hostSetAnalogReadMicros(unsigned long us);
+extern unsigned long hostAnalogReads;      // Conversions since start
+
+// ---- Fake clock ----
+unsigned long millis();
+unsigned long micros();
+void hostSetMicros(unsigned long us);
+void hostAdvanceMicros(unsigned long us);
+
+// ---- Print / Stream ----
+class Print {
+public:
+    virtual ~Print() {}
+    virtual size_t write(uint8_t c) = 0;
+    size_t write(const char* s) { size_t n = 0; while (*s) n += write((uint8_t)*s++); return n; }
+
+    size_t print(const char* s) { return write(s); }
+    size_t print(char c) { return write((uint8_t)c); }
+    size_t print(unsigned char v) { return printNumber("%u", (unsigned)v); }
+    size_t print(int v) { return printNumber("%d", v); }
+    size_t print(unsigned int v) { return printNumber("%u", v); }
+    size_t print(long v) { return printNumber("%ld", v); }
+    size_t print(unsigned long v) { return printNumber("%lu", v); }
+    size_t print(double v, int digits = 2);
+    size_t print(const std::string& s) { return write(s.c_str()); }
+
+    size_t println() { return write("\r\n"); }
+    template <typename T> size_t println(const T& v) { size_t n = print(v); return n + println(); }
+    size_t println(double v, int digits) { size_t n = print(v, digits); return n + println(); }
+
+private:
+    template <typename T> size_t printNumber(const char* fmt, T v) {
+        char buf[32];
+        snprintf(buf, sizeof(buf), fmt, v);
+        return write(buf);
+    }
+};
+
+class Stream : public Print {
+public:
+    virtual int available() = 0;
+    virtual int read() = 0;
+};
+
+// Serial: captures everything printed; input is fed by the test.
+class HostSerial : public Stream {
+public:
+    std::string output;
+    std::string input;
+    size_t inputPos = 0;
+
+    void begin(unsigned long) {}
+    size_t write(uint8_t c) override { output.push_back((char)c); return 1; }
+    using Print::write;
+    int available() override { return (int)(input.size() - inputPos); }
+    int read() override { return inputPos < input.size() ? (uint8_t)input[inputPos++] : -1; }
+};
+
+extern HostSerial Serial;
+
+#endif // HOST_ARDUINO_H
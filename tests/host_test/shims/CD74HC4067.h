@@ -0,0 +1,23 @@
+#ifndef HOST_CD74HC4067_H
+#define HOST_CD74HC4067_H
+
+// 16-channel analog multiplexer. All instances drive the same select pins, so the
+// selected channel is shared; switches are counted and can cost fake settling time.
+
+#include "Arduino.h"
+
+class CD74HC4067 {
+public:
+    static int selected;
+    static unsigned long switches;
+    static unsigned long switchMicros;
+
+    CD74HC4067(int, int, int, int) {}
+    void channel(int ch) {
+        switches++;
+        hostAdvanceMicros(switchMicros);
+        selected = ch;
+    }
+};
+
+#endif // HOST_CD74HC4067_H
@@ -0,0 +1,61 @@
+#ifndef HOST_SD_H
+#define HOST_SD_H
+
+// In-memory SD card: tests put file contents in SD.files before the firmware opens them.
+
+#include "Arduino.h"
+
+#define BUILTIN_SDCARD 254
+#define FILE_READ 0
+#define FILE_WRITE 1
+
+class File : public Stream {
+public:
+    File() {}
+    File(std::string* content, const std::string& name, bool write)
+        : content(content), fileName(name) { if (write) pos = content->size(); }
+
+    explicit operator bool() const { return content != nullptr; }
+    const char* name() const { return fileName.c_str(); }
+    bool isDirectory() const { return false; }
+    File openNextFile() { return File(); }
+    void close() { content = nullptr; }
+
+    int available() override { return content ? (int)(content->size() - pos) : 0; }
+    int read() override { return available() ? (uint8_t)(*content)[pos++] : -1; }
+    size_t write(uint8_t c) override {
+        if (!content) return 0;
+        content->push_back((char)c);
+        pos = content->size();
+        return 1;
+    }
+    using Print::write;
+    String readStringUntil(char terminator) {
+        String s;
+        int c;
+        while ((c = read()) >= 0 && c != terminator) s.push_back((char)c);
+        return s;
+    }
+
+private:
+    std::string* content = nullptr;
+    std::string fileName;
+    size_t pos = 0;
+};
+
+class HostSD {
+public:
+    std::map<std::string, std::string> files;   // Full path -> content
+
+    bool begin(int) { return true; }
+    bool exists(const char* path) { return files.count(path) > 0; }
+    bool remove(const char* path) { return files.erase(path) > 0; }
+    File open(const char* path, int mode = FILE_READ) {
+        if (mode == FILE_READ && !exists(path)) return File();
+        return File(&files[path], path, mode == FILE_WRITE);
+    }
+};
+
+extern HostSD SD;
+
+#endif // HOST_SD_H
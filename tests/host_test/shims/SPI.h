@@ -0,0 +1,4 @@
+#ifndef HOST_SPI_H
+#define HOST_SPI_H
+// Nothing of SPI is used directly by the firmware; the header only has to exist.
+#endif // HOST_SPI_H